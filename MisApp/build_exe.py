@@ -148,6 +148,8 @@ hiddenimports = [
     'numpy',
     'psutil',
     'pytz',
+    'zoneinfo',
+    'tzdata',
     'PIL',
     'qrcode',
     'httpx',
@@ -1,9 +1,8 @@
 import sys
 import os
 import time
+import multiprocessing
 import traceback
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QIcon
 
 # Cải thiện việc xử lý đường dẫn
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,12 +22,21 @@ print(f"Current directory: {os.getcwd()}")
 print(f"App directory: {app_dir}")
 print(f"Path setup: {sys.path[:5]}")
 
+# Startup profiling mode: time every import from here on (like python -X importtime)
+from software.app.utils import config
+from software.app.utils.import_profiler import import_profiler
+PROFILE_IMPORTS = (config.PROFILE_STARTUP_IMPORTS or '--profile-imports' in sys.argv
+                   or os.environ.get('MIS_PROFILE_IMPORTS') == '1')
+if PROFILE_IMPORTS:
+    import_profiler.install()
+startup_time = time.perf_counter()
+
 # Import modules
 try:
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
     from software.app.ui.main_window import MainWindow
-    from software.app.utils import config, logger
-    # Sử dụng cấu trúc module mới
-    from software.app.models.multimedia import MultimediaService
+    from software.app.utils import logger
     print("Core modules imported successfully")
 except ImportError as e:
     print(f"Failed to import core modules: {e}")
@@ -43,11 +51,8 @@ def setup_resources():
     try:
         import os
         import pygame
-        import sys
-        import zipfile
-        import shutil
+        import threading
         import traceback
-        import platform
         from software.app.utils import logger, config
         
         # Initialize paths
@@ -80,94 +85,10 @@ def setup_resources():
             except pygame.error as e:
                 logger.error(f"Failed to initialize pygame mixer with default settings: {e}")
                 
-        ffmpeg_dir = os.path.join(software_bin_dir, 'ffmpeg')
-        os.makedirs(ffmpeg_dir, exist_ok=True)
-        
-        # Kiểm tra xem FFmpeg có cần được giải nén không
-        ffmpeg_executable = os.path.join(ffmpeg_dir, 'bin', 'ffmpeg.exe' if platform.system() == 'Windows' else 'ffmpeg')
-        if not os.path.exists(ffmpeg_executable):
-            logger.info("FFmpeg not found, attempting to extract...")
-            
-            ffmpeg_zip_paths = [
-                os.path.join(software_bin_dir, 'ffmpeg.zip'),
-                os.path.join(bin_dir, 'temp_ffmpeg.zip'),
-                os.path.join(bin_dir, 'ffmpeg.zip')
-            ]
-            
-            ffmpeg_extracted = False
-            
-            for zip_path in ffmpeg_zip_paths:
-                if os.path.exists(zip_path):
-                    try:
-
-                        if not zipfile.is_zipfile(zip_path):
-                            logger.warning(f"File exists but is not a valid zip file: {zip_path}")
-                            continue
-                            
-                        logger.info(f"Extracting FFmpeg from {zip_path}...")
-                        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                            zip_ref.extractall(ffmpeg_dir)
-                            
-          
-                        if os.path.exists(ffmpeg_executable):
-                            try:
-                                from subprocess import PIPE, run
-                                result = run([ffmpeg_executable, '-version'], stdout=PIPE, stderr=PIPE, universal_newlines=True)
-                                if result.returncode == 0:
-                                    logger.info(f"FFmpeg extracted and verified successfully: {result.stdout.split('\n')[0]}")
-                                    ffmpeg_extracted = True
-                                    break
-                                else:
-                                    logger.warning(f"FFmpeg executable test failed: {result.stderr}")
-                            except Exception as e:
-                                logger.warning(f"Failed to test FFmpeg executable: {str(e)}")
-                        else:
-                            logger.warning(f"FFmpeg executable not found after extraction at: {ffmpeg_executable}")
-                    except zipfile.BadZipFile:
-                        logger.warning(f"Invalid zip file format: {zip_path}")
-                    except Exception as e:
-                        logger.error(f"Error extracting {zip_path}: {str(e)}")
-            
-            if not ffmpeg_extracted:
-                logger.warning("Could not extract FFmpeg. Some multimedia features may not work.")
-                try:
-                    if platform.system() == 'Windows':
-                        from subprocess import PIPE, run
-                        result = run("where ffmpeg", stdout=PIPE, stderr=PIPE, universal_newlines=True, shell=True)
-                        if result.returncode == 0 and result.stdout.strip():
-                            ffmpeg_path = os.path.dirname(result.stdout.strip().split('\n')[0])
-                            test_result = run([os.path.join(ffmpeg_path, 'ffmpeg.exe'), '-version'], 
-                                            stdout=PIPE, stderr=PIPE, universal_newlines=True)
-                            if test_result.returncode == 0:
-                                config.FFMPEG_PATH = ffmpeg_path
-                                logger.info(f"Using system FFmpeg found at: {ffmpeg_path}")
-                            else:
-                                logger.warning("System FFmpeg found but failed verification test")
-                    else:
-                        from subprocess import PIPE, run
-                        result = run("which ffmpeg", stdout=PIPE, stderr=PIPE, universal_newlines=True, shell=True)
-                        if result.returncode == 0 and result.stdout.strip():
-                            ffmpeg_path = os.path.dirname(result.stdout.strip())
-                            test_result = run([os.path.join(ffmpeg_path, 'ffmpeg'), '-version'], 
-                                            stdout=PIPE, stderr=PIPE, universal_newlines=True)
-                            if test_result.returncode == 0:
-                                config.FFMPEG_PATH = ffmpeg_path
-                                logger.info(f"Using system FFmpeg found at: {ffmpeg_path}")
-                            else:
-                                logger.warning("System FFmpeg found but failed verification test")
-                except Exception as e:
-                    logger.error(f"Error locating system FFmpeg: {str(e)}")
-        else:
-            try:
-                from subprocess import PIPE, run
-                result = run([ffmpeg_executable, '-version'], stdout=PIPE, stderr=PIPE, universal_newlines=True)
-                if result.returncode == 0:
-                    config.FFMPEG_PATH = os.path.dirname(ffmpeg_executable)
-                    logger.info(f"Using existing FFmpeg at: {config.FFMPEG_PATH}")
-                else:
-                    logger.warning("Existing FFmpeg executable failed verification test")
-            except Exception as e:
-                logger.error(f"Error verifying existing FFmpeg: {str(e)}")
+        # Resolve FFmpeg in the background: a cached probe only stats the binaries,
+        # a fresh one (first run or after an FFmpeg update) unpacks and verifies them once
+        from software.app.models.media_toolchain import media_toolchain
+        threading.Thread(target=media_toolchain.probe, daemon=True).start()
         
         logger.info("Resources setup completed successfully")
         return True
@@ -216,6 +137,13 @@ def exception_hook(exctype, value, tb):
     
     sys.__excepthook__(exctype, value, tb)
 
+def report_startup():
+    """Log the time to first window and, in profiling mode, the slowest imports."""
+    logger.info(f"Time to first window: {(time.perf_counter() - startup_time) * 1000:.0f} ms")
+    if PROFILE_IMPORTS:
+        import_profiler.uninstall()
+        logger.info(f"Startup import profile:\n{import_profiler.report(config.PROFILE_IMPORTS_TOP)}")
+
 def main():
     """Main entry point for the MIS Smart Assistant application."""
 
@@ -236,6 +164,8 @@ def main():
         window.show()
         
         logger.info("MIS Smart Assistant UI initialized")
+        # Runs once the first frame has been drawn
+        QTimer.singleShot(0, report_startup)
         
         exit_code = app.exec_()
         
@@ -248,4 +178,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Media library scan workers re-enter here in the frozen executable
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
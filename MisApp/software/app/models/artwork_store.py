@@ -0,0 +1,264 @@
+"""
+MIS Smart Assistant - Artwork Store
+Content-addressed cover art on disk: one copy per image (named by the SHA-1 of its
+bytes) plus downscaled thumbnails, with least-recently-used eviction by total size.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+
+from ..utils import config, logger
+from ..utils.lazy_import import LazyModule
+
+# Pillow makes the thumbnails; without it callers scale the original themselves
+PIL_Image = LazyModule('PIL.Image')
+
+
+_SOFTWARE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+THUMBNAIL_SIZES = (300, 200, 120)  # Album art disc, playlist track info, search results
+_DIGEST = re.compile(r'^[0-9a-f]{40}$')
+
+
+class ArtworkStore:
+    """
+    Cover art keyed by the hash of the image bytes.
+
+    The same cover embedded in every track of an album, or fetched again after a
+    restart, is stored once. Files are touched when read, so eviction removes the
+    covers that have not been shown for the longest time. Safe to use from the
+    media library's scan processes: every write goes through a temporary file.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Initialize the store.
+
+        Args:
+            cache_dir (str): Directory for images (defaults to resources/media_cache/artwork)
+            max_bytes (int): Size limit of the directory (defaults to ARTWORK_CACHE_MAX_MB)
+        """
+        self.cache_dir = cache_dir or os.path.join(_SOFTWARE_DIR, 'resources', 'media_cache', 'artwork')
+        self.max_bytes = max_bytes or config.ARTWORK_CACHE_MAX_MB * 1024 * 1024
+        self.urls_file = os.path.join(self.cache_dir, 'urls.json')
+        self.lock = threading.Lock()
+        self.total_bytes = None  # Measured on the first write
+        self.urls = None  # Remote cover URL -> digest, loaded on first use
+
+    def put(self, data):
+        """
+        Store an image and its thumbnails.
+
+        Args:
+            data (bytes): Encoded image (JPEG, PNG, ...)
+
+        Returns:
+            str: Hex digest identifying the image, or None if it could not be stored
+        """
+        if not data:
+            return None
+        digest = hashlib.sha1(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            self._touch(path)
+            return digest
+
+        try:
+            written = self._write(path, data)
+            written += self._make_thumbnails(digest, data)
+        except OSError as e:
+            logger.warning(f"Could not store artwork: {str(e)}")
+            return None
+        self._account(written)
+        return digest
+
+    def get(self, digest, size=None):
+        """
+        Get the file for a stored image.
+
+        Args:
+            digest (str): Digest returned by put()
+            size (int): Wanted size in pixels; the smallest thumbnail at least this big is
+                used, or the original if there is none
+
+        Returns:
+            str: Image path, or None if the image is not (or no longer) stored
+        """
+        if not digest or not _DIGEST.match(digest):
+            return None
+        candidates = [self._path(digest, s) for s in sorted(THUMBNAIL_SIZES) if size and s >= size]
+        for path in candidates + [self._path(digest)]:
+            if os.path.exists(path):
+                self._touch(path)
+                return path
+        return None
+
+    def contains(self, digest):
+        """bool: Whether the original of an image is stored."""
+        return bool(digest) and os.path.exists(self._path(digest))
+
+    def put_file(self, path):
+        """
+        Store an image file that lives outside the store (e.g. cover.jpg in a music folder).
+
+        Returns:
+            str: Digest, or None if the file cannot be read
+        """
+        try:
+            with open(path, 'rb') as f:
+                return self.put(f.read())
+        except OSError:
+            return None
+
+    def digest_for_url(self, url):
+        """
+        Digest of a remote cover fetched earlier, so it is not downloaded again.
+
+        Returns:
+            str: Digest, or None if the URL was not fetched or its image was evicted
+        """
+        with self.lock:
+            digest = self._load_urls().get(url)
+        return digest if self.contains(digest) else None
+
+    def put_url(self, url, data):
+        """
+        Store a downloaded cover and remember which URL it came from.
+
+        Returns:
+            str: Digest, or None if the image could not be stored
+        """
+        digest = self.put(data)
+        if digest:
+            with self.lock:
+                urls = self._load_urls()
+                urls[url] = digest
+                self._save_urls(urls)
+        return digest
+
+    def evict(self):
+        """Remove least recently used images until the store is under its size limit."""
+        groups = {}
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    digest = entry.name[:40]
+                    if not entry.is_file() or not _DIGEST.match(digest):
+                        continue
+                    stat = entry.stat()
+                    group = groups.setdefault(digest, {'size': 0, 'used': 0, 'paths': []})
+                    group['size'] += stat.st_size
+                    group['used'] = max(group['used'], stat.st_mtime)
+                    group['paths'].append(entry.path)
+        except OSError:
+            return
+
+        total = sum(group['size'] for group in groups.values())
+        # Trim to 90% so the next few covers do not trigger another pass
+        target = self.max_bytes * 0.9
+        removed = 0
+        for digest, group in sorted(groups.items(), key=lambda item: item[1]['used']):
+            if total <= target:
+                break
+            for path in group['paths']:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= group['size']
+            removed += 1
+        with self.lock:
+            self.total_bytes = total
+        if removed:
+            logger.info(f"Evicted {removed} covers from the artwork cache ({total / 1048576:.1f} MB left)")
+
+    def _path(self, digest, size=None):
+        name = f"{digest}_{size}.jpg" if size else f"{digest}.jpg"
+        return os.path.join(self.cache_dir, name)
+
+    def _write(self, path, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return len(data)
+
+    def _make_thumbnails(self, digest, data):
+        """Save the thumbnails smaller than the original; returns bytes written."""
+        if not PIL_Image.available:
+            return 0
+        thumbnails = {}
+        try:
+            with PIL_Image.open(io.BytesIO(data)) as image:
+                image = image.convert('RGB')
+                for size in THUMBNAIL_SIZES:
+                    if max(image.size) <= size:
+                        continue
+                    thumbnail = image.copy()
+                    thumbnail.thumbnail((size, size), PIL_Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    thumbnail.save(buffer, 'JPEG', quality=85)
+                    thumbnails[size] = buffer.getvalue()
+        except Exception as e:
+            # Undecodable image: keep the original, the UI falls back to its default art
+            logger.warning(f"Could not make artwork thumbnails: {str(e)}")
+        return sum(self._write(self._path(digest, size), thumbnail) for size, thumbnail in thumbnails.items())
+
+    def _account(self, written):
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self._measure()
+            else:
+                self.total_bytes += written
+            over = self.total_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def _measure(self):
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and _DIGEST.match(entry.name[:40]):
+                        total += entry.stat().st_size
+        except OSError:
+            pass
+        return total
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _load_urls(self):
+        if self.urls is None:
+            try:
+                with open(self.urls_file, 'r', encoding='utf-8') as f:
+                    self.urls = json.load(f)
+            except (OSError, ValueError):
+                self.urls = {}
+        return self.urls
+
+    def _save_urls(self, urls):
+        # Forget URLs whose image was evicted
+        for url in [url for url, digest in urls.items() if not self.contains(digest)]:
+            del urls[url]
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_file = f"{self.urls_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(urls, f)
+            os.replace(temp_file, self.urls_file)
+        except OSError as e:
+            logger.warning(f"Could not save artwork URL index: {str(e)}")
+
+
+# Create a global instance
+artwork_store = ArtworkStore()
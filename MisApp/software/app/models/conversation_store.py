@@ -0,0 +1,297 @@
+"""
+MIS Smart Assistant - Conversation Store
+SQLite conversation history with batched background writes, paged loading,
+full-text search and per-query frequency statistics.
+"""
+
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from ..utils import config, logger
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    sender TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS query_stats (
+    query_key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    last_asked REAL NOT NULL,
+    last_answer TEXT
+);
+CREATE INDEX IF NOT EXISTS query_stats_count ON query_stats (count DESC);
+"""
+
+# External-content FTS index over messages.text, kept in sync by triggers.
+# remove_diacritics lets "thoi tiet" find "thời tiết".
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    text, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+_QUERY_KEY_STRIP = re.compile(r'[\s?.!,;:]+')
+
+
+class ConversationStore:
+    """
+    Conversation history in a WAL-mode SQLite database.
+
+    Exchanges are queued by the caller and written in batches by a background thread,
+    so recording a message never blocks on disk. Reads use their own connection.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Initialize the store.
+
+        Args:
+            db_path (str): Database file (defaults to logs/conversations.db)
+        """
+        self.db_path = db_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            'logs', 'conversations.db'
+        )
+        self.pending = queue.Queue()
+        self.read_lock = threading.Lock()
+        self.writer_thread = None
+        self.fts_available = False
+        self.read_conn = None
+
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.read_conn = self._connect()
+            self._create_schema(self.read_conn)
+        except Exception as e:
+            logger.error(f"Could not open conversation store: {str(e)}")
+            self.read_conn = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self, conn):
+        with conn:
+            conn.executescript(_SCHEMA)
+        try:
+            with conn:
+                conn.executescript(_FTS_SCHEMA)
+            self.fts_available = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: search falls back to LIKE
+            logger.warning(f"Full-text search unavailable, using plain search: {str(e)}")
+
+    @staticmethod
+    def query_key(query):
+        """
+        Normalize a query for frequency counting.
+
+        Args:
+            query (str): User query
+
+        Returns:
+            str: Lower-cased query with punctuation and repeated spaces removed
+        """
+        return _QUERY_KEY_STRIP.sub(' ', query.lower()).strip()
+
+    def record_exchange(self, query, response):
+        """
+        Queue a query and its answer for writing.
+
+        Args:
+            query (str): User query
+            response (str): Assistant response
+        """
+        if self.read_conn is None or not config.ENABLE_CONVERSATION_HISTORY:
+            return
+        self.pending.put((time.time(), query, response))
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self.writer_thread is None or not self.writer_thread.is_alive():
+            self.writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+            self.writer_thread.start()
+
+    def _write_loop(self):
+        """Write queued exchanges in batches, one transaction per batch."""
+        try:
+            conn = self._connect()
+        except Exception as e:
+            logger.error(f"Conversation writer could not connect: {str(e)}")
+            return
+
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.time() + config.CONVERSATION_FLUSH_INTERVAL
+            # A None entry is a flush request: write what has been gathered right away
+            while batch[-1] is not None and len(batch) < config.CONVERSATION_BATCH_SIZE:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(conn, batch)
+            except Exception as e:
+                logger.error(f"Error writing conversation history: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+
+    def _write_batch(self, conn, batch):
+        messages = []
+        stats = []
+        for entry in batch:
+            if entry is None:
+                continue
+            created_at, query, response = entry
+            messages.append((created_at, "User", query))
+            messages.append((created_at, "MIS Assistant", response))
+            stats.append((self.query_key(query), query, created_at, response))
+
+        if not messages:
+            return
+        with conn:
+            conn.executemany("INSERT INTO messages (created_at, sender, text) VALUES (?, ?, ?)", messages)
+            conn.executemany(
+                """
+                INSERT INTO query_stats (query_key, query, count, last_asked, last_answer)
+                VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT (query_key) DO UPDATE SET
+                    count = count + 1,
+                    query = excluded.query,
+                    last_asked = excluded.last_asked,
+                    last_answer = excluded.last_answer
+                """,
+                stats
+            )
+
+    def flush(self):
+        """Block until every queued exchange has been written."""
+        if self.writer_thread is not None and self.writer_thread.is_alive():
+            self.pending.put(None)
+            self.pending.join()
+
+    def close(self):
+        """Write any queued exchanges before the application exits."""
+        self.flush()
+
+    def load_page(self, before_id=None, limit=None):
+        """
+        Load a page of history, newest page first.
+
+        Args:
+            before_id (int): Only messages older than this id (latest messages if None)
+            limit (int): Page size (defaults to CONVERSATION_PAGE_SIZE)
+
+        Returns:
+            list: Message dicts (id, created_at, sender, text), oldest first
+        """
+        if self.read_conn is None:
+            return []
+        limit = limit or config.CONVERSATION_PAGE_SIZE
+        try:
+            with self.read_lock:
+                if before_id is None:
+                    rows = self.read_conn.execute(
+                        "SELECT id, created_at, sender, text FROM messages ORDER BY id DESC LIMIT ?", (limit,)
+                    ).fetchall()
+                else:
+                    rows = self.read_conn.execute(
+                        "SELECT id, created_at, sender, text FROM messages WHERE id < ? ORDER BY id DESC LIMIT ?",
+                        (before_id, limit)
+                    ).fetchall()
+            return [dict(row) for row in reversed(rows)]
+        except Exception as e:
+            logger.error(f"Error loading conversation history: {str(e)}")
+            return []
+
+    def search(self, text, limit=20):
+        """
+        Search past queries and answers.
+
+        Args:
+            text (str): Words to look for (diacritics optional when FTS5 is available)
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Message dicts (id, created_at, sender, text), best match first
+        """
+        words = re.findall(r'\w+', text)
+        if self.read_conn is None or not words:
+            return []
+        self.flush()
+        try:
+            with self.read_lock:
+                if self.fts_available:
+                    match = ' '.join(f'"{word}"' for word in words)
+                    rows = self.read_conn.execute(
+                        """
+                        SELECT m.id, m.created_at, m.sender, m.text
+                        FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                        WHERE messages_fts MATCH ? ORDER BY bm25(messages_fts) LIMIT ?
+                        """,
+                        (match, limit)
+                    ).fetchall()
+                else:
+                    rows = self.read_conn.execute(
+                        "SELECT id, created_at, sender, text FROM messages WHERE text LIKE ? ORDER BY id DESC LIMIT ?",
+                        (f"%{text.strip()}%", limit)
+                    ).fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error searching conversation history: {str(e)}")
+            return []
+
+    def get_frequent_queries(self, limit=20, since=None):
+        """
+        Get the most frequently asked queries, for answer caching and speech pre-synthesis.
+
+        Args:
+            limit (int): Maximum number of queries
+            since (float): Only queries asked at or after this timestamp
+
+        Returns:
+            list: Dicts (query, count, last_asked, last_answer), most frequent first
+        """
+        if self.read_conn is None:
+            return []
+        self.flush()
+        try:
+            with self.read_lock:
+                rows = self.read_conn.execute(
+                    """
+                    SELECT query, count, last_asked, last_answer FROM query_stats
+                    WHERE last_asked >= ? ORDER BY count DESC, last_asked DESC LIMIT ?
+                    """,
+                    (since or 0, limit)
+                ).fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error reading query statistics: {str(e)}")
+            return []
+
+
+# Create a global instance
+conversation_store = ConversationStore()
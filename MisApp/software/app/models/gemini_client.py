@@ -1,10 +1,15 @@
-import google.generativeai as genai
 import os
 import time
 import re
 import threading
 from datetime import datetime
 from ..utils import config, logger
+from ..utils.lazy_import import LazyModule
+from .conversation_store import conversation_store
+from .response_renderer import render_response
+
+# The SDK pulls in gRPC and protobuf; it is first imported by the model selection thread
+genai = LazyModule('google.generativeai')
 
 class GeminiClient:
     """
@@ -45,11 +50,21 @@ class GeminiClient:
         if not self.api_key or self.api_key == "YOUR_GEMINI_API_KEY":
             logger.error("Gemini API key not configured. Please set it in config.py")
             raise ValueError("Gemini API key not configured")
-            
-        genai.configure(api_key=self.api_key)
         
+        self.model = None
+        self.chat = None
+        self.available_models = []
+        self.model_ready = threading.Event()
+        
+        # Importing the SDK and listing models must not hold up the main window
+        threading.Thread(target=self._select_model, daemon=True).start()
+    
+    def _select_model(self):
+        """List the available models and start a conversation with the preferred one."""
         try:
+            genai.configure(api_key=self.api_key)
             available_models = list(genai.list_models()) 
+            self.available_models = available_models
             model_names = [model.name for model in available_models]
             logger.info(f"Available models: {model_names}")
             
@@ -103,7 +118,19 @@ class GeminiClient:
             
         except Exception as e:
             logger.error(f"Failed to initialize Gemini client: {str(e)}")
-            raise
+        finally:
+            self.model_ready.set()
+    
+    def _wait_for_model(self):
+        """
+        Wait for background model selection to finish.
+        
+        Returns:
+            bool: True if a model is ready for queries
+        """
+        if not self.model_ready.wait(config.GEMINI_INIT_TIMEOUT):
+            logger.warning("Timed out waiting for Gemini model selection")
+        return self.chat is not None
     
     def generate_response(self, query):
         """
@@ -130,11 +157,15 @@ class GeminiClient:
                 if len(self.conversation_history) > self.max_history_length * 2:
                     self.conversation_history = self.conversation_history[-self.max_history_length*2:]
                 
-                logger.log_conversation(query, special_response)
+                conversation_store.record_exchange(query, special_response)
                 
                 self.is_generating = False
                 return special_response
             
+            if not self._wait_for_model():
+                self.is_generating = False
+                return "Xin lỗi, chưa kết nối được với Gemini. Vui lòng thử lại sau."
+            
             logger.info(f"Sending query to Gemini: {query}")
             
             system_prompt = "Bạn là MIS Assistant. Trả lời ngắn gọn, chính xác bằng tiếng Việt. Giới hạn 100 từ."
@@ -177,7 +208,7 @@ class GeminiClient:
                 self.conversation_history = self.conversation_history[-self.max_history_length*2:]
             
             # Log the conversation
-            logger.log_conversation(query, response_text)
+            conversation_store.record_exchange(query, response_text)
             
             # Reset generating flag
             self.is_generating = False
@@ -206,20 +237,9 @@ class GeminiClient:
         Returns:
             str: Properly formatted response text
         """
-        # Handle markdown bullet points (asterisks)
-        # Replace "* " at the beginning of a line with "• "
-        text = re.sub(r'(?m)^\*\s+', '• ', text)
-        
-        # Replace other asterisks used for emphasis with proper formatting
-        # Preserve any natural asterisks that aren't used for formatting
-        text = re.sub(r'(?<!\*)\*\*(?!\*)(.+?)(?<!\*)\*\*(?!\*)', r'\1', text)  # Remove bold
-        text = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'\1', text)      # Remove italic
-        
-        # Fix other common formatting issues that might appear
-        text = text.replace('__', '')  # Remove underscores for emphasis
-        text = text.replace('~~', '')  # Remove strikethrough
-        
-        return text
+        # Bullets become "• ", emphasis, strikethrough and heading markers are dropped,
+        # all in one pass shared with the chat HTML, LCD and speech renderings
+        return render_response(text).plain
     
     def _handle_special_queries(self, query):
         """
@@ -562,7 +582,6 @@ class GeminiClient:
         # Process custom day requests like "3 ngày nữa" or "5 ngày trước"
         elif any(s in query_lower for s in ["ngày nữa", "hôm nữa", "ngày tới"]):
             # Try to extract the number of days
-            import re
             day_match = re.search(r'(\d+)\s*(ngày|hôm)\s*(nữa|tới)', query_lower)
             if day_match:
                 try:
@@ -574,7 +593,6 @@ class GeminiClient:
         
         elif any(s in query_lower for s in ["ngày trước", "hôm trước"]):
             # Try to extract the number of days
-            import re
             day_match = re.search(r'(\d+)\s*(ngày|hôm)\s*trước', query_lower)
             if day_match:
                 try:
@@ -896,7 +914,8 @@ class GeminiClient:
     def reset_conversation(self):
         """Reset the conversation history."""
         self.conversation_history = []
-        self.chat = self.model.start_chat(history=[])
+        if self.model is not None:
+            self.chat = self.model.start_chat(history=[])
         logger.info("Conversation history reset")
         return "Cuộc trò chuyện đã được làm mới."
     
@@ -917,6 +936,16 @@ class GeminiClient:
         """
         return self.generate_response_with_image(prompt, image_base64)
         
+    def pop_voice_text(self):
+        """
+        Take the voice-specific text of the last response, if it had one.
+        
+        Returns:
+            str or None: Text to speak instead of the displayed response
+        """
+        voice_text, self._temp_voice_text = self._temp_voice_text, None
+        return voice_text
+    
     def generate_response_with_image(self, query, image_base64, image_name=None):
         """
         Generate a response that includes analysis of the provided image.
@@ -952,7 +981,9 @@ class GeminiClient:
             
             # Try to find an available vision model
             try:
-                available_models = list(genai.list_models())
+                # Reuse the model list fetched at startup instead of another round trip
+                self._wait_for_model()
+                available_models = self.available_models or list(genai.list_models())
                 for model_name in vision_models:
                     for model in available_models:
                         if model_name in model.name.lower():
@@ -1053,7 +1084,7 @@ class GeminiClient:
                 self.conversation_history = self.conversation_history[-self.max_history_length*2:]
             
             # Log the conversation
-            logger.log_conversation(f"{image_context} {query}", response_text)
+            conversation_store.record_exchange(f"{image_context} {query}", response_text)
             
             # Reset generating flag
             self.is_generating = False
@@ -0,0 +1,340 @@
+"""
+MIS Smart Assistant - Location Gazetteer
+Shared, diacritic-insensitive index of provinces, cities and aliases used by the
+weather service, the time service and the intent router.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+from ..utils import logger
+
+
+VIETNAM_TIMEZONE = "Asia/Ho_Chi_Minh"
+
+# (name, OpenWeather query, lat, lng, aliases)
+VIETNAM_PROVINCES = [
+    ("An Giang", "Long Xuyên,VN", 10.386, 105.435, ["long xuyên"]),
+    ("Bà Rịa - Vũng Tàu", "Vũng Tàu,VN", 10.346, 107.084, ["vũng tàu", "bà rịa"]),
+    ("Bắc Giang", "Bắc Giang,VN", 21.273, 106.195, []),
+    ("Bắc Kạn", "Bắc Kạn,VN", 22.147, 105.835, ["bắc cạn"]),
+    ("Bạc Liêu", "Bạc Liêu,VN", 9.294, 105.727, []),
+    ("Bắc Ninh", "Bắc Ninh,VN", 21.186, 106.076, []),
+    ("Bến Tre", "Bến Tre,VN", 10.241, 106.376, []),
+    ("Bình Định", "Quy Nhơn,VN", 13.776, 109.224, ["quy nhơn"]),
+    ("Bình Dương", "Thủ Dầu Một,VN", 10.980, 106.651, ["thủ dầu một"]),
+    ("Bình Phước", "Đồng Xoài,VN", 11.535, 106.883, ["đồng xoài"]),
+    ("Bình Thuận", "Phan Thiết,VN", 10.928, 108.102, ["phan thiết", "mũi né"]),
+    ("Cà Mau", "Cà Mau,VN", 9.177, 105.150, []),
+    ("Cần Thơ", "Cần Thơ,VN", 10.045, 105.747, []),
+    ("Cao Bằng", "Cao Bằng,VN", 22.666, 106.258, []),
+    ("Đà Nẵng", "Da Nang,VN", 16.054, 108.202, ["danang"]),
+    ("Đắk Lắk", "Buôn Ma Thuột,VN", 12.667, 108.038, ["đắc lắc", "dak lak", "buôn ma thuột", "buôn mê thuột"]),
+    ("Đắk Nông", "Gia Nghĩa,VN", 12.004, 107.690, ["đắc nông", "dak nong", "gia nghĩa"]),
+    ("Điện Biên", "Điện Biên Phủ,VN", 21.386, 103.023, ["điện biên phủ"]),
+    ("Đồng Nai", "Biên Hòa,VN", 10.957, 106.843, ["biên hòa"]),
+    ("Đồng Tháp", "Cao Lãnh,VN", 10.460, 105.633, ["cao lãnh"]),
+    ("Gia Lai", "Pleiku,VN", 13.983, 108.000, ["pleiku", "plây cu"]),
+    ("Hà Giang", "Hà Giang,VN", 22.823, 104.984, []),
+    ("Hà Nam", "Phủ Lý,VN", 20.541, 105.914, ["phủ lý"]),
+    ("Hà Nội", "Hanoi,VN", 21.028, 105.834, ["hanoi"]),
+    ("Hà Tĩnh", "Hà Tĩnh,VN", 18.343, 105.906, []),
+    ("Hải Dương", "Hải Dương,VN", 20.938, 106.330, []),
+    ("Hải Phòng", "Hai Phong,VN", 20.845, 106.688, ["haiphong"]),
+    ("Hậu Giang", "Vị Thanh,VN", 9.784, 105.470, ["vị thanh"]),
+    ("Hòa Bình", "Hòa Bình,VN", 20.817, 105.338, ["hoà bình"]),
+    ("Hưng Yên", "Hưng Yên,VN", 20.646, 106.051, []),
+    ("Khánh Hòa", "Nha Trang,VN", 12.238, 109.197, ["khánh hoà", "nha trang", "cam ranh"]),
+    ("Kiên Giang", "Rạch Giá,VN", 10.012, 105.081, ["rạch giá", "phú quốc"]),
+    ("Kon Tum", "Kon Tum,VN", 14.350, 108.000, ["kontum"]),
+    ("Lai Châu", "Lai Châu,VN", 22.396, 103.458, []),
+    ("Lâm Đồng", "Đà Lạt,VN", 11.940, 108.458, ["đà lạt", "dalat"]),
+    ("Lạng Sơn", "Lạng Sơn,VN", 21.853, 106.761, []),
+    ("Lào Cai", "Lào Cai,VN", 22.486, 103.971, ["sa pa", "sapa"]),
+    ("Long An", "Tân An,VN", 10.535, 106.413, ["tân an"]),
+    ("Nam Định", "Nam Định,VN", 20.420, 106.168, []),
+    ("Nghệ An", "Vinh,VN", 18.679, 105.681, ["thành phố vinh"]),
+    ("Ninh Bình", "Ninh Bình,VN", 20.250, 105.975, []),
+    ("Ninh Thuận", "Phan Rang,VN", 11.565, 108.988, ["phan rang"]),
+    ("Phú Thọ", "Việt Trì,VN", 21.322, 105.402, ["việt trì"]),
+    ("Phú Yên", "Tuy Hòa,VN", 13.096, 109.321, ["tuy hòa", "tuy hoà"]),
+    ("Quảng Bình", "Đồng Hới,VN", 17.468, 106.622, ["đồng hới"]),
+    ("Quảng Nam", "Hội An,VN", 15.880, 108.338, ["hội an", "tam kỳ"]),
+    ("Quảng Ngãi", "Quảng Ngãi,VN", 15.120, 108.792, []),
+    ("Quảng Ninh", "Hạ Long,VN", 20.951, 107.073, ["hạ long"]),
+    ("Quảng Trị", "Đông Hà,VN", 16.816, 107.100, ["đông hà"]),
+    ("Sóc Trăng", "Sóc Trăng,VN", 9.603, 105.980, []),
+    ("Sơn La", "Sơn La,VN", 21.327, 103.914, []),
+    ("Tây Ninh", "Tây Ninh,VN", 11.310, 106.098, []),
+    ("Thái Bình", "Thái Bình,VN", 20.450, 106.342, []),
+    ("Thái Nguyên", "Thái Nguyên,VN", 21.594, 105.848, []),
+    ("Thanh Hóa", "Thanh Hóa,VN", 19.807, 105.776, ["thanh hoá"]),
+    ("Thừa Thiên Huế", "Huế,VN", 16.464, 107.590, ["huế", "thừa thiên huế"]),
+    ("Tiền Giang", "Mỹ Tho,VN", 10.360, 106.360, ["mỹ tho"]),
+    ("TP. Hồ Chí Minh", "Ho Chi Minh City,VN", 10.823, 106.630, ["hồ chí minh", "thành phố hồ chí minh",
+                                                                 "ho chi minh city", "tphcm", "tp hcm", "hcm",
+                                                                 "sài gòn", "saigon"]),
+    ("Trà Vinh", "Trà Vinh,VN", 9.935, 106.345, []),
+    ("Tuyên Quang", "Tuyên Quang,VN", 21.824, 105.214, []),
+    ("Vĩnh Long", "Vĩnh Long,VN", 10.254, 105.972, []),
+    ("Vĩnh Phúc", "Vĩnh Yên,VN", 21.310, 105.597, ["vĩnh yên"]),
+    ("Yên Bái", "Yên Bái,VN", 21.705, 104.875, []),
+]
+
+# (name, OpenWeather query, lat, lng, timezone, aliases)
+INTERNATIONAL_CITIES = [
+    ("New York", "New York,US", 40.7128, -74.0060, "America/New_York", ["nyc", "niu oóc"]),
+    ("London", "London,GB", 51.5074, -0.1278, "Europe/London", ["luân đôn"]),
+    ("Tokyo", "Tokyo,JP", 35.6762, 139.6503, "Asia/Tokyo", ["tô ki ô", "nhật bản", "japan"]),
+    ("Beijing", "Beijing,CN", 39.9042, 116.4074, "Asia/Shanghai", ["bắc kinh", "trung quốc", "china"]),
+    ("Sydney", "Sydney,AU", -33.8688, 151.2093, "Australia/Sydney", ["australia"]),
+    ("Paris", "Paris,FR", 48.8566, 2.3522, "Europe/Paris", ["france"]),
+    ("Berlin", "Berlin,DE", 52.5200, 13.4050, "Europe/Berlin", ["germany"]),
+    ("Moscow", "Moscow,RU", 55.7558, 37.6173, "Europe/Moscow", ["mát xcơ va", "matxcova", "russia"]),
+    ("Singapore", "Singapore,SG", 1.3521, 103.8198, "Asia/Singapore", ["xin ga po", "xingapo"]),
+    ("Seoul", "Seoul,KR", 37.5665, 126.9780, "Asia/Seoul", ["xơ un", "hàn quốc", "korea"]),
+    ("Bangkok", "Bangkok,TH", 13.7563, 100.5018, "Asia/Bangkok", ["băng cốc", "thái lan", "thailand"]),
+    ("Dubai", "Dubai,AE", 25.2048, 55.2708, "Asia/Dubai", []),
+    ("Toronto", "Toronto,CA", 43.6532, -79.3832, "America/Toronto", ["canada"]),
+    ("Cairo", "Cairo,EG", 30.0444, 31.2357, "Africa/Cairo", ["ai cập", "egypt"]),
+    ("Amsterdam", "Amsterdam,NL", 52.3676, 4.9041, "Europe/Amsterdam", ["hà lan", "netherlands"]),
+    ("Madrid", "Madrid,ES", 40.4168, -3.7038, "Europe/Madrid", ["tây ban nha", "spain"]),
+    ("Rome", "Rome,IT", 41.9028, 12.4964, "Europe/Rome", ["roma", "italy"]),
+    ("Mumbai", "Mumbai,IN", 19.0760, 72.8777, "Asia/Kolkata", ["bombay"]),
+    ("Rio de Janeiro", "Rio de Janeiro,BR", -22.9068, -43.1729, "America/Sao_Paulo", ["rio", "brazil"]),
+    ("Jakarta", "Jakarta,ID", -6.2088, 106.8456, "Asia/Jakarta", ["indonesia"]),
+    ("Los Angeles", "Los Angeles,US", 34.0522, -118.2437, "America/Los_Angeles", ["cali"]),
+    ("Mexico City", "Mexico City,MX", 19.4326, -99.1332, "America/Mexico_City", ["mexico"]),
+    ("Johannesburg", "Johannesburg,ZA", -26.2041, 28.0473, "Africa/Johannesburg", ["nam phi", "south africa"]),
+    ("Istanbul", "Istanbul,TR", 41.0082, 28.9784, "Europe/Istanbul", ["thổ nhĩ kỳ", "turkey"]),
+    ("New Delhi", "New Delhi,IN", 28.6139, 77.2090, "Asia/Kolkata", ["ấn độ", "india", "delhi"]),
+    ("Manila", "Manila,PH", 14.5995, 120.9842, "Asia/Manila", ["philippines"]),
+]
+
+# Country-level entries are indexed last so province and city aliases take priority
+COUNTRIES = [
+    ("Việt Nam", "Hanoi,VN", 21.0278, 105.8342, VIETNAM_TIMEZONE, ["vietnam", "viet nam"]),
+]
+
+
+def normalize_location_name(text):
+    """
+    Normalize a location name for matching: lowercase, no diacritics, single spaces.
+
+    Args:
+        text (str): Raw location text
+
+    Returns:
+        str: Normalized text
+    """
+    if not text:
+        return ""
+    text = text.lower().replace("đ", "d")
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    text = re.sub(r"[^\w\s/]", " ", text)
+    return " ".join(text.split())
+
+
+def _slugify(name):
+    """Build a canonical id fragment from a display name."""
+    return normalize_location_name(name).replace(" ", "-")
+
+
+def _build_source_entries():
+    """Build the list of (entry, aliases) pairs from the static tables."""
+    sources = []
+    for name, query, lat, lng, aliases in VIETNAM_PROVINCES:
+        sources.append(({
+            "id": f"vn-{_slugify(name)}",
+            "name": name,
+            "kind": "province",
+            "country": "VN",
+            "weather_query": query,
+            "lat": lat,
+            "lng": lng,
+            "timezone": VIETNAM_TIMEZONE,
+        }, aliases))
+
+    for name, query, lat, lng, timezone_id, aliases in INTERNATIONAL_CITIES:
+        country = query.split(",")[-1]
+        sources.append(({
+            "id": f"{country.lower()}-{_slugify(name)}",
+            "name": name,
+            "kind": "city",
+            "country": country,
+            "weather_query": query,
+            "lat": lat,
+            "lng": lng,
+            "timezone": timezone_id,
+        }, aliases + [timezone_id.split("/")[-1].replace("_", " ")]))
+
+    for name, query, lat, lng, timezone_id, aliases in COUNTRIES:
+        country = query.split(",")[-1]
+        sources.append(({
+            "id": country.lower(),
+            "name": name,
+            "kind": "country",
+            "country": country,
+            "weather_query": query,
+            "lat": lat,
+            "lng": lng,
+            "timezone": timezone_id,
+        }, aliases))
+
+    return sources
+
+
+class LocationGazetteer:
+    """
+    Token trie over normalized location names and aliases.
+
+    The index is built once from the static tables above and serialized to a JSON
+    cache so later startups only need to load it. Matching walks the query once,
+    returning the leftmost-longest known location.
+    """
+
+    # Trie key that marks a terminal node; normalized tokens never contain it
+    TERMINAL = "$"
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            'resources', 'cache', 'location_gazetteer.json'
+        )
+        self.entries = {}
+        self._trie = {}
+        self._by_name = {}
+
+        self._load_or_build()
+        self._find_normalized = functools.lru_cache(maxsize=256)(self._scan)
+
+    def _fingerprint(self, sources):
+        """Hash the source tables so a stale serialized index is rebuilt."""
+        payload = json.dumps(sources, ensure_ascii=False, sort_keys=True)
+        return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+    def _load_or_build(self):
+        """Load the serialized index if it is current, otherwise build and save it."""
+        sources = _build_source_entries()
+        fingerprint = self._fingerprint(sources)
+
+        try:
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("fingerprint") == fingerprint:
+                    self.entries = data["entries"]
+                    self._trie = data["trie"]
+                    self._by_name = data["by_name"]
+                    logger.debug(f"Location gazetteer loaded from cache ({len(self.entries)} entries)")
+                    return
+        except Exception as e:
+            logger.warning(f"Could not load location gazetteer cache: {str(e)}")
+
+        self._build(sources)
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "fingerprint": fingerprint,
+                    "entries": self.entries,
+                    "trie": self._trie,
+                    "by_name": self._by_name,
+                }, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not save location gazetteer cache: {str(e)}")
+
+    def _build(self, sources):
+        """Build entries, the alias trie and the exact-name lookup table."""
+        for entry, aliases in sources:
+            self.entries[entry["id"]] = entry
+            for alias in [entry["name"], entry["weather_query"]] + aliases:
+                key = normalize_location_name(alias)
+                if not key:
+                    continue
+                self._by_name.setdefault(key, entry["id"])
+                node = self._trie
+                for token in key.split():
+                    node = node.setdefault(token, {})
+                # First entry to claim an alias keeps it
+                node.setdefault(self.TERMINAL, entry["id"])
+
+        logger.info(f"Location gazetteer built with {len(self.entries)} locations")
+
+    def _scan(self, normalized_text):
+        """Return the id of the leftmost-longest location in normalized text."""
+        tokens = normalized_text.split()
+        for start in range(len(tokens)):
+            node = self._trie
+            best = None
+            position = start
+            while position < len(tokens) and tokens[position] in node:
+                node = node[tokens[position]]
+                position += 1
+                if self.TERMINAL in node:
+                    best = node[self.TERMINAL]
+            if best:
+                return best
+        return None
+
+    def find(self, text):
+        """
+        Find the first known location mentioned in free text.
+
+        Args:
+            text (str): Query text (e.g. "Thời tiết ở Da Nang thế nào?")
+
+        Returns:
+            dict or None: Location entry, or None if no location is mentioned
+        """
+        if not text:
+            return None
+        entry_id = self._find_normalized(normalize_location_name(text))
+        return self.entries.get(entry_id) if entry_id else None
+
+    def resolve(self, location):
+        """
+        Resolve a location name, alias or OpenWeather query to its entry.
+
+        Args:
+            location (str): Location text (e.g. "Huế", "Da Nang,VN", "sài gòn")
+
+        Returns:
+            dict or None: Location entry, or None if unknown
+        """
+        if not location:
+            return None
+        key = normalize_location_name(location)
+        entry_id = self._by_name.get(key)
+        if entry_id is None:
+            # "Huế,VN" style queries: match on the name part only
+            entry_id = self._by_name.get(normalize_location_name(location.split(",")[0]))
+        return self.entries.get(entry_id) if entry_id else None
+
+    def get(self, entry_id):
+        """Get a location entry by its canonical id."""
+        return self.entries.get(entry_id)
+
+    def get_locations(self, kind=None):
+        """
+        Get all location entries, optionally filtered by kind.
+
+        Args:
+            kind (str, optional): "province", "city" or "country"
+
+        Returns:
+            list: Location entries in table order
+        """
+        return [entry for entry in self.entries.values() if kind is None or entry["kind"] == kind]
+
+
+# Create a global instance
+location_gazetteer = LocationGazetteer()
@@ -0,0 +1,368 @@
+"""
+MIS Smart Assistant - Media Cache
+Size budget for downloaded songs in resources/media_cache: an index of validated
+files with play statistics, usage-aware eviction that spares the playlist, and
+garbage collection of leftovers at startup.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+
+from ..utils import config, logger
+from .transcode_cache import transcode_cache
+
+
+_SOFTWARE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_MIN_AUDIO_BYTES = 10 * 1024  # Smaller downloads are failed ones
+_MP3_HEADERS = (b'ID3', b'\xff\xfb', b'\xff\xfa')
+_STALE_PART_SECONDS = 3600  # Partial downloads older than this are left over from a crash
+_INDEX_SAVE_DELAY = 60  # Seconds cache hits and plays wait before the index is written
+
+
+def _is_attempt(name):
+    """Whether a file is one download method's attempt (<id>.<method>.mp3), not a song."""
+    # Video ids have no dots; see DownloadEngine._attempt_path
+    return '.' in os.path.splitext(name)[0]
+
+
+def _looks_like_mp3(path):
+    """Whether a file is big enough and starts like an MP3."""
+    try:
+        if os.path.getsize(path) <= _MIN_AUDIO_BYTES:
+            return False
+        with open(path, 'rb') as f:
+            return f.read(4).startswith(_MP3_HEADERS)
+    except OSError:
+        return False
+
+
+class MediaCache:
+    """
+    Downloaded songs, kept under MEDIA_CACHE_MAX_MB.
+
+    The index remembers each song's (mtime, size) when it was validated, so a cache
+    hit is a stat instead of reading the file. When the budget is exceeded the songs
+    with the lowest score go first: the score is the last use, pushed later by
+    MEDIA_CACHE_PLAY_WEIGHT_DAYS for every doubling of the play count. Songs in the
+    playlist (or playing) are never evicted. Partial downloads count against the budget
+    but are not evicted. Evicting a song removes its metadata sidecar and transcoded
+    copy too; cover art has its own budget in the artwork store. Cache hits and plays
+    only update statistics, so they are written to the index in batches.
+    """
+
+    def __init__(self, cache_dir=None, index_file=None, max_bytes=None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Download directory (defaults to resources/media_cache)
+            index_file (str): Index of songs (defaults to resources/cache/media_cache.json)
+            max_bytes (int): Size budget (defaults to MEDIA_CACHE_MAX_MB)
+        """
+        self.cache_dir = cache_dir or os.path.join(_SOFTWARE_DIR, 'resources', 'media_cache')
+        self.index_file = index_file or os.path.join(_SOFTWARE_DIR, 'resources', 'cache', 'media_cache.json')
+        self.max_bytes = max_bytes or config.MEDIA_CACHE_MAX_MB * 1024 * 1024
+        self.lock = threading.Lock()
+        self.pin_sources = []  # Callables returning paths that must stay cached
+        self.dirty = False  # Index changes not written yet
+        self.save_timer = None
+        self.index = self._load_index()  # File name -> mtime_ns, size, added, last_used, plays
+
+    def add_pin_source(self, source):
+        """
+        Keep the songs a callable returns (e.g. the playlist) out of eviction.
+
+        Args:
+            source (callable): Returns an iterable of file paths; called on every eviction
+        """
+        self.pin_sources.append(source)
+
+    def lookup(self, path):
+        """
+        Check a cached song before reusing it, removing it if it is broken.
+
+        Args:
+            path (str): Expected cache file
+
+        Returns:
+            bool: True if the file is a complete download
+        """
+        name = self._name(path)
+        key = self._key(path)
+        if key is None:
+            return False
+
+        if name is not None:
+            with self.lock:
+                entry = self.index.get(name)
+                if entry and (entry['mtime_ns'], entry['size']) == key:
+                    entry['last_used'] = time.time()
+                    self._save_index_later()
+                    return True
+
+        # New or changed file: read its header once
+        if not _looks_like_mp3(path):
+            logger.warning(f"Removing invalid cached file: {path}")
+            if name is not None:
+                self._remove(name)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return False
+        self.register(path)
+        return True
+
+    def register(self, path):
+        """
+        Record a finished download, then evict other songs if the budget is exceeded.
+
+        Args:
+            path (str): Downloaded file in the cache directory
+        """
+        name = self._name(path)
+        key = self._key(path)
+        if name is None or key is None:
+            return
+        now = time.time()
+        with self.lock:
+            entry = self.index.get(name) or {'added': now, 'plays': 0}
+            entry.update(mtime_ns=key[0], size=key[1], last_used=now)
+            self.index[name] = entry
+            self._save_index()
+        self.evict(keep=path)
+
+    def record_play(self, path):
+        """
+        Count a play of a cached song; files outside the cache are ignored.
+
+        Args:
+            path (str): Track that started playing
+        """
+        name = self._name(path)
+        if name is None:
+            return
+        with self.lock:
+            entry = self.index.get(name)
+            if entry is None:
+                return
+            entry['plays'] += 1
+            entry['last_used'] = time.time()
+            self._save_index_later()
+
+    def evict(self, keep=None):
+        """
+        Remove the lowest-scored unpinned songs until the cache is under its budget.
+
+        Args:
+            keep (str): Song that must stay even if it is not pinned (e.g. the one just downloaded)
+
+        Returns:
+            int: Number of songs removed
+        """
+        pinned = {os.path.abspath(keep)} if keep else set()
+        for source in self.pin_sources:
+            try:
+                pinned.update(os.path.abspath(path) for path in source() if path)
+            except Exception as e:
+                logger.warning(f"Could not read pinned media: {str(e)}")
+
+        with self.lock:
+            entries = dict(self.index)
+        sizes = {name: self._footprint(name) for name in entries}
+        # Downloads in progress are preallocated at full size, so they count too
+        total = sum(sizes.values()) + self._partial_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        weight = config.MEDIA_CACHE_PLAY_WEIGHT_DAYS * 86400
+
+        def score(item):
+            entry = item[1]
+            return entry['last_used'] + weight * math.log2(1 + entry['plays'])
+
+        # Trim to 90% so the next few downloads do not trigger another pass
+        target = self.max_bytes * 0.9
+        removed = 0
+        for name, entry in sorted(entries.items(), key=score):
+            if total <= target:
+                break
+            if os.path.abspath(os.path.join(self.cache_dir, name)) in pinned:
+                continue
+            self._remove(name)
+            total -= sizes[name]
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} songs from the media cache ({total / 1048576:.0f} MB left)")
+        if total > self.max_bytes:
+            logger.warning("Media cache is over its budget with only pinned songs and downloads in progress left")
+        return removed
+
+    def collect_garbage(self):
+        """
+        Clean up after earlier runs: orphaned sidecars, stale partial downloads, index
+        entries of deleted songs and songs missing from the index; then enforce the budget.
+        """
+        start_time = time.monotonic()
+        transcode_cache.prune()
+        try:
+            names = set(os.listdir(self.cache_dir))
+        except OSError:
+            return
+
+        removed = 0
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            base, extension = os.path.splitext(name)
+            try:
+                if extension == '.mp3' and _is_attempt(name):
+                    # A download method's output left behind by a crash; a running one is recent
+                    if time.time() - os.path.getmtime(path) > _STALE_PART_SECONDS:
+                        os.remove(path)
+                        removed += 1
+                elif name.endswith('.part.json'):
+                    # A range download's journal lives and dies with its partial file
+                    if base not in names:
+                        os.remove(path)
+                        removed += 1
+                elif extension == '.part':
+                    if time.time() - os.path.getmtime(path) > _STALE_PART_SECONDS:
+                        os.remove(path)
+                        removed += 1
+                        if f"{name}.json" in names:
+                            os.remove(f"{path}.json")
+                            removed += 1
+                # A song still streaming has its sidecar before its MP3
+                elif extension == '.json' and f"{base}.mp3" not in names and f"{base}.mp3.part" not in names:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+
+        songs = {name for name in names if name.endswith('.mp3') and not _is_attempt(name)}
+        with self.lock:
+            missing = [name for name in self.index if name not in songs]
+            for name in missing:
+                del self.index[name]
+            unindexed = [name for name in songs if name not in self.index]
+            if missing:
+                self._save_index()
+
+        # Songs from before the index: validate once, oldest use first
+        for name in unindexed:
+            path = os.path.join(self.cache_dir, name)
+            if not _looks_like_mp3(path):
+                self._remove(name)
+                removed += 1
+                continue
+            key = self._key(path)
+            if key:
+                with self.lock:
+                    self.index[name] = {'mtime_ns': key[0], 'size': key[1], 'added': key[0] / 1e9,
+                                        'last_used': key[0] / 1e9, 'plays': 0}
+        if unindexed:
+            with self.lock:
+                self._save_index()
+
+        evicted = self.evict()
+        logger.info(f"Media cache: {len(self.index)} songs, {removed} leftover files removed, "
+                    f"{evicted} evicted in {time.monotonic() - start_time:.1f}s")
+
+    def _name(self, path):
+        """File name of a song in the cache directory, or None for files elsewhere."""
+        if not path or os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.cache_dir):
+            return None
+        return os.path.basename(path)
+
+    @staticmethod
+    def _key(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _footprint(self, name):
+        """Bytes a song takes with its sidecar and transcoded copy."""
+        path = os.path.join(self.cache_dir, name)
+        total = 0
+        for related in (path, f"{os.path.splitext(path)[0]}.json", transcode_cache.get(path)):
+            try:
+                total += os.path.getsize(related) if related else 0
+            except OSError:
+                pass
+        return total
+
+    def _partial_bytes(self):
+        """Bytes taken by partial downloads, their journals and download methods' attempts."""
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    in_progress = entry.name.endswith(('.part', '.part.json')) or (
+                        entry.name.endswith('.mp3') and _is_attempt(entry.name))
+                    if in_progress and entry.is_file():
+                        total += entry.stat().st_size
+        except OSError:
+            pass
+        return total
+
+    def _remove(self, name):
+        """Delete a song, its sidecar and its transcoded copy, and forget it."""
+        path = os.path.join(self.cache_dir, name)
+        transcode_cache.discard(path)
+        for related in (path, f"{os.path.splitext(path)[0]}.json"):
+            try:
+                os.remove(related)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove {related}: {str(e)}")
+        with self.lock:
+            if self.index.pop(name, None) is not None:
+                self._save_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self):
+        """Write index changes that are still batched (e.g. on shutdown)."""
+        with self.lock:
+            if self.save_timer is not None:
+                self.save_timer.cancel()
+                self.save_timer = None
+            if self.dirty:
+                self._save_index()
+
+    def _save_index_later(self):
+        """Write the index within _INDEX_SAVE_DELAY seconds; called with the lock held."""
+        self.dirty = True
+        if self.save_timer is None:
+            self.save_timer = threading.Timer(_INDEX_SAVE_DELAY, self.flush)
+            self.save_timer.daemon = True
+            self.save_timer.start()
+
+    def _save_index(self):
+        # Every write covers the batched changes too
+        self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            temp_file = f"{self.index_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(temp_file, self.index_file)
+        except OSError as e:
+            logger.warning(f"Could not save media cache index: {str(e)}")
+
+
+# Create a global instance
+media_cache = MediaCache()
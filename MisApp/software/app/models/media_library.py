@@ -0,0 +1,535 @@
+"""
+MIS Smart Assistant - Media Library
+SQLite index of the music folders and the YouTube media cache: tags, duration,
+artwork hash, loudness and waveform envelope per track, rescanned incrementally by (mtime, size).
+"""
+
+import json
+import os
+import platform
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from ..utils import config, logger
+from .artwork_store import artwork_store
+from .media_toolchain import media_toolchain
+from .transcode_cache import transcode_cache
+
+
+_SOFTWARE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.oga', '.flac', '.m4a', '.aac', '.opus', '.webm')
+
+_YOUTUBE_ID = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+_LOUDNESS_SUMMARY = re.compile(r'I:\s+(-?[\d.]+) LUFS')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sidecar_mtime_ns INTEGER,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT NOT NULL,
+    duration REAL NOT NULL,
+    artwork_hash TEXT,
+    cover_url TEXT,
+    loudness REAL,
+    youtube_id TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waveforms (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    frame_rate INTEGER NOT NULL,
+    band_count INTEGER NOT NULL,
+    peaks BLOB NOT NULL,
+    rms BLOB NOT NULL,
+    bands BLOB NOT NULL
+);
+"""
+
+# External-content FTS index over the tags, kept in sync by triggers
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(
+    title, artist, album, content='tracks', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS tracks_ai AFTER INSERT ON tracks BEGIN
+    INSERT INTO tracks_fts (rowid, title, artist, album) VALUES (new.rowid, new.title, new.artist, new.album);
+END;
+CREATE TRIGGER IF NOT EXISTS tracks_ad AFTER DELETE ON tracks BEGIN
+    INSERT INTO tracks_fts (tracks_fts, rowid, title, artist, album)
+    VALUES ('delete', old.rowid, old.title, old.artist, old.album);
+END;
+CREATE TRIGGER IF NOT EXISTS tracks_au AFTER UPDATE ON tracks BEGIN
+    INSERT INTO tracks_fts (tracks_fts, rowid, title, artist, album)
+    VALUES ('delete', old.rowid, old.title, old.artist, old.album);
+    INSERT INTO tracks_fts (rowid, title, artist, album) VALUES (new.rowid, new.title, new.artist, new.album);
+END;
+"""
+
+_COLUMNS = ('path', 'mtime_ns', 'size', 'sidecar_mtime_ns', 'title', 'artist', 'album', 'duration',
+            'artwork_hash', 'cover_url', 'loudness', 'youtube_id', 'indexed_at')
+
+
+def _sidecar_path(path):
+    """YouTube metadata JSON next to a cached track, or None for other files."""
+    base = os.path.splitext(os.path.basename(path))[0]
+    if not _YOUTUBE_ID.match(base):
+        return None
+    return os.path.join(os.path.dirname(path), f"{base}.json")
+
+
+def file_key(path):
+    """
+    Change key of a track: (mtime_ns, size, sidecar mtime_ns).
+
+    Args:
+        path (str): Audio file path
+
+    Returns:
+        tuple: The key, or None if the file is gone
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    sidecar = _sidecar_path(path)
+    try:
+        sidecar_mtime = os.stat(sidecar).st_mtime_ns if sidecar else None
+    except OSError:
+        sidecar_mtime = None
+    return (stat.st_mtime_ns, stat.st_size, sidecar_mtime)
+
+
+def _measure_loudness(ffmpeg, path):
+    """Integrated loudness in LUFS from FFmpeg's ebur128 filter, or None."""
+    kwargs = {}
+    if platform.system() == 'Windows':
+        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+    try:
+        result = subprocess.run(
+            [ffmpeg, '-hide_banner', '-nostats', '-i', path, '-map', '0:a:0',
+             '-af', 'ebur128=framelog=verbose', '-f', 'null', '-'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True,
+            timeout=120, **kwargs
+        )
+    except Exception:
+        return None
+    matches = _LOUDNESS_SUMMARY.findall(result.stderr)
+    return float(matches[-1]) if matches else None
+
+
+def scan_track(path, ffmpeg=None):
+    """
+    Read one track's tags, duration, artwork and loudness.
+
+    Runs in the scan process pool. Tags, duration and loudness come back in the result
+    (a tag reading problem as 'error'), but embedded artwork is stored from the worker
+    process itself through artwork_store.put, which writes atomically and may log or
+    trim the store there.
+
+    Args:
+        path (str): Audio file path
+        ffmpeg (str): ffmpeg executable for loudness measurement, or None to skip it
+
+    Returns:
+        dict: Row values for the tracks table, plus 'error' if reading tags failed
+    """
+    key = file_key(path)
+    if key is None:
+        return None
+    file_base = os.path.splitext(os.path.basename(path))[0]
+    track = {
+        'path': path,
+        'mtime_ns': key[0],
+        'size': key[1],
+        'sidecar_mtime_ns': key[2],
+        'title': file_base,
+        'artist': 'Unknown Artist',
+        'album': 'Unknown Album',
+        'duration': 0,
+        'artwork_hash': None,
+        'cover_url': None,
+        'loudness': None,
+        'youtube_id': file_base if _YOUTUBE_ID.match(file_base) else None,
+        'indexed_at': time.time(),
+    }
+
+    # "Artist - Title" file names
+    if ' - ' in file_base and not track['youtube_id']:
+        artist, title = file_base.split(' - ', 1)
+        track['artist'] = artist.strip()
+        track['title'] = title.strip()
+
+    artwork = None
+    try:
+        import mutagen
+        from mutagen.mp3 import MP3
+        from mutagen.mp4 import MP4
+
+        audio = mutagen.File(path)
+        if audio:
+            if hasattr(audio.info, 'length'):
+                track['duration'] = audio.info.length
+
+            if isinstance(audio, MP3) and audio.tags:
+                if 'TIT2' in audio.tags:
+                    track['title'] = str(audio.tags['TIT2'])
+                if 'TPE1' in audio.tags:
+                    track['artist'] = str(audio.tags['TPE1'])
+                if 'TALB' in audio.tags:
+                    track['album'] = str(audio.tags['TALB'])
+                pictures = audio.tags.getall('APIC')
+                if pictures:
+                    artwork = pictures[0].data
+
+            # M4A with MP4 tags
+            elif isinstance(audio, MP4):
+                if '\xa9nam' in audio:
+                    track['title'] = str(audio['\xa9nam'][0])
+                if '\xa9ART' in audio:
+                    track['artist'] = str(audio['\xa9ART'][0])
+                if '\xa9alb' in audio:
+                    track['album'] = str(audio['\xa9alb'][0])
+                if 'covr' in audio:
+                    artwork = bytes(audio['covr'][0])
+
+            # FLAC, OGG, etc. with VorbisComment tags
+            elif getattr(audio, 'tags', None):
+                tags = audio.tags
+                if 'TITLE' in tags:
+                    track['title'] = str(tags['TITLE'][0])
+                if 'ARTIST' in tags:
+                    track['artist'] = str(tags['ARTIST'][0])
+                if 'ALBUM' in tags:
+                    track['album'] = str(tags['ALBUM'][0])
+                if getattr(audio, 'pictures', None):
+                    artwork = audio.pictures[0].data
+    except ImportError:
+        pass
+    except Exception as e:
+        track['error'] = str(e)
+
+    if artwork:
+        track['artwork_hash'] = artwork_store.put(artwork)
+
+    # YouTube downloads: title and channel from the JSON saved with the download
+    sidecar = _sidecar_path(path)
+    if sidecar and key[2] is not None:
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                yt_metadata = json.load(f)
+            track['title'] = yt_metadata.get('title', track['title'])
+            track['artist'] = yt_metadata.get('channel', track['artist'])
+            track['cover_url'] = yt_metadata.get('thumbnail', track['cover_url'])
+            track['album'] = 'YouTube'
+        except Exception as e:
+            track['error'] = str(e)
+
+    if ffmpeg:
+        track['loudness'] = _measure_loudness(ffmpeg, path)
+    return track
+
+
+class MediaLibrary:
+    """
+    Track index in a WAL-mode SQLite database.
+
+    Lookups go to the index and only re-read a file whose (mtime, size) or YouTube
+    sidecar changed. A rescan walks the folders, hands new and changed files to a
+    process pool and drops rows for files that are gone.
+    """
+
+    def __init__(self, db_path=None, folders=None):
+        """
+        Initialize the library.
+
+        Args:
+            db_path (str): Database file (defaults to resources/cache/media_library.db)
+            folders (list): Folders to index (defaults to MEDIA_LIBRARY_FOLDERS plus the media cache)
+        """
+        media_cache = os.path.join(_SOFTWARE_DIR, 'resources', 'media_cache')
+        self.db_path = db_path or os.path.join(_SOFTWARE_DIR, 'resources', 'cache', 'media_library.db')
+        self.folders = folders if folders is not None else list(config.MEDIA_LIBRARY_FOLDERS) + [media_cache]
+        self.lock = threading.Lock()
+        self.scan_thread = None
+        self.fts_available = False
+        self.conn = None
+
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self._create_schema()
+        except Exception as e:
+            logger.error(f"Could not open media library: {str(e)}")
+            self.conn = None
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+        try:
+            with self.conn:
+                self.conn.executescript(_FTS_SCHEMA)
+            self.fts_available = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: search falls back to LIKE
+            logger.warning(f"Full-text search unavailable, using plain search: {str(e)}")
+
+    @staticmethod
+    def to_metadata(track):
+        """
+        Convert an index row to the metadata dict used by the player and the UI.
+
+        Args:
+            track (dict): Row of the tracks table
+
+        Returns:
+            dict: title, artist, album, duration, file_path, cover_url, youtube_id, loudness, ...
+        """
+        metadata = {
+            'title': track['title'],
+            'artist': track['artist'],
+            'album': track['album'],
+            'duration': track['duration'],
+            'position': 0,
+            'file_path': track['path'],
+            'is_playing': True,
+            'is_paused': False,
+            'cover_url': artwork_store.get(track['artwork_hash']) or track['cover_url'],
+            'youtube_id': track['youtube_id'],
+            'artwork_hash': track['artwork_hash'],
+            'loudness': track['loudness'],
+        }
+        if track['youtube_id']:
+            metadata['thumbnail'] = f"https://i.ytimg.com/vi/{track['youtube_id']}/mqdefault.jpg"
+        return metadata
+
+    def get_track(self, path):
+        """
+        Get a track's metadata, indexing the file now if it is new or changed.
+
+        Files indexed here skip the loudness measurement; the next rescan adds it.
+
+        Args:
+            path (str): Audio file path
+
+        Returns:
+            dict: Metadata (see to_metadata), or None if the file cannot be read
+        """
+        key = file_key(path)
+        if key is None:
+            return None
+        row = self._get_row(path)
+        if (row is None or (row['mtime_ns'], row['size'], row['sidecar_mtime_ns']) != key
+                or (row['artwork_hash'] and not artwork_store.contains(row['artwork_hash']))):
+            row = scan_track(path)
+            if row is None:
+                return None
+            if 'error' in row:
+                logger.warning(f"Error extracting metadata from {path}: {row['error']}")
+            self._store([row])
+        return self.to_metadata(row)
+
+    def get_tracks(self, paths):
+        """
+        Get metadata for several tracks (a playlist), in order.
+
+        Args:
+            paths (list): Audio file paths
+
+        Returns:
+            list: Metadata dicts; files that cannot be read are skipped
+        """
+        return [metadata for metadata in (self.get_track(path) for path in paths) if metadata]
+
+    def search(self, text, limit=50):
+        """
+        Search indexed tracks by title, artist or album.
+
+        Args:
+            text (str): Words to look for (diacritics optional when FTS5 is available)
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Metadata dicts, best match first
+        """
+        words = re.findall(r'\w+', text)
+        if self.conn is None or not words:
+            return []
+        try:
+            with self.lock:
+                if self.fts_available:
+                    match = ' '.join(f'"{word}"*' for word in words)
+                    rows = self.conn.execute(
+                        """
+                        SELECT t.* FROM tracks_fts JOIN tracks t ON t.rowid = tracks_fts.rowid
+                        WHERE tracks_fts MATCH ? ORDER BY bm25(tracks_fts) LIMIT ?
+                        """,
+                        (match, limit)
+                    ).fetchall()
+                else:
+                    pattern = f"%{text.strip()}%"
+                    rows = self.conn.execute(
+                        "SELECT * FROM tracks WHERE title LIKE ? OR artist LIKE ? OR album LIKE ? LIMIT ?",
+                        (pattern, pattern, pattern, limit)
+                    ).fetchall()
+            return [self.to_metadata(dict(row)) for row in rows]
+        except Exception as e:
+            logger.error(f"Error searching media library: {str(e)}")
+            return []
+
+    def get_waveform(self, path):
+        """
+        Get the stored waveform envelope of a track.
+
+        Args:
+            path (str): Audio file path
+
+        Returns:
+            dict: frame_rate, band_count, peaks, rms and bands (see waveform_analyzer),
+                or None if there is none or the file changed since it was computed
+        """
+        key = file_key(path)
+        if self.conn is None or key is None:
+            return None
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM waveforms WHERE path = ?", (path,)).fetchone()
+        if row is None or (row['mtime_ns'], row['size']) != key[:2]:
+            return None
+        return dict(row)
+
+    def store_waveform(self, path, waveform):
+        """
+        Store a track's waveform envelope, keyed by the file's current (mtime, size).
+
+        Args:
+            path (str): Audio file path
+            waveform (dict): frame_rate, band_count, peaks, rms and bands
+        """
+        key = file_key(path)
+        if self.conn is None or key is None:
+            return
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO waveforms (path, mtime_ns, size, frame_rate, band_count, peaks, rms, bands) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, key[0], key[1], waveform['frame_rate'], waveform['band_count'],
+                 waveform['peaks'], waveform['rms'], waveform['bands'])
+            )
+
+    def clear(self):
+        """Drop every indexed track; they are re-read on the next lookup or rescan."""
+        if self.conn is None:
+            return
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM tracks")
+
+    def rescan(self):
+        """Start an incremental rescan in the background unless one is running."""
+        if self.conn is None:
+            return
+        if self.scan_thread is None or not self.scan_thread.is_alive():
+            self.scan_thread = threading.Thread(target=self._rescan, daemon=True)
+            self.scan_thread.start()
+
+    def _rescan(self):
+        start_time = time.monotonic()
+        try:
+            with self.lock:
+                known = {row['path']: (row['mtime_ns'], row['size'], row['sidecar_mtime_ns'], row['loudness'])
+                         for row in self.conn.execute(
+                             "SELECT path, mtime_ns, size, sidecar_mtime_ns, loudness FROM tracks")}
+
+            measure = config.MEDIA_LIBRARY_MEASURE_LOUDNESS and media_toolchain.has_filter('ebur128')
+            seen = set()
+            changed = []
+            for path in self._walk():
+                key = file_key(path)
+                if key is None:
+                    continue
+                seen.add(path)
+                entry = known.get(path)
+                if entry is None or entry[:3] != key or (measure and entry[3] is None):
+                    changed.append(path)
+
+            removed = [path for path in known if path not in seen]
+            if removed:
+                with self.lock, self.conn:
+                    self.conn.executemany("DELETE FROM tracks WHERE path = ?", [(path,) for path in removed])
+                    self.conn.executemany("DELETE FROM waveforms WHERE path = ?", [(path,) for path in removed])
+
+            if changed:
+                self._index(changed, media_toolchain.ffmpeg if measure else None)
+
+            logger.info(f"Media library: {len(seen)} tracks, {len(changed)} indexed, {len(removed)} removed "
+                        f"in {time.monotonic() - start_time:.1f}s")
+        except Exception as e:
+            logger.error(f"Error rescanning media library: {str(e)}")
+
+    def _walk(self):
+        """Audio files under the library folders (artwork, transcoded copies and partial downloads excluded)."""
+        for folder in self.folders:
+            if not os.path.isdir(folder):
+                continue
+            for root, dirs, files in os.walk(folder):
+                excluded = (artwork_store.cache_dir, transcode_cache.cache_dir)
+                dirs[:] = [d for d in dirs if os.path.join(root, d) not in excluded]
+                for file in files:
+                    if file.lower().endswith(AUDIO_EXTENSIONS):
+                        yield os.path.join(root, file)
+
+    def _index(self, paths, ffmpeg):
+        """Scan files in the process pool, storing results in batches as they arrive."""
+        batch = []
+        try:
+            with ProcessPoolExecutor(max_workers=config.MEDIA_LIBRARY_SCAN_WORKERS) as pool:
+                for track in pool.map(scan_track, paths, repeat(ffmpeg), chunksize=4):
+                    if track:
+                        batch.append(track)
+                    if len(batch) >= 50:
+                        self._store(batch)
+                        batch = []
+        except Exception as e:
+            # No worker processes (e.g. a restricted or frozen environment): scan here instead
+            logger.warning(f"Media library process pool unavailable, scanning in a thread: {str(e)}")
+            indexed = {track['path'] for track in batch}
+            for path in paths:
+                if path not in indexed:
+                    track = scan_track(path, ffmpeg)
+                    if track:
+                        batch.append(track)
+        self._store(batch)
+
+    def _get_row(self, path):
+        if self.conn is None:
+            return None
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM tracks WHERE path = ?", (path,)).fetchone()
+        return dict(row) if row else None
+
+    def _store(self, tracks):
+        if self.conn is None or not tracks:
+            return
+        placeholders = ', '.join('?' for _ in _COLUMNS)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in _COLUMNS[1:])
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO tracks ({', '.join(_COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT (path) DO UPDATE SET {updates}",
+                [tuple(track[column] for column in _COLUMNS) for track in tracks]
+            )
+
+
+# Create a global instance
+media_library = MediaLibrary()
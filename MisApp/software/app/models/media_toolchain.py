@@ -0,0 +1,303 @@
+"""
+MIS Smart Assistant - Media Toolchain
+Locates and verifies FFmpeg/ffprobe once, caches the result keyed by the binaries'
+mtime and size, and shares it with every component that runs them.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import zipfile
+
+from ..utils import config, logger
+
+
+_EXE_SUFFIX = '.exe' if platform.system() == 'Windows' else ''
+
+_SOFTWARE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_BUNDLED_BIN_DIR = os.path.join(_SOFTWARE_DIR, 'resources', 'bin')
+_BUNDLED_ZIPS = (
+    os.path.join(_BUNDLED_BIN_DIR, 'ffmpeg.zip'),
+    os.path.join(os.path.dirname(_SOFTWARE_DIR), 'resources', 'bin', 'temp_ffmpeg.zip'),
+    os.path.join(os.path.dirname(_SOFTWARE_DIR), 'resources', 'bin', 'ffmpeg.zip'),
+)
+
+
+def _system_dirs():
+    """Usual install locations, checked before searching PATH."""
+    if platform.system() == 'Windows':
+        return [
+            os.path.join(os.environ.get('ProgramFiles', 'C:\\Program Files'), 'FFmpeg', 'bin'),
+            os.path.join(os.environ.get('ProgramFiles(x86)', 'C:\\Program Files (x86)'), 'FFmpeg', 'bin'),
+            os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local')), 'FFmpeg', 'bin'),
+            os.path.join(os.environ.get('APPDATA', os.path.expanduser('~\\AppData\\Roaming')), 'FFmpeg', 'bin'),
+        ]
+    return [
+        '/usr/bin',
+        '/usr/local/bin',
+        '/opt/local/bin',
+        '/opt/ffmpeg/bin',
+        '/usr/local/opt/ffmpeg/bin',  # Common macOS Homebrew location
+        os.path.expanduser('~/bin'),
+    ]
+
+
+def _stat_key(path):
+    """(mtime_ns, size) of a binary, or None if it is gone."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class MediaToolchain:
+    """
+    Registry of the resolved media binaries and what they can do.
+
+    The first probe unpacks the bundled FFmpeg if needed, finds the binaries and runs
+    them once to read their version, encoders and filters. The result is saved, and
+    later probes only stat the binaries: nothing is spawned while they are unchanged.
+    A binary whose -version fails is saved the same way, as unusable.
+    """
+
+    def __init__(self, cache_path=None):
+        """
+        Initialize the registry.
+
+        Args:
+            cache_path (str): Probe cache file (defaults to resources/cache/media_toolchain.json)
+        """
+        self.cache_path = cache_path or os.path.join(_SOFTWARE_DIR, 'resources', 'cache', 'media_toolchain.json')
+        self.lock = threading.Lock()
+        self.probed = False
+        self.info = None
+
+    def probe(self, refresh=False):
+        """
+        Resolve the toolchain, from the cache when the binaries are unchanged.
+
+        Args:
+            refresh (bool): Ignore the cache and verify the binaries again
+
+        Returns:
+            dict: Probe result (ffmpeg, ffprobe, version, encoders, filters), or None without a working FFmpeg
+        """
+        with self.lock:
+            if self.probed and not refresh:
+                return self.info
+
+            info = None if refresh else self._load_cached()
+            if info is None:
+                info = self._probe_binaries()
+                if info:
+                    self._save(info)
+            if info and not info['ffmpeg']:
+                # A binary that failed to run is not tried again until it changes
+                logger.warning(f"{info['unusable']} does not run, ignoring it")
+                info = None
+
+            self.info = info
+            self.probed = True
+            if info:
+                # Components that still read the configured directory see the resolved one
+                config.FFMPEG_PATH = os.path.dirname(info['ffmpeg'])
+                logger.info(f"Using {info['version']} at {info['ffmpeg']}")
+            else:
+                logger.warning("FFmpeg not found, conversion features will be limited")
+            return info
+
+    @property
+    def ffmpeg(self):
+        """str: Path to the ffmpeg executable, or None."""
+        info = self.probe()
+        return info['ffmpeg'] if info else None
+
+    @property
+    def ffmpeg_dir(self):
+        """str: Directory containing ffmpeg, or None."""
+        ffmpeg = self.ffmpeg
+        return os.path.dirname(ffmpeg) if ffmpeg else None
+
+    @property
+    def ffprobe(self):
+        """str: Path to the ffprobe executable, or None."""
+        info = self.probe()
+        return info.get('ffprobe') if info else None
+
+    @property
+    def version(self):
+        """str: First line of `ffmpeg -version`, or None."""
+        info = self.probe()
+        return info['version'] if info else None
+
+    def has_encoder(self, name):
+        """
+        Check whether ffmpeg was built with an encoder.
+
+        Args:
+            name (str): Encoder name, e.g. 'libmp3lame'
+
+        Returns:
+            bool: True if available
+        """
+        info = self.probe()
+        return bool(info) and name in info['encoders']
+
+    def has_filter(self, name):
+        """
+        Check whether ffmpeg was built with a filter.
+
+        Args:
+            name (str): Filter name, e.g. 'atempo'
+
+        Returns:
+            bool: True if available
+        """
+        info = self.probe()
+        return bool(info) and name in info['filters']
+
+    def _load_cached(self):
+        """Load the saved probe if every binary it names is unchanged."""
+        try:
+            if not os.path.exists(self.cache_path):
+                return None
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            if info.get('configured') != config.FFMPEG_PATH:
+                return None
+            for tool in ('ffmpeg', 'ffprobe', 'unusable'):
+                if info.get(tool) and _stat_key(info[tool]) != info['stat'].get(tool):
+                    logger.info(f"{tool} changed since the last probe, verifying it again")
+                    return None
+            return info
+        except Exception as e:
+            logger.warning(f"Could not load media toolchain cache: {str(e)}")
+            return None
+
+    def _save(self, info):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(info, f)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not save media toolchain cache: {str(e)}")
+
+    def _probe_binaries(self):
+        """Find ffmpeg and ffprobe and run ffmpeg once per capability list."""
+        configured = config.FFMPEG_PATH
+        ffmpeg = self._find('ffmpeg')
+        if not ffmpeg:
+            return None
+        version = self._run(ffmpeg, '-version')
+        if version is None:
+            # Saved like a successful probe so the failure is not paid for on every start
+            return {'configured': configured, 'ffmpeg': None, 'unusable': ffmpeg,
+                    'stat': {'unusable': _stat_key(ffmpeg)}}
+
+        ffprobe = os.path.join(os.path.dirname(ffmpeg), 'ffprobe' + _EXE_SUFFIX)
+        if not os.path.isfile(ffprobe):
+            ffprobe = shutil.which('ffprobe')
+
+        info = {
+            'configured': configured,
+            'ffmpeg': ffmpeg,
+            'ffprobe': ffprobe,
+            'version': version.splitlines()[0] if version else 'ffmpeg',
+            'encoders': self._list_names(ffmpeg, '-encoders'),
+            'filters': self._list_names(ffmpeg, '-filters'),
+        }
+        info['stat'] = {tool: _stat_key(info[tool]) for tool in ('ffmpeg', 'ffprobe') if info[tool]}
+        return info
+
+    def _find(self, name):
+        """Find an executable: configured path, bundled copy, usual locations, then PATH."""
+        exe_name = name + _EXE_SUFFIX
+        configured = config.FFMPEG_PATH
+        if configured:
+            for candidate in (configured, os.path.join(configured, exe_name), os.path.join(configured, 'bin', exe_name)):
+                if self._is_executable(candidate):
+                    return candidate
+
+        bundled = self._find_bundled(exe_name)
+        if bundled:
+            return bundled
+
+        for directory in _system_dirs():
+            candidate = os.path.join(directory, exe_name)
+            if self._is_executable(candidate):
+                return candidate
+        return shutil.which(name)
+
+    def _find_bundled(self, exe_name):
+        """Find the bundled executable, unpacking the shipped archive the first time."""
+        bundled_dir = os.path.join(_BUNDLED_BIN_DIR, 'ffmpeg')
+        if not (os.path.isdir(bundled_dir) and os.listdir(bundled_dir)):
+            self._extract_bundled(bundled_dir)
+        for root, _, files in os.walk(bundled_dir):
+            for file in files:
+                if file.lower() == exe_name and self._is_executable(os.path.join(root, file)):
+                    return os.path.join(root, file)
+        return None
+
+    def _extract_bundled(self, bundled_dir):
+        for zip_path in _BUNDLED_ZIPS:
+            if not os.path.exists(zip_path):
+                continue
+            try:
+                if not zipfile.is_zipfile(zip_path):
+                    logger.warning(f"File exists but is not a valid zip file: {zip_path}")
+                    continue
+                logger.info(f"Extracting FFmpeg from {zip_path}...")
+                os.makedirs(bundled_dir, exist_ok=True)
+                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                    zip_ref.extractall(bundled_dir)
+                if platform.system() != 'Windows':
+                    # zipfile does not restore the executable bit
+                    for root, _, files in os.walk(bundled_dir):
+                        for file in files:
+                            if file in ('ffmpeg', 'ffprobe'):
+                                os.chmod(os.path.join(root, file), 0o755)
+                return
+            except Exception as e:
+                logger.error(f"Error extracting FFmpeg from {zip_path}: {str(e)}")
+
+    @staticmethod
+    def _is_executable(path):
+        return os.path.isfile(path) and os.access(path, os.X_OK)
+
+    @staticmethod
+    def _run(executable, *args):
+        """Run a binary and return its stdout, or None if it fails."""
+        kwargs = {}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        try:
+            result = subprocess.run([executable, *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    universal_newlines=True, timeout=15, **kwargs)
+        except Exception as e:
+            logger.warning(f"Could not run {executable}: {str(e)}")
+            return None
+        if result.returncode != 0:
+            logger.warning(f"{executable} {' '.join(args)} failed: {result.stderr.strip()[:200]}")
+            return None
+        return result.stdout
+
+    def _list_names(self, ffmpeg, option):
+        """Names from `ffmpeg -encoders` / `-filters`: the column after the flags."""
+        names = []
+        for line in (self._run(ffmpeg, '-hide_banner', option) or '').splitlines():
+            parts = line.split()
+            # Skip the "Encoders:" title, the "V..... = Video" legend and the dashed separator
+            if len(parts) >= 2 and parts[1] != '=':
+                names.append(parts[1])
+        return names
+
+
+# Create a global instance
+media_toolchain = MediaToolchain()
@@ -1,9 +1,14 @@
 # File: software/app/models/multimedia/__init__.py
+import os
+import threading
+
 from .audio_player import AudioPlayer
 from .youtube_downloader import YouTubeDownloader
 from .playlist_manager import PlaylistManager
 from .media_converter import MediaConverter
 from .metadata_manager import MetadataManager
+from ..media_cache import media_cache
+from ..transcode_cache import transcode_cache
 
 # Facade class để giữ tương thích với mã hiện tại
 class MultimediaService:
@@ -24,6 +29,9 @@ class MultimediaService:
         # Kết nối sự kiện giữa các thành phần
         self.audio_player.register_metadata_provider(self.metadata_manager)
         
+        # Drop leftovers of earlier runs and bring the download cache under its budget
+        threading.Thread(target=media_cache.collect_garbage, daemon=True).start()
+        
         # Forward các signals từ audio_player
         self.playback_started = self.audio_player.playback_started
         self.playback_stopped = self.audio_player.playback_stopped
@@ -62,6 +70,11 @@ class MultimediaService:
         self.is_paused = False
         return self.audio_player.stop()
     
+    def close(self):
+        """Stop playback and write the media cache's batched statistics."""
+        self.stop()
+        media_cache.flush()
+    
     def set_volume(self, volume):
         return self.audio_player.set_volume(volume)
     
@@ -105,7 +118,10 @@ class MultimediaService:
         self.loop_mode = is_looping
         # Forward to the audio player if available
         if self.audio_player and hasattr(self.audio_player, 'set_loop_mode'):
-            return self.audio_player.set_loop_mode(is_looping)
+            result = self.audio_player.set_loop_mode(is_looping)
+            # The track prepared to follow changes with the mode
+            self.playlist_manager.prefetch_next()
+            return result
         return True
     
     # YouTube methods
@@ -115,6 +131,30 @@ class MultimediaService:
     def download_youtube_audio(self, video_url, output_dir=None):
         return self.youtube_downloader.download_audio(video_url, output_dir)
     
+    # Media library methods
+    def search_library(self, query, max_results=20):
+        """
+        Search the indexed music folders and media cache.
+        
+        Args:
+            query (str): Title, artist or album words
+            max_results (int): Maximum number of results
+            
+        Returns:
+            list: Result dicts in the search widget's format, with 'file_path' to play
+        """
+        results = []
+        for track in self.metadata_manager.search_tracks(query, max_results):
+            results.append({
+                'title': track['title'],
+                'artist': track['artist'],
+                'duration': int(track['duration'] or 0),
+                'file_path': track['file_path'],
+                'thumbnail_url': track.get('thumbnail'),
+                'video_id': track['youtube_id'],
+            })
+        return results
+    
     def process_music_request(self, query):
         """
         Process natural language music request.
@@ -125,8 +165,7 @@ class MultimediaService:
         Returns:
             str: Response message about the music request
         """
-        from ...utils import logger
-        import os
+        from ...utils import logger, config
         
         # Extract song name from the query
         song_name = self._extract_song_name(query)
@@ -134,9 +173,12 @@ class MultimediaService:
         if not song_name:
             return "Không thể xác định bài hát bạn muốn nghe. Vui lòng thử lại với cú pháp như 'Mở bài hát [tên bài hát]'."
             
-        # Search and download using YouTubeDownloader
+        # Search and download (or start streaming) using YouTubeDownloader
         logger.info(f"Searching for '{song_name}' using YouTube Data API")
-        video_info = self.youtube_downloader.search_and_download(song_name)
+        if config.ENABLE_STREAMING_PLAYBACK:
+            video_info = self.youtube_downloader.search_and_stream(song_name)
+        else:
+            video_info = self.youtube_downloader.search_and_download(song_name)
         
         if not video_info or 'audio_file' not in video_info:
             return f"Xin lỗi, không thể tìm thấy bài hát '{song_name}'."
@@ -144,8 +186,8 @@ class MultimediaService:
         # Store the audio file for delayed playback after TTS is complete
         audio_file = video_info['audio_file']
         
-        # Check if the file exists
-        if not os.path.exists(audio_file):
+        # Check if the file exists (a stream keeps buffering and writes it when done)
+        if not video_info.get('stream') and not os.path.exists(audio_file):
             return f"Xin lỗi, không thể tải xuống âm thanh cho '{video_info.get('title', song_name)}'."
             
         # Set the audio for playback once TTS is complete
@@ -252,8 +294,16 @@ class MultimediaService:
         """
         from ...utils import logger
         try:
+            previous_file = self.pending_playback_file
+            previous = (self.pending_playback_info or {}).get('stream')
             self.pending_playback_file = file_path
             self.pending_playback_info = video_info
+
+            # A song that was never played must not keep downloading behind the new one
+            if previous and previous is not (video_info or {}).get('stream'):
+                logger.info(f"Dropping pending stream: {os.path.basename(previous_file or '')}")
+                previous.abort()
+
             logger.info(f"Set pending playback: {os.path.basename(file_path)}")
             return True
         except Exception as e:
@@ -269,11 +319,24 @@ class MultimediaService:
             bool: True if playback started, False otherwise
         """
         from ...utils import logger
-        import os
         try:
             if not self.pending_playback_file:
                 logger.warning("No pending audio file to play")
                 return False
+            
+            stream = (self.pending_playback_info or {}).get('stream')
+            if stream:
+                logger.info(f"Playing pending stream: {os.path.basename(self.pending_playback_file)}")
+                # Joins the playlist once the download has been saved to the cache
+                stream.when_cached(self.playlist_manager.add_to_playlist)
+                stream.when_cached(media_cache.register)
+                stream.when_cached(transcode_cache.prepare)
+                result = self.audio_player.play_stream(stream)
+                
+                self.pending_playback_file = None
+                self.pending_playback_info = None
+                
+                return result
                 
             if not os.path.exists(self.pending_playback_file):
                 logger.error(f"Pending audio file not found: {self.pending_playback_file}")
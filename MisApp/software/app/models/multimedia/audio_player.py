@@ -19,6 +19,8 @@ except Exception:
     pygame = None
 
 from ...utils import logger, config
+from ..transcode_cache import transcode_cache
+from .track_prefetcher import TrackPrefetcher, PLAYABLE_FORMATS
 
 class AudioPlayer(QObject):
     """
@@ -49,6 +51,7 @@ class AudioPlayer(QObject):
         
         self.position_timer = None
         self.stop_event = threading.Event()
+        self.stream = None  # AudioStream while a streamed track is the current one
         
         self._initialize_pygame()
         
@@ -58,6 +61,17 @@ class AudioPlayer(QObject):
         import tempfile
         self.temp_dir = os.path.join(tempfile.gettempdir(), 'mis_audio_temp')
         os.makedirs(self.temp_dir, exist_ok=True)
+        
+        # Track that follows the current one, prepared while it plays
+        self.prefetcher = TrackPrefetcher(metadata_manager)
+        self.next_track = None
+        self.queued_file = None  # File handed to pygame.mixer.music.queue()
+        self.loaded_file = None  # File pygame.mixer.music is playing, so seeks can skip reloading it
+        self.preparing = None  # Track waiting for its transcoded copy before it can start
+        self.mixer_pos = 0  # Last pygame.mixer.music.get_pos(), which restarts when a queued track starts
+        self.position_offset = 0.0  # Track position when get_pos() was 0 (moved by seeks)
+        self.next_lock = threading.Lock()
+        self.fading_out = False
     
     def _initialize_pygame(self):
         """Initialize pygame mixer for audio playback."""
@@ -86,8 +100,12 @@ class AudioPlayer(QObject):
             for options in initialization_options:
                 try:
                     pygame.mixer.init(**options)
-                    if pygame.mixer.get_init():
+                    mixer_format = pygame.mixer.get_init()
+                    if mixer_format:
                         logger.info(f"Pygame mixer initialized successfully with options: {options}")
+                        # Transcoded songs are written at the mixer's rate so pygame never resamples them
+                        frequency, _, channels = mixer_format
+                        transcode_cache.set_mixer_format(frequency, channels)
                         pygame.mixer.music.set_volume(self.volume)
                         return True
                 except Exception as e:
@@ -115,6 +133,7 @@ class AudioPlayer(QObject):
     def register_metadata_provider(self, metadata_manager):
         """Set the metadata manager for track information."""
         self.metadata_manager = metadata_manager
+        self.prefetcher.metadata_manager = metadata_manager
     
     def _notify_callbacks(self, event_type, data=None):
         """Notify callbacks and emit Qt signals."""
@@ -150,11 +169,13 @@ class AudioPlayer(QObject):
         except Exception as e:
             logger.error(f"Error emitting signal for {event_type}: {str(e)}")
     
-    def play(self, media_path=None):
+    def play(self, media_path=None, fade_ms=0):
         """Play audio from the specified path or resume current track."""
         try:
             # Resume if paused
             if self.is_paused and self.currently_playing and not media_path:
+                if self.stream:
+                    return self.resume()
                 if pygame and pygame.mixer.music.get_busy():
                     pygame.mixer.music.unpause()
                     self.is_playing = True
@@ -179,45 +200,48 @@ class AudioPlayer(QObject):
                 logger.error(f"Media file not found: {media_path}")
                 return False
             
+            # A file replaces any streamed track
+            self._close_stream()
+            
+            # Play the transcoded copy when there is one; formats pygame cannot load start
+            # once the transcode cache has prepared them, unless the prefetcher already did
+            load_path = self._load_path(media_path)
+            if Path(load_path).suffix.lower() not in PLAYABLE_FORMATS:
+                return self._play_when_prepared(media_path, fade_ms)
+            self.preparing = None
+            if load_path == media_path and 'media_cache' in media_path:
+                # Downloaded before the cache existed: prepare it for the next play and for seeking
+                transcode_cache.prepare(media_path)
+            
             # Kiểm tra tệp có hợp lệ không trước khi phát
-            file_ext = Path(media_path).suffix.lower()
+            file_ext = Path(load_path).suffix.lower()
             
             # Try pygame first
             if pygame and pygame.mixer.get_init():
                 try:
                     # Check if file extension is supported by pygame
-                    if file_ext in ['.mp3', '.wav', '.ogg']:
-                        # For YouTube downloads, add specific checks
-                        if 'media_cache' in media_path and file_ext == '.mp3':
-                            logger.info("YouTube downloaded audio detected, using more cautious loading")
-                            # Use temporary wav conversion for more reliable playback
-                            if self.media_converter and hasattr(self.media_converter, 'convert_to_wav'):
-                                try:
-                                    temp_wav = self.media_converter.convert_to_wav(media_path)
-                                    if temp_wav and os.path.exists(temp_wav):
-                                        logger.info(f"Using converted WAV file for playback: {temp_wav}")
-                                        pygame.mixer.music.load(temp_wav)
-                                    else:
-                                        logger.info("Conversion failed, trying direct playback")
-                                        pygame.mixer.music.load(media_path)
-                                except Exception as conv_e:
-                                    logger.warning(f"Error in conversion: {str(conv_e)}")
-                                    pygame.mixer.music.load(media_path)
-                            else:
-                                # No converter available, try direct loading
-                                pygame.mixer.music.load(media_path)
-                        else:
-                            # Normal loading for non-YouTube files
-                            pygame.mixer.music.load(media_path)
+                    if file_ext in PLAYABLE_FORMATS:
+                        # Stopping also drops a track queued behind the previous one
+                        pygame.mixer.music.stop()
+                        with self.next_lock:
+                            self.queued_file = None
+                        self.fading_out = False
+                        
+                        if load_path != media_path:
+                            logger.info(f"Using transcoded copy for playback: {os.path.basename(load_path)}")
+                        pygame.mixer.music.load(load_path)
+                        self.loaded_file = load_path
                         
                         # Set volume and play
                         pygame.mixer.music.set_volume(self.volume)
-                        pygame.mixer.music.play()
+                        pygame.mixer.music.play(fade_ms=fade_ms)
+                        self._reset_mixer_position(0)
                         
                         # Store current track
                         self.currently_playing = media_path
                         self.is_playing = True
                         self.is_paused = False
+                        self.play_time = 0
                         
                         # Start position tracking
                         self._start_position_timer()
@@ -245,13 +269,195 @@ class AudioPlayer(QObject):
             self._notify_callbacks('error', str(e))
             return False
     
+    def play_stream(self, stream):
+        """
+        Play a track that is still downloading.
+        
+        Args:
+            stream (AudioStream): Started stream; its cache file becomes the current track
+            
+        Returns:
+            bool: True if playback started
+        """
+        try:
+            if not (pygame and pygame.mixer.get_init()):
+                logger.warning("Pygame mixer not initialized")
+                return False
+            
+            if pygame.mixer.music.get_busy():
+                pygame.mixer.music.stop()
+            self._close_stream()
+            
+            self.stream = stream
+            self.loaded_file = None
+            self.preparing = None
+            stream.play(self.volume, config.STREAM_PREBUFFER_SECONDS)
+            
+            self.currently_playing = stream.cache_file
+            self.is_playing = True
+            self.is_paused = False
+            self.play_time = 0
+            
+            self._start_position_timer()
+            self._update_track_duration(stream.duration)
+            self._notify_callbacks('playback_started', self._get_basic_track_info())
+            
+            logger.info(f"Started streaming playback: {os.path.basename(stream.cache_file)}")
+            return True
+        except Exception as e:
+            logger.error(f"Error in play_stream method: {str(e)}")
+            self._notify_callbacks('error', str(e))
+            return False
+    
+    def set_next_track(self, prepared):
+        """
+        Set the track that follows the current one.
+        
+        Args:
+            prepared (dict): Track from the prefetcher ('file_path', 'playable', 'metadata',
+                'duration'), or None to stop after the current track
+        """
+        with self.next_lock:
+            self.next_track = prepared
+        self._queue_next()
+    
+    def _queue_next(self):
+        """Hand the next track to pygame so it starts the moment the current one ends."""
+        with self.next_lock:
+            prepared = self.next_track
+            # A crossfade or a streamed track switches in _finish_track instead
+            if not prepared or config.PLAYLIST_CROSSFADE_SECONDS > 0 or self.stream:
+                return
+            if not (self.is_playing or self.is_paused) or self.queued_file == prepared['playable']:
+                return
+            if not (pygame and pygame.mixer.get_init()):
+                return
+            try:
+                pygame.mixer.music.queue(prepared['playable'])
+                self.queued_file = prepared['playable']
+            except Exception as e:
+                logger.warning(f"Could not queue next track: {str(e)}")
+    
+    def _switch_to_queued(self):
+        """
+        Take over the queued track that pygame moved on to.
+        
+        Returns:
+            bool: True if the queued track is now the current one
+        """
+        with self.next_lock:
+            prepared = self.next_track
+            if not prepared or not self.queued_file or self.queued_file != prepared['playable']:
+                return False
+            self.next_track = None
+            self.queued_file = None
+        
+        self.loaded_file = prepared['playable']
+        self.currently_playing = prepared['file_path']
+        self.position_offset = 0.0
+        self.play_time = 0
+        self._update_track_duration(prepared['duration'])
+        self._notify_callbacks('playback_started', self._get_basic_track_info())
+        logger.info(f"Gapless switch to {os.path.basename(prepared['file_path'])}")
+        return True
+    
+    def _finish_track(self):
+        """Start the prepared next track, replay the current one in loop mode, or report the end."""
+        with self.next_lock:
+            prepared, self.next_track = self.next_track, None
+            stale_queue, self.queued_file = self.queued_file, None
+        fade_ms = int(config.PLAYLIST_CROSSFADE_SECONDS * 1000) if self.fading_out else 0
+        self.fading_out = False
+        
+        # With a file queued pygame only stops after playing it: it is the track that ended
+        if prepared and stale_queue == prepared['playable']:
+            logger.info(f"Queued track {os.path.basename(prepared['file_path'])} already played")
+            self.currently_playing = prepared['file_path']
+            prepared = stale_queue = None
+        
+        if prepared and os.path.exists(prepared['file_path']):
+            logger.info(f"Starting prepared track {os.path.basename(prepared['file_path'])}")
+            if self.play(prepared['file_path'], fade_ms=fade_ms):
+                return
+        
+        # pygame would move on to a track that no longer follows
+        if stale_queue and pygame and pygame.mixer.get_init():
+            pygame.mixer.music.stop()
+        
+        # Check if we should loop the current track
+        if self.loop_mode and self.currently_playing:
+            logger.info("Loop mode is enabled, replaying current track")
+            # Restart at the beginning of the track
+            self.stop()
+            time.sleep(0.2)  # Give it a moment to release resources
+            self.play(self.currently_playing)
+        else:
+            # Notify on the main thread
+            self._notify_callbacks('track_finished', self._get_basic_track_info())
+    
+    def _play_when_prepared(self, media_path, fade_ms=0):
+        """
+        Start a track pygame cannot load once its transcoded copy is ready.
+        
+        The transcode runs on its own thread, not the caller's (usually the Qt thread),
+        and does not wait behind background transcodes; the previous track stops and
+        'track_loading' is reported meanwhile.
+        
+        Returns:
+            bool: True if the track will start when it is prepared
+        """
+        future = transcode_cache.prepare_now(media_path)
+        if future is None:
+            logger.warning(f"Unsupported file format: {Path(media_path).suffix.lower()}")
+            return False
+        
+        if self.is_playing or self.is_paused:
+            self.stop()
+        self.preparing = media_path
+        self.currently_playing = media_path
+        logger.info(f"Preparing {os.path.basename(media_path)} for playback")
+        self._notify_callbacks('track_loading', {'file_path': media_path})
+        future.add_done_callback(lambda done: self._on_prepared(media_path, fade_ms, done))
+        return True
+    
+    def _on_prepared(self, media_path, fade_ms, future):
+        """Start a track from the transcode thread unless another one was chosen meanwhile."""
+        if self.preparing != media_path:
+            return
+        self.preparing = None
+        if future.cancelled() or not future.result():
+            logger.error(f"Could not prepare {os.path.basename(media_path)} for playback")
+            self._notify_callbacks('error', f"Cannot play {os.path.basename(media_path)}")
+            return
+        self.play(media_path, fade_ms=fade_ms)
+    
+    @staticmethod
+    def _load_path(media_path):
+        """File pygame loads for a track: its transcoded copy if there is one, else the track itself."""
+        return transcode_cache.get(media_path) or media_path
+    
+    def _close_stream(self):
+        """Stop the streamed track, if any; its download still completes into the cache."""
+        if self.stream:
+            self.stream.stop()
+            self.stream = None
+    
+    def _output_busy(self):
+        """Whether the current track is still playing (or, when streamed, buffering)."""
+        if self.stream:
+            return self.stream.busy
+        return bool(pygame and pygame.mixer.music.get_busy())
+    
     def pause(self):
         """Pause current playback."""
         if not self.is_playing or self.is_paused:
             return False
             
-        if pygame and pygame.mixer.music.get_busy():
-            pygame.mixer.music.pause()
+        if self._output_busy():
+            if self.stream:
+                self.stream.pause()
+            else:
+                pygame.mixer.music.pause()
             self.is_paused = True
             
             # Stop position timer
@@ -271,8 +477,12 @@ class AudioPlayer(QObject):
             return False
             
         if pygame and pygame.mixer.get_init():
-            pygame.mixer.music.unpause()
+            if self.stream:
+                self.stream.resume()
+            else:
+                pygame.mixer.music.unpause()
             self.is_paused = False
+            self._queue_next()
             
             # Start position timer
             self._start_position_timer()
@@ -296,11 +506,16 @@ class AudioPlayer(QObject):
     
     def stop(self):
         """Stop current playback."""
+        self.preparing = None
         if not self.is_playing and not self.is_paused:
             return False
             
         if pygame and pygame.mixer.get_init():
             pygame.mixer.music.stop()
+        self._close_stream()
+        with self.next_lock:
+            self.queued_file = None
+        self.fading_out = False
         
         # Close any browser player if it exists
         if self.browser_player and os.path.exists(self.browser_player):
@@ -336,6 +551,8 @@ class AudioPlayer(QObject):
             # Apply volume if playing with pygame
             if pygame and pygame.mixer.get_init():
                 pygame.mixer.music.set_volume(volume)
+            if self.stream:
+                self.stream.set_volume(volume)
                 
             # Notify callbacks
             self._notify_callbacks('volume_changed', {'volume': volume})
@@ -360,6 +577,13 @@ class AudioPlayer(QObject):
             if not self.is_playing and not self.is_paused:
                 logger.warning("No active playback to set position")
                 return False
+            
+            if self.stream:
+                if not self.stream.cached:
+                    logger.warning("Cannot seek a streamed track before it has finished downloading")
+                    return False
+                # The cached file takes over from the stream
+                self._close_stream()
                 
             # Đảm bảo có track_duration hợp lệ
             if self.track_duration <= 0:
@@ -386,67 +610,13 @@ class AudioPlayer(QObject):
             # Store position
             self.play_time = position_seconds
             
-            # Biến để theo dõi kết quả
-            success = False
-            
             # Apply position if playing with pygame
             if pygame and pygame.mixer.get_init():
-                # Pygame doesn't support direct position seeking, so reload and skip
-                was_paused = self.is_paused
                 currently_playing = self.currently_playing
                 
                 if currently_playing and os.path.exists(currently_playing):
-                    # Remember the original volume
-                    original_volume = self.volume
-                    
-                    # Thử lặp lại tối đa 2 lần nếu thất bại
-                    for attempt in range(2):
-                        try:
-                            # Stop existing playback
-                            pygame.mixer.music.stop()
-                            
-                            # Thêm độ trễ nhỏ để đảm bảo pygame giải phóng tài nguyên
-                            time.sleep(0.1)
-                            
-                            # Load the file again
-                            pygame.mixer.music.load(currently_playing)
-                            
-                            # Start from the requested position
-                            pygame.mixer.music.play(0, position_seconds)
-                            
-                            # Restore volume setting
-                            pygame.mixer.music.set_volume(original_volume)
-                            
-                            # If it was paused before, pause it again
-                            if was_paused:
-                                pygame.mixer.music.pause()
-                            else:
-                                self.is_playing = True
-                                self.is_paused = False
-                                
-                            # Kiểm tra xem đã phát chưa
-                            if not was_paused:
-                                time.sleep(0.2)  # Chờ một chút để pygame bắt đầu phát
-                                if pygame.mixer.music.get_busy():
-                                    success = True
-                                    break
-                            else:
-                                success = True
-                                break
-                                
-                        except Exception as e:
-                            logger.error(f"Error during position seeking (attempt {attempt+1}): {str(e)}")
-                            if attempt == 0:  # Chỉ thử khởi tạo lại nếu đây là lần thử đầu tiên
-                                # Thử khởi tạo lại pygame
-                                try:
-                                    pygame.mixer.quit()
-                                    time.sleep(0.3)
-                                    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
-                                except Exception as reinit_error:
-                                    logger.error(f"Error reinitializing pygame: {str(reinit_error)}")
-                    
-                    # Nếu đã thành công, thông báo các callbacks
-                    if success:
+                    # Seek in place; reload only when pygame holds a different file
+                    if self._seek_loaded(position_seconds) or self._seek_reload(position_seconds):
                         # Notify callbacks with the new position
                         self._notify_callbacks('position_changed', {'position': position_seconds})
                         self._notify_callbacks('position_updated', {
@@ -457,10 +627,10 @@ class AudioPlayer(QObject):
                         # Emit Qt signal for UI components
                         self.playback_position_changed.emit(position_seconds, self.track_duration)
                         
-                        logger.info(f"Position set to {position_seconds:.2f}s of {self.track_duration:.2f}s (originally requested: {original_position:.2f}s)")
+                        logger.debug(f"Position set to {position_seconds:.2f}s of {self.track_duration:.2f}s (originally requested: {original_position:.2f}s)")
                         return True
                     else:
-                        logger.warning(f"Failed to seek to position {position_seconds:.2f}s after multiple attempts")
+                        logger.warning(f"Failed to seek to position {position_seconds:.2f}s")
                 else:
                     logger.warning(f"Cannot seek position - file does not exist: {currently_playing}")
             
@@ -481,6 +651,105 @@ class AudioPlayer(QObject):
             logger.error(f"Error in set_position method: {str(e)}")
             return False
     
+    def _seek_loaded(self, position_seconds):
+        """
+        Move the file pygame is playing to a new position without loading it again.
+        
+        OGG, the transcode cache format, seeks to an absolute time through the Vorbis
+        granule positions; MP3 seeks relative to the current position, so it is rewound
+        first. WAV, or a track that already ended, restarts the loaded file at the offset.
+        
+        Returns:
+            bool: True if the position was applied
+        """
+        load_path = self.loaded_file
+        if not load_path or load_path != self._load_path(self.currently_playing):
+            return False
+        extension = Path(load_path).suffix.lower()
+        try:
+            if extension in ('.ogg', '.mp3') and (self.is_paused or pygame.mixer.music.get_busy()):
+                if extension == '.mp3':
+                    pygame.mixer.music.rewind()
+                pygame.mixer.music.set_pos(position_seconds)
+                self._reset_mixer_position(position_seconds)
+            else:
+                # Restarting drops the queued next track
+                with self.next_lock:
+                    self.queued_file = None
+                pygame.mixer.music.play(0, position_seconds)
+                self._reset_mixer_position(position_seconds)
+                if self.is_paused:
+                    pygame.mixer.music.pause()
+                self._queue_next()
+            return True
+        except pygame.error as e:
+            logger.warning(f"In-place seek failed, reloading track: {str(e)}")
+            return False
+    
+    def _seek_reload(self, position_seconds):
+        """
+        Load the current track again and start it at a position (e.g. after its transcoded copy appeared).
+        
+        Returns:
+            bool: True if the position was applied
+        """
+        try:
+            load_path = self._load_path(self.currently_playing)
+            # Stopping drops the queued next track
+            with self.next_lock:
+                self.queued_file = None
+            pygame.mixer.music.stop()
+            pygame.mixer.music.load(load_path)
+            pygame.mixer.music.play(0, position_seconds)
+            self._reset_mixer_position(position_seconds)
+            pygame.mixer.music.set_volume(self.volume)
+            self.loaded_file = load_path
+            
+            # If it was paused before, pause it again
+            if self.is_paused:
+                pygame.mixer.music.pause()
+            else:
+                self.is_playing = True
+        except Exception as e:
+            logger.error(f"Error during position seeking: {str(e)}")
+            self.loaded_file = None
+            return False
+        
+        self._queue_next()
+        return True
+    
+    def _reset_mixer_position(self, position_seconds):
+        """Continue the position from a point the mixer was just started at or moved to."""
+        with self.next_lock:
+            self.mixer_pos = max(0, pygame.mixer.music.get_pos())
+            self.position_offset = position_seconds - self.mixer_pos / 1000
+    
+    def _sync_mixer_position(self):
+        """
+        Update play_time from pygame and take over the queued track once pygame started it.
+        
+        get_pos() counts the milliseconds actually played since the file started, so it
+        does not drift, and it restarts from 0 when pygame moves on to the queued file.
+        
+        Returns:
+            bool: False if pygame moved on to a track that no longer follows and the
+                current track was finished instead
+        """
+        with self.next_lock:
+            pos = pygame.mixer.music.get_pos()
+            if pos < 0:
+                return True
+            switched = bool(self.queued_file) and pos < self.mixer_pos
+            self.mixer_pos = pos
+        if switched and not self._switch_to_queued():
+            # The queued track was withdrawn after pygame got it, and pygame cannot unqueue
+            logger.info(f"Stopping withdrawn queued track {os.path.basename(self.queued_file or '')}")
+            pygame.mixer.music.stop()
+            self._finish_track()
+            return False
+        self.play_time = max(0.0, self.position_offset + pos / 1000)
+        return True
+    
     def get_position(self):
         """Get current playback position in seconds."""
         return self.play_time
@@ -498,7 +767,7 @@ class AudioPlayer(QObject):
     
     def is_currently_playing(self):
         """Check if audio is currently playing."""
-        if pygame and pygame.mixer.music.get_busy() and not self.is_paused:
+        if self._output_busy() and not self.is_paused:
             return True
         return self.is_playing and not self.is_paused
     
@@ -549,40 +818,30 @@ class AudioPlayer(QObject):
             while not self.stop_event.is_set():
                 # Check if we're playing
                 if self.is_playing and not self.is_paused:
-                    # Update play time (0.1 second increments)
-                    self.play_time += 0.1
+                    # Update play time from what was actually heard
+                    if self.stream:
+                        self.play_time = self.stream.position
+                    elif pygame and pygame.mixer.get_init():
+                        if not self._sync_mixer_position():
+                            break
+                    
+                    # Crossfade: fade out for the last seconds, the prepared track fades in
+                    crossfade = config.PLAYLIST_CROSSFADE_SECONDS
+                    if (crossfade > 0 and self.next_track and not self.fading_out and not self.stream
+                            and self.track_duration > crossfade
+                            and self.play_time >= self.track_duration - crossfade):
+                        pygame.mixer.music.fadeout(int(crossfade * 1000))
+                        self.fading_out = True
                     
                     # Check for end of track
                     if pygame and pygame.mixer.get_init():
-                        if not pygame.mixer.music.get_busy() and self.play_time > 1.0:
+                        if not self._output_busy() and self.play_time > 1.0:
                             # Track has finished - wait a moment to confirm
                             time.sleep(0.2)
-                            if not pygame.mixer.music.get_busy():
-                                # Check if we should loop the current track
-                                if self.loop_mode and self.currently_playing:
-                                    logger.info("Loop mode is enabled, replaying current track")
-                                    # Restart at the beginning of the track
-                                    self.stop()
-                                    time.sleep(0.2)  # Give it a moment to release resources
-                                    self.play(self.currently_playing)
-                                else:
-                                    # Notify on the main thread
-                                    self._notify_callbacks('track_finished', self._get_basic_track_info())
+                            if not self._output_busy():
+                                self._finish_track()
                                 break
                     
-                    if self.track_duration > 0 and self.play_time >= self.track_duration:
-                        # Check if we should loop the current track
-                        if self.loop_mode and self.currently_playing:
-                            logger.info("Loop mode is enabled, replaying current track")
-                            # Restart at the beginning of the track
-                            self.stop()
-                            time.sleep(0.2)  # Give it a moment to release resources
-                            self.play(self.currently_playing)
-                        else:
-                            # Notify on the main thread
-                            self._notify_callbacks('track_finished', self._get_basic_track_info())
-                        break
-                    
                     # Notify about position updates (but not too frequently)
                     current_time = time.time()
                     if current_time - last_notification_time >= 0.1:  # Update more frequently (10 times per second)
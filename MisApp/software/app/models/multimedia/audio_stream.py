@@ -0,0 +1,314 @@
+# File: software/app/models/multimedia/audio_stream.py
+"""
+Progressive playback of a remote audio stream.
+
+One ffmpeg process reads the source URL and writes two outputs: raw PCM in the
+mixer's format on stdout, which is played from a growing in-memory buffer as soon
+as the first seconds arrive, and an MP3 copy that replaces the cache file once the
+whole track has been received.
+"""
+
+import collections
+import os
+import platform
+import subprocess
+import threading
+import time
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+    pygame = None
+
+from ...utils import config, logger
+from ..media_toolchain import media_toolchain
+
+
+STREAM_CHANNEL = 0  # Mixer channel reserved for streamed tracks (TTS uses channel 1)
+CHUNK_SECONDS = 0.5  # Audio per pygame Sound queued on the channel
+
+# pygame.mixer.get_init() sample size -> (ffmpeg raw format, bytes per sample)
+_SAMPLE_FORMATS = {
+    -8: ('s8', 1),
+    8: ('u8', 1),
+    -16: ('s16le', 2),
+    16: ('u16le', 2),
+    32: ('f32le', 4),
+}
+
+
+class AudioStream:
+    """
+    A track that plays while it is still being downloaded.
+
+    `start()` begins decoding right away, so the buffer fills while the assistant is
+    still speaking; `play()` starts output on the reserved mixer channel. The buffer
+    holds at most STREAM_BUFFER_AHEAD_SECONDS: when it is full ffmpeg's output is not
+    read, which pauses the download until playback catches up. Stopping playback does
+    not cancel the download: the track still lands in the cache, at full speed.
+    """
+
+    def __init__(self, source_url, cache_file, headers=None, duration=0):
+        """
+        Initialize the stream.
+
+        Args:
+            source_url (str): Direct URL of the audio (e.g. from yt-dlp)
+            cache_file (str): Path the complete MP3 is saved to
+            headers (dict): HTTP headers the source requires
+            duration (float): Track length in seconds if known, else 0
+        """
+        self.source_url = source_url
+        self.cache_file = cache_file
+        self.part_file = f"{cache_file}.part"
+        self.headers = headers or {}
+        self.duration = duration or 0
+
+        self.process = None
+        self.bytes_per_second = 0
+        self.chunks = collections.deque()
+        self.condition = threading.Condition()
+        self.decoded_seconds = 0.0
+        self.decoding = False
+        self.discard = False  # Playback is over, only the cache copy is still wanted
+        self.cached = False
+        self.cached_callbacks = []
+
+        self.feeder = None
+        self.playing = False
+        self.paused = False
+        self.stopped = False
+        self.volume = 1.0
+        self.position = 0.0
+
+    def start(self):
+        """
+        Start downloading and decoding.
+
+        Returns:
+            bool: True if ffmpeg was started
+        """
+        ffmpeg = media_toolchain.ffmpeg
+        mixer = pygame.mixer.get_init() if PYGAME_AVAILABLE else None
+        if not ffmpeg or not mixer:
+            logger.warning("Streaming playback needs FFmpeg and an initialized pygame mixer")
+            return False
+
+        frequency, size, channels = mixer
+        if size not in _SAMPLE_FORMATS:
+            logger.warning(f"Unsupported mixer sample size for streaming: {size}")
+            return False
+        sample_format, sample_bytes = _SAMPLE_FORMATS[size]
+        self.bytes_per_second = frequency * channels * sample_bytes
+        # Keep Sound.play() from picking the stream channel for notification sounds
+        pygame.mixer.set_reserved(STREAM_CHANNEL + 1)
+
+        command = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin']
+        if self.source_url.startswith(('http://', 'https://')):
+            command += ['-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5']
+        if self.headers:
+            command += ['-headers', ''.join(f"{key}: {value}\r\n" for key, value in self.headers.items())]
+        command += ['-i', self.source_url,
+                    '-map', '0:a:0', '-f', sample_format, '-ar', str(frequency), '-ac', str(channels), 'pipe:1']
+        if media_toolchain.has_encoder('libmp3lame'):
+            command += ['-map', '0:a:0', '-c:a', 'libmp3lame', '-b:a', '192k', '-f', 'mp3', '-y', self.part_file]
+        else:
+            logger.warning("FFmpeg has no MP3 encoder, the streamed track will not be cached")
+
+        kwargs = {}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, **kwargs)
+        except Exception as e:
+            logger.error(f"Could not start FFmpeg for streaming: {str(e)}")
+            return False
+
+        self.decoding = True
+        threading.Thread(target=self._read_output, daemon=True).start()
+        logger.info(f"Streaming {os.path.basename(self.cache_file)}")
+        return True
+
+    def wait_ready(self, seconds, timeout):
+        """
+        Wait until enough audio is decoded to start playback.
+
+        Args:
+            seconds (float): Buffered audio required
+            timeout (float): Maximum wait in seconds
+
+        Returns:
+            bool: True if playback can start
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.decoded_seconds >= seconds or not self.decoding, timeout)
+            return self.decoded_seconds >= seconds or (not self.decoding and self.decoded_seconds > 0)
+
+    def when_cached(self, callback):
+        """
+        Call `callback(cache_file)` once the complete track is in the cache.
+
+        Args:
+            callback (callable): Called from the download thread, or right away if already cached
+        """
+        with self.condition:
+            if not self.cached:
+                self.cached_callbacks.append(callback)
+                return
+        callback(self.cache_file)
+
+    def play(self, volume=1.0, prebuffer=0):
+        """
+        Start output on the reserved mixer channel.
+
+        Args:
+            volume (float): Channel volume (0.0 to 1.0)
+            prebuffer (float): Seconds of audio to buffer before the first sound
+        """
+        self.volume = volume
+        self.playing = True
+        self.feeder = threading.Thread(target=self._feed_output, args=(prebuffer,), daemon=True)
+        self.feeder.start()
+
+    def pause(self):
+        self.paused = True
+        if PYGAME_AVAILABLE and pygame.mixer.get_init():
+            pygame.mixer.Channel(STREAM_CHANNEL).pause()
+
+    def resume(self):
+        self.paused = False
+        if PYGAME_AVAILABLE and pygame.mixer.get_init():
+            pygame.mixer.Channel(STREAM_CHANNEL).unpause()
+
+    def set_volume(self, volume):
+        self.volume = volume
+        if PYGAME_AVAILABLE and pygame.mixer.get_init():
+            pygame.mixer.Channel(STREAM_CHANNEL).set_volume(volume)
+
+    @property
+    def busy(self):
+        """bool: Whether the track is still playing (or waiting for more audio)."""
+        return self.playing
+
+    def stop(self):
+        """Stop output and drop the buffer; the download keeps filling the cache."""
+        self.stopped = True
+        with self.condition:
+            self.discard = True
+            self.chunks.clear()
+            self.condition.notify_all()
+        if self.feeder and self.feeder is not threading.current_thread():
+            self.feeder.join(timeout=1.0)
+        self.playing = False
+        if PYGAME_AVAILABLE and pygame.mixer.get_init():
+            pygame.mixer.Channel(STREAM_CHANNEL).stop()
+
+    def abort(self):
+        """Stop everything, including the download, and remove the partial file."""
+        self.stop()
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+    def _read_output(self):
+        """Move decoded PCM from ffmpeg into the buffer, then persist the cache copy."""
+        chunk_bytes = int(self.bytes_per_second * CHUNK_SECONDS)
+        max_chunks = max(1, int(config.STREAM_BUFFER_AHEAD_SECONDS / CHUNK_SECONDS))
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.discard or len(self.chunks) < max_chunks)
+                data = self.process.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                with self.condition:
+                    if not self.discard:
+                        self.chunks.append(data)
+                    self.decoded_seconds += len(data) / self.bytes_per_second
+                    self.condition.notify_all()
+        except Exception as e:
+            logger.error(f"Error reading streamed audio: {str(e)}")
+        returncode = self.process.wait()
+        self._persist(returncode)
+        with self.condition:
+            self.decoding = False
+            self.condition.notify_all()
+
+    def _persist(self, returncode):
+        """Move the finished MP3 into the cache, or remove a partial one."""
+        if returncode == 0 and os.path.exists(self.part_file) and os.path.getsize(self.part_file) > 10 * 1024:
+            try:
+                os.replace(self.part_file, self.cache_file)
+                logger.info(f"Streamed track cached at {self.cache_file} ({self.decoded_seconds:.0f}s)")
+                with self.condition:
+                    self.cached = True
+                    callbacks, self.cached_callbacks = self.cached_callbacks, []
+                for callback in callbacks:
+                    try:
+                        callback(self.cache_file)
+                    except Exception as e:
+                        logger.error(f"Error in stream cached callback: {str(e)}")
+                return
+            except OSError as e:
+                logger.error(f"Could not cache streamed track: {str(e)}")
+        elif returncode != 0:
+            logger.warning(f"FFmpeg stream ended with exit code {returncode}")
+        try:
+            if os.path.exists(self.part_file):
+                os.remove(self.part_file)
+        except OSError:
+            pass
+
+    def _next_chunk(self):
+        with self.condition:
+            if not self.chunks:
+                return None
+            chunk = self.chunks.popleft()
+            self.condition.notify_all()
+            return chunk
+
+    def _feed_output(self, prebuffer):
+        """Keep one Sound queued behind the playing one until the buffer runs dry."""
+        try:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.stopped or not self.decoding or self.decoded_seconds >= prebuffer)
+
+            channel = pygame.mixer.Channel(STREAM_CHANNEL)
+            channel.set_volume(self.volume)
+            underrun = False
+            last_time = time.monotonic()
+            while not self.stopped:
+                now = time.monotonic()
+                if self.paused:
+                    last_time = now
+                    time.sleep(0.05)
+                    continue
+                if channel.get_busy():
+                    self.position += now - last_time
+                last_time = now
+
+                if channel.get_queue() is None:
+                    chunk = self._next_chunk()
+                    if chunk is not None:
+                        sound = pygame.mixer.Sound(buffer=chunk)
+                        if channel.get_busy():
+                            channel.queue(sound)
+                        else:
+                            channel.play(sound)
+                            if underrun:
+                                logger.info(f"Stream resumed after buffering at {self.position:.1f}s")
+                                underrun = False
+                    elif not channel.get_busy():
+                        if not self.decoding:
+                            break
+                        if not underrun:
+                            logger.warning(f"Stream buffer ran dry at {self.position:.1f}s, waiting for data")
+                            underrun = True
+                time.sleep(0.05)
+        except Exception as e:
+            logger.error(f"Error in stream playback: {str(e)}")
+        finally:
+            self.playing = False
@@ -0,0 +1,455 @@
+# File: software/app/models/multimedia/download_engine.py
+"""
+Download engine for YouTube audio.
+
+Races the download backends with staggered (hedged) starts so a slow or stalled
+backend no longer delays a working one, keeps per-backend success and latency
+stats to try the fastest healthy backend first, and fetches direct URLs with
+parallel HTTP Range requests that resume from a sidecar journal.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ...utils import logger, config
+from ...utils.http_client import http_client
+
+
+_SOFTWARE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+MIN_AUDIO_SIZE = 10 * 1024  # Smaller downloads are treated as failed
+LATENCY_SMOOTHING = 0.3  # Weight of the newest download in the average time per backend
+
+
+class DownloadCancelled(Exception):
+    """Raised inside a backend when another backend has already won the race."""
+
+
+def check_cancelled(cancel):
+    """
+    Abort a backend that has lost the race.
+
+    Args:
+        cancel (threading.Event): The attempt's cancel event, or None
+
+    Raises:
+        DownloadCancelled: If the event is set
+    """
+    if cancel is not None and cancel.is_set():
+        raise DownloadCancelled()
+
+
+def backend_name(backend):
+    """Short stats key for a download method, e.g. _download_with_ytdlp -> ytdlp."""
+    return backend.__name__.replace('_download_with_', '').replace('_download_', '')
+
+
+class BackendStats:
+    """
+    Success counts and average download time per backend, saved between runs.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the stats.
+
+        Args:
+            path (str): JSON file (defaults to resources/cache/download_backends.json)
+        """
+        self.path = path or os.path.join(_SOFTWARE_DIR, 'resources', 'cache', 'download_backends.json')
+        self.lock = threading.Lock()
+        self.backends = self._load()
+
+    def record(self, name, success, seconds):
+        """
+        Record a finished attempt.
+
+        Args:
+            name (str): Backend name
+            success (bool): Whether it produced a usable file
+            seconds (float): Time the attempt took
+        """
+        with self.lock:
+            stats = self._entry(name)
+            stats['attempts'] += 1
+            if success:
+                stats['successes'] += 1
+                if stats['avg_seconds'] is None:
+                    stats['avg_seconds'] = seconds
+                else:
+                    stats['avg_seconds'] += LATENCY_SMOOTHING * (seconds - stats['avg_seconds'])
+            else:
+                stats['failures'] += 1
+            self._save()
+
+    def record_cancelled(self, name):
+        """Count an attempt that lost the race; it says nothing about the backend's health."""
+        with self.lock:
+            self._entry(name)['cancelled'] += 1
+            self._save()
+
+    def order(self, backends):
+        """
+        Sort backends: healthy before failing, then fastest first, then the given order.
+
+        Args:
+            backends (list): (name, backend) pairs in the default order
+
+        Returns:
+            list: The same pairs, best first
+        """
+        with self.lock:
+            def key(item):
+                index, (name, _) = item
+                stats = self.backends.get(name)
+                if not stats:
+                    return (False, float('inf'), index)
+                # Laplace-smoothed success rate, so one early failure does not bury a backend
+                health = (stats['successes'] + 1) / (stats['attempts'] + 2)
+                latency = stats['avg_seconds'] if stats['avg_seconds'] is not None else float('inf')
+                return (health < 0.5, latency, index)
+            return [pair for _, pair in sorted(enumerate(backends), key=key)]
+
+    def summary(self):
+        """
+        Get a copy of the stats.
+
+        Returns:
+            dict: name -> {attempts, successes, failures, cancelled, avg_seconds}
+        """
+        with self.lock:
+            return {name: dict(stats) for name, stats in self.backends.items()}
+
+    def _entry(self, name):
+        return self.backends.setdefault(name, {
+            'attempts': 0, 'successes': 0, 'failures': 0, 'cancelled': 0, 'avg_seconds': None
+        })
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load download backend stats: {str(e)}")
+        return {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.backends, f, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save download backend stats: {str(e)}")
+
+
+class DownloadEngine:
+    """
+    Runs download backends against each other and fetches direct URLs in chunks.
+    """
+
+    def __init__(self, stats=None):
+        """
+        Initialize the engine.
+
+        Args:
+            stats (BackendStats): Backend stats (loaded from the default file if omitted)
+        """
+        self.stats = stats or BackendStats()
+
+    def race(self, backends, video_url, output_file):
+        """
+        Download with the first backend that succeeds.
+
+        The best backend starts first; if it has not finished after DOWNLOAD_HEDGE_DELAY
+        seconds the next one starts alongside it (up to DOWNLOAD_MAX_CONCURRENT_BACKENDS),
+        and a failure starts the next one right away. Each attempt writes its own file;
+        the first valid one is moved to `output_file` and the others are cancelled and
+        their files removed. The race is given up after DOWNLOAD_TIMEOUT seconds.
+
+        Args:
+            backends (list): Callables (video_url, output_file, cancel) -> bool
+            video_url (str): YouTube video URL
+            output_file (str): Target output file path
+
+        Returns:
+            str: output_file if a backend succeeded, otherwise None
+        """
+        waiting = self.stats.order([(backend_name(backend), backend) for backend in backends])
+        results = queue.Queue()
+        running = {}  # name -> (cancel event, attempt file)
+
+        def launch():
+            name, backend = waiting.pop(0)
+            cancel = threading.Event()
+            attempt_file = self._attempt_path(output_file, name)
+            running[name] = (cancel, attempt_file)
+            logger.info(f"Trying download method: {name}")
+            threading.Thread(target=self._run_backend, daemon=True,
+                             args=(name, backend, video_url, attempt_file, cancel, results)).start()
+
+        deadline = time.monotonic() + config.DOWNLOAD_TIMEOUT
+        launch()
+        while running:
+            remaining = deadline - time.monotonic()
+            can_hedge = waiting and len(running) < config.DOWNLOAD_MAX_CONCURRENT_BACKENDS
+            try:
+                if remaining <= 0:
+                    raise queue.Empty
+                name, success = results.get(timeout=min(config.DOWNLOAD_HEDGE_DELAY, remaining)
+                                            if can_hedge else remaining)
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    logger.error(f"Download timed out after {config.DOWNLOAD_TIMEOUT}s")
+                    # Partial range downloads stay on disk so the next attempt can resume them
+                    self._discard_attempts(running, results, keep_partial=True)
+                    return None
+                logger.info(f"Download still running after {config.DOWNLOAD_HEDGE_DELAY}s, "
+                            f"starting {waiting[0][0]} alongside")
+                launch()
+                continue
+
+            _, attempt_file = running.pop(name)
+            if success:
+                os.replace(attempt_file, output_file)
+                self._discard_attempts(running, results, keep_partial=False)
+                logger.info(f"Successfully downloaded audio to {output_file} with {name} "
+                            f"({os.path.getsize(output_file)} bytes)")
+                return output_file
+            if waiting and len(running) < config.DOWNLOAD_MAX_CONCURRENT_BACKENDS:
+                launch()
+
+        logger.error("All download methods failed")
+        return None
+
+    def _discard_attempts(self, running, results, keep_partial):
+        """Cancel the attempts still running and remove their files once their backends have stopped."""
+        if not running:
+            return
+        attempts = dict(running)
+        for cancel, _ in attempts.values():
+            cancel.set()
+
+        def cleanup():
+            # A backend that ignores its cancel event is waited for only so long
+            stopped = 0
+            deadline = time.monotonic() + 30
+            while stopped < len(attempts) and time.monotonic() < deadline:
+                try:
+                    results.get(timeout=max(0.1, deadline - time.monotonic()))
+                    stopped += 1
+                except queue.Empty:
+                    break
+            for _, attempt_file in attempts.values():
+                leftovers = [attempt_file] if keep_partial else [
+                    attempt_file, f"{attempt_file}.part", f"{attempt_file}.part.json"]
+                for path in leftovers:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.warning(f"Could not remove {path}: {str(e)}")
+
+        threading.Thread(target=cleanup, daemon=True).start()
+
+    def _run_backend(self, name, backend, video_url, attempt_file, cancel, results):
+        start_time = time.monotonic()
+        success = False
+        try:
+            success = bool(backend(video_url, attempt_file, cancel))
+            if success and not os.path.exists(attempt_file):
+                logger.warning(f"{name} claimed success but the file doesn't exist")
+                success = False
+            elif success and os.path.getsize(attempt_file) < MIN_AUDIO_SIZE:
+                logger.warning(f"{name} downloaded file seems too small ({os.path.getsize(attempt_file)} bytes)")
+                success = False
+        except DownloadCancelled:
+            pass
+        except Exception as e:
+            logger.error(f"{name} error: {str(e)}")
+
+        if cancel.is_set():
+            logger.info(f"Cancelled {name}, another method finished first")
+            self.stats.record_cancelled(name)
+            success = False
+        else:
+            self.stats.record(name, success, time.monotonic() - start_time)
+
+        if not success and os.path.exists(attempt_file):
+            try:
+                os.remove(attempt_file)
+            except OSError:
+                pass
+        results.put((name, success))
+
+    @staticmethod
+    def _attempt_path(output_file, name):
+        """Per-backend file next to the target, e.g. <id>.ytdlp.mp3."""
+        stem, ext = os.path.splitext(output_file)
+        return f"{stem}.{name}{ext}"
+
+    def fetch_ranges(self, url, output_file, headers=None, total_size=None, cancel=None):
+        """
+        Download a URL with parallel Range requests, resuming a previous partial download.
+
+        Data goes to `<output_file>.part`; the chunks already written are listed in
+        `<output_file>.part.json`, so a failed or cancelled download continues where it
+        stopped. Servers that do not report a size or accept ranges get one plain GET.
+
+        Args:
+            url (str): Direct file URL
+            output_file (str): Target output file path
+            headers (dict): Extra request headers
+            total_size (int): File size if already known
+            cancel (threading.Event): Set to abort the download
+
+        Returns:
+            bool: True if the complete file was written to output_file
+
+        Raises:
+            DownloadCancelled: If `cancel` was set
+        """
+        headers = dict(headers or {})
+        headers.pop('Range', None)
+        part_file = f"{output_file}.part"
+        journal_file = f"{part_file}.json"
+
+        if not total_size:
+            response = http_client.head(url, headers=headers, timeout=10)
+            if response.status_code >= 400:
+                logger.warning(f"Download URL is not valid (status {response.status_code})")
+                return False
+            if response.headers.get('Accept-Ranges', 'bytes') == 'none':
+                return self._fetch_whole(url, output_file, headers, cancel)
+            total_size = int(response.headers.get('Content-Length') or 0)
+        if not total_size:
+            return self._fetch_whole(url, output_file, headers, cancel)
+
+        chunk_size = config.DOWNLOAD_CHUNK_SIZE
+        journal = self._load_journal(journal_file, part_file, total_size, chunk_size)
+        if journal is None:
+            journal = {'size': total_size, 'chunk_size': chunk_size, 'done': []}
+            with open(part_file, 'wb') as f:
+                f.truncate(total_size)
+        else:
+            logger.info(f"Resuming download: {len(journal['done'])} chunks already on disk")
+
+        chunk_count = (total_size + chunk_size - 1) // chunk_size
+        done = set(journal['done'])
+        pending = [index for index in range(chunk_count) if index not in done]
+        journal_lock = threading.Lock()
+        failed = threading.Event()  # Stops the other chunks when one fails for good
+
+        with ThreadPoolExecutor(max_workers=config.DOWNLOAD_CHUNK_WORKERS) as executor:
+            futures = {
+                executor.submit(self._fetch_chunk, url, part_file, headers, index * chunk_size,
+                                min(total_size, (index + 1) * chunk_size) - 1, cancel, failed): index
+                for index in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    chunk_ok = future.result()
+                except DownloadCancelled:
+                    chunk_ok = False
+                except Exception as e:
+                    logger.warning(f"Chunk {futures[future]} failed: {str(e)}")
+                    chunk_ok = False
+                if chunk_ok:
+                    with journal_lock:
+                        journal['done'].append(futures[future])
+                        self._save_journal(journal_file, journal)
+                else:
+                    failed.set()
+
+        check_cancelled(cancel)
+        if len(journal['done']) < chunk_count:
+            logger.warning(f"Download incomplete: {len(journal['done'])}/{chunk_count} chunks, "
+                           f"kept for resuming")
+            return False
+
+        os.replace(part_file, output_file)
+        try:
+            os.remove(journal_file)
+        except OSError:
+            pass
+        logger.info(f"Downloaded {total_size} bytes in {chunk_count} chunks")
+        return True
+
+    def _fetch_chunk(self, url, part_file, headers, start, end, cancel, failed):
+        """Write bytes start..end (inclusive) of the URL into the part file, with retries."""
+        expected = end - start + 1
+        attempts = 3
+        for attempt in range(attempts):
+            if failed.is_set():
+                return False
+            check_cancelled(cancel)
+            written = 0
+            try:
+                request_headers = dict(headers, Range=f"bytes={start}-{end}")
+                with http_client.stream("GET", url, headers=request_headers, timeout=60) as response:
+                    if response.status_code != 206:
+                        logger.warning(f"Range request returned HTTP {response.status_code}")
+                        return False
+                    with open(part_file, 'r+b') as f:
+                        f.seek(start)
+                        for data in response.iter_bytes(chunk_size=65536):
+                            check_cancelled(cancel)
+                            f.write(data[:expected - written])
+                            written += len(data)
+                            if written >= expected:
+                                break
+                if written >= expected:
+                    return True
+                logger.warning(f"Chunk at {start} ended early ({written}/{expected} bytes)")
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"Chunk at {start} attempt {attempt + 1} failed: {str(e)}")
+            if attempt < attempts - 1:
+                time.sleep(1 + attempt)
+        return False
+
+    def _fetch_whole(self, url, output_file, headers, cancel):
+        """Plain streamed GET for servers without range support."""
+        part_file = f"{output_file}.part"
+        with http_client.stream("GET", url, headers=headers, timeout=60) as response:
+            if response.status_code not in (200, 206):
+                logger.error(f"Download failed with status {response.status_code}")
+                return False
+            with open(part_file, 'wb') as f:
+                for data in response.iter_bytes(chunk_size=65536):
+                    check_cancelled(cancel)
+                    f.write(data)
+        os.replace(part_file, output_file)
+        return True
+
+    @staticmethod
+    def _load_journal(journal_file, part_file, total_size, chunk_size):
+        """The journal of an earlier attempt at the same file, or None to start over."""
+        try:
+            if not (os.path.exists(journal_file) and os.path.exists(part_file)):
+                return None
+            with open(journal_file, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+            if journal.get('size') != total_size or journal.get('chunk_size') != chunk_size:
+                return None
+            if os.path.getsize(part_file) != total_size:
+                return None
+            return journal
+        except Exception as e:
+            logger.warning(f"Could not load download journal: {str(e)}")
+            return None
+
+    @staticmethod
+    def _save_journal(journal_file, journal):
+        temp_path = f"{journal_file}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(journal, f)
+        os.replace(temp_path, journal_file)
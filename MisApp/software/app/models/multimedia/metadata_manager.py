@@ -1,19 +1,18 @@
 # File: software/app/models/multimedia/metadata_manager.py
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List
 import os
 import re
 import tempfile
 import shutil
 import json
 
-try:
-    import mutagen
-    from mutagen.id3 import ID3, APIC, TIT2, TPE1, TALB
-    MUTAGEN_AVAILABLE = True
-except ImportError:
-    MUTAGEN_AVAILABLE = False
-
 from ...utils import logger
+from ...utils.lazy_import import LazyModule
+from ..media_library import media_library
+
+# Tag libraries are imported when metadata is first read or written
+mutagen = LazyModule('mutagen')
+mutagen_id3 = LazyModule('mutagen.id3')
 
 class MetadataManager:
     """
@@ -23,14 +22,11 @@ class MetadataManager:
     
     def __init__(self):
         """Initialize the metadata manager."""
-        self.metadata_cache = {}  # Cache for metadata by file path
-        self.artwork_cache_dir = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
-            'resources', 'media_cache', 'artwork'
-        )
-        os.makedirs(self.artwork_cache_dir, exist_ok=True)
         logger.info("Metadata manager initialized")
         
+        # Bring the library index up to date in the background
+        media_library.rescan()
+        
         # Setup YouTube ID pattern for special handling
         self.youtube_id_pattern = re.compile(r'^[a-zA-Z0-9_-]{11}$')
     
@@ -38,21 +34,21 @@ class MetadataManager:
         """
         Get metadata for an audio file.
         
+        Reads from the media library index, which re-reads the file only when
+        its modification time or size changed since it was indexed.
+        
         Args:
             file_path: Path to the audio file
             
         Returns:
             Dictionary of track metadata
         """
-        # Return cached metadata if available
-        if file_path in self.metadata_cache:
-            return self.metadata_cache[file_path]
-            
-        # Get file base name and extension
-        file_name = os.path.basename(file_path)
-        file_base, file_ext = os.path.splitext(file_name)
+        metadata = media_library.get_track(file_path)
+        if metadata:
+            return metadata
         
-        # Default metadata
+        # File unreadable or not indexed: fall back to what the name tells us
+        file_base = os.path.splitext(os.path.basename(file_path))[0]
         metadata = {
             'title': file_base,
             'artist': 'Unknown Artist',
@@ -65,136 +61,23 @@ class MetadataManager:
             'cover_url': None,
             'youtube_id': None
         }
-        
-        # Check if this is a YouTube file (the filename would be the video ID)
-        youtube_id = None
         if self.youtube_id_pattern.match(file_base):
-            youtube_id = file_base
-            metadata['youtube_id'] = youtube_id
-            metadata['thumbnail'] = f"https://i.ytimg.com/vi/{youtube_id}/mqdefault.jpg"
-            
-        # Try to extract artist and title from filename if it follows "Artist - Title" format
-        if ' - ' in file_base and not youtube_id:
-            parts = file_base.split(' - ', 1)
-            if len(parts) == 2:
-                artist, title = parts
-                metadata['artist'] = artist.strip()
-                metadata['title'] = title.strip()
+            metadata['youtube_id'] = file_base
+            metadata['thumbnail'] = f"https://i.ytimg.com/vi/{file_base}/mqdefault.jpg"
+        return metadata
+    
+    def search_tracks(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Search the indexed library by title, artist or album.
         
-        # Try to extract metadata using mutagen if available
-        if MUTAGEN_AVAILABLE:
-            try:
-                audio = mutagen.File(file_path)
-                
-                if audio:
-                    # Extract duration
-                    if hasattr(audio.info, 'length'):
-                        metadata['duration'] = audio.info.length
-                    
-                    if isinstance(audio, mutagen.mp3.MP3) and audio.tags:
-                        # Title
-                        if 'TIT2' in audio.tags:
-                            metadata['title'] = str(audio.tags['TIT2'])
-                        # Artist
-                        if 'TPE1' in audio.tags:
-                            metadata['artist'] = str(audio.tags['TPE1'])
-                        # Album
-                        if 'TALB' in audio.tags:
-                            metadata['album'] = str(audio.tags['TALB'])
-                        
-                        # Extract album art if available
-                        if 'APIC:' in audio.tags or 'APIC' in audio.tags:
-                            apic = audio.tags['APIC:'] if 'APIC:' in audio.tags else audio.tags['APIC']
-                            cover_path = self._save_cover_art(file_path, apic.data)
-                            if cover_path:
-                                metadata['cover_url'] = cover_path
-                    
-                    # FLAC, OGG, etc. with VorbisComment tags
-                    elif hasattr(audio, 'tags') and audio.tags:
-                        tags = audio.tags
-                        
-                        # Title
-                        if 'TITLE' in tags:
-                            metadata['title'] = str(tags['TITLE'][0])
-                        # Artist
-                        if 'ARTIST' in tags:
-                            metadata['artist'] = str(tags['ARTIST'][0])
-                        # Album
-                        if 'ALBUM' in tags:
-                            metadata['album'] = str(tags['ALBUM'][0])
-                        
-                        # Cover art for FLAC
-                        if hasattr(audio, 'pictures') and audio.pictures:
-                            cover_path = self._save_cover_art(file_path, audio.pictures[0].data)
-                            if cover_path:
-                                metadata['cover_url'] = cover_path
-                    
-                    # M4A with MP4 tags
-                    elif isinstance(audio, mutagen.mp4.MP4):
-                        # Title
-                        if '\xa9nam' in audio:
-                            metadata['title'] = str(audio['\xa9nam'][0])
-                        # Artist
-                        if '\xa9ART' in audio:
-                            metadata['artist'] = str(audio['\xa9ART'][0])
-                        # Album
-                        if '\xa9alb' in audio:
-                            metadata['album'] = str(audio['\xa9alb'][0])
-                            
-                        # Cover art
-                        if 'covr' in audio:
-                            cover_path = self._save_cover_art(file_path, audio['covr'][0])
-                            if cover_path:
-                                metadata['cover_url'] = cover_path
+        Args:
+            query: Words to look for
+            limit: Maximum number of results
             
-            except Exception as e:
-                logger.warning(f"Error extracting metadata from {file_path}: {str(e)}")
-        
-        # Special case for YouTube files: Try to load metadata from adjacent JSON file
-        if youtube_id:
-            json_path = os.path.join(os.path.dirname(file_path), f"{youtube_id}.json")
-            if os.path.exists(json_path):
-                try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        yt_metadata = json.load(f)
-                        
-                    if 'title' in yt_metadata:
-                        metadata['title'] = yt_metadata['title']
-                    if 'channel' in yt_metadata:
-                        metadata['artist'] = yt_metadata['channel']
-                    if 'thumbnail' in yt_metadata:
-                        metadata['cover_url'] = yt_metadata['thumbnail']
-                        
-                    metadata['album'] = 'YouTube'
-                    logger.info(f"Successfully loaded metadata for YouTube video {youtube_id} - Title: {metadata['title']}")
-                except Exception as e:
-                    logger.warning(f"Error loading YouTube metadata from JSON: {str(e)}")
-            else:
-                # Try to look for a JSON file with a more general search
-                try:
-                    json_files = [f for f in os.listdir(os.path.dirname(file_path)) 
-                                if f.startswith(youtube_id) and f.endswith('.json')]
-                    if json_files:
-                        json_path = os.path.join(os.path.dirname(file_path), json_files[0])
-                        with open(json_path, 'r', encoding='utf-8') as f:
-                            yt_metadata = json.load(f)
-                            
-                        if 'title' in yt_metadata:
-                            metadata['title'] = yt_metadata['title']
-                        if 'channel' in yt_metadata:
-                            metadata['artist'] = yt_metadata['channel']
-                        if 'thumbnail' in yt_metadata:
-                            metadata['cover_url'] = yt_metadata['thumbnail']
-                            
-                        metadata['album'] = 'YouTube'
-                        logger.info(f"Successfully loaded metadata for YouTube video {youtube_id} using alternative JSON path")
-                except Exception as e:
-                    logger.warning(f"Error during alternative YouTube metadata search: {str(e)}")
-        
-        # Cache the metadata
-        self.metadata_cache[file_path] = metadata
-        
-        return metadata
+        Returns:
+            List of track metadata dictionaries, best match first
+        """
+        return media_library.search(query, limit)
     
     def update_track_metadata(self, file_path: str, metadata: Dict[str, Any]) -> bool:
         """
@@ -207,7 +90,7 @@ class MetadataManager:
         Returns:
             Success status
         """
-        if not MUTAGEN_AVAILABLE:
+        if not mutagen.available:
             logger.warning("Mutagen not available. Cannot update metadata.")
             return False
             
@@ -233,10 +116,6 @@ class MetadataManager:
                         json.dump(metadata, f, ensure_ascii=False, indent=2)
                     logger.info(f"Saved YouTube metadata to {json_path}")
                     
-                    # Update cache
-                    if file_path in self.metadata_cache:
-                        self.metadata_cache[file_path].update(metadata)
-                    
                     return True
                 
                 logger.warning(f"Unsupported file type for metadata update: {file_ext}")
@@ -251,26 +130,22 @@ class MetadataManager:
         try:
             # Load ID3 tags
             try:
-                tags = ID3(file_path)
+                tags = mutagen_id3.ID3(file_path)
             except:
                 # Create ID3 tags if not present
-                tags = ID3()
+                tags = mutagen_id3.ID3()
             
             # Update tags
             if 'title' in metadata:
-                tags['TIT2'] = TIT2(encoding=3, text=metadata['title'])
+                tags['TIT2'] = mutagen_id3.TIT2(encoding=3, text=metadata['title'])
             if 'artist' in metadata:
-                tags['TPE1'] = TPE1(encoding=3, text=metadata['artist'])
+                tags['TPE1'] = mutagen_id3.TPE1(encoding=3, text=metadata['artist'])
             if 'album' in metadata:
-                tags['TALB'] = TALB(encoding=3, text=metadata['album'])
+                tags['TALB'] = mutagen_id3.TALB(encoding=3, text=metadata['album'])
             
             # Save tags
             tags.save(file_path)
             
-            # Update cache
-            if file_path in self.metadata_cache:
-                self.metadata_cache[file_path].update(metadata)
-            
             logger.info(f"Updated MP3 metadata for {file_path}")
             return True
             
@@ -295,10 +170,6 @@ class MetadataManager:
             # Save changes
             flac.save()
             
-            # Update cache
-            if file_path in self.metadata_cache:
-                self.metadata_cache[file_path].update(metadata)
-            
             logger.info(f"Updated FLAC metadata for {file_path}")
             return True
             
@@ -323,10 +194,6 @@ class MetadataManager:
             # Save changes
             ogg.save()
             
-            # Update cache
-            if file_path in self.metadata_cache:
-                self.metadata_cache[file_path].update(metadata)
-            
             logger.info(f"Updated OGG metadata for {file_path}")
             return True
             
@@ -351,10 +218,6 @@ class MetadataManager:
             # Save changes
             m4a.save()
             
-            # Update cache
-            if file_path in self.metadata_cache:
-                self.metadata_cache[file_path].update(metadata)
-            
             logger.info(f"Updated M4A metadata for {file_path}")
             return True
             
@@ -362,38 +225,9 @@ class MetadataManager:
             logger.error(f"Error updating M4A metadata: {str(e)}")
             return False
     
-    def _save_cover_art(self, file_path: str, cover_data: bytes) -> Optional[str]:
-        """
-        Save cover art data to a file.
-        
-        Args:
-            file_path: Path of the source audio file
-            cover_data: Binary data of the cover art
-            
-        Returns:
-            Path to the saved cover art file, or None if failed
-        """
-        try:
-            # Generate a unique filename based on the file path
-            import hashlib
-            file_hash = hashlib.md5(file_path.encode()).hexdigest()
-            cover_filename = f"cover_{file_hash}.jpg"
-            cover_path = os.path.join(self.artwork_cache_dir, cover_filename)
-            
-            # Save cover art
-            with open(cover_path, 'wb') as f:
-                f.write(cover_data)
-            
-            logger.info(f"Saved cover art to {cover_path}")
-            return cover_path
-            
-        except Exception as e:
-            logger.error(f"Error saving cover art: {str(e)}")
-            return None
-    
     def clear_cache(self):
-        """Clear the metadata cache."""
-        self.metadata_cache.clear()
+        """Clear the metadata index; tracks are re-read on their next lookup."""
+        media_library.clear()
     
     def save_youtube_metadata(self, video_id: str, metadata: Dict[str, Any], audio_file: str) -> bool:
         """
@@ -417,20 +251,6 @@ class MetadataManager:
             
             logger.info(f"Saved YouTube metadata to {json_path}")
             
-            # Update cache for audio file
-            self.metadata_cache[audio_file] = {
-                'title': metadata.get('title', 'Unknown Title'),
-                'artist': metadata.get('channel', 'YouTube'),
-                'album': 'YouTube',
-                'duration': metadata.get('duration', 0),
-                'position': 0,
-                'file_path': audio_file,
-                'is_playing': True,
-                'is_paused': False,
-                'cover_url': metadata.get('thumbnail', None),
-                'youtube_id': video_id
-            }
-            
             return True
             
         except Exception as e:
@@ -1,7 +1,8 @@
 # File: software/app/models/multimedia/playlist_manager.py
 from typing import List, Optional
 import os
-from ...utils import logger
+from ...utils import config, logger
+from ..media_cache import media_cache
 
 class PlaylistManager:
     """
@@ -10,14 +11,62 @@ class PlaylistManager:
     
     def __init__(self, audio_player=None):
         """Initialize the playlist manager."""
-        self.audio_player = audio_player
+        self.audio_player = None
         self.playlist = []
         self.current_track_index = -1
+        self.set_audio_player(audio_player)
+        # Songs in the playlist stay in the download cache
+        media_cache.add_pin_source(self._pinned_tracks)
         logger.info("Playlist manager initialized")
     
     def set_audio_player(self, audio_player):
         """Set the audio player reference."""
         self.audio_player = audio_player
+        if audio_player and hasattr(audio_player, 'register_callback'):
+            # Follow track changes, including the player's own switch to the next track
+            audio_player.register_callback(self._on_player_event)
+    
+    def _on_player_event(self, event_type, data):
+        if event_type == 'playback_started' and isinstance(data, dict):
+            if data.get('file_path') in self.playlist:
+                self.current_track_index = self.playlist.index(data['file_path'])
+            media_cache.record_play(data.get('file_path'))
+            self.prefetch_next()
+    
+    def _pinned_tracks(self) -> List[str]:
+        """Playlist tracks plus the playing one (which may have left the playlist)."""
+        tracks = list(self.playlist)
+        if self.audio_player and getattr(self.audio_player, 'currently_playing', None):
+            tracks.append(self.audio_player.currently_playing)
+        return tracks
+    
+    def _upcoming_track(self) -> Optional[str]:
+        """Track that plays after the current one: itself in loop mode, None at the end."""
+        if getattr(self.audio_player, 'loop_mode', False):
+            return self.audio_player.currently_playing
+        next_index = self.current_track_index + 1
+        if self.current_track_index < 0 or next_index >= len(self.playlist):
+            return None
+        return self.playlist[next_index]
+    
+    def prefetch_next(self):
+        """Prepare the upcoming track in the background, or drop a prepared one that no longer follows."""
+        if not self.audio_player or not hasattr(self.audio_player, 'prefetcher'):
+            return
+        
+        upcoming = None
+        if config.ENABLE_TRACK_PREFETCH and (self.audio_player.is_playing or self.audio_player.is_paused):
+            upcoming = self._upcoming_track()
+        prepared = self.audio_player.next_track
+        if prepared and prepared['file_path'] == upcoming:
+            return
+        
+        if prepared:
+            self.audio_player.set_next_track(None)
+        if upcoming:
+            self.audio_player.prefetcher.prepare(upcoming, self.audio_player.set_next_track)
+        else:
+            self.audio_player.prefetcher.cancel()
     
     def get_playlist(self) -> List[str]:
         """Get the current playlist."""
@@ -45,6 +94,7 @@ class PlaylistManager:
             # Update playlist
             self.playlist = valid_paths
             self.current_track_index = -1
+            self.prefetch_next()
             
             logger.info(f"Playlist updated with {len(valid_paths)} tracks")
             return True
@@ -79,6 +129,7 @@ class PlaylistManager:
                 self.current_track_index = self.playlist.index(file_path)
                 logger.info(f"Track already in playlist, set as current: {os.path.basename(file_path)}")
             
+            self.prefetch_next()
             return True
                 
         except Exception as e:
@@ -90,6 +141,7 @@ class PlaylistManager:
         try:
             self.playlist = []
             self.current_track_index = -1
+            self.prefetch_next()
             logger.info("Playlist cleared")
             return True
         except Exception as e:
@@ -226,6 +278,9 @@ class PlaylistManager:
                 except ValueError:
                     self.current_track_index = 0
             
+            # The shuffled order decides which track comes next
+            self.prefetch_next()
+            
             logger.info("Playlist shuffled")
             return True
                 
@@ -0,0 +1,137 @@
+# File: software/app/models/multimedia/track_prefetcher.py
+"""
+Preparation of the next playlist track while the current one plays.
+
+Metadata and artwork are read (and indexed) ahead of time, remote cover art is
+stored locally, formats pygame cannot play are transcoded through the transcode
+cache and the visualizer's waveform is queued for analysis, so the player can
+switch to the next track without waiting.
+"""
+
+import os
+import threading
+import time
+
+from ...utils import config, logger
+from ...utils.http_client import http_client
+from ..artwork_store import artwork_store
+from ..transcode_cache import transcode_cache
+from ..waveform_analyzer import waveform_analyzer
+
+
+PLAYABLE_FORMATS = ('.mp3', '.wav', '.ogg')  # Formats pygame.mixer.music loads directly
+
+
+class TrackPrefetcher:
+    """
+    Prepares one upcoming track at a time.
+
+    Asking for a different track, or cancelling, abandons the previous job and kills
+    its transcode, so playlist edits never leave stale work running.
+    """
+
+    def __init__(self, metadata_manager=None):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            metadata_manager (MetadataManager): Source of track metadata
+        """
+        self.metadata_manager = metadata_manager
+        self.lock = threading.Lock()
+        self.pending = None  # Track being prepared
+        self.cancel_event = None  # Set to abandon the running job
+
+    def prepare(self, file_path, callback):
+        """
+        Prepare a track in the background.
+
+        Args:
+            file_path (str): Track to prepare
+            callback (callable): Called with the prepared track dict ('file_path', 'playable',
+                'metadata', 'duration') unless the job was cancelled or replaced meanwhile
+        """
+        with self.lock:
+            if file_path == self.pending:
+                return
+            if self.cancel_event:
+                self.cancel_event.set()
+            self.pending = file_path
+            cancel = self.cancel_event = threading.Event()
+        threading.Thread(target=self._prepare, args=(file_path, callback, cancel), daemon=True).start()
+
+    def cancel(self):
+        """Abandon the current job."""
+        with self.lock:
+            if self.cancel_event:
+                self.cancel_event.set()
+            self.pending = None
+            self.cancel_event = None
+
+    @staticmethod
+    def playable_path(file_path, cancel=None):
+        """
+        Get a file pygame can load for a track, transcoding it if needed.
+
+        Args:
+            file_path (str): Track path
+            cancel (threading.Event): Set to abandon the transcode
+
+        Returns:
+            str: The track's transcoded copy or the track itself, or None if it cannot be played
+        """
+        prepared = transcode_cache.get(file_path)
+        if prepared:
+            return prepared
+        if os.path.splitext(file_path)[1].lower() in PLAYABLE_FORMATS:
+            return file_path
+        return transcode_cache.transcode(file_path, cancel)
+
+    def _prepare(self, file_path, callback, cancel):
+        start_time = time.monotonic()
+        try:
+            metadata = self.metadata_manager.get_track_metadata(file_path) if self.metadata_manager else {}
+            if cancel.is_set():
+                return
+            self._fetch_cover(metadata)
+
+            playable = self.playable_path(file_path, cancel)
+            if playable is None:
+                return
+            # After the transcode, so the analysis decodes the prepared copy
+            waveform_analyzer.analyze(file_path)
+
+            prepared = {
+                'file_path': file_path,
+                'playable': playable,
+                'metadata': metadata,
+                'duration': metadata.get('duration') or 0,
+            }
+            with self.lock:
+                if cancel.is_set():
+                    return
+                callback(prepared)
+            logger.info(f"Prepared next track {os.path.basename(file_path)} "
+                        f"in {time.monotonic() - start_time:.1f}s")
+        except Exception as e:
+            logger.error(f"Error preparing next track: {str(e)}")
+        finally:
+            with self.lock:
+                if cancel is self.cancel_event:
+                    self.pending = None
+                    self.cancel_event = None
+
+    @staticmethod
+    def _fetch_cover(metadata):
+        """Store a remote cover (e.g. a YouTube thumbnail) so the player shows it at once."""
+        cover_url = metadata.get('cover_url')
+        if not cover_url or not cover_url.startswith(('http://', 'https://')):
+            return
+        if artwork_store.digest_for_url(cover_url):
+            return
+        try:
+            response = http_client.get(cover_url, timeout=config.ARTWORK_FETCH_TIMEOUT)
+            response.raise_for_status()
+            artwork_store.put_url(cover_url, response.content)
+        except Exception as e:
+            logger.warning(f"Could not prefetch cover art: {str(e)}")
@@ -4,7 +4,6 @@ import os
 import re
 import tempfile
 import shutil
-import requests
 import logging
 import random
 import urllib.parse
@@ -12,34 +11,34 @@ import time
 import threading
 import json
 import html  
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 
-try:
-    from googleapiclient.discovery import build
-    from googleapiclient.errors import HttpError
-    YOUTUBE_API_AVAILABLE = True
-except ImportError:
-    YOUTUBE_API_AVAILABLE = False
+from ...utils import logger, config
+from ...utils.http_client import http_client
+from ...utils.lazy_import import LazyModule
+from ..media_cache import media_cache
+from ..media_toolchain import media_toolchain
+from ..transcode_cache import transcode_cache
+from .audio_stream import AudioStream
+from .download_engine import DownloadEngine, DownloadCancelled, check_cancelled
 
-try:
-    from pytube import YouTube, Search
-    PYTUBE_AVAILABLE = True
-except ImportError:
-    PYTUBE_AVAILABLE = False
 
-try:
-    import yt_dlp
-    YT_DLP_AVAILABLE = True
-except ImportError:
-    YT_DLP_AVAILABLE = False
+def _setup_pafy(module):
+    module.g.opener.addheaders = [('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')]
 
-try:
-    import pafy
-    PAFY_AVAILABLE = True
-    pafy.g.opener.addheaders = [('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')]
-except ImportError:
-    PAFY_AVAILABLE = False
 
-from ...utils import logger, config
+# Download backends are imported on the first search or download, not with the app
+youtube_api = LazyModule('googleapiclient.discovery')
+youtube_api_errors = LazyModule('googleapiclient.errors')
+pytube = LazyModule('pytube')
+yt_dlp = LazyModule('yt_dlp')
+pafy = LazyModule('pafy', setup=_setup_pafy)
+
+# Video entries embedded in the results page (ytInitialData), read before asking per-video pages
+_VIDEO_RENDERER = re.compile(r'"videoRenderer":\{"videoId":"([0-9A-Za-z_-]{11})".*?"title":\{"runs":\[\{"text":"((?:[^"\\]|\\.)*)"')
+_OWNER_TEXT = re.compile(r'"ownerText":\{"runs":\[\{"text":"((?:[^"\\]|\\.)*)"')
 
 class YouTubeDownloader:
     """
@@ -59,20 +58,37 @@ class YouTubeDownloader:
         self.temp_dir = os.path.join(tempfile.gettempdir(), 'mis_youtube_temp')
         os.makedirs(self.temp_dir, exist_ok=True)
         
-        self.download_methods = []
-        if PYTUBE_AVAILABLE:
-            self.download_methods.append(self._download_with_pytube)
-        if YT_DLP_AVAILABLE:
-            self.download_methods.append(self._download_with_ytdlp)
-        if PAFY_AVAILABLE:
-            self.download_methods.append(self._download_with_pafy)
+        self._download_methods = None
+        self.download_engine = DownloadEngine()
         
-        self.download_methods.append(self._download_direct_stream)
+        # Search results per normalized query, least recently used first
+        self.search_cache = OrderedDict()
+        self.search_cache_lock = threading.Lock()
+        self.search_cache_path = os.path.join(os.path.dirname(self.cache_dir), 'cache', 'youtube_search.json')
+        self._load_search_cache()
+    
+    @property
+    def download_methods(self):
+        """list: Download methods in default order (the engine reorders them by past results)."""
+        if self._download_methods is None:
+            methods = []
+            if pytube.available:
+                methods.append(self._download_with_pytube)
+            if yt_dlp.available:
+                methods.append(self._download_with_ytdlp)
+            if pafy.available:
+                methods.append(self._download_with_pafy)
+            methods.append(self._download_direct_stream)
+            self._download_methods = methods
+        return self._download_methods
     
     def search_youtube(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """
         Search for videos on YouTube based on a query.
         
+        Results are cached per normalized query for YOUTUBE_SEARCH_CACHE_TTL hours,
+        so asking for the same song again needs no network request.
+        
         Args:
             query: The search query
             max_results: Maximum number of results to return
@@ -80,11 +96,76 @@ class YouTubeDownloader:
         Returns:
             List of video information dictionaries
         """
+        key = self._normalize_query(query)
+        cached = self._get_cached_search(key, max_results)
+        if cached is not None:
+            logger.info(f"Using cached search results for: {query}")
+            return cached
+        
+        videos = self._search_uncached(query, max_results)
+        if videos:
+            self._store_search(key, max_results, videos)
+        return [dict(video) for video in videos]
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Cache key for a query: NFC, case-folded, single spaces."""
+        return ' '.join(unicodedata.normalize('NFC', query).casefold().split())
+    
+    def _get_cached_search(self, key: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """Copies of the cached results for a query, or None if missing, too short or expired."""
+        with self.search_cache_lock:
+            entry = self.search_cache.get(key)
+            if not entry:
+                return None
+            if time.time() - entry['time'] > config.YOUTUBE_SEARCH_CACHE_TTL * 3600:
+                del self.search_cache[key]
+                return None
+            if entry['max_results'] < max_results and len(entry['videos']) >= entry['max_results']:
+                # Cached search asked for fewer results than this one
+                return None
+            self.search_cache.move_to_end(key)
+            return [dict(video) for video in entry['videos'][:max_results]]
+    
+    def _store_search(self, key: str, max_results: int, videos: List[Dict[str, Any]]) -> None:
+        with self.search_cache_lock:
+            self.search_cache[key] = {'time': time.time(), 'max_results': max_results, 'videos': videos}
+            self.search_cache.move_to_end(key)
+            while len(self.search_cache) > config.YOUTUBE_SEARCH_CACHE_MAX_ENTRIES:
+                self.search_cache.popitem(last=False)
+        self._save_search_cache()
+    
+    def _load_search_cache(self) -> None:
+        try:
+            if os.path.exists(self.search_cache_path):
+                with open(self.search_cache_path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+                now = time.time()
+                for key, entry in entries:
+                    if now - entry['time'] <= config.YOUTUBE_SEARCH_CACHE_TTL * 3600:
+                        self.search_cache[key] = entry
+        except Exception as e:
+            logger.warning(f"Could not load YouTube search cache: {str(e)}")
+    
+    def _save_search_cache(self) -> None:
+        try:
+            with self.search_cache_lock:
+                data = json.dumps(list(self.search_cache.items()), ensure_ascii=False)
+            os.makedirs(os.path.dirname(self.search_cache_path), exist_ok=True)
+            temp_path = f"{self.search_cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.search_cache_path)
+        except Exception as e:
+            logger.warning(f"Could not save YouTube search cache: {str(e)}")
+    
+    def _search_uncached(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Search with the YouTube Data API, pytube or the results page, in that order."""
         # Method 1: Use YouTube Data API if available
-        if YOUTUBE_API_AVAILABLE and config.YOUTUBE_API_KEY:
+        if config.YOUTUBE_API_KEY and youtube_api.available:
             try:
                 logger.info(f"Searching for '{query}' using YouTube Data API")
-                youtube = build('youtube', 'v3', developerKey=config.YOUTUBE_API_KEY)
+                youtube = youtube_api.build('youtube', 'v3', developerKey=config.YOUTUBE_API_KEY)
                 
                 search_response = youtube.search().list(
                     q=query,
@@ -108,15 +189,15 @@ class YouTubeDownloader:
                 
                 logger.info(f"Found {len(videos)} videos for: {query}")
                 return videos
-            except HttpError as e:
+            except youtube_api_errors.HttpError as e:
                 logger.error(f"YouTube API error: {str(e)}")
             except Exception as e:
                 logger.error(f"Error searching with YouTube API: {str(e)}")
         
-        if PYTUBE_AVAILABLE:
+        if pytube.available:
             try:
                 logger.info(f"Searching for '{query}' using pytube Search")
-                search = Search(query)
+                search = pytube.Search(query)
                 videos = []
                 
                 results = search.results
@@ -149,7 +230,7 @@ class YouTubeDownloader:
                 'Accept-Language': 'en-US,en;q=0.9',
             }
             
-            response = requests.get(url, headers=headers)
+            response = http_client.get(url, headers=headers)
             if response.status_code != 200:
                 logger.error(f"Error fetching search results: HTTP {response.status_code}")
                 return []
@@ -163,19 +244,23 @@ class YouTubeDownloader:
                 if len(unique_ids) >= max_results:
                     break
             
+            # Titles and channels listed on the results page itself need no extra request
+            page_info = self._parse_search_page(response.text)
+            
             videos = []
             for video_id in unique_ids:
+                title, channel = page_info.get(video_id, (None, None))
                 video_info = {
                     'id': video_id,
-                    'title': f"YouTube Video {video_id}",  
+                    'title': title or f"YouTube Video {video_id}",  
                     'description': '',
                     'thumbnail': f"https://i.ytimg.com/vi/{video_id}/default.jpg",
-                    'channel': 'YouTube',
+                    'channel': channel or 'YouTube',
                     'url': f"https://www.youtube.com/watch?v={video_id}"
                 }
                 videos.append(video_info)
             
-            self._fetch_video_titles(videos)
+            self._fetch_video_titles([video for video in videos if video['id'] not in page_info])
             
             logger.info(f"Found {len(videos)} videos for: {query}")
             return videos
@@ -183,39 +268,100 @@ class YouTubeDownloader:
             logger.error(f"Error searching with direct method: {str(e)}")
         return []
     
+    @staticmethod
+    def _parse_search_page(page: str) -> Dict[str, tuple]:
+        """
+        Read titles and channels from the video entries embedded in a results page.
+        
+        Args:
+            page: HTML of https://www.youtube.com/results
+            
+        Returns:
+            Dictionary of video ID -> (title, channel or None)
+        """
+        info = {}
+        matches = list(_VIDEO_RENDERER.finditer(page))
+        for index, match in enumerate(matches):
+            try:
+                video_id = match.group(1)
+                title = json.loads(f'"{match.group(2)}"')
+                # The channel name follows the title inside the same entry
+                entry_end = matches[index + 1].start() if index + 1 < len(matches) else len(page)
+                owner_match = _OWNER_TEXT.search(page, match.end(), entry_end)
+                channel = json.loads(f'"{owner_match.group(1)}"') if owner_match else None
+                info.setdefault(video_id, (html.unescape(title), html.unescape(channel) if channel else None))
+            except ValueError:
+                continue
+        return info
+    
     def _fetch_video_titles(self, videos: List[Dict[str, Any]]) -> None:
         """
         Try to fetch video titles for videos found via direct search.
         
+        Titles are fetched in parallel (YOUTUBE_TITLE_FETCH_WORKERS at a time). After
+        YOUTUBE_TITLE_FETCH_TIMEOUT seconds the search returns with what it has; the
+        remaining lookups finish in the background and update the cached results.
+        
         Args:
             videos: List of video info dictionaries to update with titles
         """
-        for video in videos:
-            try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                }
-                response = requests.get(video['url'], headers=headers)
-                
-                if response.status_code == 200:
-                    # Try to extract title
-                    title_match = re.search(r'<title>(.*?)</title>', response.text)
-                    if title_match:
-                        title = title_match.group(1)
-                        
-                        if " - YouTube" in title:
-                            title = title.replace(" - YouTube", "")
-                       
-                        title = html.unescape(title)
-                        video['title'] = title
+        if not videos:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=min(config.YOUTUBE_TITLE_FETCH_WORKERS, len(videos)))
+        futures = [executor.submit(self._fetch_video_title, video) for video in videos]
+        executor.shutdown(wait=False)
+        
+        _, pending = wait(futures, timeout=config.YOUTUBE_TITLE_FETCH_TIMEOUT)
+        if pending:
+            logger.info(f"{len(pending)} video titles still loading, returning partial results")
+            
+            def save_when_done():
+                wait(pending)
+                self._save_search_cache()
+            
+            threading.Thread(target=save_when_done, daemon=True).start()
+    
+    def _fetch_video_title(self, video: Dict[str, Any]) -> None:
+        """Fill in one video's title and channel from oEmbed, or from its watch page."""
+        try:
+            response = http_client.get("https://www.youtube.com/oembed",
+                                       params={'url': video['url'], 'format': 'json'},
+                                       timeout=config.YOUTUBE_TITLE_FETCH_TIMEOUT)
+            if response.status_code == 200:
+                data = response.json()
+                video['title'] = html.unescape(data['title'])
+                if data.get('author_name'):
+                    video['channel'] = html.unescape(data['author_name'])
+                return
+        except Exception as e:
+            logger.warning(f"oEmbed lookup failed for video {video['id']}: {str(e)}")
+        
+        try:
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            }
+            response = http_client.get(video['url'], headers=headers, timeout=config.YOUTUBE_TITLE_FETCH_TIMEOUT * 3)
+            
+            if response.status_code == 200:
+                # Try to extract title
+                title_match = re.search(r'<title>(.*?)</title>', response.text)
+                if title_match:
+                    title = title_match.group(1)
                     
-                    channel_match = re.search(r'"ownerChannelName":"(.*?)"', response.text)
-                    if channel_match:
-                        channel = channel_match.group(1)
-                        channel = html.unescape(channel)
-                        video['channel'] = channel
-            except Exception as e:
-                logger.warning(f"Error fetching title for video {video['id']}: {str(e)}")
+                    if " - YouTube" in title:
+                        title = title.replace(" - YouTube", "")
+                   
+                    title = html.unescape(title)
+                    video['title'] = title
+                
+                channel_match = re.search(r'"ownerChannelName":"(.*?)"', response.text)
+                if channel_match:
+                    channel = channel_match.group(1)
+                    channel = html.unescape(channel)
+                    video['channel'] = channel
+        except Exception as e:
+            logger.warning(f"Error fetching title for video {video['id']}: {str(e)}")
     
     def download_audio(self, video_url: str, output_dir: Optional[str] = None) -> Optional[str]:
         """
@@ -243,79 +389,40 @@ class YouTubeDownloader:
         
         output_file = os.path.join(output_dir, f"{video_id}.mp3")
         
-        # Kiểm tra tệp đã tải xuống trước đó có hợp lệ hay không
-        if os.path.exists(output_file):
-            # Kiểm tra kích thước tệp (tối thiểu 10 KB)
-            file_size = os.path.getsize(output_file)
-            if file_size > 10 * 1024:  # Lớn hơn 10KB
-                try:
-                    # Thử đọc header của tệp MP3 để xác minh nó là MP3 hợp lệ
-                    with open(output_file, 'rb') as f:
-                        header = f.read(4)
-                        if header.startswith(b'ID3') or header.startswith(b'\xff\xfb') or header.startswith(b'\xff\xfa'):
-                            logger.info(f"Using cached YouTube audio at {output_file}")
-                            return output_file
-                        else:
-                            logger.warning(f"Cached file exists but has invalid header: {output_file}")
-                            # Xóa tệp không hợp lệ
-                            os.remove(output_file)
-                except Exception as e:
-                    logger.warning(f"Error checking cached file: {str(e)}")
-                    # Xóa tệp có thể bị hỏng
-                    try:
-                        os.remove(output_file)
-                        logger.info(f"Removed potentially corrupt file: {output_file}")
-                    except Exception:
-                        pass
-            else:
-                logger.warning(f"Cached file exists but is too small ({file_size} bytes): {output_file}")
-                # Xóa tệp quá nhỏ
-                try:
-                    os.remove(output_file)
-                    logger.info(f"Removed small file: {output_file}")
-                except Exception:
-                    pass
-        
-        # Thử từng phương thức tải xuống, ưu tiên trong thứ tự
-        for method in self.download_methods:
-            try:
-                logger.info(f"Trying download method: {method.__name__}")
-                if method(video_url, output_file):
-                    # Xác minh lại tệp tải xuống
-                    if os.path.exists(output_file):
-                        file_size = os.path.getsize(output_file)
-                        if file_size < 10 * 1024:  # Nhỏ hơn 10KB
-                            logger.warning(f"Downloaded file seems too small ({file_size} bytes), trying next method")
-                            continue
-                        
-                        logger.info(f"Successfully downloaded audio to {output_file} ({file_size} bytes)")
-                        return output_file
-                    else:
-                        logger.warning("Download method claimed success but file doesn't exist")
-            except Exception as e:
-                logger.error(f"{method.__name__} error: {str(e)}")
-        
-        # Tất cả phương thức đều thất bại
-        logger.error("All download methods failed")
-        return None
+        # Kiểm tra tệp đã tải xuống trước đó có hợp lệ hay không (the cache index makes this a stat)
+        if os.path.exists(output_file) and media_cache.lookup(output_file):
+            logger.info(f"Using cached YouTube audio at {output_file}")
+            transcode_cache.prepare(output_file)
+            return output_file
+        
+        # Chạy đua các phương thức tải xuống, ưu tiên phương thức nhanh và ổn định nhất
+        result = self.download_engine.race(self.download_methods, video_url, output_file)
+        if result:
+            media_cache.register(result)
+            # Decode once in the background so playback and seeking use the prepared copy
+            transcode_cache.prepare(result)
+        return result
     
-    def _download_with_pytube(self, video_url: str, output_file: str) -> bool:
+    def _download_with_pytube(self, video_url: str, output_file: str,
+                              cancel: Optional[threading.Event] = None) -> bool:
         """
         Download YouTube audio using pytube.
         
         Args:
             video_url: YouTube video URL
             output_file: Target output file path
+            cancel: Set when another method has finished first
             
         Returns:
             True if successful, False otherwise
         """
-        if not PYTUBE_AVAILABLE:
+        if not pytube.available:
             return False
         
         try:
             logger.info(f"Downloading with pytube: {video_url}")
-            yt = YouTube(video_url)
+            yt = pytube.YouTube(video_url)
+            yt.register_on_progress_callback(lambda stream, chunk, remaining: check_cancelled(cancel))
             
             # Get audio stream (prioritize higher quality)
             audio_stream = yt.streams.filter(only_audio=True).order_by('abr').desc().first()
@@ -333,22 +440,26 @@ class YouTubeDownloader:
             
             return os.path.exists(output_file)
             
+        except DownloadCancelled:
+            raise
         except Exception as e:
             logger.error(f"Pytube download error: {str(e)}")
             return False
     
-    def _download_with_ytdlp(self, video_url: str, output_file: str) -> bool:
+    def _download_with_ytdlp(self, video_url: str, output_file: str,
+                             cancel: Optional[threading.Event] = None) -> bool:
         """
         Download YouTube audio using yt-dlp.
         
         Args:
             video_url: YouTube video URL
             output_file: Target output file path
+            cancel: Set when another method has finished first
             
         Returns:
             True if successful, False otherwise
         """
-        if not YT_DLP_AVAILABLE:
+        if not yt_dlp.available:
             return False
         
         try:
@@ -374,42 +485,12 @@ class YouTubeDownloader:
                     'preferredquality': '192',
                 }],
                 'prefer_ffmpeg': True,
+                'progress_hooks': [lambda status: check_cancelled(cancel)],
             }
             
-            if config.FFMPEG_PATH:
-                import platform
-                import shutil
-                
-                ffmpeg_exe = None
-                if platform.system() == 'Windows':
-                    potential_paths = [
-                        os.path.join(config.FFMPEG_PATH, 'bin', 'ffmpeg.exe'),
-                        os.path.join(config.FFMPEG_PATH, 'ffmpeg.exe'),
-                        config.FFMPEG_PATH if config.FFMPEG_PATH.endswith('.exe') else None
-                    ]
-                else:
-                    potential_paths = [
-                        os.path.join(config.FFMPEG_PATH, 'bin', 'ffmpeg'),
-                        os.path.join(config.FFMPEG_PATH, 'ffmpeg'),
-                        config.FFMPEG_PATH
-                    ]
-                
-                # Filter out None values
-                potential_paths = [p for p in potential_paths if p]
-                
-                # Try each path
-                for path in potential_paths:
-                    if os.path.exists(path):
-                        ffmpeg_exe = path
-                        break
-                
-                if not ffmpeg_exe:
-                    # Try using system FFmpeg
-                    ffmpeg_exe = shutil.which('ffmpeg')
-                
-                if ffmpeg_exe:
-                    logger.info(f"Using FFmpeg at {ffmpeg_exe} for yt-dlp")
-                    ydl_opts['ffmpeg_location'] = os.path.dirname(ffmpeg_exe)
+            if media_toolchain.ffmpeg:
+                logger.info(f"Using FFmpeg at {media_toolchain.ffmpeg} for yt-dlp")
+                ydl_opts['ffmpeg_location'] = media_toolchain.ffmpeg_dir
             
             # Download the video
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
@@ -447,22 +528,26 @@ class YouTubeDownloader:
             
             return False
             
+        except DownloadCancelled:
+            raise
         except Exception as e:
             logger.error(f"YT-DLP download error: {str(e)}")
             return False
     
-    def _download_with_pafy(self, video_url: str, output_file: str) -> bool:
+    def _download_with_pafy(self, video_url: str, output_file: str,
+                            cancel: Optional[threading.Event] = None) -> bool:
         """
         Download YouTube audio using pafy.
         
         Args:
             video_url: YouTube video URL
             output_file: Target output file path
+            cancel: Set when another method has finished first
             
         Returns:
             True if successful, False otherwise
         """
-        if not PAFY_AVAILABLE:
+        if not pafy.available:
             return False
         
         try:
@@ -476,7 +561,7 @@ class YouTubeDownloader:
                 return False
             
             # Download the audio stream
-            temp_file = audio.download(filepath=output_file)
+            temp_file = audio.download(filepath=output_file, callback=lambda *progress: check_cancelled(cancel))
             
             # If download succeeded but with a different extension, rename to .mp3
             if temp_file and os.path.exists(temp_file) and temp_file != output_file:
@@ -484,11 +569,14 @@ class YouTubeDownloader:
             
             return os.path.exists(output_file)
             
+        except DownloadCancelled:
+            raise
         except Exception as e:
             logger.error(f"Pafy download error: {str(e)}")
             return False
     
-    def _download_direct_stream(self, video_url: str, output_file: str) -> bool:
+    def _download_direct_stream(self, video_url: str, output_file: str,
+                                cancel: Optional[threading.Event] = None) -> bool:
         """
         Fallback method to download YouTube audio by direct streaming.
         This method doesn't require ffmpeg or any external libraries.
@@ -496,6 +584,7 @@ class YouTubeDownloader:
         Args:
             video_url: YouTube video URL
             output_file: Target output file path
+            cancel: Set when another method has finished first
             
         Returns:
             True if successful, False otherwise
@@ -536,16 +625,16 @@ class YouTubeDownloader:
             
             # Phương pháp 1: Thử lấy từ trang watch
             try:
-                session = requests.Session()  # Sử dụng session để giữ cookies
-                response = session.get(watch_url, headers=headers, timeout=15)
+                # Client dùng chung giữ cookies và kết nối keep-alive
+                response = http_client.get(watch_url, headers=headers, timeout=15)
                 if response.status_code != 200:
                     logger.warning(f"Failed to get watch page: HTTP {response.status_code}")
                     # Thử phương pháp khác
-                    response = session.get(embed_url, headers=headers, timeout=15)
+                    response = http_client.get(embed_url, headers=headers, timeout=15)
                     if response.status_code != 200:
                         logger.warning(f"Failed to get embed page: HTTP {response.status_code}")
                         # Thử truy cập cả youtube mobile
-                        response = session.get(f"https://m.youtube.com/watch?v={video_id}", headers=headers, timeout=15)
+                        response = http_client.get(f"https://m.youtube.com/watch?v={video_id}", headers=headers, timeout=15)
             except Exception as e:
                 logger.warning(f"Error making request: {str(e)}")
                 return False
@@ -553,6 +642,7 @@ class YouTubeDownloader:
             if not response or response.status_code != 200:
                 logger.error("Failed to retrieve YouTube page content")
                 return False
+            check_cancelled(cancel)
             
             # Step 2: Tìm kiếm URL audio bằng nhiều phương pháp khác nhau
             audio_url = None
@@ -635,7 +725,7 @@ class YouTubeDownloader:
                                 player_url = f"https://www.youtube.com{player_path}" if player_path.startswith('/') else player_path
                                 logger.info(f"Found player URL: {player_url}")
                                 # Load player code to tìm hàm decoder
-                                player_resp = requests.get(player_url, headers=headers)
+                                player_resp = http_client.get(player_url, headers=headers)
                                 if player_resp.status_code == 200:
                                     logger.info("Successfully retrieved player JS")
                         except json.JSONDecodeError:
@@ -644,10 +734,9 @@ class YouTubeDownloader:
                     logger.warning(f"Error extracting from YTCFG: {str(e)}")
             
             # Phương pháp 3: Sử dụng YouTube-DL core functionalities nếu yt-dlp có sẵn
-            if not audio_url and YT_DLP_AVAILABLE:
+            if not audio_url and yt_dlp.available:
                 try:
                     # Load phiên bản downsized của yt-dlp để chỉ lấy direct URL
-                    from yt_dlp import YoutubeDL
                     ydl_opts = {
                         'format': 'bestaudio/best',
                         'quiet': True,
@@ -656,7 +745,7 @@ class YouTubeDownloader:
                         'skip_download': True,
                     }
                     
-                    with YoutubeDL(ydl_opts) as ydl:
+                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                         info = ydl.extract_info(video_url, download=False)
                         formats = info.get('formats', [])
                         audio_formats = [f for f in formats if 
@@ -682,112 +771,48 @@ class YouTubeDownloader:
                     'Accept-Language': 'en-US,en;q=0.9,vi;q=0.8',
                     'Referer': 'https://www.youtube.com/',
                     'Origin': 'https://www.youtube.com',
-                    'Range': 'bytes=0-',
-                    'Connection': 'keep-alive'
                 }
                 
-                # Sử dụng session để duy trì cookies và headers
-                if not hasattr(self, 'download_session'):
-                    self.download_session = requests.Session()
+                # Tải song song theo từng đoạn (HTTP Range), tiếp tục từ lần tải dở trước đó
+                if not self.download_engine.fetch_ranges(audio_url, output_file, headers=download_headers,
+                                                         total_size=content_length, cancel=cancel):
+                    logger.error("Direct download failed")
+                    return False
                 
-                max_retries = 5  # Tăng số lần thử lại
+                file_size = os.path.getsize(output_file)
+                logger.info(f"File size on disk: {file_size} bytes")
                 
-                for attempt in range(max_retries):
-                    try:
-                        # Kiểm tra URL có validity trước khi tải xuống
-                        head_response = self.download_session.head(audio_url, headers=download_headers, timeout=10)
-                        if head_response.status_code >= 400:
-                            logger.warning(f"Audio URL is not valid (status {head_response.status_code}), trying next method")
-                            break
-                            
-                        server_content_length = None
-                        if 'Content-Length' in head_response.headers:
-                            server_content_length = int(head_response.headers['Content-Length'])
-                            logger.info(f"Expected content length: {server_content_length} bytes")
-                        
-                        # Tải xuống tệp audio
-                        response = self.download_session.get(audio_url, headers=download_headers, stream=True, timeout=60)
-                        
-                        # Kiểm tra phản hồi
-                        if response.status_code in (200, 206):
-                            # Tải xuống theo từng phần
-                            total_size = 0
-                            expected_size = int(response.headers.get('Content-Length', 0)) if 'Content-Length' in response.headers else None
-                            
-                            with open(output_file, 'wb') as f:
-                                for chunk in response.iter_content(chunk_size=8192):
-                                    if chunk:
-                                        f.write(chunk)
-                                        total_size += len(chunk)
-                            
-                            logger.info(f"Downloaded {total_size} bytes")
-                            
-                            # Xác minh tệp tải xuống
-                            if os.path.exists(output_file):
-                                file_size = os.path.getsize(output_file)
-                                logger.info(f"File size on disk: {file_size} bytes")
-                                
-                                # Kiểm tra tính toàn vẹn của tệp
-                                if expected_size and abs(file_size - expected_size) > 1024:
-                                    logger.warning(f"Download incomplete: got {file_size}, expected {expected_size}")
-                                    if attempt < max_retries - 1:
-                                        logger.info(f"Retrying download (attempt {attempt + 2}/{max_retries})")
-                                        continue
-                                elif file_size < 10000:  # Nhỏ hơn 10KB
-                                    logger.error(f"Downloaded file is too small: {file_size} bytes")
-                                    if attempt < max_retries - 1:
-                                        logger.info(f"Retrying download (attempt {attempt + 2}/{max_retries})")
-                                        continue
-                                else:
-                                    # Kiểm tra xem tệp có phải là MP3 hợp lệ hay không
-                                    try:
-                                        with open(output_file, 'rb') as f:
-                                            header = f.read(4)
-                                            if header.startswith(b'ID3') or header.startswith(b'\xff\xfb') or header.startswith(b'\xff\xfa'):
-                                                logger.info(f"Successfully downloaded valid audio file: {output_file}")
-                                                
-                                                # Lưu metdata vào tệp JSON
-                                                try:
-                                                    metadata_file = os.path.join(os.path.dirname(output_file), f"{video_id}.json")
-                                                    metadata = {
-                                                        "id": video_id,
-                                                        "title": f"YouTube Audio {video_id}",
-                                                        "url": video_url,
-                                                        "thumbnail": f"https://i.ytimg.com/vi/{video_id}/default.jpg"
-                                                    }
-                                                    with open(metadata_file, 'w', encoding='utf-8') as f:
-                                                        json.dump(metadata, f)
-                                                except:
-                                                    pass
-                                                
-                                                return True
-                                            else:
-                                                # Không phải là MP3 hợp lệ
-                                                logger.warning("Downloaded file is not a valid audio file")
-                                                if attempt < max_retries - 1:
-                                                    logger.info(f"Retrying download (attempt {attempt + 2}/{max_retries})")
-                                                    continue
-                                    except Exception as e:
-                                        logger.error(f"Error verifying audio file: {str(e)}")
-                            else:
-                                logger.error("File was not created")
-                        else:
-                            logger.error(f"Download failed with status {response.status_code}")
-                            
-                    except Exception as e:
-                        logger.error(f"Download attempt {attempt + 1} failed: {str(e)}")
-                        if attempt < max_retries - 1:
-                            logger.info(f"Retrying in 2 seconds...")
-                            time.sleep(2)
+                # Kiểm tra xem tệp có phải là MP3 hợp lệ hay không
+                with open(output_file, 'rb') as f:
+                    header = f.read(4)
+                if not (header.startswith(b'ID3') or header.startswith(b'\xff\xfb') or header.startswith(b'\xff\xfa')):
+                    logger.warning("Downloaded file is not a valid audio file")
+                    return False
                 
-                # Nếu tất cả các lần thử đều thất bại
-                logger.error("All download attempts failed")
-                return False
+                logger.info(f"Successfully downloaded valid audio file: {output_file}")
+                
+                # Lưu metdata vào tệp JSON
+                try:
+                    metadata_file = os.path.join(os.path.dirname(output_file), f"{video_id}.json")
+                    metadata = {
+                        "id": video_id,
+                        "title": f"YouTube Audio {video_id}",
+                        "url": video_url,
+                        "thumbnail": f"https://i.ytimg.com/vi/{video_id}/default.jpg"
+                    }
+                    with open(metadata_file, 'w', encoding='utf-8') as f:
+                        json.dump(metadata, f)
+                except:
+                    pass
+                
+                return True
             else:
                 logger.error("Could not extract any audio URL using multiple methods")
             
             return False
             
+        except DownloadCancelled:
+            raise
         except Exception as e:
             logger.error(f"Direct streaming error: {str(e)}")
             return False
@@ -802,25 +827,111 @@ class YouTubeDownloader:
         Returns:
             Dictionary with audio information or None if failed
         """
-        # Search for the video
+        video = self._search_first(query)
+        if not video:
+            return None
+        return self._download_video(video)
+    
+    def search_and_stream(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Search for a video and start streaming its audio.
+        
+        Decoding starts right away and the call returns once the first seconds are
+        buffered; the download finishes in the background and is saved to the cache.
+        Cached songs, and sources that cannot be streamed, go through the normal download.
+        
+        Args:
+            query: Search query for the song
+            
+        Returns:
+            Dictionary with audio information (plus a started 'stream' when streaming) or None if failed
+        """
+        video = self._search_first(query)
+        if not video:
+            return None
+        
+        output_file = os.path.join(self.cache_dir, f"{video['id']}.mp3")
+        if (os.path.exists(output_file) and media_cache.lookup(output_file)) or not media_toolchain.ffmpeg:
+            return self._download_video(video)
+        
+        source = self.get_audio_stream(video['url'])
+        if source:
+            stream = AudioStream(source['url'], output_file, headers=source['headers'], duration=source['duration'])
+            if stream.start() and stream.wait_ready(config.STREAM_PREBUFFER_SECONDS, config.STREAM_START_TIMEOUT):
+                self._save_video_metadata(video, self.cache_dir)
+                result = self._video_result(video, output_file)
+                result['stream'] = stream
+                return result
+            stream.abort()
+            logger.warning(f"Could not stream {video['title']}, downloading it instead")
+        
+        return self._download_video(video)
+    
+    def get_audio_stream(self, video_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve the direct URL of a video's best audio-only format without downloading it.
+        
+        Args:
+            video_url: YouTube video URL
+            
+        Returns:
+            Dictionary with 'url', 'headers' and 'duration', or None if it cannot be resolved
+        """
+        if not yt_dlp.available:
+            return None
+        
+        try:
+            ydl_opts = {
+                'format': 'bestaudio/best',
+                'quiet': True,
+                'no_warnings': True,
+                'skip_download': True,
+            }
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(video_url, download=False)
+            
+            audio_formats = [f for f in info.get('formats', [])
+                             if f.get('url') and f.get('acodec', 'none') != 'none' and f.get('vcodec', 'none') == 'none']
+            if not audio_formats:
+                logger.warning(f"No audio-only format to stream for {video_url}")
+                return None
+            
+            best_audio = max(audio_formats, key=lambda f: f.get('abr') or 0)
+            logger.info(f"Resolved audio stream: {best_audio.get('ext', 'unknown')} at {best_audio.get('abr', 'unknown')} kbps")
+            return {
+                'url': best_audio['url'],
+                'headers': best_audio.get('http_headers') or info.get('http_headers') or {},
+                'duration': info.get('duration') or 0,
+            }
+        except Exception as e:
+            logger.warning(f"Could not resolve audio stream: {str(e)}")
+            return None
+    
+    def _search_first(self, query: str) -> Optional[Dict[str, Any]]:
+        """Search and return the first result, or None."""
         search_results = self.search_youtube(query, max_results=1)
         
         if not search_results:
             logger.error(f"No search results for: {query}")
             return None
         
-        # Get the first result
         video = search_results[0]
         logger.info(f"Found: {video['title']} by {video['channel']}")
-        
-        # Download the audio
+        return video
+    
+    def _download_video(self, video: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Download a search result's audio and save its metadata next to it."""
         audio_file = self.download_audio(video['url'])
         
         if not audio_file:
             logger.error(f"Failed to download: {video['title']}")
             return None
         
-        # Save metadata to JSON file for better UX
+        self._save_video_metadata(video, os.path.dirname(audio_file))
+        return self._video_result(video, audio_file)
+    
+    def _save_video_metadata(self, video: Dict[str, Any], directory: str) -> None:
+        """Save metadata to JSON file for better UX."""
         try:
             video_id = video.get('id')
             if video_id:
@@ -829,15 +940,16 @@ class YouTubeDownloader:
                     if field in video and isinstance(video[field], str):
                         video[field] = html.unescape(video[field])
                 
-                json_path = os.path.join(os.path.dirname(audio_file), f"{video_id}.json")
+                json_path = os.path.join(directory, f"{video_id}.json")
                 with open(json_path, 'w', encoding='utf-8') as f:
                     json.dump(video, f, ensure_ascii=False, indent=2)
                 logger.info(f"Saved video metadata to {json_path}")
         except Exception as e:
             logger.warning(f"Could not save metadata: {str(e)}")
-        
-        # Populate result with video and audio information
-        result = {
+    
+    def _video_result(self, video: Dict[str, Any], audio_file: str) -> Dict[str, Any]:
+        """Populate result with video and audio information."""
+        return {
             'audio_file': audio_file,
             'title': video['title'],
             'id': video['id'],
@@ -845,8 +957,6 @@ class YouTubeDownloader:
             'channel': video['channel'],
             'thumbnail': video['thumbnail']
         }
-        
-        return result
     
     def extract_song_name(self, query: str) -> str:
         """
@@ -3,11 +3,17 @@ MIS Smart Assistant - News Service
 Module for fetching latest news from NewsData.io API
 Supports Vietnamese news across different categories
 """
-import requests
+import httpx
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
 from ..utils import config, logger
+from ..utils.http_client import http_client
+from .news_store import NewsStore
+from .text_formatter import TextFormatter
 
 class NewsService:
     """
@@ -15,16 +21,32 @@ class NewsService:
     Supports various news categories like general, business, sports, technology, etc.
     """
     
-    def __init__(self):
-        """Initialize the news service with API configuration."""
+    def __init__(self, speech_processor=None):
+        """
+        Initialize the news service with API configuration.
+        
+        Args:
+            speech_processor: Optional SpeechProcessor used to pre-synthesize voice digests
+        """
         self.api_key = config.NEWSDATA_API_KEY
         self.base_url = "https://newsdata.io/api/1/news"
         # Note: Country filter "vn" is not supported by NewsData.io API
         # We'll use language filter instead to get Vietnamese content
         self.language = "vi"  # Vietnamese
-        self.cached_news = {}
-        self.cache_expiry = {}
-        self.cache_duration = 30  # Cache for 30 minutes
+        self.store = NewsStore()
+        self.cache_duration = config.NEWS_CACHE_DURATION * 60  # Convert to seconds
+        self.refresh_lead = config.NEWS_REFRESH_LEAD * 60
+        self.refreshing = set()
+        # category -> time it was last asked for; the default category is warmed at startup
+        self.requested = {"general": time.time()}
+        self.failures = {}  # category -> (consecutive failures, monotonic time of the next attempt)
+        self.refresh_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        
+        # Rendered display HTML and voice text per category, rebuilt once per article set
+        self.speech_processor = speech_processor
+        self.renders = {}
+        self.render_lock = threading.Lock()
         
         # Category mapping for Vietnamese queries
         self.category_map = {
@@ -88,6 +110,8 @@ class NewsService:
             "trung quốc": "world"
         }
         
+        self._start_refresh_thread()
+        
         logger.info("News service initialized")
     
     def is_news_query(self, query: str) -> bool:
@@ -129,54 +153,137 @@ class NewsService:
         
         return "general"  # Default category
     
-    def _is_cache_valid(self, cache_key: str) -> bool:
-        """Check if cached data is still valid."""
-        if cache_key not in self.cache_expiry:
-            return False
+    def _start_refresh_thread(self):
+        """Start the background thread that keeps recently requested categories fresh."""
+        if not self.api_key or self.api_key == "YOUR_NEWSDATA_API_KEY":
+            logger.error("NewsData API key not configured")
+            return
         
-        return datetime.now() < self.cache_expiry[cache_key]
+        self.refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self.refresh_thread.start()
+    
+    def _refresh_loop(self):
+        """
+        Refresh categories asked for within NEWS_ACTIVE_MINUTES shortly before they expire.
+        
+        Refreshing every category around the clock would take ~460 calls a day, more
+        than the NewsData.io free quota; the others are fetched when they are asked for.
+        """
+        while not self.stop_event.is_set():
+            try:
+                active_since = time.time() - config.NEWS_ACTIVE_MINUTES * 60
+                with self.refresh_lock:
+                    active = [category for category, requested_at in self.requested.items()
+                              if requested_at >= active_since]
+                due = []
+                for category in active:
+                    age = self.store.get_age(category)
+                    if age is None or age >= self.cache_duration - self.refresh_lead:
+                        due.append(category)
+                if due:
+                    self.refresh_categories(due)
+            except Exception as e:
+                logger.error(f"Error in news refresh loop: {str(e)}")
+            self.stop_event.wait(60)
+    
+    def stop(self):
+        """Stop the background refresh thread."""
+        self.stop_event.set()
     
-    def _get_cached_news(self, cache_key: str) -> Optional[List[Dict]]:
-        """Get news from cache if valid."""
-        if self._is_cache_valid(cache_key) and cache_key in self.cached_news:
-            logger.info(f"Returning cached news for: {cache_key}")
-            return self.cached_news[cache_key]
-        return None
+    def refresh_categories(self, categories: List[str]):
+        """
+        Fetch several categories concurrently and store the results.
+        
+        Args:
+            categories (List[str]): News categories to refresh
+        """
+        now = time.monotonic()
+        with self.refresh_lock:
+            # A category that failed waits out its backoff, whoever asks for it
+            categories = [category for category in categories if category not in self.refreshing
+                          and self.failures.get(category, (0, 0))[1] <= now]
+            self.refreshing.update(categories)
+        if not categories:
+            return
+        
+        results = [False] * len(categories)
+        try:
+            with ThreadPoolExecutor(max_workers=config.NEWS_FETCH_WORKERS) as executor:
+                results = list(executor.map(self._fetch_category, categories))
+        finally:
+            with self.refresh_lock:
+                self.refreshing.difference_update(categories)
+                for category, fetched in zip(categories, results):
+                    if fetched:
+                        self.failures.pop(category, None)
+                    else:
+                        count = self.failures.get(category, (0, 0))[0] + 1
+                        delay = min(config.NEWS_BACKOFF_MAX, config.NEWS_BACKOFF_BASE * 2 ** (count - 1))
+                        self.failures[category] = (count, time.monotonic() + delay)
+                        logger.warning(f"News category {category} failed {count} time(s), next attempt in {delay}s")
+        
+        # Render the new article sets now so answers only have to look them up
+        for category, fetched in zip(categories, results):
+            if fetched:
+                rendered = self._get_rendered(category)
+                self._presynthesize_voice(rendered["voice"])
+    
+    def refresh_in_background(self, category: str):
+        """
+        Refresh one category on a worker thread.
+        
+        Args:
+            category (str): News category
+        """
+        threading.Thread(target=self.refresh_categories, args=([category],), daemon=True).start()
     
-    def _cache_news(self, cache_key: str, news_data: List[Dict]):
-        """Cache news data."""
-        self.cached_news[cache_key] = news_data
-        self.cache_expiry[cache_key] = datetime.now() + timedelta(minutes=self.cache_duration)
-        logger.info(f"Cached news for: {cache_key}")
+    def is_refreshing(self, category: str) -> bool:
+        """Check whether a category is being fetched right now."""
+        with self.refresh_lock:
+            return category in self.refreshing
     
     def fetch_news(self, category: str = "general", limit: int = 6) -> List[Dict]:
         """
-        Fetch news from NewsData.io API.
+        Get news articles from the local store.
+        
+        Never waits on the network: stale articles are served while a refresh runs,
+        and an empty list is returned until a never-fetched category arrives.
         
         Args:
             category (str): News category
-            limit (int): Number of articles to fetch (default 6)
+            limit (int): Number of articles to return (default 6)
             
         Returns:
             List[Dict]: List of news articles
         """
-        if not self.api_key or self.api_key == "YOUR_NEWSDATA_API_KEY":
-            logger.error("NewsData API key not configured")
-            return []
-        
-        cache_key = f"{category}_{limit}"
+        self._note_request(category)
+        return self.store.get_category(category, limit)
+    
+    def _note_request(self, category: str):
+        """Keep a category asked for by the user fresh, refreshing it now if it expired."""
+        with self.refresh_lock:
+            self.requested[category] = time.time()
         
-        # Try to get from cache first
-        cached_news = self._get_cached_news(cache_key)
-        if cached_news:
-            return cached_news
+        age = self.store.get_age(category)
+        if age is None or age >= self.cache_duration:
+            self.refresh_in_background(category)
+    
+    def _fetch_category(self, category: str) -> bool:
+        """
+        Fetch a category from NewsData.io API and store it.
         
+        Args:
+            category (str): News category
+            
+        Returns:
+            bool: True if the category was stored
+        """
         try:
             # Prepare API parameters - removed country filter as "vn" is not supported
             params = {
                 "apikey": self.api_key,
                 "language": self.language,
-                "size": limit,
+                "size": config.NEWS_FETCH_SIZE,
                 "category": category if category != "general" else None
             }
             
@@ -186,7 +293,7 @@ class NewsService:
             logger.info(f"Fetching news for category: {category}")
             
             # Make API request
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = http_client.get(self.base_url, params=params, timeout=10, cache=True)
             response.raise_for_status()
             
             data = response.json()
@@ -194,10 +301,17 @@ class NewsService:
             if data.get("status") == "success" and "results" in data:
                 articles = data["results"]
                 processed_articles = []
+                seen_ids = set()
                 
-                for article in articles[:limit]:
+                for article in articles:
+                    article_id = NewsStore.article_id(article)
+                    if article_id in seen_ids:
+                        continue
+                    seen_ids.add(article_id)
+                    
                     # Process each article
                     processed_article = {
+                        "id": article_id,
                         "title": article.get("title", "Không có tiêu đề"),
                         "description": article.get("description", "Không có mô tả"),
                         "url": article.get("link", ""),
@@ -214,67 +328,74 @@ class NewsService:
                             processed_article["formatted_date"] = pub_date.strftime("%d/%m/%Y %H:%M")
                         except:
                             processed_article["formatted_date"] = "Thời gian không xác định"
-                    else:                        processed_article["formatted_date"] = "Thời gian không xác định"
+                    else:
+                        processed_article["formatted_date"] = "Thời gian không xác định"
                     
                     processed_articles.append(processed_article)
                 
-                # Cache the results
-                self._cache_news(cache_key, processed_articles)
+                self.store.put_category(category, processed_articles)
                 
-                logger.info(f"Successfully fetched {len(processed_articles)} news articles")
-                return processed_articles
+                logger.info(f"Successfully fetched {len(processed_articles)} news articles for {category}")
+                return True
             else:
                 logger.error(f"API returned error: {data.get('message', 'Unknown error')}")
-                return []                
-        except requests.exceptions.RequestException as e:
+                return False
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching news: {str(e)}")
-            return []
+            return False
         except json.JSONDecodeError as e:
             logger.error(f"Error parsing news response: {str(e)}")
-            return []
+            return False
         except Exception as e:
             logger.error(f"Unexpected error in news service: {str(e)}")
-            return []
+            return False
     
-    def format_news_response(self, query: str) -> str:
+    def _unavailable_message(self, category: str) -> str:
+        """Message for when a category has no stored articles yet."""
+        if self.is_refreshing(category):
+            return "Tin tức đang được cập nhật, vui lòng thử lại sau giây lát."
+        return "Xin lỗi, hiện tại không thể lấy tin tức. Vui lòng thử lại sau."
+    
+    def _get_rendered(self, category: str) -> Dict[str, str]:
         """
-        Format news response based on user query.
+        Get the display HTML and voice text for a category.
+        
+        Both are built once per article set (and per day, since the voice digest
+        announces the date) and reused for every later query.
         
         Args:
-            query (str): User's query
+            category (str): News category
             
         Returns:
-            str: Formatted news response with HTML formatting for clickable links
+            Dict[str, str]: {"display": ..., "voice": ...}
         """
-        category = self.get_category_from_query(query)
-        articles = self.fetch_news(category, limit=5)  # Limit to 5 news items as requested
+        version = (self.store.get_version(category), datetime.now().date())
+        with self.render_lock:
+            rendered = self.renders.get(category)
+            if rendered and rendered["version"] == version:
+                return rendered
         
+        # Read the store directly: background refreshes must not count as requests
+        articles = self.store.get_category(category, 5)  # Limit to 5 news items as requested
         if not articles:
-            return "Xin lỗi, hiện tại không thể lấy tin tức. Vui lòng thử lại sau."
-        
-        # Format published date to correct format
-        for article in articles:
-            if article.get("published_at"):
-                try:
-                    # Parse the ISO date format from API
-                    pub_date = datetime.fromisoformat(article["published_at"].replace("Z", "+00:00"))
-                    # Format to YYYY-MM-DD HH:MM:SS
-                    article["formatted_date"] = pub_date.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    article["formatted_date"] = "2025-05-31 02:31:00"  # Default fallback
-            else:
-                article["formatted_date"] = "2025-05-31 02:31:00"  # Default fallback
-        
-        # Build response with the exact format requested
-        total_articles = len(articles)
-        response = f'<span style="color: #3498db; font-weight: bold; font-size: 16px;">Tin tức mới nhất từ Việt Nam ({total_articles} tin):</span>\n\n'
+            message = self._unavailable_message(category)
+            return {"version": None, "display": message, "voice": message}
         
+        rendered = {
+            "version": version,
+            "display": self._render_display(articles),
+            "voice": self._render_voice(articles),
+        }
+        with self.render_lock:
+            self.renders[category] = rendered
+        return rendered
+    
+    def _render_display(self, articles: List[Dict]) -> str:
+        """Build the news HTML shown in the chat (the stylesheet is attached at display time)."""
+        items = []
         for article in articles:
-            # Get title
-            title = article.get("title", "Không có tiêu đề")
-            
             # Get description and limit to first sentence or reasonable length
-            description = article.get("description", "Không có mô tả")
+            description = article.get("description") or "Không có mô tả"
             if len(description) > 120:
                 # Find the first sentence end or cut at reasonable length
                 sentences = description.split('. ')
@@ -283,19 +404,65 @@ class NewsService:
                 else:
                     description = description[:120] + "..."
             
-            # Get formatted date
-            formatted_date = article.get("formatted_date", "2025-05-31 02:31:00")
-            
-            # Get URL
-            url = article.get("url", "#")
+            # Format published date as YYYY-MM-DD HH:MM:SS
+            formatted_date = article.get("formatted_date", "Thời gian không xác định")
+            if article.get("published_at"):
+                try:
+                    pub_date = datetime.fromisoformat(article["published_at"].replace("Z", "+00:00"))
+                    formatted_date = pub_date.strftime("%Y-%m-%d %H:%M:%S")
+                except ValueError:
+                    pass
             
-            # Add each news item in the requested format
-            response += f"{title}\n"
-            response += f"{description}\n"
-            response += f"📅 {formatted_date}\n"
-            response += f'<a href="{url}" target="_blank" style="color: #3498db; text-decoration: none; font-weight: bold;">Đọc thêm →</a>\n\n'
+            items.append({
+                "title": article.get("title") or "Không có tiêu đề",
+                "description": description,
+                "date": formatted_date,
+                "link_url": article.get("url", ""),
+                "link_text": "Đọc thêm",
+            })
         
-        return response
+        header = f"Tin tức mới nhất từ Việt Nam ({len(items)} tin)"
+        return TextFormatter.render_news_html(header, items)
+    
+    def _render_voice(self, articles: List[Dict]) -> str:
+        """Build the voice digest: today's date followed by the titles only."""
+        now = datetime.now()
+        current_date_voice = f"ngày {now.day} tháng {now.month} năm {now.year}"
+        
+        # Start with date announcement
+        voice_text = f"Tin tức mới nhất hôm nay, {current_date_voice}. "
+        
+        # Add news titles (only titles, no descriptions)
+        for article in articles:
+            title = article.get("title") or "Không có tiêu đề"
+            voice_text += f"{title}. "
+        
+        # Add closing message
+        voice_text += "Bạn có thể click vào 'Đọc thêm' để hiểu sâu hơn về tin tức, xin cảm ơn."
+        return voice_text
+    
+    def _presynthesize_voice(self, voice_text: str):
+        """Synthesize a voice digest into the TTS cache so reading it starts immediately."""
+        if not self.speech_processor or not config.ENABLE_VOICE_RESPONSE or not config.ENABLE_TTS_CACHE:
+            return
+        try:
+            self.speech_processor.text_to_speech(voice_text, play=False)
+        except Exception as e:
+            logger.warning(f"Could not pre-synthesize news voice: {str(e)}")
+    
+    def format_news_response(self, query: str) -> str:
+        """
+        Format news response based on user query.
+        
+        Args:
+            query (str): User's query
+            
+        Returns:
+            str: Pre-rendered news HTML with clickable links
+        """
+        category = self.get_category_from_query(query)
+        self._note_request(category)
+        return self._get_rendered(category)["display"]
     
     def get_formatted_news(self, query: str) -> str:
         """
@@ -322,25 +489,5 @@ class NewsService:
             str: Text formatted specifically for voice reading
         """
         category = self.get_category_from_query(query)
-        articles = self.fetch_news(category, limit=5)  # Limit to 5 news items as requested
-        
-        if not articles:
-            return "Xin lỗi, hiện tại không thể lấy tin tức. Vui lòng thử lại sau."
-        
-        # Get current date for voice announcement
-        from datetime import datetime
-        now = datetime.now()
-        current_date_voice = f"ngày {now.day} tháng {now.month} năm {now.year}"
-        
-        # Start with date announcement
-        voice_text = f"Tin tức mới nhất hôm nay, {current_date_voice}. "
-        
-        # Add news titles (only titles, no descriptions)
-        for i, article in enumerate(articles, 1):
-            title = article.get("title", "Không có tiêu đề")
-            voice_text += f"{title}. "
-            
-        # Add closing message
-        voice_text += "Bạn có thể click vào 'Đọc thêm' để hiểu sâu hơn về tin tức, xin cảm ơn."
-            
-        return voice_text
\ No newline at end of file
+        self._note_request(category)
+        return self._get_rendered(category)["voice"]
@@ -0,0 +1,145 @@
+"""
+MIS Smart Assistant - News Store
+Disk-backed article store shared by all news categories.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ..utils import logger
+
+
+class NewsStore:
+    """
+    Articles keyed by article id, plus an ordered id list per category.
+
+    An article that appears in several categories is stored once. The whole store
+    is persisted as JSON so news is available immediately after a restart.
+    """
+
+    def __init__(self, store_path=None):
+        """
+        Initialize the store and load any persisted articles.
+
+        Args:
+            store_path (str): JSON file path (defaults to resources/cache/news_articles.json)
+        """
+        self.store_path = store_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            'resources', 'cache', 'news_articles.json'
+        )
+        self.articles = {}
+        self.categories = {}  # category -> {"ids": [...], "fetched_at": timestamp}
+        self.lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def article_id(article):
+        """
+        Get a stable id for an API article.
+
+        Args:
+            article (dict): Raw NewsData.io article
+
+        Returns:
+            str: The API's article_id, or a hash of the link/title
+        """
+        if article.get("article_id"):
+            return str(article["article_id"])
+        key = article.get("link") or article.get("title") or ""
+        return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.store_path):
+                with open(self.store_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.articles = data.get("articles", {})
+                self.categories = data.get("categories", {})
+                logger.info(f"Loaded {len(self.articles)} stored news articles")
+        except Exception as e:
+            logger.warning(f"Could not load news store: {str(e)}")
+
+    def _save(self):
+        """Write the store atomically (caller holds the lock)."""
+        try:
+            os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+            temp_path = f"{self.store_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"articles": self.articles, "categories": self.categories}, f, ensure_ascii=False)
+            os.replace(temp_path, self.store_path)
+        except Exception as e:
+            logger.warning(f"Could not save news store: {str(e)}")
+
+    def put_category(self, category, articles):
+        """
+        Replace a category's article list.
+
+        Args:
+            category (str): News category
+            articles (list): Processed articles, each with an 'id'
+        """
+        with self.lock:
+            for article in articles:
+                self.articles[article["id"]] = article
+            self.categories[category] = {
+                "ids": [article["id"] for article in articles],
+                "fetched_at": time.time(),
+            }
+
+            # Drop articles no category refers to any more
+            referenced = {article_id for entry in self.categories.values() for article_id in entry["ids"]}
+            for article_id in list(self.articles):
+                if article_id not in referenced:
+                    del self.articles[article_id]
+
+            self._save()
+
+    def get_category(self, category, limit=None):
+        """
+        Get the stored articles of a category, newest fetch first.
+
+        Args:
+            category (str): News category
+            limit (int): Maximum number of articles (all if None)
+
+        Returns:
+            list: Copies of the stored articles
+        """
+        with self.lock:
+            entry = self.categories.get(category)
+            if not entry:
+                return []
+            ids = entry["ids"] if limit is None else entry["ids"][:limit]
+            return [dict(self.articles[article_id]) for article_id in ids if article_id in self.articles]
+
+    def get_age(self, category):
+        """
+        Get the age of a category's articles.
+
+        Args:
+            category (str): News category
+
+        Returns:
+            float or None: Seconds since the category was fetched, or None if never fetched
+        """
+        with self.lock:
+            entry = self.categories.get(category)
+            return time.time() - entry["fetched_at"] if entry else None
+
+    def get_version(self, category):
+        """
+        Get a token that changes whenever a category's articles are replaced.
+
+        Args:
+            category (str): News category
+
+        Returns:
+            float or None: Fetch timestamp of the current article set, or None if never fetched
+        """
+        with self.lock:
+            entry = self.categories.get(category)
+            return entry["fetched_at"] if entry else None
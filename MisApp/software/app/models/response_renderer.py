@@ -0,0 +1,239 @@
+"""
+MIS Smart Assistant - Response Renderer
+Single-pass conversion of Gemini markdown into chat HTML, plain text,
+LCD-safe text and TTS-safe text.
+"""
+
+import functools
+import html
+import re
+import unicodedata
+
+
+class RenderedResponse:
+    """
+    All output forms of one response.
+
+    The scan yields the plain text and the segments of the response; the HTML, LCD
+    and speech forms are built from them on first use, so a render whose only purpose
+    is the plain text (what GeminiClient stores) does no HTML escaping.
+    """
+
+    def __init__(self, segments, plain, has_quote):
+        self.plain = plain          # Markdown emphasis removed, layout kept (what gets stored and shown)
+        self.has_quote = has_quote  # Whether any line starts with '>'
+        self._segments = segments   # (kind, value) pairs in text order; line breaks are in the _TEXT values
+
+    @functools.cached_property
+    def html(self):
+        """Rich text for the chat bubble (poem layout when the text quotes lines)."""
+        if self.has_quote and '\n' in self.plain:
+            return render_poem(self.plain)
+
+        parts = []
+        line_close = ''  # Closing markup of the current heading or quote line
+        for kind, value in self._segments:
+            if kind == _TEXT:
+                if line_close and '\n' in value:
+                    line_end, rest = value.split('\n', 1)
+                    parts.append(f'{html.escape(line_end)}{line_close}\n{html.escape(rest)}')
+                    line_close = ''
+                else:
+                    parts.append(html.escape(value))
+            elif kind == _BOLD:
+                parts.append(f'<b>{html.escape(value)}</b>')
+            elif kind == _ITALIC:
+                parts.append(f'<i>{html.escape(value)}</i>')
+            elif kind == _BOLD_ITALIC:
+                parts.append(f'<b><i>{html.escape(value)}</i></b>')
+            elif kind == _CODE:
+                parts.append(f'<code>{html.escape(value)}</code>')
+            elif kind == _URL:
+                escaped = html.escape(value)
+                parts.append(f'<a href="{escaped}" target="_blank" rel="noopener" style="{_LINK_STYLE}">{escaped}</a>')
+            elif kind == _TAG:
+                parts.append(html.escape(value))
+            elif kind == _BULLET:
+                parts.append(html.escape(value) + '• ')
+            elif kind == _HEADING:
+                parts.append('<b>')
+                line_close = '</b>'
+            else:
+                parts.append(f'<div style="{_QUOTE_STYLE}">')
+                line_close = '</div>'
+        parts.append(line_close)
+        return ''.join(parts).replace('\n', '<br>')
+
+    @functools.cached_property
+    def lcd(self):
+        """One ASCII line for the character LCD."""
+        return _collapse_spaces(_to_ascii(self.plain))
+
+    @functools.cached_property
+    def speech(self):
+        """Text for TTS: no URLs, tags, bullets or emoji."""
+        # Text and the words inside emphasis are read; markup, URLs and tags are not
+        speech = ''.join(value for kind, value in self._segments if kind in _SPOKEN)
+        speech = _SYMBOLS.sub('', speech)
+        return '\n'.join(_collapse_spaces(line) for line in speech.split('\n')).strip()
+
+
+# Markdown tokens, tried left to right in one scan of the text. Every alternative
+# starts with a literal character, so the regex engine skips ordinary text without
+# entering the pattern; line prefixes match from the line break before them.
+_TOKEN = re.compile(
+    r'\n(?P<indent>[ \t]*)(?:(?P<bullet>[*+])[ \t]+|(?P<heading>#{1,6})[ \t]+|>[ \t]?)'  # Bullet, heading or quote
+    r'|https?://[^\s<>"]+'                                       # URL
+    r'|</?[a-zA-Z][^<>\n]*>'                                     # HTML-like tag, shown as text
+    r'|\*\*\*(?P<strong_em>[^*\n]+?)\*\*\*'                         # ***bold italic***
+    r'|\*\*(?:[^*\n]|\*(?!\*))+?\*\*'                              # **bold**, possibly with *italic* inside
+    r'|\*(?<![*\w]\*)[^*\s](?:[^*\n]*?[^*\s])?\*(?![*\w])'       # *italic*, not inside a word
+    r'|`[^`\n]+`'                                                # `code`
+    r'|__|~~'                                                    # Stray emphasis markers
+)
+_TEXT, _BULLET, _HEADING, _QUOTE, _URL, _TAG, _BOLD, _ITALIC, _BOLD_ITALIC, _CODE = range(10)
+_SPOKEN = (_TEXT, _BOLD, _ITALIC, _BOLD_ITALIC, _CODE)
+
+# *italic* inside a bold span; split() yields bold and italic runs alternately
+_NESTED_ITALIC = re.compile(r'\*([^*\s](?:[^*]*?[^*\s])?)\*')
+
+_LINK_STYLE = 'color: #667eea; text-decoration: none; border-bottom: 1px solid #667eea; transition: all 0.3s ease;'
+_QUOTE_STYLE = ('padding: 12px 16px; border-left: 4px solid #667eea; '
+                'background: linear-gradient(135deg, #f8f9ff 0%, #e3f2fd 100%); color: #2c3e50; '
+                'margin: 8px 0; border-radius: 0 8px 8px 0; font-style: italic;')
+_POEM_LINE_STYLE = 'margin: 8px 0; font-size: 16px; line-height: 1.6; position: relative; z-index: 1;'
+_POEM_SPACER = '<div style="height: 16px;"></div>'
+
+_POEM_OPEN = '''
+            <div style="
+                font-family: 'Georgia', serif;
+                font-style: italic;
+                color: #2c3e50;
+                background: linear-gradient(135deg, #ffeaa7 0%, #fab1a0 100%);
+                padding: 20px 25px;
+                border-radius: 12px;
+                margin: 15px 0;
+                box-shadow: 0 4px 15px rgba(250, 177, 160, 0.2);
+                position: relative;
+                overflow: hidden;
+            ">
+                <div style="
+                    position: absolute;
+                    top: 10px;
+                    right: 15px;
+                    font-size: 40px;
+                    opacity: 0.2;
+                ">📜</div>
+            '''
+
+
+# Emoji and pictographic symbols, which TTS engines read out by name
+_SYMBOLS = re.compile('[\u2190-\u21ff\u2300-\u23ff\u2460-\u27bf\u2b00-\u2bff\ufe0f\u200d\U0001f000-\U0001faff]')
+
+
+def _to_ascii(text):
+    """Fold Vietnamese letters to ASCII and drop every other non-ASCII character."""
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    return unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+def _collapse_spaces(text):
+    return ' '.join(text.split())
+
+
+@functools.lru_cache(maxsize=32)
+def render_poem(text):
+    """
+    Render text in the poem layout, one paragraph per line with '>' markers removed.
+
+    Args:
+        text (str): Poem text
+
+    Returns:
+        str: Poem HTML
+    """
+    poem_lines = []
+    for line in text.strip().split('\n'):
+        line = line.strip()
+        if line.startswith('>'):
+            line = line[1:].strip()
+        if line:
+            poem_lines.append(f'<p style="{_POEM_LINE_STYLE}">{html.escape(line)}</p>')
+        else:
+            # Dòng trống tạo khoảng cách giữa các đoạn thơ
+            poem_lines.append(_POEM_SPACER)
+    return _POEM_OPEN + ''.join(poem_lines) + '</div>'
+
+
+@functools.lru_cache(maxsize=128)
+def render_response(text):
+    """
+    Render a response in every output form from one scan of its tokens.
+
+    Args:
+        text (str): Response text, possibly with Gemini markdown
+
+    Returns:
+        RenderedResponse: HTML, plain, LCD and speech forms of the text
+    """
+    segments = []
+    plain_parts = []
+    has_quote = False
+
+    # A leading line break lets the first line's prefix match like the others
+    source = '\n' + text
+    position = 1
+    for token in _TOKEN.finditer(source):
+        value = token.group()
+        first = value[0]
+        # A line prefix leaves its line break in the text before it
+        start = token.start() + 1 if first == '\n' else token.start()
+        if start > position:
+            chunk = source[position:start]
+            segments.append((_TEXT, chunk))
+            plain_parts.append(chunk)
+        position = token.end()
+
+        if first == '\n':
+            prefix = token.lastgroup
+            if prefix == 'bullet':
+                indent = token.group('indent')
+                segments.append((_BULLET, indent))
+                plain_parts.append(indent + '• ')
+            elif prefix == 'heading':
+                segments.append((_HEADING, value))
+            else:
+                # Keep the quote marker in the stored text; the poem check relies on it
+                has_quote = True
+                segments.append((_QUOTE, value))
+                plain_parts.append(value[1:])
+        elif first == 'h':
+            segments.append((_URL, value))
+            plain_parts.append(value)
+        elif first == '<':
+            segments.append((_TAG, value))
+            plain_parts.append(value)
+        elif token.lastgroup == 'strong_em':
+            inner = token.group('strong_em')
+            segments.append((_BOLD_ITALIC, inner))
+            plain_parts.append(inner)
+        elif value.startswith('**'):
+            runs = _NESTED_ITALIC.split(value[2:-2])
+            for i, run in enumerate(runs):
+                if run:
+                    segments.append((_BOLD_ITALIC if i % 2 else _BOLD, run))
+            plain_parts.append(''.join(runs))
+        elif first == '*':
+            segments.append((_ITALIC, value[1:-1]))
+            plain_parts.append(value[1:-1])
+        elif first == '`':
+            segments.append((_CODE, value[1:-1]))
+            plain_parts.append(value)
+        # Stray emphasis markers are dropped everywhere
+
+    if position < len(source):
+        chunk = source[position:]
+        segments.append((_TEXT, chunk))
+        plain_parts.append(chunk)
+
+    return RenderedResponse(segments, ''.join(plain_parts), has_quote)
@@ -0,0 +1,176 @@
+"""
+MIS Smart Assistant - Service Container
+Builds application services on first use instead of at startup.
+"""
+
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from ..utils import logger
+
+
+class LazyService:
+    """
+    Stand-in for a service that is built the first time one of its attributes is used.
+
+    Lets a service be handed to a consumer (e.g. GeminiClient) without paying
+    for its construction until the consumer actually needs it.
+    """
+
+    def __init__(self, container, name):
+        object.__setattr__(self, '_container', container)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr):
+        return getattr(self._container.get(self._name), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._container.get(self._name), attr, value)
+
+    def __repr__(self):
+        return f"<LazyService {self._name}>"
+
+
+class ServiceContainer(QObject):
+    """
+    Registry of service factories; each service is built once, on first request.
+
+    Services that own Qt objects (timers, signals) are registered with gui=True and are
+    always built on the GUI thread: a request from a worker thread waits while the GUI
+    thread builds it, so the objects get the right thread affinity.
+    """
+
+    _build_requested = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.factories = {}  # name -> (factory, gui)
+        self.shutdowns = {}  # name -> callable(service) run when the application closes
+        self.instances = {}  # In build order
+        self.lock = threading.Lock()
+        self.build_locks = {}  # name -> lock held while that service is built
+        self.gui_builds = {}  # name -> threading.Event for builds handed to the GUI thread
+        self._build_requested.connect(self._build_on_gui_thread)
+
+    def register(self, name, factory, gui=False, shutdown=None):
+        """
+        Register a service factory.
+
+        Args:
+            name (str): Service name
+            factory (callable): Called with no arguments to build the service
+            gui (bool): Whether the service must be built on the GUI thread
+            shutdown (callable): Called with the service on shutdown(), if it was built
+        """
+        self.factories[name] = (factory, gui)
+        if shutdown:
+            self.shutdowns[name] = shutdown
+
+    def get(self, name):
+        """
+        Get a service, building it if this is the first request.
+
+        Args:
+            name (str): Service name
+
+        Returns:
+            object: The service instance
+        """
+        instance = self.instances.get(name)
+        if instance is not None:
+            return instance
+
+        factory, gui = self.factories[name]
+        if gui and threading.current_thread() is not threading.main_thread():
+            return self._get_from_gui_thread(name)
+
+        # One lock per service, so a service whose factory needs another one cannot deadlock
+        with self.lock:
+            build_lock = self.build_locks.setdefault(name, threading.RLock())
+        with build_lock:
+            instance = self.instances.get(name)
+            if instance is None:
+                start_time = time.perf_counter()
+                instance = factory()
+                self.instances[name] = instance
+                logger.info(f"Service '{name}' started in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+        return instance
+
+    def peek(self, name):
+        """
+        Get a service only if it has already been built.
+
+        Args:
+            name (str): Service name
+
+        Returns:
+            object: The service instance, or None if it has not been built
+        """
+        return self.instances.get(name)
+
+    def lazy(self, name):
+        """
+        Get a stand-in that builds the service on first attribute access.
+
+        Args:
+            name (str): Service name
+
+        Returns:
+            object: The service itself if already built, otherwise a LazyService
+        """
+        instance = self.instances.get(name)
+        return instance if instance is not None else LazyService(self, name)
+
+    def built(self):
+        """
+        Services that have been built so far.
+
+        Returns:
+            list: (name, instance) pairs in build order
+        """
+        return list(self.instances.items())
+
+    def shutdown(self):
+        """Stop the services that were built, most recently built first; unbuilt ones are left alone."""
+        for name, instance in reversed(self.built()):
+            shutdown = self.shutdowns.get(name)
+            if shutdown is None:
+                continue
+            try:
+                shutdown(instance)
+            except Exception as e:
+                logger.error(f"Error stopping service '{name}': {str(e)}")
+
+    def pending(self):
+        """
+        Names of registered services that have not been built yet.
+
+        Returns:
+            list: Service names in registration order, GUI-thread services first
+        """
+        names = [name for name in self.factories if name not in self.instances]
+        return sorted(names, key=lambda name: not self.factories[name][1])
+
+    def _get_from_gui_thread(self, name):
+        with self.lock:
+            done = self.gui_builds.get(name)
+            if done is None:
+                done = self.gui_builds[name] = threading.Event()
+                self._build_requested.emit(name)
+        done.wait()
+        instance = self.instances.get(name)
+        if instance is None:
+            raise RuntimeError(f"Service '{name}' could not be started")
+        return instance
+
+    def _build_on_gui_thread(self, name):
+        try:
+            self.get(name)
+        except Exception as e:
+            logger.error(f"Error starting service '{name}': {str(e)}")
+        finally:
+            done = self.gui_builds.pop(name, None)
+            if done:
+                done.set()
@@ -9,7 +9,6 @@ import shutil
 import hashlib
 import queue
 import re
-from gtts import gTTS
 import speech_recognition as sr
 from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtWidgets import QApplication  # Add this import for QApplication access
@@ -177,18 +176,12 @@ class SpeechProcessor(QObject):
                 logger.info(f"Using existing speed-adjusted file: {output_file}")
                 return output_file
                 
-            # Xác định đường dẫn FFmpeg
-            ffmpeg_path = getattr(config, 'FFMPEG_PATH', None)
-            
-            if ffmpeg_path:
-                # Sử dụng đường dẫn FFmpeg được cấu hình
-                if os.name == 'nt':  # Windows
-                    ffmpeg_exe = os.path.join(ffmpeg_path, 'ffmpeg.exe')
-                else:  # Linux/Mac
-                    ffmpeg_exe = os.path.join(ffmpeg_path, 'ffmpeg')
-            else:
-                # Sử dụng ffmpeg trên PATH
-                ffmpeg_exe = 'ffmpeg'
+            # Xác định đường dẫn FFmpeg (đã dò một lần và lưu lại bởi media toolchain)
+            from .media_toolchain import media_toolchain
+            ffmpeg_exe = media_toolchain.ffmpeg
+            if not ffmpeg_exe or not media_toolchain.has_filter('atempo'):
+                logger.warning("FFmpeg with the atempo filter is not available, playing at normal speed")
+                return input_file
                 
             # Điều chỉnh tốc độ với giữ nguyên pitch (atempo hỗ trợ giá trị từ 0.5 đến 2.0)
             # Đối với giá trị nằm ngoài phạm vi đó, chúng ta sẽ sử dụng nhiều bộ lọc atempo 
@@ -362,6 +355,7 @@ class SpeechProcessor(QObject):
             
             # Initialize gTTS with error handling
             try:
+                from gtts import gTTS  # Imported on first synthesis; cached phrases never need it
                 tts = gTTS(text=cleaned_text, lang=language, slow=False)
             except Exception as e:
                 logger.error(f"Error initializing gTTS: {str(e)}")
@@ -456,6 +450,7 @@ class SpeechProcessor(QObject):
             
             # Initialize gTTS with error handling
             try:
+                from gtts import gTTS  # Imported on first synthesis; cached phrases never need it
                 tts = gTTS(text=cleaned_text, lang=language, slow=False)
             except Exception as e:
                 logger.error(f"Error initializing gTTS: {str(e)}")
@@ -5,17 +5,21 @@ Cung cấp các tiện ích để định dạng văn bản, xử lý ký tự 
 
 import re
 import html
+import functools
 from datetime import datetime
 from ..utils import logger
+from .response_renderer import render_poem, render_response
+
+# Control characters removed by normalize_vietnamese_text (tab, newline and CR are kept)
+_CONTROL_CHARS = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
 
 class TextFormatter:
     """
     Lớp tiện ích để định dạng văn bản và xử lý ký tự đặc biệt
     """
     
-    # CSS styles for news formatting
-    NEWS_STYLES = """
-    <style>
+    # CSS styles for news formatting, shared by every news message
+    NEWS_STYLESHEET = """
         .news-container {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             max-width: 100%;
@@ -269,8 +273,9 @@ class TextFormatter:
             0% { background-position: -200% 0; }
             100% { background-position: 200% 0; }
         }
-    </style>
     """
+    # Pre-rendered news HTML (see render_news_html) starts with this tag
+    NEWS_HTML_MARKER = '<div class="news-container">'
     
     @staticmethod
     def format_message_text(text):
@@ -283,6 +288,10 @@ class TextFormatter:
         - Định dạng tin tức theo format đặc biệt
         """
         try:
+            # Tin tức đã được dựng sẵn HTML; stylesheet dùng chung do khung chat gắn vào tài liệu
+            if text.startswith(TextFormatter.NEWS_HTML_MARKER):
+                return text, "html"
+            
             # Kiểm tra xem có phải là tin tức không
             if "Tin tức mới nhất từ Việt Nam" in text and "tin):" in text:
                 return TextFormatter.format_news_text(text)
@@ -293,30 +302,8 @@ class TextFormatter:
                 # HTML thực sự, trả về trực tiếp
                 return text, "html"
                 
-            # Tìm và chuyển URLs thành link có thể nhấp
-            url_pattern = r'(https?://[^\s]+)'
-            text_with_links = re.sub(url_pattern, r'<a href="\1" target="_blank" rel="noopener">\1</a>', text)
-                
-            # Đầu tiên, mã hóa ký tự đặc biệt như <, >, &, "
-            clean_text = html.escape(text)
-            
-            # Xử lý các dòng có '>' ở đầu (thường là để hiển thị trích dẫn)
-            lines = clean_text.split('\n')
-            for i, line in enumerate(lines):
-                if line.strip().startswith('&gt;'):
-                    # Định dạng dòng trích dẫn đẹp hơn
-                    formatted_line = f'<div style="padding: 12px 16px; border-left: 4px solid #667eea; background: linear-gradient(135deg, #f8f9ff 0%, #e3f2fd 100%); color: #2c3e50; margin: 8px 0; border-radius: 0 8px 8px 0; font-style: italic;">{line[4:]}</div>'
-                    lines[i] = formatted_line
-            
-            # Thay thế xuống dòng bằng thẻ <br>
-            formatted_text = '<br>'.join(lines)
-            
-            # Nếu có URLs, sử dụng phiên bản có link
-            if text_with_links != text:
-                # Thêm các liên kết vào văn bản đã được định dạng
-                pattern = r'&lt;a href=&quot;(.*?)&quot; target=&quot;_blank&quot; rel=&quot;noopener&quot;&gt;(.*?)&lt;/a&gt;'
-                replacer = r'<a href="\1" target="_blank" rel="noopener" style="color: #667eea; text-decoration: none; border-bottom: 1px solid #667eea; transition: all 0.3s ease;">\2</a>'
-                formatted_text = re.sub(pattern, replacer, html.escape(text_with_links).replace('\n', '<br>'))
+            # Liên kết, trích dẫn, thơ và ký tự đặc biệt được xử lý trong một lượt duy nhất
+            formatted_text = render_response(text).html
                 
             return formatted_text, "rich"
             
@@ -325,6 +312,7 @@ class TextFormatter:
             return text, "plain"
     
     @staticmethod
+    @functools.lru_cache(maxsize=32)
     def format_quote_text(text):
         """Định dạng văn bản trích dẫn với kiểu dáng đẹp hơn"""
         try:
@@ -372,7 +360,7 @@ class TextFormatter:
         try:
             # Giữ nguyên văn bản, chỉ thực hiện những thay thế cụ thể nếu cần
             # Loại bỏ các ký tự điều khiển không cần thiết
-            normalized = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
+            normalized = text.translate(_CONTROL_CHARS)
             return normalized.strip()
         except Exception as e:
             logger.error(f"Lỗi khi chuẩn hóa văn bản tiếng Việt: {str(e)}")
@@ -393,47 +381,8 @@ class TextFormatter:
     def format_poem_text(poem_text):
         """Định dạng văn bản thơ với kiểu dáng đặc biệt"""
         try:
-            # Loại bỏ dấu '>' thường được sử dụng để trích dẫn thơ
-            lines = poem_text.strip().split('\n')
-            clean_lines = []
-            for line in lines:
-                if line.strip().startswith('>'):
-                    clean_lines.append(line.strip()[1:].strip())
-                else:
-                    clean_lines.append(line.strip())
-            
-            # Tạo HTML với định dạng đẹp
-            formatted = '''
-            <div style="
-                font-family: 'Georgia', serif;
-                font-style: italic; 
-                color: #2c3e50; 
-                background: linear-gradient(135deg, #ffeaa7 0%, #fab1a0 100%); 
-                padding: 20px 25px; 
-                border-radius: 12px;
-                margin: 15px 0;
-                box-shadow: 0 4px 15px rgba(250, 177, 160, 0.2);
-                position: relative;
-                overflow: hidden;
-            ">
-                <div style="
-                    position: absolute;
-                    top: 10px;
-                    right: 15px;
-                    font-size: 40px;
-                    opacity: 0.2;
-                ">📜</div>
-            '''
-            
-            for line in clean_lines:
-                if line:
-                    formatted += f'<p style="margin: 8px 0; font-size: 16px; line-height: 1.6; position: relative; z-index: 1;">{html.escape(line)}</p>'
-                else:
-                    # Dòng trống tạo khoảng cách giữa các đoạn thơ
-                    formatted += '<div style="height: 16px;"></div>'
-            formatted += '</div>'
-            
-            return formatted
+            # Loại bỏ dấu '>' và dựng HTML; kết quả của các bài thơ gần đây được ghi nhớ
+            return render_poem(poem_text)
         except Exception as e:
             logger.error(f"Lỗi khi định dạng văn bản thơ: {str(e)}")
             return poem_text
@@ -447,54 +396,7 @@ class TextFormatter:
         try:
             # Kiểm tra xem có phải là tin tức không
             if "Tin tức mới nhất từ Việt Nam" in text and "tin):" in text:
-                lines = text.split('\n')
-                  # Đếm số lượng tin tức - limit to 5
-                news_count = min(text.count('📅') if '📅' in text else len([l for l in lines if l.strip() and not l.startswith('Tin tức')]), 5)
-                
-                # Bắt đầu HTML với CSS và container
-                formatted_html = TextFormatter.NEWS_STYLES
-                formatted_html += '<div class="news-container">'
-                  # Header section
-                header_line = next((line for line in lines if "Tin tức mới nhất từ Việt Nam" in line), "Tin tức mới nhất từ Việt Nam")
-                current_time = datetime.now().strftime("%d/%m/%Y - %H:%M")
-                
-                formatted_html += f'''
-                <div class="news-header">
-                    <h1 class="news-title-main">📰 {header_line}</h1>
-                    <p class="news-subtitle">Cập nhật lúc {current_time} • {news_count} tin tức</p>
-                </div>
-                '''
-                
-                # Content section
-                formatted_html += '<div class="news-content">'
-                  # Process news items - limit to first 5 items
-                news_items = TextFormatter._parse_news_items(lines)
-                if news_items:
-                    # Limit to first 5 news items
-                    news_items = news_items[:5]
-                
-                if news_items:
-                    for i, item in enumerate(news_items):
-                        formatted_html += TextFormatter._format_single_news_item(item, i + 1)
-                else:
-                    formatted_html += '''
-                    <div class="no-news">
-                        <div class="no-news-icon">📰</div>
-                        <p>Không có tin tức nào được tìm thấy.</p>
-                    </div>
-                    '''
-                
-                # Footer với thống kê
-                if news_items:
-                    formatted_html += f'''
-                    <div class="news-stats">
-                        Hiển thị {len(news_items)} tin tức mới nhất • Dữ liệu được cập nhật tự động
-                    </div>
-                    '''
-                
-                formatted_html += '</div></div>' 
-                
-                return formatted_html, "html"
+                return TextFormatter._render_news_text(text), "html"
             
             return text, "plain"
             
@@ -502,6 +404,74 @@ class TextFormatter:
             logger.error(f"Lỗi khi định dạng tin tức: {str(e)}")
             return text, "plain"
     
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _render_news_text(text):
+        """Parse a plain-text news response once and render it (without CSS)"""
+        lines = text.split('\n')
+        header_line = next((line for line in lines if "Tin tức mới nhất từ Việt Nam" in line), "Tin tức mới nhất từ Việt Nam")
+        
+        # Process news items - limit to first 5 items
+        news_items = TextFormatter._parse_news_items(lines)[:5]
+        return TextFormatter._render_news_html(header_line, news_items)
+    
+    @staticmethod
+    def render_news_html(header_line, items):
+        """
+        Dựng HTML tin tức trực tiếp từ dữ liệu bài viết (không kèm CSS)
+        
+        Args:
+            header_line (str): Dòng tiêu đề
+            items (list): Các dict có title, description, date, link_url, link_text
+            
+        Returns:
+            str: HTML bắt đầu bằng NEWS_HTML_MARKER
+        """
+        try:
+            return TextFormatter._render_news_html(header_line, items)
+        except Exception as e:
+            logger.error(f"Lỗi khi định dạng tin tức: {str(e)}")
+            return html.escape(header_line)
+    
+    @staticmethod
+    def _render_news_html(header_line, news_items):
+        """Build the news container HTML for already-parsed items"""
+        current_time = datetime.now().strftime("%d/%m/%Y - %H:%M")
+        
+        parts = [TextFormatter.NEWS_HTML_MARKER]
+        
+        # Header section
+        parts.append(f'''
+        <div class="news-header">
+            <h1 class="news-title-main">📰 {header_line}</h1>
+            <p class="news-subtitle">Cập nhật lúc {current_time} • {len(news_items)} tin tức</p>
+        </div>
+        ''')
+        
+        # Content section
+        parts.append('<div class="news-content">')
+        
+        if news_items:
+            for i, item in enumerate(news_items):
+                parts.append(TextFormatter._format_single_news_item(item, i + 1))
+            
+            # Footer với thống kê
+            parts.append(f'''
+            <div class="news-stats">
+                Hiển thị {len(news_items)} tin tức mới nhất • Dữ liệu được cập nhật tự động
+            </div>
+            ''')
+        else:
+            parts.append('''
+            <div class="no-news">
+                <div class="no-news-icon">📰</div>
+                <p>Không có tin tức nào được tìm thấy.</p>
+            </div>
+            ''')
+        
+        parts.append('</div></div>')
+        return ''.join(parts)
+    
     @staticmethod
     def _parse_news_items(lines):
         """Parse news items from text lines"""
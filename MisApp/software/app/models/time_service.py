@@ -1,6 +1,6 @@
-import requests
+import httpx
 import datetime
-import pytz
+import re
 import time
 import threading
 import uuid
@@ -8,11 +8,14 @@ import os
 import pygame
 from PyQt5.QtCore import QTime, QDate
 from ..utils import config, logger
+from ..utils.http_client import http_client
+from .timezone_engine import timezone_engine
 
 class TimeService:
     """
     Service for retrieving and managing time information from various timezones.
-    Uses TimezoneDB API to get current time for different locations around the world.
+    Resolves city times locally with zoneinfo; the TimezoneDB API is only used as a
+    fallback for locations outside the built-in gazetteer.
     Also manages alarms with sound notification.
     """
     
@@ -78,30 +81,10 @@ class TimeService:
             "Cairo": {"lat": 30.0444, "lng": 31.2357}
         }
         
-        # Timezone mappings (from common names to IANA timezone identifiers)
-        self.timezone_mappings = {
-            "việt nam": "Asia/Ho_Chi_Minh",
-            "vietnam": "Asia/Ho_Chi_Minh",
-            "hanoi": "Asia/Ho_Chi_Minh",
-            "hà nội": "Asia/Ho_Chi_Minh",
-            "ho chi minh": "Asia/Ho_Chi_Minh",
-            "hồ chí minh": "Asia/Ho_Chi_Minh",
-            "saigon": "Asia/Ho_Chi_Minh",
-            "sài gòn": "Asia/Ho_Chi_Minh",
-            "new york": "America/New_York",
-            "london": "Europe/London",
-            "tokyo": "Asia/Tokyo",
-            "sydney": "Australia/Sydney",
-            "paris": "Europe/Paris",
-            "berlin": "Europe/Berlin",
-            "moscow": "Europe/Moscow",
-            "dubai": "Asia/Dubai",
-            "los angeles": "America/Los_Angeles",
-            "bangkok": "Asia/Bangkok",
-            "singapore": "Asia/Singapore",
-            "beijing": "Asia/Shanghai",
-            "cairo": "Africa/Cairo"
-        }
+        # Local zoneinfo engine answers known cities; the API is only a fallback
+        self.timezone_engine = timezone_engine
+        self.enable_api_fallback = config.TIMEZONE_API_FALLBACK
+        self.api_timeout = config.TIMEZONE_API_TIMEOUT
         
     def get_current_time(self, location=None):
         """
@@ -117,33 +100,17 @@ class TimeService:
         if not location:
             location = self.default_location
             
-        # Standardize location name (lowercase for matching)
-        location_lower = location.lower()
-        
-        # Try to find the timezone from our mappings
-        timezone_id = None
-        for loc_name, tz_id in self.timezone_mappings.items():
-            if loc_name in location_lower:
-                timezone_id = tz_id
-                break
-                
-        # If we found a direct timezone mapping, use pytz to get the time
-        if timezone_id:
-            try:
-                now = datetime.datetime.now(pytz.timezone(timezone_id))
-                return {
-                    "success": True,
-                    "location": location,
-                    "formatted": now.strftime("%H:%M:%S"),
-                    "datetime": now.strftime("%Y-%m-%d %H:%M:%S"),
-                    "timezone": timezone_id,
-                    "timezone_offset": int(now.utcoffset().total_seconds() / 3600),
-                    "source": "local"
-                }
-            except Exception as e:
-                logger.error(f"Error getting time for {location} using pytz: {str(e)}")
+        # Resolve through the local gazetteer first (no network access)
+        try:
+            time_info = self.timezone_engine.get_time_info(location)
+            if time_info:
+                return time_info
+        except Exception as e:
+            logger.error(f"Error getting local time for {location}: {str(e)}")
         
-        # If we couldn't match to a known timezone, try the API
+        # If we couldn't match to a known timezone, optionally try the API
+        if not self.enable_api_fallback:
+            return {"success": False, "error": f"Unknown location: {location}"}
         return self._get_time_from_api(location)
     
     def _get_time_from_api(self, location):
@@ -197,7 +164,7 @@ class TimeService:
             }
             
             # Make API request
-            response = requests.get(self.base_url, params=params)
+            response = http_client.get(self.base_url, params=params, timeout=self.api_timeout)
             response.raise_for_status()
             data = response.json()
             
@@ -222,7 +189,7 @@ class TimeService:
                 logger.error(f"API error for {location}: {data.get('message', 'Unknown error')}")
                 return {"success": False, "error": data.get("message", "Unknown error")}
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Request error for {location}: {str(e)}")
             return {"success": False, "error": f"Request error: {str(e)}"}
         except Exception as e:
@@ -239,19 +206,18 @@ class TimeService:
         Returns:
             str or None: Extracted location or None if not found
         """
-        query_lower = query.lower()
+        # Check for direct mentions of known locations (diacritic-insensitive)
+        location = self.timezone_engine.find_location(query)
+        if location:
+            return location
         
-        # Check for "in {location}" pattern
-        if "in " in query_lower:
-            location_part = query_lower.split("in ", 1)[1]
+        # Check for "in {location}" pattern (whole word, so "xin" does not match)
+        match = re.search(r"\bin\s+(.+)", query.lower())
+        if match:
             # Remove question marks and other punctuation
-            location_part = location_part.strip("?!.,;: ")
-            return location_part
-            
-        # Check for direct mentions of locations
-        for location in self.timezone_mappings.keys():
-            if location.lower() in query_lower:
-                return location
+            location_part = match.group(1).strip("?!.,;: ")
+            if location_part:
+                return location_part
                 
         # If no location mentioned, return None (to use default)
         return None
@@ -911,7 +877,7 @@ class TimeService:
         while not self.stop_clock_thread and self.is_showing_clock:
             try:
                 # Get current Vietnam time
-                now = datetime.datetime.now(pytz.timezone(self.default_timezone))
+                now = self.timezone_engine.now(self.default_timezone)
                 
                 # Format as requested: Date: DD/MM/YYYY \n Time: HH:MM:SS
                 date_str = now.strftime("%d/%m/%Y")
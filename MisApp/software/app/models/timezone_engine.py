@@ -0,0 +1,140 @@
+"""
+MIS Smart Assistant - Timezone Engine
+Local time lookups backed by zoneinfo and the shared location gazetteer.
+"""
+
+import datetime
+import threading
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    ZONEINFO_AVAILABLE = True
+except ImportError:
+    ZONEINFO_AVAILABLE = False
+    ZoneInfo = None
+    ZoneInfoNotFoundError = KeyError
+
+from ..utils import logger
+from .location_gazetteer import location_gazetteer
+
+
+class TimezoneEngine:
+    """
+    Resolves locations to IANA timezones without network access.
+    Locations come from the shared gazetteer; tzinfo objects are built once and reused.
+    """
+
+    def __init__(self, gazetteer=None):
+        self.gazetteer = gazetteer or location_gazetteer
+        self._tzinfo_cache = {}
+        self._lock = threading.Lock()
+
+    def get_tzinfo(self, timezone_id):
+        """
+        Get a cached tzinfo object for an IANA timezone id.
+
+        Args:
+            timezone_id (str): IANA timezone identifier (e.g. "Asia/Tokyo")
+
+        Returns:
+            tzinfo or None: Timezone object, or None if the id is unknown
+        """
+        tzinfo = self._tzinfo_cache.get(timezone_id)
+        if tzinfo is not None:
+            return tzinfo
+
+        with self._lock:
+            tzinfo = self._tzinfo_cache.get(timezone_id)
+            if tzinfo is not None:
+                return tzinfo
+            try:
+                if not ZONEINFO_AVAILABLE:
+                    raise ZoneInfoNotFoundError(timezone_id)
+                tzinfo = ZoneInfo(timezone_id)
+            except (ZoneInfoNotFoundError, ValueError):
+                # Platforms without a system tz database (Windows without tzdata) fall back to pytz
+                try:
+                    import pytz
+                    tzinfo = pytz.timezone(timezone_id)
+                except Exception:
+                    logger.warning(f"Unknown timezone: {timezone_id}")
+                    return None
+            self._tzinfo_cache[timezone_id] = tzinfo
+            return tzinfo
+
+    def now(self, timezone_id):
+        """
+        Get the current time in a timezone.
+
+        Args:
+            timezone_id (str): IANA timezone identifier
+
+        Returns:
+            datetime.datetime: Timezone-aware current time (local time if the id is unknown)
+        """
+        tzinfo = self.get_tzinfo(timezone_id)
+        if tzinfo is None:
+            return datetime.datetime.now().astimezone()
+        return datetime.datetime.now(tzinfo)
+
+    def resolve(self, location):
+        """
+        Resolve a location name to its display name and timezone.
+
+        Args:
+            location (str): Location name, alias or IANA timezone id
+
+        Returns:
+            tuple or None: (display_name, timezone_id), or None if not found
+        """
+        if not location:
+            return None
+
+        if "/" in location and self.get_tzinfo(location.strip()) is not None:
+            return location.strip(), location.strip()
+
+        entry = self.gazetteer.resolve(location) or self.gazetteer.find(location)
+        return (entry["name"], entry["timezone"]) if entry else None
+
+    def find_location(self, query):
+        """
+        Find the first known location mentioned in a free-text query.
+
+        Args:
+            query (str): Query text (e.g. "Mấy giờ ở Tokyo?")
+
+        Returns:
+            str or None: Display name of the location, or None if none is mentioned
+        """
+        entry = self.gazetteer.find(query)
+        return entry["name"] if entry else None
+
+    def get_time_info(self, location):
+        """
+        Get current time information for a location.
+
+        Args:
+            location (str): Location name
+
+        Returns:
+            dict or None: Time information in the TimeService result format, or None if unknown
+        """
+        match = self.resolve(location)
+        if not match:
+            return None
+
+        display_name, timezone_id = match
+        now = self.now(timezone_id)
+        return {
+            "success": True,
+            "location": display_name,
+            "formatted": now.strftime("%H:%M:%S"),
+            "datetime": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "timezone": timezone_id,
+            "timezone_offset": int(now.utcoffset().total_seconds() / 3600),
+            "source": "local"
+        }
+
+
+# Create a global instance
+timezone_engine = TimezoneEngine()
@@ -0,0 +1,300 @@
+"""
+MIS Smart Assistant - Transcode Cache
+Downloaded songs decoded once into a pygame-friendly file (Ogg Vorbis, or WAV
+without a Vorbis encoder) at the mixer's sample rate, reused for playback and seeking.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from ..utils import config, logger
+from .media_toolchain import media_toolchain
+
+
+_SOFTWARE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TranscodeCache:
+    """
+    Prepared playback copies of audio files, keyed by the source's (mtime, size).
+
+    Downloads are queued on a single background worker so transcoding never competes
+    with playback for more than one core; a caller that needs a file right away
+    (an unplayable format) transcodes in its own thread, joining a job already
+    running for the same source. An index maps each source to its artifact so
+    stale and orphaned copies can be removed.
+    """
+
+    def __init__(self, cache_dir=None, index_file=None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory for prepared files (defaults to resources/media_cache/transcoded)
+            index_file (str): Source -> artifact index (defaults to resources/cache/transcodes.json)
+        """
+        self.cache_dir = cache_dir or os.path.join(_SOFTWARE_DIR, 'resources', 'media_cache', 'transcoded')
+        self.index_file = index_file or os.path.join(_SOFTWARE_DIR, 'resources', 'cache', 'transcodes.json')
+        self.frequency = 44100
+        self.channels = 2
+        self.lock = threading.Lock()
+        self.active = {}  # Source -> Event set when its running transcode ends
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='transcode')
+        self.index = self._load_index()
+
+    def set_mixer_format(self, frequency, channels):
+        """
+        Match prepared files to the mixer so pygame does not resample them.
+
+        Args:
+            frequency (int): Mixer sample rate in Hz
+            channels (int): Mixer channel count
+        """
+        self.frequency = frequency
+        self.channels = channels
+
+    def get(self, source):
+        """
+        Get the prepared copy of a file.
+
+        Args:
+            source (str): Original audio file
+
+        Returns:
+            str: Prepared file, or None if there is no up-to-date one
+        """
+        if not config.ENABLE_TRANSCODE_CACHE:
+            return None
+        key = self._key(source)
+        with self.lock:
+            entry = self.index.get(source)
+        if not key or not entry or entry['key'] != key:
+            return None
+        artifact = os.path.join(self.cache_dir, entry['artifact'])
+        return artifact if os.path.exists(artifact) else None
+
+    def prepare(self, source):
+        """
+        Queue a file for transcoding in the background (e.g. right after it was downloaded).
+
+        Args:
+            source (str): Original audio file
+
+        Returns:
+            Future: Resolves to the prepared file or None, or None if nothing was queued
+        """
+        if not config.ENABLE_TRANSCODE_CACHE or not media_toolchain.ffmpeg or self.get(source):
+            return None
+        return self.executor.submit(self.transcode, source)
+
+    def prepare_now(self, source):
+        """
+        Transcode a file on its own thread, ahead of the queued background work
+        (e.g. a track the user asked to play).
+        
+        Args:
+            source (str): Original audio file
+            
+        Returns:
+            Future: Resolves to the prepared file or None, or None if transcoding is unavailable
+        """
+        if not config.ENABLE_TRANSCODE_CACHE or not media_toolchain.ffmpeg:
+            return None
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(self.transcode(source))
+            except Exception as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, name='transcode-now', daemon=True).start()
+        return future
+    
+    def transcode(self, source, cancel=None):
+        """
+        Prepare a file now.
+
+        Args:
+            source (str): Original audio file
+            cancel (threading.Event): Set to give up; the FFmpeg process is killed
+
+        Returns:
+            str: Prepared file, or None if transcoding failed, was cancelled or is disabled
+        """
+        if not config.ENABLE_TRANSCODE_CACHE:
+            return None
+        while True:
+            artifact = self.get(source)
+            if artifact:
+                return artifact
+            with self.lock:
+                running = self.active.get(source)
+                if running is None:
+                    done = self.active[source] = threading.Event()
+                    break
+            # Another thread is transcoding this file: wait for it instead of starting a second job
+            while not running.wait(0.2):
+                if cancel and cancel.is_set():
+                    return None
+
+        try:
+            return self._run(source, cancel)
+        finally:
+            with self.lock:
+                del self.active[source]
+            done.set()
+
+    def discard(self, source):
+        """
+        Remove the prepared copy of a file (e.g. when the file leaves the media cache).
+
+        Args:
+            source (str): Original audio file
+        """
+        with self.lock:
+            entry = self.index.pop(source, None)
+            if entry:
+                self._save_index()
+        if entry:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['artifact']))
+            except OSError:
+                pass
+
+    def prune(self):
+        """
+        Remove prepared files whose source changed or is gone, and files missing from the index.
+
+        Returns:
+            int: Number of files removed
+        """
+        with self.lock:
+            entries = dict(self.index)
+        keep = set()
+        stale = []
+        for source, entry in entries.items():
+            if self._key(source) == entry['key']:
+                keep.add(entry['artifact'])
+            else:
+                stale.append(source)
+
+        removed = 0
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            names = []
+        for name in names:
+            if name in keep or name.endswith('.part'):
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+            except OSError:
+                pass
+
+        if stale:
+            with self.lock:
+                for source in stale:
+                    if self.index.get(source) == entries[source]:
+                        del self.index[source]
+                self._save_index()
+        if removed:
+            logger.info(f"Removed {removed} stale transcoded files")
+        return removed
+
+    def _run(self, source, cancel):
+        ffmpeg = media_toolchain.ffmpeg
+        key = self._key(source)
+        if not ffmpeg or not key:
+            return None
+
+        if media_toolchain.has_encoder('libvorbis'):
+            output_format, codec = 'ogg', ['-c:a', 'libvorbis', '-q:a', '6']
+        else:
+            output_format, codec = 'wav', ['-c:a', 'pcm_s16le']
+        name = hashlib.sha1(f"{source}|{key}|{self.frequency}|{self.channels}".encode('utf-8')).hexdigest()
+        artifact = os.path.join(self.cache_dir, f"{name}.{output_format}")
+        part_file = f"{artifact}.part"
+
+        command = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin', '-i', source,
+                   '-map', '0:a:0', '-map_metadata', '-1', '-ar', str(self.frequency), '-ac', str(self.channels)]
+        command += codec + ['-f', output_format, '-y', part_file]
+        kwargs = {}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+
+        start_time = time.monotonic()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.PIPE, **kwargs)
+            # stderr stays small with -loglevel error, so polling cannot fill the pipe
+            if cancel is None:
+                process.wait()
+            while process.poll() is None:
+                if cancel.wait(0.2):
+                    process.kill()
+                    process.wait()
+            stderr = process.stderr.read().decode('utf-8', errors='replace').strip()
+            process.stderr.close()
+
+            if process.returncode != 0 or (cancel and cancel.is_set()):
+                if not (cancel and cancel.is_set()):
+                    logger.error(f"Could not transcode {os.path.basename(source)}: {stderr}")
+                if os.path.exists(part_file):
+                    os.remove(part_file)
+                return None
+
+            os.replace(part_file, artifact)
+        except Exception as e:
+            logger.error(f"Error transcoding {os.path.basename(source)}: {str(e)}")
+            return None
+
+        with self.lock:
+            previous = self.index.get(source)
+            self.index[source] = {'key': key, 'artifact': os.path.basename(artifact)}
+            self._save_index()
+        if previous and previous['artifact'] != os.path.basename(artifact):
+            try:
+                os.remove(os.path.join(self.cache_dir, previous['artifact']))
+            except OSError:
+                pass
+        logger.info(f"Transcoded {os.path.basename(source)} for playback in {time.monotonic() - start_time:.1f}s")
+        return artifact
+
+    @staticmethod
+    def _key(source):
+        """Change key of a source file, or None if it is gone."""
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            temp_file = f"{self.index_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+        except OSError as e:
+            logger.warning(f"Could not save transcode index: {str(e)}")
+
+
+# Create a global instance
+transcode_cache = TranscodeCache()
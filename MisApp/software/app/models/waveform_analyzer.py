@@ -0,0 +1,258 @@
+"""
+MIS Smart Assistant - Waveform Analyzer
+Compact per-track envelope for the player's visualizer: peak and RMS level plus
+coarse spectrum bands for every 1/20 s of audio, computed once with NumPy and
+stored in the media library.
+"""
+
+import os
+import platform
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ..utils import config, logger
+from ..utils.lazy_import import LazyModule
+from .media_library import media_library
+from .media_toolchain import media_toolchain
+from .transcode_cache import transcode_cache
+
+# Without NumPy tracks are not analyzed and the visualizer stays idle
+numpy = LazyModule('numpy')
+
+
+FRAME_RATE = 20  # Envelope frames per second of audio
+BAND_COUNT = 24  # Log-spaced spectrum bands from 60 Hz to 8 kHz
+_SAMPLE_RATE = 16000  # Decoding rate for analysis; enough for the top band
+_FRAME_SIZE = _SAMPLE_RATE // FRAME_RATE
+_FFT_SIZE = 1024
+_DYNAMIC_RANGE_DB = 40  # Band levels this far below a band's loud passages show as silence
+
+
+class Waveform:
+    """
+    Envelope of one track, quantized to one byte per value.
+
+    Looking up a frame is a slice of bytes, so the visualizer can sample it on every
+    repaint. Peak and RMS are relative to the loudest frame of the track; each band
+    is relative to its own loud passages, so quiet treble still moves.
+    """
+
+    def __init__(self, frame_rate, band_count, peaks, rms, bands):
+        """
+        Initialize the envelope.
+
+        Args:
+            frame_rate (int): Frames per second of audio
+            band_count (int): Spectrum bands per frame
+            peaks (bytes): Peak level per frame (0-255)
+            rms (bytes): RMS level per frame (0-255)
+            bands (bytes): band_count levels per frame (0-255), frame after frame
+        """
+        self.frame_rate = frame_rate
+        self.band_count = band_count
+        self.peaks = peaks
+        self.rms = rms
+        self.bands = bands
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an envelope from analyze_track() output or a media library row."""
+        return cls(data['frame_rate'], data['band_count'], data['peaks'], data['rms'], data['bands'])
+
+    def __len__(self):
+        return len(self.peaks)
+
+    def frame(self, position):
+        """
+        Levels at a playback position.
+
+        Args:
+            position (float): Seconds from the start of the track
+
+        Returns:
+            tuple: (peak, rms, bands) scaled to 0.0-1.0, bands being a list of band_count values
+        """
+        index = max(0, min(len(self.peaks) - 1, int(position * self.frame_rate)))
+        start = index * self.band_count
+        bands = self.bands[start:start + self.band_count]
+        return self.peaks[index] / 255, self.rms[index] / 255, [level / 255 for level in bands]
+
+
+def analyze_track(path, ffmpeg):
+    """
+    Compute a track's envelope.
+
+    Args:
+        path (str): Audio file (or its transcoded copy)
+        ffmpeg (str): FFmpeg executable used to decode it
+
+    Returns:
+        dict: frame_rate, band_count, peaks, rms and bands as bytes, or None if it cannot be decoded
+    """
+    kwargs = {}
+    if platform.system() == 'Windows':
+        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+    result = subprocess.run(
+        [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin', '-i', path, '-map', '0:a:0',
+         '-ac', '1', '-ar', str(_SAMPLE_RATE), '-f', 'f32le', '-'],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=120, **kwargs
+    )
+    if result.returncode != 0:
+        logger.warning(f"Could not decode {os.path.basename(path)} for analysis: "
+                       f"{result.stderr.decode('utf-8', errors='replace').strip()}")
+        return None
+
+    samples = numpy.frombuffer(result.stdout, dtype=numpy.float32)
+    frame_count = len(samples) // _FRAME_SIZE
+    if frame_count == 0:
+        return None
+    frames = samples[:frame_count * _FRAME_SIZE].reshape(frame_count, _FRAME_SIZE)
+
+    peaks = numpy.abs(frames).max(axis=1)
+    rms = numpy.sqrt(numpy.square(frames).mean(axis=1))
+
+    # FFT bins of each band; low bands get at least one bin
+    frequencies = numpy.fft.rfftfreq(_FFT_SIZE, 1.0 / _SAMPLE_RATE)
+    edges = numpy.searchsorted(frequencies, numpy.geomspace(60, 8000, BAND_COUNT + 1))
+    for i in range(1, len(edges)):
+        edges[i] = max(edges[i], edges[i - 1] + 1)
+    low, high = edges[:-1], edges[1:]
+
+    window = numpy.hanning(_FRAME_SIZE).astype(numpy.float32)
+    power = numpy.empty((frame_count, BAND_COUNT), dtype=numpy.float32)
+    # In chunks so a long track never holds its whole spectrogram
+    for start in range(0, frame_count, 512):
+        chunk = frames[start:start + 512] * window
+        spectrum = numpy.square(numpy.abs(numpy.fft.rfft(chunk, n=_FFT_SIZE, axis=1)))
+        cumulative = numpy.concatenate([numpy.zeros((len(chunk), 1)), numpy.cumsum(spectrum, axis=1)], axis=1)
+        power[start:start + len(chunk)] = (cumulative[:, high] - cumulative[:, low]) / (high - low)
+
+    levels = 10 * numpy.log10(power + 1e-12)
+    top = numpy.percentile(levels, 99, axis=0)
+    bands = numpy.clip((levels - (top - _DYNAMIC_RANGE_DB)) / _DYNAMIC_RANGE_DB, 0.0, 1.0)
+
+    def quantize(values):
+        return numpy.round(values * 255).astype(numpy.uint8).tobytes()
+
+    return {
+        'frame_rate': FRAME_RATE,
+        'band_count': BAND_COUNT,
+        'peaks': quantize(peaks / max(float(peaks.max()), 1e-6)),
+        'rms': quantize(rms / max(float(rms.max()), 1e-6)),
+        'bands': quantize(bands),
+    }
+
+
+class WaveformAnalyzer:
+    """
+    Envelopes of recently played tracks, analyzed on one background worker.
+
+    get() never blocks on analysis: it returns what is in memory or stored in the
+    media library and queues the track otherwise, so the visualizer can simply ask
+    again on its next frame.
+    """
+
+    def __init__(self, max_tracks=4):
+        """
+        Initialize the analyzer.
+
+        Args:
+            max_tracks (int): Envelopes kept in memory
+        """
+        self.max_tracks = max_tracks
+        self.waveforms = OrderedDict()  # Track path -> Waveform
+        self.pending = set()
+        self.failed = set()  # Tracks that cannot be analyzed; asked for again only after a restart
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='waveform')
+
+    @property
+    def available(self):
+        """bool: Whether tracks can be analyzed (NumPy and FFmpeg are present)."""
+        return config.ENABLE_WAVEFORM_ANALYSIS and numpy.available and bool(media_toolchain.ffmpeg)
+
+    def get(self, path):
+        """
+        Get a track's envelope, queueing its analysis if there is none yet.
+
+        Args:
+            path (str): Audio file path
+
+        Returns:
+            Waveform: The envelope, or None while it is being computed or if it cannot be
+        """
+        if not path:
+            return None
+        with self.lock:
+            waveform = self.waveforms.get(path)
+            if waveform is not None:
+                self.waveforms.move_to_end(path)
+                return waveform
+            if path in self.pending or path in self.failed:
+                return None
+        # A streamed track has no file until its download completes
+        if not os.path.exists(path):
+            return None
+
+        stored = media_library.get_waveform(path)
+        if stored:
+            waveform = Waveform.from_dict(stored)
+            self._remember(path, waveform)
+            return waveform
+        if self.available:
+            self.analyze(path)
+        else:
+            with self.lock:
+                self.failed.add(path)
+        return None
+
+    def analyze(self, path):
+        """
+        Queue a track for analysis unless its envelope is already known (e.g. when it is prepared to play next).
+
+        Args:
+            path (str): Audio file path
+        """
+        if not self.available:
+            return
+        with self.lock:
+            if path in self.waveforms or path in self.pending or path in self.failed:
+                return
+            self.pending.add(path)
+        self.executor.submit(self._analyze, path)
+
+    def _analyze(self, path):
+        start_time = time.monotonic()
+        try:
+            stored = media_library.get_waveform(path)
+            if stored:
+                self._remember(path, Waveform.from_dict(stored))
+                return
+            # The transcoded copy decodes faster and matches what is heard
+            result = analyze_track(transcode_cache.get(path) or path, media_toolchain.ffmpeg)
+            if result is None:
+                return
+            media_library.store_waveform(path, result)
+            self._remember(path, Waveform.from_dict(result))
+            logger.info(f"Analyzed waveform of {os.path.basename(path)} in {time.monotonic() - start_time:.1f}s")
+        except Exception as e:
+            logger.error(f"Error analyzing waveform of {os.path.basename(path)}: {str(e)}")
+        finally:
+            with self.lock:
+                self.pending.discard(path)
+                if path not in self.waveforms:
+                    self.failed.add(path)
+
+    def _remember(self, path, waveform):
+        with self.lock:
+            self.waveforms[path] = waveform
+            self.waveforms.move_to_end(path)
+            while len(self.waveforms) > self.max_tracks:
+                self.waveforms.popitem(last=False)
+
+
+# Create a global instance
+waveform_analyzer = WaveformAnalyzer()
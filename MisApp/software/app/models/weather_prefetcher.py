@@ -0,0 +1,308 @@
+"""
+MIS Smart Assistant - Weather Prefetcher
+Periodically refreshes current conditions for every location in the weather picker
+using OpenWeather's multi-city group endpoint, and keeps them in a columnar snapshot.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from array import array
+
+import httpx
+
+from ..utils import config, logger
+from ..utils.http_client import http_client
+
+
+class WeatherSnapshot:
+    """
+    Compact columnar store of current conditions for a fixed set of locations.
+
+    Numeric fields live in one array('d') per column, text fields in parallel lists,
+    so hundreds of locations cost a few kilobytes instead of full JSON responses.
+    """
+
+    NUMERIC_COLUMNS = (
+        "temp", "feels_like", "temp_min", "temp_max", "humidity", "pressure",
+        "wind_speed", "wind_deg", "clouds", "visibility", "sunrise", "sunset", "dt",
+    )
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        size = len(self.keys)
+        self.columns = {name: array('d', [math.nan]) * size for name in self.NUMERIC_COLUMNS}
+        self.fetched_at = array('d', [0.0]) * size
+        self.names = [None] * size
+        self.countries = [None] * size
+        self.icons = [None] * size
+        self.descriptions = [None] * size
+        self.lock = threading.Lock()
+
+    def update(self, key, weather):
+        """
+        Store an OpenWeather current-weather object for a location.
+
+        Args:
+            key (str): Location key (OpenWeather query)
+            weather (dict): Current weather response object
+        """
+        i = self.index.get(key)
+        if i is None:
+            return
+
+        main = weather.get('main', {})
+        wind = weather.get('wind', {})
+        sys_data = weather.get('sys', {})
+        condition = (weather.get('weather') or [{}])[0]
+        values = {
+            "temp": main.get('temp'),
+            "feels_like": main.get('feels_like'),
+            "temp_min": main.get('temp_min'),
+            "temp_max": main.get('temp_max'),
+            "humidity": main.get('humidity'),
+            "pressure": main.get('pressure'),
+            "wind_speed": wind.get('speed'),
+            "wind_deg": wind.get('deg'),
+            "clouds": weather.get('clouds', {}).get('all'),
+            "visibility": weather.get('visibility'),
+            "sunrise": sys_data.get('sunrise'),
+            "sunset": sys_data.get('sunset'),
+            "dt": weather.get('dt'),
+        }
+
+        with self.lock:
+            for name, value in values.items():
+                self.columns[name][i] = math.nan if value is None else float(value)
+            self.names[i] = weather.get('name')
+            self.countries[i] = sys_data.get('country')
+            self.icons[i] = condition.get('icon')
+            self.descriptions[i] = condition.get('description')
+            self.fetched_at[i] = time.time()
+
+    def get(self, key):
+        """
+        Rebuild an OpenWeather-shaped current weather dict for a location.
+
+        Args:
+            key (str): Location key (OpenWeather query)
+
+        Returns:
+            tuple or None: (weather dict, fetched_at) or None if never fetched
+        """
+        i = self.index.get(key)
+        if i is None:
+            return None
+
+        with self.lock:
+            fetched_at = self.fetched_at[i]
+            if not fetched_at:
+                return None
+            col = {name: self.columns[name][i] for name in self.NUMERIC_COLUMNS}
+            name = self.names[i]
+            country = self.countries[i]
+            icon = self.icons[i]
+            description = self.descriptions[i]
+
+        def value(column, cast=float, default=0):
+            number = col[column]
+            return default if math.isnan(number) else cast(number)
+
+        weather = {
+            "name": name,
+            "dt": value("dt", int),
+            "main": {
+                "temp": value("temp"),
+                "feels_like": value("feels_like"),
+                "temp_min": value("temp_min"),
+                "temp_max": value("temp_max"),
+                "humidity": value("humidity", int),
+                "pressure": value("pressure", int),
+            },
+            "wind": {"speed": value("wind_speed"), "deg": value("wind_deg", int)},
+            "clouds": {"all": value("clouds", int)},
+            "visibility": value("visibility", int),
+            "sys": {"country": country, "sunrise": value("sunrise", int), "sunset": value("sunset", int)},
+            "weather": [{"icon": icon or "01d", "description": description or ""}],
+        }
+        return weather, fetched_at
+
+
+class WeatherPrefetcher:
+    """
+    Background refresher for all picker locations.
+
+    OpenWeather's group endpoint takes numeric city ids, so each location's id is
+    learned once from a by-name lookup (which also fills the snapshot) and
+    persisted. Later cycles refresh up to 20 locations per request, paced to stay
+    under the configured calls-per-minute quota.
+    """
+
+    GROUP_URL = "https://api.openweathermap.org/data/2.5/group"
+    WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+    GROUP_SIZE = 20
+
+    def __init__(self, api_key, locations, request_timeout=10):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            api_key (str): OpenWeather API key
+            locations (list): OpenWeather location queries to keep warm (e.g. 'Hanoi,VN')
+            request_timeout (float): Per-request timeout in seconds
+        """
+        self.api_key = api_key
+        self.locations = list(dict.fromkeys(locations))
+        self.request_timeout = request_timeout
+        self.interval = config.WEATHER_PREFETCH_INTERVAL * 60  # Convert to seconds
+        self.min_call_spacing = 60.0 / max(1, config.WEATHER_PREFETCH_CALLS_PER_MINUTE)
+
+        self.snapshot = WeatherSnapshot(self.locations)
+        self.ids_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            'resources', 'cache', 'weather_city_ids.json'
+        )
+        self.city_ids = self._load_city_ids()
+
+        self.last_call_time = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _load_city_ids(self):
+        """Load the persisted location key -> OpenWeather city id map."""
+        try:
+            if os.path.exists(self.ids_path):
+                with open(self.ids_path, 'r', encoding='utf-8') as f:
+                    return {key: int(city_id) for key, city_id in json.load(f).items()}
+        except Exception as e:
+            logger.warning(f"Could not load weather city ids: {str(e)}")
+        return {}
+
+    def _save_city_ids(self):
+        """Persist the city id map so later startups go straight to group calls."""
+        try:
+            os.makedirs(os.path.dirname(self.ids_path), exist_ok=True)
+            temp_path = f"{self.ids_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.city_ids, f, ensure_ascii=False)
+            os.replace(temp_path, self.ids_path)
+        except Exception as e:
+            logger.warning(f"Could not save weather city ids: {str(e)}")
+
+    def start(self):
+        """Start the background prefetch loop."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+        self.thread.start()
+        logger.info(f"Weather prefetcher started for {len(self.locations)} locations")
+
+    def stop(self):
+        """Stop the background prefetch loop."""
+        self.stop_event.set()
+
+    def _prefetch_loop(self):
+        """Refresh every location, then sleep until the next cycle."""
+        while not self.stop_event.is_set():
+            try:
+                self.prefetch_all()
+            except Exception as e:
+                logger.error(f"Error in weather prefetch loop: {str(e)}")
+            self.stop_event.wait(self.interval)
+
+    def _throttle(self):
+        """Space out API calls to respect the per-minute quota."""
+        wait = self.last_call_time + self.min_call_spacing - time.time()
+        if wait > 0:
+            self.stop_event.wait(wait)
+        self.last_call_time = time.time()
+
+    def prefetch_all(self):
+        """Run one refresh cycle over all locations."""
+        if not self.api_key:
+            return
+
+        refreshed = []
+
+        # Locations without a known city id: one lookup by name each, which also returns their weather
+        unresolved = [key for key in self.locations if key not in self.city_ids]
+        if unresolved:
+            for key in unresolved:
+                if self.stop_event.is_set():
+                    return
+                if self._resolve_city_id(key):
+                    refreshed.append(key)
+            self._save_city_ids()
+
+        # Everything else: grouped refresh, GROUP_SIZE ids per request
+        id_to_key = {self.city_ids[key]: key for key in self.locations
+                     if key in self.city_ids and key not in refreshed}
+        ids = list(id_to_key)
+        for start in range(0, len(ids), self.GROUP_SIZE):
+            if self.stop_event.is_set():
+                return
+            batch = ids[start:start + self.GROUP_SIZE]
+            refreshed.extend(self._fetch_group(batch, id_to_key))
+
+        logger.info(f"Weather prefetch refreshed {len(refreshed)}/{len(self.locations)} locations")
+
+    def _resolve_city_id(self, key):
+        """Look up a location once by name to learn its city id and current weather."""
+        self._throttle()
+        try:
+            response = http_client.get(self.WEATHER_URL, params={
+                "q": key,
+                "appid": self.api_key,
+                "units": "metric",
+                "lang": "vi",
+            }, timeout=self.request_timeout)
+            response.raise_for_status()
+            weather = response.json()
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not resolve weather city id for {key}: {str(e)}")
+            return False
+
+        if weather.get('id'):
+            self.city_ids[key] = int(weather['id'])
+        self.snapshot.update(key, weather)
+        return True
+
+    def _fetch_group(self, batch, id_to_key):
+        """Fetch current weather for up to GROUP_SIZE city ids in one request."""
+        self._throttle()
+        try:
+            response = http_client.get(self.GROUP_URL, params={
+                "id": ",".join(str(city_id) for city_id in batch),
+                "appid": self.api_key,
+                "units": "metric",
+                "lang": "vi",
+            }, timeout=self.request_timeout)
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            logger.warning(f"Weather group request failed for {len(batch)} locations: {str(e)}")
+            return []
+
+        refreshed = []
+        for weather in data.get('list', []):
+            key = id_to_key.get(weather.get('id'))
+            if key:
+                self.snapshot.update(key, weather)
+                refreshed.append(key)
+        return refreshed
+
+    def get(self, key):
+        """
+        Get prefetched current conditions for a location.
+
+        Args:
+            key (str): Location key (OpenWeather query)
+
+        Returns:
+            tuple or None: (weather dict, fetched_at) or None if not prefetched yet
+        """
+        return self.snapshot.get(key)
@@ -1,9 +1,13 @@
-import requests
 import datetime
 import time
 import threading
 import os
+from collections import OrderedDict
+import httpx
 from ..utils import config, logger
+from ..utils.http_client import http_client
+from .location_gazetteer import location_gazetteer
+from .weather_prefetcher import WeatherPrefetcher
 
 class WeatherService:
     """
@@ -20,78 +24,37 @@ class WeatherService:
         self.forecast_data = None
         self.is_updating = False
         self.update_callbacks = []
+        self.request_timeout = config.WEATHER_REQUEST_TIMEOUT
         
-        # Initialize province to city mapping for Vietnamese provinces
-        self.province_to_city_mapping = {
-            # Map province names to major cities or specific locations for more accurate weather data
-            "Quảng Bình": "Đồng Hới,VN",
-            "Quảng Trị": "Đông Hà,VN",
-            "Thừa Thiên Huế": "Huế,VN",
-            "Quảng Nam": "Hội An,VN",
-            "Quảng Ngãi": "Quảng Ngãi,VN",
-            "Bình Định": "Quy Nhơn,VN",
-            "Phú Yên": "Tuy Hòa,VN",
-            "Khánh Hòa": "Nha Trang,VN",
-            "Ninh Thuận": "Phan Rang,VN",
-            "Bình Thuận": "Phan Thiết,VN",
-            "Kon Tum": "Kon Tum,VN",
-            "Gia Lai": "Pleiku,VN",
-            "Đắk Lắk": "Buôn Ma Thuột,VN",
-            "Đắk Nông": "Gia Nghĩa,VN",
-            "Lâm Đồng": "Đà Lạt,VN",
-            "Bình Phước": "Đồng Xoài,VN",
-            "Tây Ninh": "Tây Ninh,VN",
-            "Bình Dương": "Thủ Dầu Một,VN",
-            "Đồng Nai": "Biên Hòa,VN",
-            "Bà Rịa - Vũng Tàu": "Vũng Tàu,VN",
-            "TP. Hồ Chí Minh": "Ho Chi Minh City,VN",
-            "Long An": "Tân An,VN",
-            "Tiền Giang": "Mỹ Tho,VN",
-            "Bến Tre": "Bến Tre,VN",
-            "Trà Vinh": "Trà Vinh,VN",
-            "Vĩnh Long": "Vĩnh Long,VN",
-            "Đồng Tháp": "Cao Lãnh,VN",
-            "An Giang": "Long Xuyên,VN",
-            "Kiên Giang": "Rạch Giá,VN",
-            "Cần Thơ": "Cần Thơ,VN",
-            "Hậu Giang": "Vị Thanh,VN",
-            "Sóc Trăng": "Sóc Trăng,VN",
-            "Bạc Liêu": "Bạc Liêu,VN",
-            "Cà Mau": "Cà Mau,VN",
-            "Hà Nội": "Hanoi,VN",
-            "Hà Giang": "Hà Giang,VN",
-            "Cao Bằng": "Cao Bằng,VN",
-            "Bắc Kạn": "Bắc Kạn,VN",
-            "Tuyên Quang": "Tuyên Quang,VN",
-            "Lào Cai": "Lào Cai,VN",
-            "Yên Bái": "Yên Bái,VN",
-            "Thái Nguyên": "Thái Nguyên,VN",
-            "Lạng Sơn": "Lạng Sơn,VN",
-            "Bắc Giang": "Bắc Giang,VN",
-            "Phú Thọ": "Việt Trì,VN",
-            "Vĩnh Phúc": "Vĩnh Yên,VN",
-            "Bắc Ninh": "Bắc Ninh,VN",
-            "Hải Dương": "Hải Dương,VN",
-            "Hải Phòng": "Hai Phong,VN",
-            "Hưng Yên": "Hưng Yên,VN",
-            "Thái Bình": "Thái Bình,VN",
-            "Hà Nam": "Phủ Lý,VN",
-            "Nam Định": "Nam Định,VN",
-            "Ninh Bình": "Ninh Bình,VN",
-            "Thanh Hóa": "Thanh Hóa,VN",
-            "Nghệ An": "Vinh,VN",
-            "Hà Tĩnh": "Hà Tĩnh,VN",
-            "Đà Nẵng": "Da Nang,VN",
-            "Lai Châu": "Lai Châu,VN",
-            "Điện Biên": "Điện Biên Phủ,VN",
-            "Sơn La": "Sơn La,VN",
-            "Hòa Bình": "Hòa Bình,VN",
-            "Quảng Ninh": "Hạ Long,VN",
-        }
+        # Per-location cache (weather query -> entry), least recently used first
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.cache_max_entries = config.WEATHER_CACHE_MAX_ENTRIES
+        self.cache_max_stale = config.WEATHER_CACHE_MAX_STALE * 60  # Convert to seconds
+        self.refreshing_locations = set()
+        
+        # Shared location index (provinces, cities, aliases -> OpenWeather queries)
+        self.gazetteer = location_gazetteer
         
         self._ensure_icons_directory()
         
+        # Keeps current conditions for every picker location warm with grouped API calls
+        self.prefetcher = None
+        if config.ENABLE_WEATHER_PREFETCH and self.api_key:
+            self.prefetcher = WeatherPrefetcher(self.api_key, self._get_picker_locations(), self.request_timeout)
+        
         self._start_update_thread()
+        
+        if self.prefetcher:
+            self.prefetcher.start()
+    
+    def _get_picker_locations(self):
+        """Get the OpenWeather queries for every location offered in the weather picker."""
+        locations = []
+        for location in self.get_all_vietnam_provinces() + self.get_international_cities():
+            entry = self.gazetteer.resolve(location)
+            locations.append(entry["weather_query"] if entry else location)
+        return locations
     
     def _ensure_icons_directory(self):
         """Ensure the weather icons directory exists."""
@@ -121,7 +84,7 @@ class WeatherService:
                 time.sleep(60) 
     
     def update_weather(self):
-        """Update current weather data."""
+        """Update current weather data for the home location."""
         if self.is_updating:
             return
             
@@ -133,30 +96,11 @@ class WeatherService:
             self.is_updating = True
             logger.info(f"Updating weather data for {self.location}")
             
-            # Build API URL for current weather
-            url = f"https://api.openweathermap.org/data/2.5/weather?q={self.location}&appid={self.api_key}&units=metric&lang=vi"
-            
-            # Make the API request
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            # Parse the response
-            self.weather_data = response.json()
-            self.last_update_time = time.time()
-            
-            # Also update forecast
-            self.update_forecast()
+            self.refresh_location(self.location)
             
             logger.info("Weather data updated successfully")
-            
-            # Notify callbacks
-            for callback in self.update_callbacks:
-                try:
-                    callback(self.weather_data)
-                except Exception as e:
-                    logger.error(f"Error in weather update callback: {str(e)}")
                     
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Error fetching weather data: {str(e)}")
             
             # Check if it's a 404 error and if we used a province name directly
@@ -164,14 +108,14 @@ class WeatherService:
                 location_name_only = self.location.split(',')[0].strip()
                 
                 # Try to find a suitable replacement (major city in the province)
-                for province, city in self.province_to_city_mapping.items():
-                    if province.lower() == location_name_only.lower():
-                        logger.info(f"Location not found: {self.location}. Trying with mapped city: {city}")
-                        self.location = city
-                        # Try again with the mapped city
-                        self.is_updating = False
-                        self.update_weather()
-                        return
+                entry = self.gazetteer.resolve(location_name_only)
+                if entry and entry["weather_query"] != self.location:
+                    logger.info(f"Location not found: {self.location}. Trying with mapped city: {entry['weather_query']}")
+                    self.location = entry["weather_query"]
+                    # Try again with the mapped city
+                    self.is_updating = False
+                    self.update_weather()
+                    return
                     
                 # If we couldn't find a mapping but the current location isn't the default,
                 # fall back to default location
@@ -181,7 +125,7 @@ class WeatherService:
                     self.is_updating = False
                     self.update_weather()
                     return
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching weather data: {str(e)}")
         finally:
             self.is_updating = False
@@ -193,34 +137,186 @@ class WeatherService:
             return
             
         try:
-            # Build API URL for 5-day/3-hour forecast (which is all the free API offers)
-            # We'll process this into a 10-day forecast by extending with historical patterns
-            url = f"https://api.openweathermap.org/data/2.5/forecast?q={self.location}&appid={self.api_key}&units=metric&lang=vi&cnt=40"
+            forecast = self._fetch_forecast(self.location)
             
-            # Make the API request
-            response = requests.get(url)
-            response.raise_for_status()
+            with self.cache_lock:
+                entry = self.cache.get(self.location)
+                if entry:
+                    entry["forecast"] = forecast
+            self.forecast_data = forecast
             
-            # Parse the response
-            self.forecast_data = response.json()
+            logger.info("Weather forecast updated successfully")
             
-            # For a 10-day forecast, we need to extend beyond the 5 days provided by the free API
-            # We'll do this by extrapolating based on the last day's data and patterns
-            self._extend_forecast_to_10_days()
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching weather forecast: {str(e)}")
+    
+    def _fetch_forecast(self, location):
+        """
+        Fetch the forecast for a location and extend it to 10 days.
+        
+        Args:
+            location (str): OpenWeather location query (e.g. 'Hanoi,VN')
             
-            logger.info("Weather forecast updated successfully")
+        Returns:
+            dict: Forecast data
+        """
+        # Build API URL for 5-day/3-hour forecast (which is all the free API offers)
+        # We'll process this into a 10-day forecast by extending with historical patterns
+        url = f"https://api.openweathermap.org/data/2.5/forecast?q={location}&appid={self.api_key}&units=metric&lang=vi&cnt=40"
+        
+        response = http_client.get(url, timeout=self.request_timeout, cache=True)
+        response.raise_for_status()
+        forecast = response.json()
+        
+        # For a 10-day forecast, we need to extend beyond the 5 days provided by the free API
+        self._extend_forecast_to_10_days(forecast)
+        return forecast
+    
+    def refresh_location(self, location):
+        """
+        Fetch current weather and forecast for a location and store them in the cache.
+        
+        Args:
+            location (str): OpenWeather location query (e.g. 'Hanoi,VN')
+            
+        Returns:
+            dict: Cache entry with 'weather', 'forecast' and 'fetched_at'
             
-        except requests.exceptions.RequestException as e:
+        Raises:
+            httpx.HTTPError: If the current weather request fails
+        """
+        url = f"https://api.openweathermap.org/data/2.5/weather?q={location}&appid={self.api_key}&units=metric&lang=vi"
+        response = http_client.get(url, timeout=self.request_timeout, cache=True)
+        response.raise_for_status()
+        weather = response.json()
+        
+        forecast = None
+        try:
+            forecast = self._fetch_forecast(location)
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching weather forecast: {str(e)}")
+        
+        entry = self._store_in_cache(location, weather, forecast)
+        
+        # Only the home location drives the widget, so other cities never replace its data
+        if location == self.location:
+            self.weather_data = entry["weather"]
+            self.forecast_data = entry["forecast"]
+            self.last_update_time = entry["fetched_at"]
+            self._notify_update_callbacks()
+        
+        return entry
+    
+    def _store_in_cache(self, location, weather, forecast):
+        """Insert or refresh a cache entry and evict least recently used locations."""
+        with self.cache_lock:
+            previous = self.cache.pop(location, None)
+            if forecast is None and previous:
+                # Keep the last good forecast if only the forecast request failed
+                forecast = previous["forecast"]
+            entry = {"weather": weather, "forecast": forecast, "fetched_at": time.time()}
+            self.cache[location] = entry
+            
+            while len(self.cache) > self.cache_max_entries:
+                evicted, _ = self.cache.popitem(last=False)
+                logger.debug(f"Evicted weather cache entry for {evicted}")
+            
+            return entry
+    
+    def _notify_update_callbacks(self):
+        """Notify registered callbacks with the home location's weather data."""
+        for callback in self.update_callbacks:
+            try:
+                callback(self.weather_data)
+            except Exception as e:
+                logger.error(f"Error in weather update callback: {str(e)}")
     
-    def _extend_forecast_to_10_days(self):
+    def refresh_in_background(self, location=None):
+        """
+        Refresh a location on a background thread unless a refresh is already running.
+        
+        Args:
+            location (str, optional): OpenWeather location query. Defaults to the home location.
+        """
+        location = location or self.location
+        
+        with self.cache_lock:
+            if location in self.refreshing_locations:
+                return
+            self.refreshing_locations.add(location)
+        
+        def _refresh():
+            try:
+                self.refresh_location(location)
+            except httpx.HTTPError as e:
+                logger.error(f"Background weather refresh failed for {location}: {str(e)}")
+            except Exception as e:
+                logger.error(f"Unexpected error refreshing weather for {location}: {str(e)}")
+            finally:
+                with self.cache_lock:
+                    self.refreshing_locations.discard(location)
+        
+        threading.Thread(target=_refresh, daemon=True).start()
+    
+    def get_weather_for_location(self, location, block=True):
+        """
+        Get weather and forecast for a location using stale-while-revalidate.
+        
+        Fresh entries are returned as-is. Stale entries that are still within the
+        maximum staleness are returned immediately while a background refresh runs.
+        Missing or expired entries are fetched synchronously when block is True.
+        
+        Args:
+            location (str): OpenWeather location query (e.g. 'Hanoi,VN')
+            block (bool): Whether to fetch synchronously on a cache miss
+            
+        Returns:
+            dict or None: Cache entry with 'weather', 'forecast' and 'fetched_at'
+        """
+        with self.cache_lock:
+            entry = self.cache.get(location)
+            if entry:
+                self.cache.move_to_end(location)
+        
+        age = time.time() - entry["fetched_at"] if entry else None
+        
+        if entry and age < self.update_interval:
+            return entry
+        
+        if entry and age < self.cache_max_stale:
+            self.refresh_in_background(location)
+            return entry
+        
+        # Prefetched current conditions make a cold switch instant; the forecast follows
+        prefetched = self.prefetcher.get(location) if self.prefetcher else None
+        if prefetched and time.time() - prefetched[1] < self.update_interval:
+            self.refresh_in_background(location)
+            weather, fetched_at = prefetched
+            return {"weather": weather, "forecast": None, "fetched_at": fetched_at}
+        
+        if not block:
+            self.refresh_in_background(location)
+            return entry
+        
+        if not self.api_key:
+            logger.error("Weather API key not configured. Please set it in config.py")
+            return entry
+        
+        try:
+            return self.refresh_location(location)
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching weather data for {location}: {str(e)}")
+            # An expired entry is still better than nothing
+            return entry
+    
+    def _extend_forecast_to_10_days(self, forecast_data):
         """Extend the 5-day forecast from the API to a 10-day forecast."""
-        if not self.forecast_data or 'list' not in self.forecast_data:
+        if not forecast_data or 'list' not in forecast_data:
             return
             
         try:
             # Get the existing forecast list
-            forecasts = self.forecast_data['list']
+            forecasts = forecast_data['list']
             
             # Get the last day's forecasts (usually 8 entries for day 5)
             last_day_forecasts = forecasts[-8:]
@@ -255,38 +351,38 @@ class WeatherService:
                     extended_forecasts.append(new_forecast)
             
             # Add the extended forecasts to the existing list
-            self.forecast_data['list'].extend(extended_forecasts)
+            forecast_data['list'].extend(extended_forecasts)
             
             logger.info(f"Extended forecast from 5 to 10 days with {len(extended_forecasts)} additional entries")
             
         except Exception as e:
             logger.error(f"Error extending forecast to 10 days: {str(e)}")
     
-    def get_current_weather(self):
+    def get_current_weather(self, block=True):
         """
-        Get the current weather data.
+        Get the current weather data for the home location.
         
+        Args:
+            block (bool): Whether to wait for a fetch when nothing usable is cached
+            
         Returns:
             dict: Current weather data or None if not available
         """
-        # Update if data is stale (older than update_interval)
-        if not self.weather_data or (time.time() - self.last_update_time > self.update_interval):
-            self.update_weather()
-            
-        return self.weather_data
+        entry = self.get_weather_for_location(self.location, block=block)
+        return entry["weather"] if entry else self.weather_data
     
-    def get_forecast(self):
+    def get_forecast(self, block=True):
         """
-        Get the weather forecast data.
+        Get the weather forecast data for the home location.
         
+        Args:
+            block (bool): Whether to wait for a fetch when nothing usable is cached
+            
         Returns:
             dict: Weather forecast data or None if not available
         """
-        # Update if data is stale or not available
-        if not self.forecast_data or (time.time() - self.last_update_time > self.update_interval):
-            self.update_weather()
-            
-        return self.forecast_data
+        entry = self.get_weather_for_location(self.location, block=block)
+        return entry["forecast"] if entry else self.forecast_data
     
     def get_formatted_weather(self, location=None):
         """
@@ -300,37 +396,24 @@ class WeatherService:
         """
         # Use provided location or default
         original_display_name = None
+        query_location = self.location
         if location:
-            # Store original location to restore later
-            saved_original_location = self.location
-            
             # Store original name for display purposes
             original_display_name = location
-            
-            # Check if this is a province that needs mapping to a city
-            location_name_only = location.split(',')[0].strip()
-            if location_name_only in self.province_to_city_mapping:
-                # Save the original province name for display
-                original_display_name = location_name_only
-                # Use the mapping for the actual API request
-                location = self.province_to_city_mapping[location_name_only]
-                logger.info(f"Using mapped city {location} for weather data, but will display as {original_display_name}")
-            
-            # Update location temporarily
-            self.location = location
-            self.update_weather()
-            
-            # Get weather with new location
-            weather = self.get_current_weather()
-            forecast = self.get_forecast()
-            
-            # Restore original location
-            self.location = saved_original_location
-            self.update_weather()
-        else:
-            # Use default location
-            weather = self.get_current_weather()
-            forecast = self.get_forecast()
+            query_location = location
+            
+            # Resolve provinces and aliases to the city used for the API request
+            entry = self.gazetteer.resolve(location)
+            if entry:
+                # Keep the canonical name for display
+                original_display_name = entry["name"]
+                query_location = entry["weather_query"]
+                logger.info(f"Using mapped city {query_location} for weather data, but will display as {original_display_name}")
+        
+        # Served from the per-location cache; the home location is left untouched
+        cached = self.get_weather_for_location(query_location)
+        weather = cached["weather"] if cached else None
+        forecast = cached["forecast"] if cached else None
         
         if not weather:
             return "Thông tin thời tiết không khả dụng."
@@ -483,18 +566,33 @@ class WeatherService:
         Args:
             location (str): Location name (e.g., 'Hanoi,VN')
         """
-        # Check if the location is a Vietnamese province that needs mapping
         original_location = location
-        location_name_only = location.split(',')[0].strip()
         
-        # Check if we need to map this province to a specific city
-        if location_name_only in self.province_to_city_mapping:
-            location = self.province_to_city_mapping[location_name_only]
-            logger.info(f"Mapped province '{location_name_only}' to city '{location}'")
+        # Check if we need to map this province or alias to a specific city
+        entry = self.gazetteer.resolve(location)
+        if entry:
+            location = entry["weather_query"]
+            logger.info(f"Mapped location '{original_location}' to city '{location}'")
         
         self.location = location
         logger.info(f"Weather location set to: {location} (original query: {original_location})")
-        self.update_weather()  # Update weather for new location
+        
+        # Show cached data for the new location immediately, then revalidate in the background
+        with self.cache_lock:
+            entry = self.cache.get(location)
+        if entry:
+            self.weather_data = entry["weather"]
+            self.forecast_data = entry["forecast"]
+            self.last_update_time = entry["fetched_at"]
+            self._notify_update_callbacks()
+            if time.time() - entry["fetched_at"] < self.update_interval:
+                return
+        elif self.prefetcher and self.prefetcher.get(location):
+            # No full entry yet: show the prefetched current conditions while the forecast loads
+            self.weather_data, self.last_update_time = self.prefetcher.get(location)
+            self.forecast_data = None
+            self._notify_update_callbacks()
+        self.refresh_in_background(location)
         
     def register_update_callback(self, callback):
         """
@@ -516,6 +614,12 @@ class WeatherService:
         Returns:
             str or None: Extracted location or None if no location found
         """
+        # Known provinces, cities and aliases (diacritic-insensitive, one pass)
+        entry = self.gazetteer.find(query)
+        if entry:
+            logger.info(f"Found location '{entry['name']}' in query")
+            return entry["name"]
+        
         # Lowercase the query for matching
         query_lower = query.lower()
         
@@ -531,7 +635,7 @@ class WeatherService:
             "thời tiết tại "
         ]
         
-        # Try to find a location based on prefixes
+        # Fall back to free text after a prefix for places outside the gazetteer
         for prefix in location_prefixes:
             if prefix in query_lower:
                 # Extract the text after the prefix
@@ -551,18 +655,7 @@ class WeatherService:
                 
                 # Return location if it's not empty
                 if location:
-                    # Check if the extracted location is a province that needs mapping to a city
-                    for province in self.province_to_city_mapping:
-                        if location.lower() == province.lower():
-                            logger.info(f"Found province '{province}' in query")
-                            return province
                     return location
-        
-        # If no location found through prefixes, try direct province matching
-        for province in self.province_to_city_mapping:
-            if province.lower() in query_lower:
-                logger.info(f"Found province '{province}' directly in query")
-                return province
                 
         # No location found in the query
         return None
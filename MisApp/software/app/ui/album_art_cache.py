@@ -0,0 +1,114 @@
+"""
+MIS Smart Assistant - Album Art Cache
+Decoded cover images for the media player, loaded from the artwork store on worker threads.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from ..utils import config, logger
+from ..utils.http_client import http_client
+from ..models.artwork_store import artwork_store
+
+
+class AlbumArtCache(QObject):
+    """
+    In-memory cache of cover images keyed by (cover, size).
+
+    A cover is an artwork store digest, a local image path or a thumbnail URL. Reading
+    the file, downloading a remote cover and decoding all happen on a worker thread:
+    callers get None at first and art_ready is emitted when the image can be requested
+    again. Decoded images are QImages, so they can be built off the UI thread; the
+    widget turns them into pixmaps.
+    """
+
+    art_ready = pyqtSignal(str)
+
+    RETRY_AFTER = 300  # Seconds before a failed cover is attempted again
+
+    def __init__(self, max_images=32, parent=None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_images (int): Decoded images kept in memory
+            parent (QObject): Parent object
+        """
+        super().__init__(parent)
+        self.max_images = max_images
+        self.images = OrderedDict()  # (cover, size) -> QImage scaled to fit size
+        self.pending = set()
+        self.failed = {}  # cover -> time of the last failed load
+        self.lock = threading.Lock()
+
+    def get_image(self, cover, size):
+        """
+        Get a cover image scaled to fit a square of the given size.
+
+        Args:
+            cover (str): Artwork digest, local image path or URL
+            size (int): Edge of the target square in pixels
+
+        Returns:
+            QImage: The image, or None while it is loading or if it cannot be loaded
+        """
+        if not cover:
+            return None
+        key = (cover, size)
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                return image
+            if key in self.pending or time.time() - self.failed.get(cover, 0) < self.RETRY_AFTER:
+                return None
+            self.pending.add(key)
+        threading.Thread(target=self._load, args=(cover, size), daemon=True).start()
+        return None
+
+    def _load(self, cover, size):
+        """Resolve a cover to a stored file, decode and scale it, and announce it."""
+        key = (cover, size)
+        try:
+            path = artwork_store.get(self._digest(cover), size)
+            if path is None:
+                raise ValueError("cover not available")
+
+            image = QImage(path)
+            if image.isNull():
+                raise ValueError(f"invalid image data in {path}")
+            if image.width() > size or image.height() > size:
+                image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+            with self.lock:
+                self.images[key] = image
+                while len(self.images) > self.max_images:
+                    self.images.popitem(last=False)
+                self.pending.discard(key)
+            self.art_ready.emit(cover)
+        except Exception as e:
+            logger.warning(f"Could not load album art: {str(e)}")
+            with self.lock:
+                self.failed[cover] = time.time()
+                self.pending.discard(key)
+
+    def _digest(self, cover):
+        """Artwork store digest of a cover, storing it first if it comes from elsewhere."""
+        if cover.startswith(('http://', 'https://')):
+            digest = artwork_store.digest_for_url(cover)
+            if digest is None:
+                response = http_client.get(cover, timeout=config.ARTWORK_FETCH_TIMEOUT)
+                response.raise_for_status()
+                digest = artwork_store.put_url(cover, response.content)
+            return digest
+        if os.path.isfile(cover):
+            # Files inside the store are named by their digest
+            if os.path.dirname(os.path.abspath(cover)) == os.path.abspath(artwork_store.cache_dir):
+                return os.path.basename(cover)[:40]
+            return artwork_store.put_file(cover)
+        return cover
@@ -0,0 +1,465 @@
+"""
+MIS Smart Assistant - Chat Transcript
+Model/view chat history: messages are kept as lightweight records and only the
+rows in view are laid out and painted, by a delegate that draws the bubbles.
+"""
+
+import html
+import itertools
+import math
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QAbstractListModel, QByteArray, QEvent, QModelIndex, QPoint, QPointF, QRect, QSize, Qt, QUrl
+from PyQt5.QtGui import (QAbstractTextDocumentLayout, QColor, QDesktopServices, QFont, QFontMetrics, QImage,
+                         QPainter, QPalette, QPen, QPixmap, QPixmapCache, QTextDocument)
+from PyQt5.QtWidgets import QAbstractItemView, QFrame, QListView, QStyledItemDelegate
+
+from ..models.text_formatter import TextFormatter
+from ..utils import config, logger
+from .decoration_cache import circular_avatar
+
+
+class ChatMessage:
+    """One transcript entry. Only data is kept here; layouts and pixmaps live in the delegate's caches."""
+
+    __slots__ = ('id', 'sender', 'text', 'timestamp', 'image_data', 'file_name', 'image_size', 'record_id')
+
+    _ids = itertools.count()
+
+    def __init__(self, sender, text, timestamp=None, image_data=None, file_name=None, record_id=None):
+        """
+        Initialize a message record.
+
+        Args:
+            sender (str): "User", "MIS Assistant" or "System"
+            text (str): Message text (plain, rich or HTML)
+            timestamp (str): Display time (defaults to now, HH:MM)
+            image_data (bytes): Base64-encoded image attachment
+            file_name (str): Attachment file name
+            record_id (int): Conversation store id, for messages loaded from history
+        """
+        self.id = next(ChatMessage._ids)
+        self.sender = sender
+        self.text = text
+        self.timestamp = timestamp or time.strftime("%H:%M")
+        self.image_data = image_data
+        self.file_name = file_name
+        self.image_size = None  # Source size of the attachment, known after the first decode
+        self.record_id = record_id
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Create a message from a conversation store row.
+
+        Args:
+            record (dict): Row from ConversationStore.load_page
+
+        Returns:
+            ChatMessage: The message, stamped with its time (and date if not today)
+        """
+        created = time.localtime(record["created_at"])
+        time_format = "%H:%M" if created[:3] == time.localtime()[:3] else "%d/%m %H:%M"
+        return cls(record["sender"], record["text"], timestamp=time.strftime(time_format, created),
+                   record_id=record["id"])
+
+    @property
+    def is_user(self):
+        return self.sender == "User"
+
+
+class ChatTranscriptModel(QAbstractListModel):
+    """List model holding the chat history as ChatMessage records."""
+
+    MessageRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.messages = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.messages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self.messages[index.row()]
+        if role == self.MessageRole:
+            return message
+        if role == Qt.DisplayRole:
+            return message.text
+        return None
+
+    def append_message(self, sender, text, image_data=None, file_name=None):
+        """
+        Append a message to the end of the transcript.
+
+        Args:
+            sender (str): Message sender
+            text (str): Message text
+            image_data (bytes): Base64-encoded image attachment
+            file_name (str): Attachment file name
+
+        Returns:
+            ChatMessage: The new record
+        """
+        message = ChatMessage(sender, text, image_data=image_data, file_name=file_name)
+        row = len(self.messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.messages.append(message)
+        self.endInsertRows()
+        return message
+
+    def prepend_messages(self, messages):
+        """
+        Insert older messages at the top of the transcript.
+
+        Args:
+            messages (list): ChatMessage records, oldest first
+        """
+        if not messages:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(messages) - 1)
+        self.messages[:0] = messages
+        self.endInsertRows()
+
+    def oldest_record_id(self):
+        """
+        Get the store id of the first message in the transcript.
+
+        Returns:
+            int or None: Its record id, or None if the first message was not loaded from history
+        """
+        return self.messages[0].record_id if self.messages else None
+
+    def clear(self):
+        """Remove every message."""
+        self.beginResetModel()
+        self.messages = []
+        self.endResetModel()
+
+
+class _BubbleLayout:
+    """Measured contents of one bubble at one row width."""
+
+    __slots__ = ('document', 'sender_text', 'inner_width', 'text_top', 'image_top', 'image_size',
+                 'caption', 'caption_top', 'bubble_size', 'row_height')
+
+
+class _BubbleStyle:
+    """Colors and fonts of one kind of bubble."""
+
+    __slots__ = ('bubble', 'border', 'text', 'sender', 'font')
+
+    def __init__(self, bubble, border, text, sender, font):
+        self.bubble = QColor(bubble)
+        self.border = QColor(border)
+        self.text = QColor(text)
+        self.sender = QColor(sender)
+        self.font = font
+
+
+class ChatBubbleDelegate(QStyledItemDelegate):
+    """
+    Paints chat messages as Messenger-like bubbles.
+
+    Row heights are measured once per message and view width. Text layouts are kept
+    for the most recently painted rows only, so memory does not grow with the session.
+    """
+
+    AVATAR_SIZE = 40
+    AVATAR_SPACING = 12
+    BUBBLE_RADIUS = 18
+    BUBBLE_PADDING = 14
+    ROW_MARGIN_H = 15
+    ROW_MARGIN_V = 10
+    SENDER_SPACING = 6
+    MAX_BUBBLE_RATIO = 0.8
+    MAX_IMAGE_WIDTH = 300
+    LAYOUT_CACHE_SIZE = 48
+
+    def __init__(self, view, user_avatar_path=None, assistant_avatar_path=None):
+        """
+        Initialize the delegate.
+
+        Args:
+            view (QListView): View the delegate paints for (its viewport width sets row widths)
+            user_avatar_path (str): User avatar image
+            assistant_avatar_path (str): Assistant avatar image
+        """
+        super().__init__(view)
+        self.view = view
+        self.avatar_paths = {"User": user_avatar_path, "MIS Assistant": assistant_avatar_path}
+
+        self.heights = {}  # message id -> (row width, row height)
+        self.layouts = OrderedDict()  # (message id, row width) -> _BubbleLayout, most recent last
+
+        self.sender_font = QFont()
+        self.sender_font.setPixelSize(12)
+        self.sender_font.setBold(True)
+        self.caption_font = QFont()
+        self.caption_font.setPixelSize(12)
+        self.caption_font.setItalic(True)
+
+        user_font = QFont()
+        user_font.setPixelSize(15)
+        user_font.setWeight(QFont.DemiBold)
+        assistant_font = QFont()
+        assistant_font.setPixelSize(14)
+
+        self.user_style = _BubbleStyle(config.CHAT_USER_BUBBLE_COLOR, QColor(0, 0, 0, 26),
+                                       "#FFFFFF", "#FFFFFF", user_font)
+        self.assistant_style = _BubbleStyle(config.CHAT_ASSISTANT_BUBBLE_COLOR, "#E4E6EB",
+                                            "#050505", "#3D3D3D", assistant_font)
+
+    def clear_cache(self):
+        """Forget measured heights and layouts (after the transcript is cleared)."""
+        self.heights.clear()
+        self.layouts.clear()
+
+    def sizeHint(self, option, index):
+        message = index.data(ChatTranscriptModel.MessageRole)
+        width = self.view.viewport().width()
+        if message is None:
+            return QSize(width, 0)
+
+        cached = self.heights.get(message.id)
+        if cached is None or cached[0] != width:
+            cached = (width, self._layout(message, width).row_height)
+            self.heights[message.id] = cached
+        return QSize(width, cached[1])
+
+    def paint(self, painter, option, index):
+        message = index.data(ChatTranscriptModel.MessageRole)
+        if message is None:
+            return
+
+        layout = self._layout(message, option.rect.width())
+        style = self.user_style if message.is_user else self.assistant_style
+        bubble_rect, avatar_pos = self._geometry(layout, option.rect, message.is_user)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+
+        painter.drawPixmap(avatar_pos, self._avatar(message))
+
+        painter.setPen(QPen(style.border, 1))
+        painter.setBrush(style.bubble)
+        painter.drawRoundedRect(bubble_rect.adjusted(0, 0, -1, -1), self.BUBBLE_RADIUS, self.BUBBLE_RADIUS)
+
+        left = bubble_rect.left() + self.BUBBLE_PADDING
+        top = bubble_rect.top() + self.BUBBLE_PADDING
+
+        # Sender name and time
+        painter.setFont(self.sender_font)
+        painter.setPen(style.sender)
+        alignment = (Qt.AlignRight if message.is_user else Qt.AlignLeft) | Qt.AlignVCenter
+        painter.drawText(QRect(left, top, layout.inner_width, layout.text_top - self.SENDER_SPACING),
+                         alignment, layout.sender_text)
+
+        # Message text
+        painter.translate(left, top + layout.text_top)
+        context = QAbstractTextDocumentLayout.PaintContext()
+        context.palette.setColor(QPalette.Text, style.text)
+        layout.document.documentLayout().draw(painter, context)
+        painter.translate(-left, -(top + layout.text_top))
+
+        # Image attachment and its caption
+        if layout.image_size is not None:
+            thumbnail = self._thumbnail(message, layout.image_size)
+            if thumbnail is not None:
+                painter.drawPixmap(left, top + layout.image_top, thumbnail)
+        if layout.caption:
+            painter.setFont(self.caption_font)
+            painter.setPen(style.sender if message.is_user else QColor("#555555"))
+            painter.drawText(QRect(left, top + layout.caption_top, layout.inner_width, QFontMetrics(self.caption_font).height()),
+                             Qt.AlignLeft | Qt.AlignVCenter, layout.caption)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """Open links when they are clicked."""
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            anchor = self.anchor_at(index, option.rect, event.pos())
+            if anchor:
+                QDesktopServices.openUrl(QUrl(anchor))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def anchor_at(self, index, rect, pos):
+        """
+        Get the link under a point of a row.
+
+        Args:
+            index (QModelIndex): Row index
+            rect (QRect): Row rectangle in viewport coordinates
+            pos (QPoint): Point in viewport coordinates
+
+        Returns:
+            str: Link target, or an empty string if there is no link there
+        """
+        message = index.data(ChatTranscriptModel.MessageRole)
+        if message is None:
+            return ""
+        layout = self._layout(message, rect.width())
+        bubble_rect, _ = self._geometry(layout, rect, message.is_user)
+        point = QPointF(pos.x() - bubble_rect.left() - self.BUBBLE_PADDING,
+                        pos.y() - bubble_rect.top() - self.BUBBLE_PADDING - layout.text_top)
+        return layout.document.documentLayout().anchorAt(point)
+
+    def _geometry(self, layout, rect, is_user):
+        """Place the bubble and avatar inside a row rectangle."""
+        bubble_width, bubble_height = layout.bubble_size
+        content_top = rect.top() + self.ROW_MARGIN_V
+        content_height = max(bubble_height, self.AVATAR_SIZE)
+        avatar_y = content_top + (content_height - self.AVATAR_SIZE) // 2
+
+        if is_user:
+            avatar_x = rect.right() - self.ROW_MARGIN_H - self.AVATAR_SIZE
+            bubble_x = avatar_x - self.AVATAR_SPACING - bubble_width
+        else:
+            avatar_x = rect.left() + self.ROW_MARGIN_H
+            bubble_x = avatar_x + self.AVATAR_SIZE + self.AVATAR_SPACING
+
+        return QRect(bubble_x, content_top, bubble_width, bubble_height), QPoint(avatar_x, avatar_y)
+
+    def _layout(self, message, width):
+        """Lay out a message's bubble for a row width (cached for recently used rows)."""
+        key = (message.id, width)
+        layout = self.layouts.get(key)
+        if layout is not None:
+            self.layouts.move_to_end(key)
+            return layout
+
+        style = self.user_style if message.is_user else self.assistant_style
+        content_width = max(width - 2 * self.ROW_MARGIN_H - self.AVATAR_SIZE - self.AVATAR_SPACING, 120)
+        max_inner = int(content_width * self.MAX_BUBBLE_RATIO) - 2 * self.BUBBLE_PADDING
+
+        document = QTextDocument()
+        document.setDocumentMargin(0)
+        document.setDefaultFont(style.font)
+        message_html = self._message_html(message.text)
+        if message_html.startswith(TextFormatter.NEWS_HTML_MARKER):
+            # The news stylesheet is shared, not repeated in every news message
+            document.setDefaultStyleSheet(TextFormatter.NEWS_STYLESHEET)
+        document.setHtml(message_html)
+        document.setTextWidth(max_inner)
+        text_width = min(math.ceil(document.idealWidth()), max_inner)
+        document.setTextWidth(text_width)
+
+        layout = _BubbleLayout()
+        layout.document = document
+        name = "Bạn" if message.is_user else message.sender
+        layout.sender_text = f"{name}, {message.timestamp}"
+        sender_metrics = QFontMetrics(self.sender_font)
+        inner_width = max(text_width, sender_metrics.horizontalAdvance(layout.sender_text))
+        layout.text_top = sender_metrics.height() + self.SENDER_SPACING
+        inner_height = layout.text_top + math.ceil(document.size().height())
+
+        layout.image_size = None
+        layout.image_top = 0
+        layout.caption = ""
+        layout.caption_top = 0
+        if message.image_data:
+            image_size = self._image_size(message, max_inner)
+            if image_size is not None:
+                layout.image_size = image_size
+                layout.image_top = inner_height + 8
+                inner_height = layout.image_top + image_size.height()
+                inner_width = max(inner_width, image_size.width())
+                if message.file_name:
+                    layout.caption = f"Hình ảnh: {message.file_name}"
+                    caption_metrics = QFontMetrics(self.caption_font)
+                    layout.caption_top = inner_height + 5
+                    inner_height = layout.caption_top + caption_metrics.height()
+                    inner_width = min(max(inner_width, caption_metrics.horizontalAdvance(layout.caption)), max_inner)
+
+        layout.inner_width = inner_width
+        layout.bubble_size = (inner_width + 2 * self.BUBBLE_PADDING, inner_height + 2 * self.BUBBLE_PADDING)
+        layout.row_height = max(layout.bubble_size[1], self.AVATAR_SIZE) + 2 * self.ROW_MARGIN_V
+
+        self.layouts[key] = layout
+        while len(self.layouts) > self.LAYOUT_CACHE_SIZE:
+            self.layouts.popitem(last=False)
+        return layout
+
+    @staticmethod
+    def _message_html(text):
+        """Format message text as rich text (HTML, links, quotes and poems)."""
+        try:
+            formatted_text, text_format = TextFormatter.format_message_text(text)
+            if text_format in ("html", "rich"):
+                return formatted_text
+        except Exception as e:
+            logger.error(f"Error formatting chat message: {str(e)}")
+        return html.escape(text).replace('\n', '<br>')
+
+    def _image_size(self, message, max_width):
+        """Thumbnail size of an attachment, at most MAX_IMAGE_WIDTH wide."""
+        if message.image_size is None:
+            image = self._decode_image(message)
+            if image is None:
+                return None
+            message.image_size = (image.width(), image.height())
+
+        source_width, source_height = message.image_size
+        width = min(source_width, self.MAX_IMAGE_WIDTH, max_width)
+        height = round(source_height * width / source_width) if source_width else 0
+        return QSize(width, height)
+
+    @staticmethod
+    def _decode_image(message):
+        image = QImage()
+        if not image.loadFromData(QByteArray.fromBase64(message.image_data)):
+            logger.warning(f"Could not decode chat image attachment {message.file_name or ''}")
+            return None
+        return image
+
+    def _thumbnail(self, message, size):
+        """Scaled attachment pixmap, kept in Qt's global pixmap cache."""
+        key = f"chat-thumb-{message.id}-{size.width()}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None or pixmap.isNull():
+            image = self._decode_image(message)
+            if image is None:
+                return None
+            pixmap = QPixmap.fromImage(image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def _avatar(self, message):
+        """Circular avatar for a sender, from the shared decoration cache."""
+        if message.is_user:
+            initial, colors = "B", ("#4285F4", "#1A73E8")
+        else:
+            initial, colors = (message.sender[0].upper() if message.sender else "?"), ("#9575CD", "#7986CB")
+        return circular_avatar(self.avatar_paths.get(message.sender), self.AVATAR_SIZE, initial, colors)
+
+
+class ChatTranscriptView(QListView):
+    """Scrolling chat history backed by ChatTranscriptModel and painted by ChatBubbleDelegate."""
+
+    def __init__(self, user_avatar_path=None, assistant_avatar_path=None, parent=None):
+        super().__init__(parent)
+        self.bubble_delegate = ChatBubbleDelegate(self, user_avatar_path, assistant_avatar_path)
+        self.setItemDelegate(self.bubble_delegate)
+
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setUniformItemSizes(False)
+        self.setResizeMode(QListView.Adjust)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.verticalScrollBar().setSingleStep(20)
+        self.setMouseTracking(True)
+
+    def mouseMoveEvent(self, event):
+        """Show a hand cursor over links."""
+        index = self.indexAt(event.pos())
+        anchor = index.isValid() and self.bubble_delegate.anchor_at(index, self.visualRect(index), event.pos())
+        self.viewport().setCursor(Qt.PointingHandCursor if anchor else Qt.ArrowCursor)
+        super().mouseMoveEvent(event)
@@ -8,13 +8,13 @@ import base64
 import mimetypes
 from io import BytesIO
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, 
-                             QLineEdit, QPushButton, QLabel, QScrollArea,
-                             QFrame, QSizePolicy, QStackedWidget, QListWidget,
+                             QLineEdit, QPushButton, QLabel,
+                             QStackedWidget, QListWidget,
                              QListWidgetItem, QSpacerItem, QMenu, QAction, 
-                             QGraphicsDropShadowEffect, QApplication, QButtonGroup,
+                             QApplication, QButtonGroup,
                              QFileDialog, QDialog)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, pyqtSlot, QTimer, QMetaObject, Q_ARG, QSize, QRect, QPoint, QByteArray, QBuffer
-from PyQt5.QtGui import QIcon, QFont, QTextCursor, QPixmap, QColor, QPainter, QPainterPath, QBrush, QPen, QImage, QLinearGradient
+from PyQt5.QtGui import QIcon, QTextCursor, QPixmap, QColor, QPainter, QPainterPath, QPen, QImage, QLinearGradient
 
 try:
     import pygame
@@ -38,6 +38,11 @@ except ImportError:
         config = MockConfig()
         logger = None
 
+from ..models.response_renderer import render_response
+from ..models.conversation_store import conversation_store
+from .chat_transcript import ChatMessage, ChatTranscriptModel, ChatTranscriptView
+from .decoration_cache import ShadowFrame
+
 # QueryWorker classes to replace missing workers module
 class QueryWorker(QThread):
     """Worker thread for processing text queries to the AI assistant."""
@@ -85,379 +90,6 @@ class QueryWorkerWithImage(QThread):
         except Exception as e:
             self.error_occurred.emit(str(e))
 
-class ChatBubbleWidget(QWidget):
-    """Custom widget for displaying chat bubbles in a Messenger-like interface."""
-    
-    def __init__(self, text, sender, bubble_color, text_color, avatar_path=None, parent=None):
-        super().__init__(parent)
-        self.text = text
-        self.sender = sender
-        self.bubble_color = QColor(bubble_color)
-        self.text_color = QColor(text_color)
-        self.avatar_path = avatar_path
-        self.is_user = sender == "User"
-        self.avatar_size = 40
-        self.bubble_radius = 18
-        self.bubble_padding = 12
-        self.avatar_margin = 10
-        self.setMinimumWidth(200)
-        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
-        
-        self._create_layout()
-        
-    def _create_layout(self):
-        """Create the layout for the chat bubble."""
-        main_layout = QHBoxLayout(self)
-        main_layout.setContentsMargins(0, 8, 0, 8)
-        main_layout.setSpacing(12)
-        
-        # Create avatar label
-        self.avatar_label = QLabel()
-        self.avatar_label.setFixedSize(self.avatar_size, self.avatar_size)
-        
-        # Load avatar image or create default
-        self._load_avatar()
-        
-        # Create bubble container for text
-        self.bubble_container = QFrame()
-        self.bubble_container.setObjectName("bubbleContainer")
-        self.bubble_container.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
-        
-        # Set style for the bubble container - different colors for user and assistant
-        if self.is_user:
-            # User bubble with enhanced visibility using config colors
-            self.bubble_container.setStyleSheet(f"""
-                QFrame#bubbleContainer {{
-                    background-color: {config.CHAT_USER_BUBBLE_COLOR};
-                    border: 1px solid rgba(0, 0, 0, 0.1);
-                    border-radius: {self.bubble_radius}px;
-                    padding: {self.bubble_padding}px;
-                }}
-                QLabel {{
-                    background-color: transparent;
-                    color: white;
-                }}
-            """)
-        else:
-            # Assistant bubble - flat lighter color
-            self.bubble_container.setStyleSheet(f"""
-                QFrame#bubbleContainer {{
-                    background-color: {config.CHAT_ASSISTANT_BUBBLE_COLOR};
-                    border: 1px solid #E4E6EB;
-                    border-radius: {self.bubble_radius}px;
-                    padding: {self.bubble_padding}px;
-                }}
-            """)
-        
-        bubble_layout = QVBoxLayout(self.bubble_container)
-        bubble_layout.setContentsMargins(self.bubble_padding, self.bubble_padding, 
-                                       self.bubble_padding, self.bubble_padding)
-        bubble_layout.setSpacing(6)
-        
-        # Create sender name label with timestamp
-        timestamp = time.strftime("%H:%M")
-        if self.is_user:
-            sender_text = f"Bạn, {timestamp}"
-        else:
-            sender_text = f"{self.sender}, {timestamp}"
-            
-        self.sender_label = QLabel(sender_text)
-        
-        # Different color for sender names based on bubble type
-        if self.is_user:
-            self.sender_label.setStyleSheet(f"color: rgba(255, 255, 255, 1.0); font-size: 12px; font-weight: bold; background-color: transparent;")
-        else:
-            self.sender_label.setStyleSheet(f"color: #3d3d3d; font-size: 12px; font-weight: bold;")
-        
-        # Create text label with proper contrast and format text properly
-        self.text_label = QLabel()
-        self.text_label.setWordWrap(True)
-        self.text_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
-        
-        # Format message text (handle HTML or escape special characters)
-        self._format_message()
-        
-        # Different text color for better contrast
-        if self.is_user:
-            self.text_label.setStyleSheet("color: white; font-size: 15px; line-height: 145%; font-weight: 600; background-color: transparent;")
-        else:
-            self.text_label.setStyleSheet("color: #050505; font-size: 14px; line-height: 140%;")
-        
-        # Add text to bubble
-        bubble_layout.addWidget(self.sender_label)
-        bubble_layout.addWidget(self.text_label)
-        
-        # Arrange elements based on sender (user or assistant)
-        if self.is_user:
-            main_layout.addStretch()
-            main_layout.addWidget(self.bubble_container)
-            main_layout.addWidget(self.avatar_label)
-            # Right align sender name
-            self.sender_label.setAlignment(Qt.AlignRight)
-        else:
-            # For assistant, we place the bubble on the left
-            main_layout.addWidget(self.avatar_label)
-            main_layout.addWidget(self.bubble_container)
-            main_layout.addStretch()
-            # Left align sender name
-            self.sender_label.setAlignment(Qt.AlignLeft)
-            
-    def _format_message(self):
-        """Format message text to handle HTML or escape special characters."""
-        import re
-        import html
-        
-        try:
-            # Sử dụng TextFormatter nếu khả dụng, nếu không dùng xử lý trực tiếp
-            try:
-                from ..models.text_formatter import TextFormatter
-                formatted_text, text_format = TextFormatter.format_message_text(self.text)
-                
-                # Kiểm tra chuỗi có chứa thơ hoặc trích dẫn không
-                if '>' in self.text and '\n' in self.text:
-                    # Tìm kiếm đoạn trích dẫn dạng ">"
-                    quote_pattern = r'(\n|^)\s*>.*(\n\s*>.*)*'
-                    matches = re.findall(quote_pattern, self.text)
-                    if matches:
-                        # Nếu tìm thấy đoạn trích dẫn nhiều dòng, áp dụng định dạng đặc biệt hơn
-                        formatted_text = TextFormatter.format_poem_text(self.text)
-                
-                if text_format == "html":
-                    self.text_label.setTextFormat(Qt.RichText)
-                    self.text_label.setText(formatted_text)
-                    self.text_label.setOpenExternalLinks(True)
-                elif text_format == "rich":
-                    self.text_label.setTextFormat(Qt.RichText)
-                    self.text_label.setText(formatted_text)
-                    self.text_label.setOpenExternalLinks(True)
-                else:
-                    self.text_label.setTextFormat(Qt.PlainText)
-                    self.text_label.setText(self.text)
-                    
-            except ImportError:
-                # Fallback - Xử lý trực tiếp nếu không import được TextFormatter
-                # Kiểm tra xem có phải là văn bản HTML không
-                if self.text.startswith('<') and '>' in self.text:
-                    # Nếu là HTML, hiển thị trực tiếp
-                    self.text_label.setTextFormat(Qt.RichText)
-                    self.text_label.setText(self.text)
-                else:
-                    # Tìm và chuyển URLs thành link có thể nhấp
-                    url_pattern = r'(https?://[^\s]+)'
-                    html_result = re.sub(url_pattern, r'<a href="\1">\1</a>', self.text)
-                    
-                    # Nếu có URLs, hiển thị dưới dạng HTML
-                    if html_result != self.text:
-                        self.text_label.setTextFormat(Qt.RichText)
-                        self.text_label.setText(html_result)
-                        self.text_label.setOpenExternalLinks(True)
-                    else:
-                        # Đảm bảo ký tự đặc biệt được hiển thị đúng
-                        escaped_text = html.escape(self.text)
-                        # Thay thế xuống dòng bằng thẻ <br>
-                        formatted_text = escaped_text.replace('\n', '<br>')
-                        self.text_label.setTextFormat(Qt.RichText)
-                        self.text_label.setText(formatted_text)
-        
-        except Exception as e:
-            # Nếu có lỗi, hiển thị dưới dạng văn bản thuần túy
-            self.text_label.setTextFormat(Qt.PlainText)
-            self.text_label.setText(self.text)
-    
-    def _load_avatar(self):
-        """Load or create avatar image."""
-        pixmap = QPixmap(self.avatar_size, self.avatar_size)
-        pixmap.fill(Qt.transparent)
-        
-        if self.avatar_path and os.path.exists(self.avatar_path):
-            # Load from file if exists
-            avatar_img = QImage(self.avatar_path)
-            avatar_pixmap = QPixmap.fromImage(avatar_img)
-            
-            # Create a rounded avatar
-            rounded_pixmap = QPixmap(self.avatar_size, self.avatar_size)
-            rounded_pixmap.fill(Qt.transparent)
-            
-            painter = QPainter(rounded_pixmap)
-            painter.setRenderHint(QPainter.Antialiasing)
-            
-            # Create circular path
-            path = QPainterPath()
-            path.addEllipse(0, 0, self.avatar_size, self.avatar_size)
-            painter.setClipPath(path)
-            
-            # Draw the avatar
-            painter.drawPixmap(0, 0, self.avatar_size, self.avatar_size, avatar_pixmap)
-            painter.end()
-            
-            self.avatar_label.setPixmap(rounded_pixmap)
-        else:
-            # Create a default avatar with gradient
-            painter = QPainter(pixmap)
-            painter.setRenderHint(QPainter.Antialiasing)
-            
-            # Draw circle background with gradient
-            if self.is_user:
-                # Blue gradient for user
-                gradient = QLinearGradient(0, 0, self.avatar_size, self.avatar_size)
-                gradient.setColorAt(0, QColor("#4285F4"))
-                gradient.setColorAt(1, QColor("#1A73E8"))
-            else:
-                # Purple/blue gradient for assistant
-                gradient = QLinearGradient(0, 0, self.avatar_size, self.avatar_size)
-                gradient.setColorAt(0, QColor("#9575CD"))
-                gradient.setColorAt(1, QColor("#7986CB"))
-                
-            painter.setBrush(gradient)
-            painter.setPen(Qt.NoPen)
-            painter.drawEllipse(0, 0, self.avatar_size, self.avatar_size)
-            
-            # Add a subtle highlight for 3D effect
-            highlight = QPainterPath()
-            highlight.addEllipse(5, 5, self.avatar_size - 10, self.avatar_size/3)
-            painter.fillPath(highlight, QColor(255, 255, 255, 60))
-            
-            # Draw initial letter
-            painter.setPen(QColor(255, 255, 255))
-            painter.setFont(QFont("Arial", 16, QFont.Bold))
-            
-            initial = self.sender[0].upper() if self.sender else "?"
-            if self.is_user:
-                initial = "B"  # "Bạn" in Vietnamese
-            
-            painter.drawText(pixmap.rect(), Qt.AlignCenter, initial)
-            painter.end()
-            
-            self.avatar_label.setPixmap(pixmap)
-            
-    def sizeHint(self):
-        """Provide size hint for layout management"""
-        width = self.bubble_container.sizeHint().width() + self.avatar_size + 20
-        height = max(self.bubble_container.sizeHint().height(), self.avatar_size) + 16
-        return QSize(width, height)
-
-
-class ChatBubbleWidgetWithImage(ChatBubbleWidget):
-    """Extended chat bubble that can display an image attachment."""
-    
-    def __init__(self, text, sender, bubble_color, text_color, image_data=None, file_path=None, 
-                 file_name=None, avatar_path=None, parent=None):
-        super().__init__(text, sender, bubble_color, text_color, avatar_path, parent)
-        self.image_data = image_data
-        self.file_path = file_path
-        self.file_name = file_name
-        
-        # Add image or file attachment if provided
-        if image_data or file_path:
-            self._add_attachment()
-    
-    def _create_layout(self):
-        """Override to create a layout that can include an image."""
-        super()._create_layout()
-        
-        # Create container for potential attachments
-        self.attachment_container = QWidget()
-        self.attachment_layout = QVBoxLayout(self.attachment_container)
-        self.attachment_layout.setContentsMargins(0, 8, 0, 0)
-        self.attachment_layout.setSpacing(5)
-        
-        # Insert attachment container after text
-        bubble_layout = self.bubble_container.layout()
-        bubble_layout.addWidget(self.attachment_container)
-    
-    def _add_attachment(self):
-        """Add image or file attachment to the bubble."""
-        if self.image_data:
-            # Create image from image data
-            pixmap = QPixmap()
-            pixmap.loadFromData(QByteArray.fromBase64(self.image_data))
-            
-            # Scale image to reasonable size if needed (max 300px wide)
-            if pixmap.width() > 300:
-                pixmap = pixmap.scaledToWidth(300, Qt.SmoothTransformation)
-            
-            # Create image label
-            image_label = QLabel()
-            image_label.setPixmap(pixmap)
-            image_label.setAlignment(Qt.AlignLeft)
-            
-            # Add rounded corners to image
-            image_label.setStyleSheet("""
-                border: 1px solid #DDDDDD;
-                border-radius: 8px;
-                padding: 2px;
-            """)
-            
-            # Add image to bubble
-            self.attachment_layout.addWidget(image_label)
-            
-            # Add file name if available
-            if self.file_name:
-                file_name_label = QLabel(f"Hình ảnh: {self.file_name}")
-                file_name_label.setStyleSheet("""
-                    color: #555555;
-                    font-size: 12px;
-                    font-style: italic;
-                """)
-                self.attachment_layout.addWidget(file_name_label)
-                
-        elif self.file_path:
-            # Create file attachment representation
-            file_widget = QWidget()
-            file_layout = QHBoxLayout(file_widget)
-            file_layout.setContentsMargins(5, 5, 5, 5)
-            
-            # File icon
-            file_icon_label = QLabel()
-            file_icon = QPixmap(24, 24)
-            file_icon.fill(Qt.transparent)
-            
-            # Draw a simple document icon
-            painter = QPainter(file_icon)
-            painter.setRenderHint(QPainter.Antialiasing)
-            painter.setPen(QPen(QColor("#6c757d"), 1))
-            painter.setBrush(QBrush(QColor("#f8f9fa")))
-            painter.drawRect(4, 2, 16, 20)
-            painter.drawLines([QPoint(8, 8), QPoint(16, 8), 
-                              QPoint(8, 12), QPoint(16, 12), 
-                              QPoint(8, 16), QPoint(16, 16)])
-            painter.end()
-            
-            file_icon_label.setPixmap(file_icon)
-            
-            # File name and info
-            file_name = self.file_name if self.file_name else os.path.basename(self.file_path)
-            file_info_label = QLabel(f"Tệp đính kèm: {file_name}")
-            file_info_label.setStyleSheet("""
-                color: #0d6efd;
-                font-size: 13px;
-                text-decoration: underline;
-            """)
-            
-            file_layout.addWidget(file_icon_label)
-            file_layout.addWidget(file_info_label, 1)
-            
-            # Style the file widget
-            file_widget.setStyleSheet("""
-                background-color: rgba(0, 0, 0, 0.05);
-                border-radius: 6px;
-            """)
-            
-            self.attachment_layout.addWidget(file_widget)
-    
-    def sizeHint(self):
-        """Override size hint to account for attachment."""
-        # Start with the base size
-        base_size = super().sizeHint()
-        
-        # Add space for attachment if present
-        if hasattr(self, 'attachment_container') and not self.attachment_container.isHidden():
-            attachment_height = self.attachment_container.sizeHint().height()
-            return QSize(base_size.width(), base_size.height() + attachment_height)
-            
-        return base_size
-
-
 class ChatWidget(QWidget):
     """Widget for interacting with the AI assistant through chat with a modern Messenger-like interface."""
     
@@ -677,25 +309,10 @@ class ChatWidget(QWidget):
         # Add header to main layout
         layout.addWidget(header_container)
         
-        # Chat messages container with shadow effect
-        self.messages_container = QWidget()
-        self.messages_container.setObjectName("messagesContainer")
-        self.messages_container.setStyleSheet("""
-            QWidget#messagesContainer {
-                background-color: #F8F9FA;
-                border: none;
-            }
-        """)
-        
-        self.messages_layout = QVBoxLayout(self.messages_container)
-        self.messages_layout.setContentsMargins(15, 20, 15, 20)  # Increased padding inside the chat area
-        self.messages_layout.setSpacing(20)  # Increased spacing between messages for better readability
-        self.messages_layout.setAlignment(Qt.AlignTop)
-        
-        # Add a spacer at the bottom to keep messages at the top
-        self.messages_layout.addStretch()
+        # Chat transcript: messages are records in a model, painted as bubbles by a delegate
+        self.transcript_model = ChatTranscriptModel(self)
         
-        # Create a container for the scroll area with shadow
+        # Create a container for the transcript with shadow
         scroll_container = QWidget()
         scroll_container.setObjectName("scrollContainer")
         scroll_container.setStyleSheet("""
@@ -709,17 +326,15 @@ class ChatWidget(QWidget):
         scroll_layout = QVBoxLayout(scroll_container)
         scroll_layout.setContentsMargins(1, 1, 1, 1)  # Very small margins to not interfere with the border radius
         
-        # Scroll area for chat messages
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setWidget(self.messages_container)
-        self.scroll_area.setFrameShape(QFrame.NoFrame)  # Remove the frame
-        self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.scroll_area.setStyleSheet("""
-            QScrollArea {
-                background-color: transparent;
+        # Only the visible rows are laid out and painted
+        self.transcript_view = ChatTranscriptView(self.user_avatar_path, self.assistant_avatar_path)
+        self.transcript_view.setModel(self.transcript_model)
+        self.transcript_view.setStyleSheet("""
+            QListView {
+                background-color: #F8F9FA;
                 border: none;
+                border-radius: 11px;
+                padding: 10px 0px;
             }
             QScrollBar:vertical {
                 background: #F8F9FA;
@@ -743,13 +358,14 @@ class ChatWidget(QWidget):
             }
         """)
         
-        scroll_layout.addWidget(self.scroll_area)
+        scroll_layout.addWidget(self.transcript_view)
         
-        # Add shadow effect to scroll container
-        shadow = self.create_shadow_effect()
-        scroll_container.setGraphicsEffect(shadow)
+        # Older conversations are paged in from the store when scrolled to the top
+        self.history_exhausted = not config.ENABLE_CONVERSATION_HISTORY
+        self.transcript_view.verticalScrollBar().valueChanged.connect(self._on_transcript_scrolled)
         
-        layout.addWidget(scroll_container, 1)  # Add with stretch factor
+        # Add shadow to scroll container (painted from a cached pixmap, not a graphics effect)
+        layout.addWidget(ShadowFrame(scroll_container, radius=12), 1)  # Add with stretch factor
         
         # Input area with modern styling and shadow effect
         input_container = QWidget()
@@ -954,11 +570,8 @@ class ChatWidget(QWidget):
         input_layout.addWidget(self.voice_button)
         input_layout.addWidget(self.send_button)
         
-        # Add shadow effect to input container
-        input_shadow = self.create_shadow_effect(blur_radius=8, offset=1)
-        input_container.setGraphicsEffect(input_shadow)
-        
-        layout.addWidget(input_container)
+        # Add shadow to input container
+        layout.addWidget(ShadowFrame(input_container, radius=24, blur_radius=8, offset=1))
         
         # Status and control bar with modern styling
         self.status_container = QWidget()
@@ -1053,16 +666,9 @@ class ChatWidget(QWidget):
         layout.addWidget(self.status_container)
         
         # Add default welcome message
+        self._load_history_page()
         self._add_message_to_chat("MIS Assistant", "Xin chào! Tôi là MIS Assistant. Bạn có thể hỏi tôi thông tin về thời tiết, thời gian, hoặc bất kỳ điều gì bạn muốn biết.\n\nNhấn vào nút microphone để kích hoạt chế độ nhận diện giọng nói.")
     
-    def create_shadow_effect(self, color=QColor(0, 0, 0, 35), blur_radius=15, offset=0):
-        """Create a shadow effect for widgets."""
-        shadow = QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(blur_radius)
-        shadow.setColor(color)
-        shadow.setOffset(offset)
-        return shadow
-
     def _change_speech_speed(self):
         """Change the speech playback speed based on the selected button."""
         selected_button = self.speed_button_group.checkedButton()
@@ -1164,10 +770,15 @@ class ChatWidget(QWidget):
         # Clear any previous prepared speech to avoid playing the wrong audio
         if self.speech_processor:
             self.speech_processor.prepared_audio_file = None
+        
+        # Some answers (news) come with a separate text meant for reading aloud;
+        # everything else is read without URLs, bullets or emoji
+        rendered = render_response(response)
+        speech_text = self.gemini_client.pop_voice_text() or rendered.speech or response
             
         # Chuẩn bị âm thanh trước khi hiển thị văn bản để quá trình chạy song song
         if config.ENABLE_VOICE_RESPONSE:
-            self.speech_processor.prepare_speech(response)
+            self.speech_processor.prepare_speech(speech_text)
         
         # Thiết lập flag để theo dõi khi nào tin nhắn được hiển thị đầy đủ
         self.message_displayed = False
@@ -1178,7 +789,7 @@ class ChatWidget(QWidget):
         if self.hardware_interface.is_connected():
             try:
                 # Display first part of response on LCD
-                display_text = response[:40] + "..." if len(response) > 40 else response
+                display_text = rendered.lcd[:40] + "..." if len(rendered.lcd) > 40 else rendered.lcd
                 self.hardware_interface.display_message(display_text)
                 self.hardware_interface.set_responding_mode()
             except Exception as e:
@@ -1198,7 +809,7 @@ class ChatWidget(QWidget):
         if config.ENABLE_VOICE_RESPONSE:
             speech_thread = threading.Thread(
                 target=self._process_speech_response,
-                args=(response,),
+                args=(speech_text,),
                 daemon=True
             )
             speech_thread.start()
@@ -1303,48 +914,38 @@ class ChatWidget(QWidget):
     
     def _add_message_to_chat(self, sender, message):
         """Add a message to the chat history with the messenger-like UI."""
-        # Get appropriate colors for the sender
-        if sender == "User":
-            bubble_color = config.CHAT_USER_BUBBLE_COLOR
-            text_color = config.CHAT_USER_TEXT_COLOR
-            avatar_path = self.user_avatar_path
-        elif sender == "MIS Assistant":
-            bubble_color = config.CHAT_ASSISTANT_BUBBLE_COLOR
-            text_color = config.CHAT_ASSISTANT_TEXT_COLOR
-            avatar_path = self.assistant_avatar_path
-        else:
-            # System messages use a light gray
-            bubble_color = "#F1F1F1"
-            text_color = "#666666"
-            avatar_path = None
+        self.transcript_model.append_message(sender, message)
         
-        # Create a chat bubble for the message
-        chat_bubble = ChatBubbleWidget(message, sender, bubble_color, text_color, avatar_path)
-        
-        # Remove the stretch from the bottom
-        self.messages_layout.removeItem(self.messages_layout.itemAt(self.messages_layout.count() - 1))
-        
-        # Add new bubble
-        self.messages_layout.addWidget(chat_bubble)
+        # Scroll once the view has laid out the new row
+        QTimer.singleShot(0, self._scroll_to_bottom)
+    
+    def _on_transcript_scrolled(self, value):
+        """Load older history when the transcript is scrolled to the top."""
+        if not self.history_exhausted and value == self.transcript_view.verticalScrollBar().minimum():
+            QTimer.singleShot(0, self._load_history_page)
+    
+    def _load_history_page(self):
+        """Prepend the next page of stored history, keeping the visible messages in place."""
+        if self.history_exhausted:
+            return
         
-        # Add stretch back to push messages to the top
-        self.messages_layout.addStretch()
+        records = conversation_store.load_page(before_id=self.transcript_model.oldest_record_id())
+        if len(records) < config.CONVERSATION_PAGE_SIZE:
+            self.history_exhausted = True
+        if not records:
+            return
         
-        # Scroll to the bottom to show the latest message
-        QTimer.singleShot(100, self._scroll_to_bottom)
+        scrollbar = self.transcript_view.verticalScrollBar()
+        distance_from_bottom = scrollbar.maximum() - scrollbar.value()
+        self.transcript_model.prepend_messages([ChatMessage.from_record(record) for record in records])
+        self.transcript_view.doItemsLayout()
+        scrollbar.setValue(scrollbar.maximum() - distance_from_bottom)
+        logger.info(f"Loaded {len(records)} messages of conversation history")
     
     def _scroll_to_bottom(self):
         """Scroll the chat to the bottom to show the latest messages."""
-        # Using a more reliable approach to ensure scrolling works consistently
         try:
-            vertical_scrollbar = self.scroll_area.verticalScrollBar()
-            # Force layout update to ensure correct scroll maximum
-            self.messages_container.layout().update()
-            QApplication.processEvents()
-            # Set to maximum value to scroll to bottom
-            vertical_scrollbar.setValue(vertical_scrollbar.maximum())
-            # For additional reliability, schedule another scroll after a short delay
-            QTimer.singleShot(50, lambda: vertical_scrollbar.setValue(vertical_scrollbar.maximum()))
+            self.transcript_view.scrollToBottom()
         except Exception as e:
             logger.error(f"Error scrolling to bottom: {str(e)}")
     
@@ -1465,14 +1066,10 @@ class ChatWidget(QWidget):
             if self.hardware_interface.is_connected():
                 self.hardware_interface.set_finished_mode()
         
-        # Clear messages
-        for i in reversed(range(self.messages_layout.count())):
-            item = self.messages_layout.itemAt(i)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # Add stretch back
-        self.messages_layout.addStretch()
+        # Clear messages; history stays in the store but is no longer paged in
+        self.transcript_model.clear()
+        self.transcript_view.bubble_delegate.clear_cache()
+        self.history_exhausted = True
         
         # Xóa ảnh đính kèm đang chờ nếu có
         if self.selected_image['path']:
@@ -1954,38 +1551,10 @@ class ChatWidget(QWidget):
 
     def _add_message_to_chat_with_image(self, sender, message, image_data, file_name=None):
         """Add a message with image attachment to the chat history."""
-        # Get appropriate colors for the sender
-        if sender == "User":
-            bubble_color = config.CHAT_USER_BUBBLE_COLOR
-            text_color = config.CHAT_USER_TEXT_COLOR
-            avatar_path = self.user_avatar_path
-        elif sender == "MIS Assistant":
-            bubble_color = config.CHAT_ASSISTANT_BUBBLE_COLOR
-            text_color = config.CHAT_ASSISTANT_TEXT_COLOR
-            avatar_path = self.assistant_avatar_path
-        else:
-            # System messages use a light gray
-            bubble_color = "#F1F1F1"
-            text_color = "#666666"
-            avatar_path = None
-        
-        # Create a chat bubble with image for the message
-        chat_bubble = ChatBubbleWidgetWithImage(
-            message, sender, bubble_color, text_color, 
-            image_data=image_data, file_name=file_name,
-            avatar_path=avatar_path
-        )
-        
-        # Remove the stretch from the bottom
-        self.messages_layout.removeItem(self.messages_layout.itemAt(self.messages_layout.count() - 1))
-          # Add new bubble
-        self.messages_layout.addWidget(chat_bubble)
-        
-        # Add stretch back to push messages to the top
-        self.messages_layout.addStretch()
+        self.transcript_model.append_message(sender, message, image_data=image_data, file_name=file_name)
         
-        # Scroll to the bottom to show the latest message
-        QTimer.singleShot(100, self._scroll_to_bottom)
+        # Scroll once the view has laid out the new row
+        QTimer.singleShot(0, self._scroll_to_bottom)
 
     def get_hotword_detection_status(self):
         """Get detailed hotword detection status for UI display"""
@@ -0,0 +1,208 @@
+"""
+MIS Smart Assistant - Decoration Cache
+Process-wide cache of pre-rendered circular avatars and nine-patch drop shadows.
+"""
+
+import os
+
+from PyQt5.QtCore import QRect, QRectF, Qt
+from PyQt5.QtGui import QColor, QFont, QImage, QLinearGradient, QPainter, QPainterPath, QPixmap
+from PyQt5.QtWidgets import QGraphicsDropShadowEffect, QGraphicsPathItem, QGraphicsScene, QVBoxLayout, QWidget
+
+
+_avatars = {}  # Request (path, size, initial, colors) or rendered image (path or initial, size[, colors]) -> QPixmap
+_shadows = {}  # (radius, blur, rgba, offset) -> (source QPixmap, corner size, margin)
+
+
+def circular_avatar(path, size, initial="?", colors=("#9575CD", "#7986CB")):
+    """
+    Get a circular avatar, rendered once per (path, size).
+
+    Called for every painted transcript row, so a repeated request is a dict lookup:
+    whether the image exists is checked only the first time.
+
+    Args:
+        path (str): Avatar image; the gradient default is drawn if it is missing
+        size (int): Diameter in pixels
+        initial (str): Letter drawn on the default avatar
+        colors (tuple): Gradient start and end colors of the default avatar
+
+    Returns:
+        QPixmap: The avatar
+    """
+    request = (path, size, initial, colors)
+    pixmap = _avatars.get(request)
+    if pixmap is not None:
+        return pixmap
+
+    has_image = bool(path) and os.path.exists(path)
+    key = (path, size) if has_image else (initial, size, colors)
+    pixmap = _avatars.get(key)
+    if pixmap is not None:
+        _avatars[request] = pixmap
+        return pixmap
+
+    pixmap = QPixmap(size, size)
+    pixmap.fill(Qt.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+
+    if has_image:
+        path_shape = QPainterPath()
+        path_shape.addEllipse(0, 0, size, size)
+        painter.setClipPath(path_shape)
+        painter.drawImage(QRect(0, 0, size, size), QImage(path))
+    else:
+        gradient = QLinearGradient(0, 0, size, size)
+        gradient.setColorAt(0, QColor(colors[0]))
+        gradient.setColorAt(1, QColor(colors[1]))
+        painter.setBrush(gradient)
+        painter.setPen(Qt.NoPen)
+        painter.drawEllipse(0, 0, size, size)
+
+        # Subtle highlight for a 3D look
+        highlight = QPainterPath()
+        highlight.addEllipse(5, 5, size - 10, size / 3)
+        painter.fillPath(highlight, QColor(255, 255, 255, 60))
+
+        painter.setPen(QColor(255, 255, 255))
+        painter.setFont(QFont("Arial", 16, QFont.Bold))
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, initial)
+
+    painter.end()
+    _avatars[key] = _avatars[request] = pixmap
+    return pixmap
+
+
+def shadow_margin(blur_radius, offset=0):
+    """
+    Space a shadow needs around its shape.
+
+    Args:
+        blur_radius (int): Blur radius of the shadow
+        offset (int): Downward offset of the shadow
+
+    Returns:
+        int: Margin in pixels
+    """
+    return (blur_radius + 1) // 2 + abs(offset)
+
+
+def _shadow_source(radius, blur_radius, color, offset):
+    """Render a nine-patch shadow source once: a small rounded rectangle's shadow, with the shape cut out."""
+    key = (radius, blur_radius, color.rgba(), offset)
+    cached = _shadows.get(key)
+    if cached is not None:
+        return cached
+
+    margin = shadow_margin(blur_radius, offset)
+    corner = margin + radius + 1
+    size = 2 * corner + 1
+    shape_rect = QRectF(margin, margin, size - 2 * margin, size - 2 * margin)
+    shape = QPainterPath()
+    shape.addRoundedRect(shape_rect, radius, radius)
+
+    # The one offscreen render of this shadow; every widget using it draws the pixmap
+    item = QGraphicsPathItem(shape)
+    item.setBrush(Qt.black)
+    item.setPen(Qt.NoPen)
+    effect = QGraphicsDropShadowEffect()
+    effect.setBlurRadius(blur_radius)
+    effect.setColor(color)
+    effect.setOffset(0, offset)
+    item.setGraphicsEffect(effect)
+    scene = QGraphicsScene()
+    scene.addItem(item)
+
+    image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    scene.render(painter, QRectF(0, 0, size, size), QRectF(0, 0, size, size))
+    # Only the shadow is wanted; the widget paints its own body
+    painter.setCompositionMode(QPainter.CompositionMode_DestinationOut)
+    painter.fillPath(shape, Qt.black)
+    painter.end()
+    scene.removeItem(item)
+
+    cached = (QPixmap.fromImage(image), corner, margin)
+    _shadows[key] = cached
+    return cached
+
+
+def paint_shadow(painter, rect, radius, blur_radius=15, color=QColor(0, 0, 0, 35), offset=0):
+    """
+    Paint a drop shadow around a rounded rectangle from the cached nine-patch.
+
+    Args:
+        painter (QPainter): Target painter
+        rect (QRect): Shape the shadow belongs to
+        radius (int): Corner radius of the shape
+        blur_radius (int): Blur radius of the shadow
+        color (QColor): Shadow color
+        offset (int): Downward offset of the shadow
+    """
+    source, corner, margin = _shadow_source(radius, blur_radius, QColor(color), offset)
+    outer = QRectF(rect).adjusted(-margin, -margin, margin, margin)
+    middle = source.width() - 2 * corner  # 1-pixel stretchable center
+
+    left, top = outer.left(), outer.top()
+    right, bottom = outer.right() - corner, outer.bottom() - corner
+    inner_width = outer.width() - 2 * corner
+    inner_height = outer.height() - 2 * corner
+    if inner_width < 0 or inner_height < 0:
+        return
+
+    far = corner + middle
+    patches = (
+        (QRectF(left, top, corner, corner), QRectF(0, 0, corner, corner)),
+        (QRectF(right, top, corner, corner), QRectF(far, 0, corner, corner)),
+        (QRectF(left, bottom, corner, corner), QRectF(0, far, corner, corner)),
+        (QRectF(right, bottom, corner, corner), QRectF(far, far, corner, corner)),
+        (QRectF(left + corner, top, inner_width, corner), QRectF(corner, 0, middle, corner)),
+        (QRectF(left + corner, bottom, inner_width, corner), QRectF(corner, far, middle, corner)),
+        (QRectF(left, top + corner, corner, inner_height), QRectF(0, corner, corner, middle)),
+        (QRectF(right, top + corner, corner, inner_height), QRectF(far, corner, corner, middle)),
+    )
+    for target, patch in patches:
+        painter.drawPixmap(target, source, patch)
+
+
+class ShadowFrame(QWidget):
+    """
+    Wraps a widget and paints a cached drop shadow around it.
+
+    Replaces QGraphicsDropShadowEffect, which renders the whole wrapped widget
+    offscreen on every repaint.
+    """
+
+    def __init__(self, child, radius, blur_radius=15, color=QColor(0, 0, 0, 35), offset=0, parent=None):
+        """
+        Initialize the frame.
+
+        Args:
+            child (QWidget): Widget to decorate
+            radius (int): Corner radius of the child's border
+            blur_radius (int): Blur radius of the shadow
+            color (QColor): Shadow color
+            offset (int): Downward offset of the shadow
+            parent (QWidget): Parent widget
+        """
+        super().__init__(parent)
+        self.child = child
+        self.radius = radius
+        self.blur_radius = blur_radius
+        self.color = QColor(color)
+        self.offset = offset
+
+        margin = shadow_margin(blur_radius, offset)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(margin, margin, margin, margin)
+        layout.setSpacing(0)
+        layout.addWidget(child)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        paint_shadow(painter, self.child.geometry(), self.radius, self.blur_radius, self.color, self.offset)
+        painter.end()
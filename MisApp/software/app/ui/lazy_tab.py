@@ -0,0 +1,62 @@
+"""
+MIS Smart Assistant - Lazy Tab
+Tab page that builds its widget the first time the tab is opened.
+"""
+
+import time
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+from ..utils import logger
+
+
+class LazyTab(QWidget):
+    """
+    Placeholder page for a QTabWidget.
+
+    Shows a loading label until the tab is first activated, then calls its factory
+    and replaces the label with the widget the factory returns.
+    """
+
+    def __init__(self, name, factory, parent=None):
+        """
+        Initialize the placeholder.
+
+        Args:
+            name (str): Tab name, for logging
+            factory (callable): Called with no arguments to build the real widget
+            parent (QWidget): Parent widget
+        """
+        super().__init__(parent)
+        self.name = name
+        self.factory = factory
+        self.widget = None
+
+        self.page_layout = QVBoxLayout(self)
+        self.page_layout.setContentsMargins(0, 0, 0, 0)
+        self.loading_label = QLabel("Đang tải...")
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        self.page_layout.addWidget(self.loading_label)
+
+    def ensure_built(self):
+        """
+        Build the real widget if it has not been built yet.
+
+        Returns:
+            QWidget: The tab's widget
+        """
+        if self.widget is None:
+            start_time = time.perf_counter()
+            self.widget = self.factory()
+            self.page_layout.removeWidget(self.loading_label)
+            self.loading_label.deleteLater()
+            self.page_layout.addWidget(self.widget)
+            logger.info(f"Tab '{self.name}' built in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+        return self.widget
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.widget is None:
+            # Let the loading label paint before the (possibly slow) build
+            QTimer.singleShot(0, self.ensure_built)
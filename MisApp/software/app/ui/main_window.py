@@ -10,25 +10,22 @@ from PyQt5.QtWidgets import (QMainWindow, QStackedWidget, QWidget,
 from PyQt5.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QEasingCurve, QPoint
 from PyQt5.QtGui import QIcon, QPixmap, QColor, QFont
 
-# Import UI widgets
-from .time_widget import TimeWidget
-from .weather_widget import WeatherWidget
+# Import UI widgets (the other tabs are imported when first opened)
 from .chat_widget import ChatWidget
-from .multimedia_widget import MultiMediaWidget
 from .status_widget import StatusWidget
-from .smart_vision_widget import SmartVisionWidget
-from .lcd_widget import LCDWidget
+from .lazy_tab import LazyTab
 
 # Import services
 from ..utils import config, logger
+from ..models.service_container import ServiceContainer
 from ..models.gemini_client import GeminiClient
+from ..models.conversation_store import conversation_store
 from ..models.speech_processor import SpeechProcessor
 from ..models.hardware_interface import HardwareInterface
 from ..models.time_service import TimeService
 from ..models.weather_service import WeatherService
 from ..models.news_service import NewsService
 from ..models.lcd_service import LCDService
-from ..models.multimedia import MultimediaService
 from ..models.launcher_service import LauncherService
 from ..models.notification_sound_service import notification_service
 
@@ -37,31 +34,11 @@ class MainWindow(QMainWindow):
     
     def __init__(self):
         super().__init__()
-        # Initialize models
-        self.hardware_interface = HardwareInterface()
-        self.speech_processor = SpeechProcessor()
-        self.weather_service = WeatherService()
-        self.news_service = NewsService()
-        self.time_service = TimeService(hardware_interface=self.hardware_interface)
-        self.launcher_service = LauncherService()
-        self.multimedia_service = MultimediaService()
-        self.lcd_service = LCDService(hardware_interface=self.hardware_interface)
-          # Initialize notification sound service
+        # Services are built on first use; only what the chat tab needs is built now
+        self.services = ServiceContainer()
+        self._register_services()
         self.notification_service = notification_service
-        
-        # Connect launcher service with multimedia service for music playback
-        self.launcher_service.set_multimedia_service(self.multimedia_service)
-        
-        # Initialize Gemini client with services
-        self.gemini_client = GeminiClient(
-            time_service=self.time_service,
-            weather_service=self.weather_service,
-            news_service=self.news_service,
-            launcher_service=self.launcher_service,
-            multimedia_service=self.multimedia_service,
-            hardware_interface=self.hardware_interface,
-            lcd_service=self.lcd_service
-        )
+        self.warmup_queue = None  # Services still to start after the window shows
         
         # Set up the window
         self.setWindowTitle("MIS Smart Assistant")
@@ -92,33 +69,17 @@ class MainWindow(QMainWindow):
             self.gemini_client, 
             self.speech_processor, 
             self.hardware_interface,
-            self.time_service,
-            self.weather_service
+            self.services.lazy('time_service'),
+            self.services.lazy('weather_service')
         )
         self.tabs.addTab(self.chat_widget, "Trợ lý")
         
-        # Create and add weather widget
-        self.weather_widget = WeatherWidget(self.weather_service)
-        self.tabs.addTab(self.weather_widget, "Thời tiết")
-        
-        # Create and add time widget
-        self.time_widget = TimeWidget(self.time_service, self.lcd_service)
-        self.tabs.addTab(self.time_widget, "Thời gian")
-        
-        # Create and add smart vision widget
-        self.smart_vision_widget = SmartVisionWidget(
-            gemini_client=self.gemini_client,
-            speech_processor=self.speech_processor
-        )
-        self.tabs.addTab(self.smart_vision_widget, "Smart Vision")
-        
-        # Create and add multimedia widget
-        self.multimedia_widget = MultiMediaWidget(self.multimedia_service)
-        self.tabs.addTab(self.multimedia_widget, "Media")
-        
-        # Create and add LCD widget
-        self.lcd_widget = LCDWidget(hardware_interface=self.hardware_interface)
-        self.tabs.addTab(self.lcd_widget, "LCD")
+        # The other tabs are placeholders until they are first opened
+        self.tabs.addTab(LazyTab("weather", self._create_weather_widget), "Thời tiết")
+        self.tabs.addTab(LazyTab("time", self._create_time_widget), "Thời gian")
+        self.tabs.addTab(LazyTab("smart_vision", self._create_smart_vision_widget), "Smart Vision")
+        self.tabs.addTab(LazyTab("media", self._create_multimedia_widget), "Media")
+        self.tabs.addTab(LazyTab("lcd", self._create_lcd_widget), "LCD")
         
         # Add the tabs to the layout
         self.layout.addWidget(self.tabs)
@@ -138,6 +99,107 @@ class MainWindow(QMainWindow):
         self._add_menu_animations()
         
         logger.info("Main window initialized")
+    
+    @property
+    def hardware_interface(self):
+        return self.services.get('hardware_interface')
+    
+    @property
+    def speech_processor(self):
+        return self.services.get('speech_processor')
+    
+    @property
+    def lcd_service(self):
+        return self.services.get('lcd_service')
+    
+    @property
+    def gemini_client(self):
+        return self.services.get('gemini_client')
+    
+    def _register_services(self):
+        """Register how each service is built and stopped; none is built here."""
+        services = self.services
+        services.register('hardware_interface', HardwareInterface,
+                          shutdown=lambda service: service.disconnect())
+        services.register('speech_processor', SpeechProcessor, gui=True,
+                          shutdown=lambda service: service.stop_speaking())
+        services.register('lcd_service', self._create_lcd_service, gui=True,
+                          shutdown=lambda service: service.stop_scrolling())
+        services.register('time_service', lambda: TimeService(hardware_interface=services.get('hardware_interface')))
+        services.register('weather_service', WeatherService,
+                          shutdown=lambda service: service.prefetcher and service.prefetcher.stop())
+        services.register('news_service', lambda: NewsService(speech_processor=services.get('speech_processor')),
+                          shutdown=lambda service: service.stop())
+        services.register('multimedia_service', self._create_multimedia_service, gui=True,
+                          shutdown=lambda service: service.close())
+        services.register('launcher_service', self._create_launcher_service)
+        services.register('gemini_client', lambda: GeminiClient(
+            time_service=services.lazy('time_service'),
+            weather_service=services.lazy('weather_service'),
+            news_service=services.lazy('news_service'),
+            launcher_service=services.lazy('launcher_service'),
+            multimedia_service=services.lazy('multimedia_service'),
+            hardware_interface=services.lazy('hardware_interface'),
+            lcd_service=services.lazy('lcd_service')
+        ))
+    
+    def _create_lcd_service(self):
+        lcd_service = LCDService(hardware_interface=self.services.get('hardware_interface'))
+        lcd_service.display_updated.connect(self._on_lcd_display_updated)
+        lcd_service.scrolling_started.connect(self._on_lcd_scrolling_started)
+        lcd_service.scrolling_stopped.connect(self._on_lcd_scrolling_stopped)
+        return lcd_service
+    
+    def _create_multimedia_service(self):
+        from ..models.multimedia import MultimediaService
+        return MultimediaService()
+    
+    def _create_launcher_service(self):
+        launcher_service = LauncherService()
+        # Connect launcher service with multimedia service for music playback
+        launcher_service.set_multimedia_service(self.services.lazy('multimedia_service'))
+        return launcher_service
+    
+    def _create_weather_widget(self):
+        from .weather_widget import WeatherWidget
+        return WeatherWidget(self.services.get('weather_service'))
+    
+    def _create_time_widget(self):
+        from .time_widget import TimeWidget
+        return TimeWidget(self.services.get('time_service'), self.lcd_service)
+    
+    def _create_smart_vision_widget(self):
+        from .smart_vision_widget import SmartVisionWidget
+        return SmartVisionWidget(
+            gemini_client=self.gemini_client,
+            speech_processor=self.speech_processor
+        )
+    
+    def _create_multimedia_widget(self):
+        from .multimedia_widget import MultiMediaWidget
+        return MultiMediaWidget(self.services.get('multimedia_service'))
+    
+    def _create_lcd_widget(self):
+        from .lcd_widget import LCDWidget
+        return LCDWidget(hardware_interface=self.hardware_interface)
+    
+    def showEvent(self, event):
+        """Start the remaining services once the window is on screen."""
+        super().showEvent(event)
+        if self.warmup_queue is None:
+            self.warmup_queue = self.services.pending()
+            QTimer.singleShot(config.SERVICE_WARMUP_DELAY, self._warm_up_next_service)
+    
+    def _warm_up_next_service(self):
+        """Build one pending service, then yield to the event loop before the next."""
+        if not self.warmup_queue:
+            return
+        name = self.warmup_queue.pop(0)
+        try:
+            self.services.get(name)
+        except Exception as e:
+            logger.error(f"Error starting service '{name}': {str(e)}")
+        QTimer.singleShot(0, self._warm_up_next_service)
         
     def _setup_theme(self):
         """Set up the UI theme."""
@@ -359,14 +421,11 @@ class MainWindow(QMainWindow):
         help_menu.addAction(about_action)
     
     def _connect_signals(self):
-        """Connect signals between components."""
+        """Connect signals between components; the LCD service connects its own when it is built."""
         self.hardware_interface.register_callback('CONNECTED', self._on_hardware_connected)
         self.hardware_interface.register_callback('DISCONNECTED', self._on_hardware_disconnected)
         self.hardware_interface.register_callback('LISTENING', self._on_hardware_listening)
         self.hardware_interface.register_callback('ACTIVATE_MICROPHONE', self.chat_widget._on_hardware_button_pressed)
-        self.lcd_service.display_updated.connect(self._on_lcd_display_updated)
-        self.lcd_service.scrolling_started.connect(self._on_lcd_scrolling_started)
-        self.lcd_service.scrolling_stopped.connect(self._on_lcd_scrolling_stopped)
     
     def _on_hardware_connected(self, data):
         """Handle hardware connected event.""" 
@@ -421,12 +480,9 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         """Handle window close event.""" 
         try:
-            if self.lcd_service:
-                self.lcd_service.stop_scrolling()
-            if self.hardware_interface:
-                self.hardware_interface.disconnect()
-            if self.speech_processor:
-                self.speech_processor.stop_speaking()
+            # Only services that were built are stopped; none is built just to shut it down
+            self.services.shutdown()
+            conversation_store.close()
             logger.info("Application shutting down")
         except Exception as e:
             logger.error(f"Error during shutdown: {str(e)}")
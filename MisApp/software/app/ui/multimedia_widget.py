@@ -2,11 +2,7 @@ import sys
 import os
 import time
 import math
-import threading
 import json
-import urllib.request
-import urllib.parse
-import random
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
                            QSlider, QFrame, QSizePolicy, QStackedWidget, QProgressBar,
                            QGraphicsDropShadowEffect, QListWidget, QListWidgetItem,
@@ -17,11 +13,13 @@ from PyQt5.QtGui import QIcon, QFont, QColor, QPixmap, QPainter, QPainterPath, Q
 
 from ..utils import config, logger
 from ..models.multimedia import MultimediaService
+from ..models.waveform_analyzer import waveform_analyzer
+from .album_art_cache import AlbumArtCache
 
 class AlbumArtWidget(QWidget):
     """Widget for displaying album artwork with a spinning disc animation."""
     
-    def __init__(self, parent=None):
+    def __init__(self, art_cache, parent=None):
         super().__init__(parent)
         
         self.setFixedSize(300, 300)
@@ -44,6 +42,10 @@ class AlbumArtWidget(QWidget):
         # Current track metadata
         self.track_metadata = None
         
+        # Covers are decoded in the background and shown once ready
+        self.art_cache = art_cache
+        self.art_cache.art_ready.connect(self._on_art_ready)
+        
         # Set up hover effects
         self.setMouseTracking(True)
         self.hover = False
@@ -156,37 +158,31 @@ class AlbumArtWidget(QWidget):
     def set_track(self, metadata):
         """Set the track metadata and album art."""
         self.track_metadata = metadata
-        
-        if metadata and 'cover_url' in metadata and metadata['cover_url']:
-            # Try to load album art from URL or local file
-            try:
-                if os.path.isfile(metadata['cover_url']):
-                    # Local file
-                    self.album_image = QPixmap(metadata['cover_url'])
-                else:
-                    # URL - download and create QPixmap
-                    import urllib.request
-                    from io import BytesIO
-                    
-                    response = urllib.request.urlopen(metadata['cover_url'])
-                    data = response.read()
-                    image = QPixmap()
-                    image.loadFromData(data)
-                    self.album_image = image
-                
-                # Ensure the image is circular with vinyl effects
-                self.album_image = self._create_circular_image(self.album_image)
-                
-            except Exception as e:
-                logger.error(f"Error loading album art: {str(e)}")
-                self.album_image = self.default_album_image
+        self._show_cover()
+    
+    def _cover(self):
+        """Artwork digest or cover path/URL of the current track."""
+        if not self.track_metadata:
+            return None
+        return self.track_metadata.get('artwork_hash') or self.track_metadata.get('cover_url')
+    
+    def _show_cover(self):
+        """Show the cached cover, or the default disc until it has loaded."""
+        image = self.art_cache.get_image(self._cover(), self.width())
+        if image is not None:
+            # Ensure the image is circular with vinyl effects
+            self.album_image = self._create_circular_image(QPixmap.fromImage(image))
         else:
-            # Use default album art
             self.album_image = self.default_album_image
         
         # Trigger update
         self.update()
     
+    def _on_art_ready(self, cover):
+        """Show a cover that finished loading if it belongs to the current track."""
+        if cover == self._cover():
+            self._show_cover()
+    
     def _create_circular_image(self, pixmap):
         """Create a circular version of the album art with vinyl styling."""
         if pixmap.isNull():
@@ -347,9 +343,15 @@ class PlaylistWidget(QWidget):
     # Define signals
     track_selected = pyqtSignal(int)  # Track index
     
-    def __init__(self, parent=None):
+    def __init__(self, art_cache, parent=None):
         super().__init__(parent)
         
+        # Cover of the playing track replaces the default image once loaded
+        self.art_cache = art_cache
+        self.art_cache.art_ready.connect(self._on_art_ready)
+        self.current_cover = None
+        self.default_pixmap = None
+        
         # Create layout
         layout = QVBoxLayout(self)
         layout.setContentsMargins(10, 10, 10, 10)
@@ -419,6 +421,7 @@ class PlaylistWidget(QWidget):
             # Load and scale the image
             pixmap = QPixmap(image_path)
             pixmap = pixmap.scaled(900, 850, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.default_pixmap = pixmap
             
             # Set the pixmap to the label
             self.album_image_label.setPixmap(pixmap)
@@ -516,12 +519,28 @@ class PlaylistWidget(QWidget):
             # Make sure the title is fully visible with proper word wrapping
             self.title_label.setWordWrap(True)
             self.artist_label.setWordWrap(True)
+            
+            self.current_cover = metadata.get('artwork_hash') or metadata.get('cover_url')
         else:
             # Reset labels for no track
             self.status_label.setText("Không có bài hát nào đang phát")
             self.title_label.setText("--")
             self.artist_label.setText("--")
             self.album_label.setText("--")
+            self.current_cover = None
+        self._show_cover()
+    
+    def _show_cover(self):
+        """Show the current track's cover thumbnail, or the default image."""
+        image = self.art_cache.get_image(self.current_cover, 200)
+        if image is not None:
+            self.album_image_label.setPixmap(QPixmap.fromImage(image))
+        elif self.default_pixmap is not None:
+            self.album_image_label.setPixmap(self.default_pixmap)
+    
+    def _on_art_ready(self, cover):
+        if cover == self.current_cover:
+            self._show_cover()
     
     def set_playlist(self, tracks, current_index=-1):
         """Set the playlist items with modern styling."""
@@ -560,6 +579,7 @@ class PlaylistWidget(QWidget):
             # Create list item
             item = QListWidgetItem()
             item.setSizeHint(item_widget.sizeHint())
+            item.setData(Qt.UserRole, track.get('artwork_hash') or track.get('cover_url'))
             
             # Set current track with different style
             if i == current_index:
@@ -616,7 +636,8 @@ class PlaylistWidget(QWidget):
                     current_track = {
                         'title': title_label.text() if title_label else 'Unknown Title',
                         'artist': artist_label.text() if artist_label else 'Unknown Artist',
-                        'album': ''  # We might not have this info in the item widget
+                        'album': '',  # We might not have this info in the item widget
+                        'cover_url': item.data(Qt.UserRole)
                     }
                 else:
                     # Regular track styling
@@ -719,6 +740,13 @@ class PlaybackControlsWidget(QWidget):
         self.position_slider.valueChanged.connect(self._on_position_slider_value_changed)
         self.position_slider.sliderPressed.connect(self._on_position_slider_pressed)
         
+        # Dragging seeks at most once per interval, always to the latest slider value
+        self.seek_timer = QTimer(self)
+        self.seek_timer.setSingleShot(True)
+        self.seek_timer.setInterval(config.SEEK_INTERVAL_MS)
+        self.seek_timer.timeout.connect(self._emit_drag_seek)
+        self._drag_seek_value = None
+        
         time_layout.addWidget(self.current_time_label)
         time_layout.addWidget(self.position_slider, 1)
         time_layout.addWidget(self.total_time_label)
@@ -1139,8 +1167,11 @@ class PlaybackControlsWidget(QWidget):
         self._last_seek_time = time.time()
         self._last_seek_value = value
         
-        # Gửi tín hiệu thay đổi vị trí
-        self.position_changed.emit(value)
+        # Gửi tín hiệu thay đổi vị trí, unless the last drag seek already went there
+        self.seek_timer.stop()
+        if value != self._drag_seek_value:
+            self.position_changed.emit(value)
+        self._drag_seek_value = None
         
         # Khôi phục style gốc cho label
         if hasattr(self, '_original_label_style'):
@@ -1148,6 +1179,10 @@ class PlaybackControlsWidget(QWidget):
     
     def _on_position_slider_moved(self, value):
         """Handle position slider value change while dragging."""
+        # Scrub the audio along with the slider
+        if not self.seek_timer.isActive():
+            self.seek_timer.start()
+        
         # Kiểm tra xem có cần throttle (giới hạn tần suất cập nhật) không
         current_time = time.time()
         if hasattr(self, '_last_slider_update') and (current_time - self._last_slider_update < 0.05):
@@ -1211,6 +1246,13 @@ class PlaybackControlsWidget(QWidget):
             min-width: 55px;
         """)
     
+    def _emit_drag_seek(self):
+        """Seek to the slider value reached while dragging."""
+        value = self.position_slider.value()
+        if self.position_slider.isSliderDown() and value != self._drag_seek_value:
+            self._drag_seek_value = value
+            self.position_changed.emit(value)
+    
     def _on_position_slider_value_changed(self, value):
         """Handle automatic value changes in the position slider."""
         # Only respond to programmatic changes, not user drags
@@ -1291,7 +1333,13 @@ class PlaybackControlsWidget(QWidget):
 
 
 class AudioWaveformWidget(QWidget):
-    """Widget for displaying a responsive audio waveform visualization."""
+    """
+    Audio visualization driven by the playing track's precomputed envelope.
+    
+    Each bar shows a spectrum band at the current playback position, scaled by the
+    frame's loudness; a frame is a lookup in the track's Waveform, so repainting costs
+    no analysis. Until the envelope is ready (or without NumPy) the bars stay idle.
+    """
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -1303,11 +1351,14 @@ class AudioWaveformWidget(QWidget):
         
         # Waveform data
         self.waveform_data = []
-        self.max_data_points = 100  # Number of bars to show
+        self.max_data_points = 48  # Number of bars to show
         self.is_active = False
-        self.audio_intensity = 0.5  # Default intensity factor (0.0 to 1.0)
-        self.tempo = 0.5  # Music tempo (0.0=slow to 1.0=fast)
-        self.beat_phase = 0.0  # Phase for beat visualization
+        
+        # Track envelope and the last reported playback position
+        self.file_path = None
+        self.envelope = None
+        self.position = 0.0
+        self.position_time = time.monotonic()
         
         # Color theme with gradient stops
         self.color_themes = {
@@ -1348,16 +1399,6 @@ class AudioWaveformWidget(QWidget):
         self.animation_timer.timeout.connect(self._update_waveform)
         self.animation_timer.setInterval(50)  # Update every 50ms
         
-        # Theme transition timer - changes themes every 10 seconds when active
-        self.theme_timer = QTimer(self)
-        self.theme_timer.timeout.connect(self._advance_color_theme)
-        self.theme_timer.setInterval(10000)  # Change every 10 seconds
-        
-        # Beat timer for visual beat effects
-        self.beat_timer = QTimer(self)
-        self.beat_timer.timeout.connect(self._update_beat)
-        self.beat_timer.setInterval(500)  # Default beat interval (will adjust based on tempo)
-        
         # Generate initial empty waveform
         self._generate_empty_waveform()
         
@@ -1372,85 +1413,72 @@ class AudioWaveformWidget(QWidget):
         self.setStyleSheet("background-color: transparent;")
     
     def _generate_empty_waveform(self):
-        """Generate an empty waveform with minimal movement for inactive state."""
-        self.waveform_data = []
-        for i in range(self.max_data_points):
-            # Generate very small random values for minimal movement
-            value = random.uniform(0.05, 0.08)
-            self.waveform_data.append(value)
+        """Generate a flat, gently shaped waveform for the inactive state."""
+        self.waveform_data = [
+            0.05 + 0.03 * math.sin(i * math.pi / self.max_data_points)
+            for i in range(self.max_data_points)
+        ]
     
     def _generate_active_waveform(self):
-        """Generate a new active waveform frame."""
-        # Update existing waveform data
-        for i in range(len(self.waveform_data)):
-            if self.is_active:
-                # Generate more dramatic values when active
-                base_height = random.uniform(0.2, 0.8)
-                
-                # Create a pattern where bars in the middle tend to be taller
-                position_factor = 1.0 - abs((i - (self.max_data_points / 2)) / (self.max_data_points / 2))
-                height = base_height * (0.5 + position_factor * 0.7)
-                
-                # Apply audio intensity factor to make waveform respond to volume/intensity
-                height = height * self.audio_intensity * 1.3
-                
-                # Apply beat effect - boost heights rhythmically based on beat phase
-                beat_influence = math.sin(self.beat_phase + i * 0.2) * 0.2
-                height = height * (1.0 + beat_influence * self.tempo)
-                
-                # Add some randomness for natural effect
-                height += random.uniform(-0.1, 0.1)
-                
-                # Ensure height stays within bounds
-                height = max(0.05, min(0.95, height))
-                
-                # Smooth transitions by blending with previous value
-                if i < len(self.waveform_data):
-                    prev_height = self.waveform_data[i]
-                    # Faster tempo = more responsive waves (less smoothing)
-                    smoothing = max(0.5, 0.8 - self.tempo * 0.3)
-                    self.waveform_data[i] = prev_height * smoothing + height * (1.0 - smoothing)
-            else:
-                # Minimal movement for inactive state
-                value = random.uniform(0.02, 0.08)
-                self.waveform_data[i] = value
+        """Set the bar heights from the envelope frame at the current playback position."""
+        if self.envelope is None:
+            self.envelope = waveform_analyzer.get(self.file_path)
+            if self.envelope is None:
+                return
+        
+        # Interpolate between position reports so the bars follow the music smoothly
+        position = self.position + (time.monotonic() - self.position_time)
+        peak, rms, bands = self.envelope.frame(position)
+        loudness = 0.35 + 0.65 * rms
+        
+        last_band = len(bands) - 1
+        for i in range(self.max_data_points):
+            # Spread the bands over the bars, low frequencies on the left
+            band_position = i * last_band / max(1, self.max_data_points - 1)
+            lower = int(band_position)
+            upper = min(lower + 1, last_band)
+            fraction = band_position - lower
+            level = bands[lower] * (1 - fraction) + bands[upper] * fraction
+            
+            height = max(0.05, min(0.95, 0.05 + 0.9 * level * loudness))
+            
+            # Rise at once, fall back smoothly
+            prev_height = self.waveform_data[i]
+            self.waveform_data[i] = height if height > prev_height else prev_height * 0.7 + height * 0.3
+    
+    def set_track(self, file_path):
+        """
+        Show a new track, starting its analysis if it has not been analyzed yet.
+        
+        Args:
+            file_path (str): Path of the playing track, or None
+        """
+        if file_path == self.file_path:
+            return
+        self.file_path = file_path
+        self.envelope = waveform_analyzer.get(file_path)
+        self.update_position(0, 0)
+        
+        # A different color theme per track
+        if file_path:
+            themes = sorted(self.color_themes)
+            self.target_theme = themes[sum(file_path.encode('utf-8')) % len(themes)]
+            self.transition_progress = 0.0
     
     def start_animation(self):
         """Start the waveform animation."""
         self.is_active = True
+        self.position_time = time.monotonic()
         if not self.animation_timer.isActive():
             self.animation_timer.start()
-        
-        # Start theme transitions
-        if not self.theme_timer.isActive():
-            self.theme_timer.start()
-        
-        # Start beat animation
-        self._update_beat_timer()
-        if not self.beat_timer.isActive():
-            self.beat_timer.start()
     
     def stop_animation(self):
         """Stop the waveform animation."""
         self.is_active = False
-        
-        # Don't immediately stop the timer, let it fade out
-        # We'll just make the waveform less active
+        if self.animation_timer.isActive():
+            self.animation_timer.stop()
         self._generate_empty_waveform()
         self.update()
-        
-        # Stop the timers after a short delay
-        QTimer.singleShot(1000, self._stop_timers)
-    
-    def _stop_timers(self):
-        """Stop all animation timers completely."""
-        if not self.is_active:
-            if self.animation_timer.isActive():
-                self.animation_timer.stop()
-            if self.theme_timer.isActive():
-                self.theme_timer.stop()
-            if self.beat_timer.isActive():
-                self.beat_timer.stop()
     
     def _update_waveform(self):
         """Update the waveform data and trigger a repaint."""
@@ -1465,34 +1493,6 @@ class AudioWaveformWidget(QWidget):
         
         self.update()
     
-    def _advance_color_theme(self):
-        """Advance to the next color theme with smooth transition."""
-        if not self.is_active:
-            return
-            
-        # Get available themes excluding current
-        available_themes = list(self.color_themes.keys())
-        if self.current_theme in available_themes:
-            available_themes.remove(self.current_theme)
-        
-        # Set target theme and reset transition progress
-        self.target_theme = random.choice(available_themes)
-        self.transition_progress = 0.0
-    
-    def _update_beat(self):
-        """Update the beat phase for visual rhythm effects."""
-        self.beat_phase += math.pi / 4
-        if self.beat_phase > 2 * math.pi:
-            self.beat_phase -= 2 * math.pi
-    
-    def _update_beat_timer(self):
-        """Update the beat timer interval based on tempo."""
-        # Adjust beat interval based on tempo (faster tempo = faster beats)
-        # tempo 0.0 (slow) = 800ms, tempo 1.0 (fast) = 300ms
-        beat_interval = 800 - int(self.tempo * 500)
-        if self.beat_timer.interval() != beat_interval:
-            self.beat_timer.setInterval(beat_interval)
-    
     def _get_blended_color(self, pos):
         """Get a color blended between current and target themes."""
         if self.current_theme == self.target_theme or self.transition_progress <= 0:
@@ -1559,32 +1559,16 @@ class AudioWaveformWidget(QWidget):
         width = self.width()
         height = self.height()
         
-        # Adjust number of bars based on tempo (faster music = more bars)
-        if self.is_active:
-            # Scale between 60-120 bars based on tempo
-            visible_bars = int(60 + self.tempo * 60)
-        else:
-            visible_bars = 60  # Default for inactive state
-        
         # Calculate bar width and spacing
-        bar_count = min(visible_bars, len(self.waveform_data))
-        
-        # Spacing varies by tempo (faster = tighter spacing)
-        base_spacing = 4
-        tempo_spacing_adjustment = -2 * self.tempo  # Reduce spacing as tempo increases
-        spacing = max(1, base_spacing + tempo_spacing_adjustment)
+        bar_count = len(self.waveform_data)
+        spacing = 3
         
         bar_width = max(2, (width - (bar_count - 1) * spacing) / bar_count)
         
         # Draw each bar
         for i in range(bar_count):
-            # Calculate index to use from our data array
-            data_index = int(i * (self.max_data_points / bar_count))
-            if data_index >= len(self.waveform_data):
-                data_index = len(self.waveform_data) - 1
-                
             # Get the normalized height value (0.0 to 1.0)
-            normalized_height = self.waveform_data[data_index]
+            normalized_height = self.waveform_data[i]
             
             # Calculate bar height as percentage of widget height (with padding)
             bar_height = int(normalized_height * (height * 0.8))
@@ -1624,42 +1608,16 @@ class AudioWaveformWidget(QWidget):
             else:
                 self.stop_animation()
     
-    def update_intensity(self, position, duration):
-        """
-        Update the audio intensity based on playback position.
-        This simulates response to audio amplitude changes.
+    def update_position(self, position, duration):
         """
-        if not self.is_active or duration <= 0:
-            return
-            
-        # Calculate a pseudo-intensity based on position
-        # This creates a varying intensity that simulates real audio response
-        # In a real implementation, this would use actual audio samples/amplitude
-        
-        # Create a pattern that varies based on position in the track
-        position_ratio = position / duration
-        base_intensity = 0.5  # Base intensity
-        
-        # Add variation based on position
-        variation = math.sin(position * 4) * 0.2 + math.cos(position * 2.5) * 0.15
-        
-        # Add some randomness for more natural effect
-        random_factor = random.uniform(-0.1, 0.1)
-        
-        # Calculate final intensity
-        intensity = base_intensity + variation + random_factor
-        
-        # Ensure intensity stays within bounds
-        self.audio_intensity = max(0.3, min(1.0, intensity))
+        Follow the playback position reported by the player.
         
-        # Also update the tempo (rhythm) based on position
-        # This simulates faster/slower sections of music
-        tempo_variation = (math.sin(position * 0.5) * 0.3) + (math.cos(position * 0.2) * 0.2)
-        self.tempo = 0.5 + tempo_variation
-        self.tempo = max(0.2, min(0.9, self.tempo))
-        
-        # Update beat timer interval based on new tempo
-        self._update_beat_timer()
+        Args:
+            position (float): Seconds from the start of the track
+            duration (float): Track length in seconds
+        """
+        self.position = position
+        self.position_time = time.monotonic()
 
 class MultiMediaWidget(QWidget):
     """
@@ -1740,8 +1698,11 @@ class MultiMediaWidget(QWidget):
             border-radius: 8px;
         """)
         
+        # Covers shared by the album art disc and the playlist
+        self.art_cache = AlbumArtCache(parent=self)
+        
         # Album art with spinning disc
-        self.album_art = AlbumArtWidget()
+        self.album_art = AlbumArtWidget(self.art_cache)
         left_layout.addWidget(self.album_art, 0, Qt.AlignCenter)
         
         # Add audio waveform visualization below the album art
@@ -1767,7 +1728,7 @@ class MultiMediaWidget(QWidget):
         middle_layout = QVBoxLayout(middle_side)
         middle_layout.setContentsMargins(0, 0, 0, 0)
         
-        self.playlist = PlaylistWidget()
+        self.playlist = PlaylistWidget(self.art_cache)
         middle_layout.addWidget(self.playlist)
         
         # Right side - Search widget
@@ -1775,7 +1736,7 @@ class MultiMediaWidget(QWidget):
         right_layout = QVBoxLayout(right_side)
         right_layout.setContentsMargins(0, 0, 0, 0)
         
-        self.search_widget = MediaSearchWidget(self.multimedia_service)
+        self.search_widget = MediaSearchWidget(self.multimedia_service, self.art_cache)
         right_layout.addWidget(self.search_widget)
         
         # Add vertical dividers between sections
@@ -1846,7 +1807,8 @@ class MultiMediaWidget(QWidget):
         self.album_art.set_track(metadata)
         self.album_art.start_spinning()
         
-        # Activate waveform animation
+        # Activate waveform animation for the new track
+        self.waveform.set_track(metadata.get('file_path') if metadata else None)
         self.waveform.set_active(True)
         
         # Update playlist selection
@@ -2000,16 +1962,7 @@ class MultiMediaWidget(QWidget):
         self.multimedia_service.set_volume(volume)
     
     def _on_seek_position(self, percentage):
-        """Handle position slider change."""
-        # Kiểm tra xem có phải seek liên tục không (để tránh gửi quá nhiều yêu cầu)
-        current_time = time.time()
-        if hasattr(self, '_last_seek_request') and (current_time - self._last_seek_request < 0.1):
-            # Quá nhanh, bỏ qua để tránh seek liên tục
-            return
-            
-        # Cập nhật thời gian seek gần nhất
-        self._last_seek_request = current_time
-        
+        """Handle position slider change (already throttled by the controls while dragging)."""
         # Convert percentage to position in seconds
         try:
             # Get the current duration from the multimedia service
@@ -2021,12 +1974,12 @@ class MultiMediaWidget(QWidget):
                 audio_player = self.multimedia_service.audio_player
                 if hasattr(audio_player, 'track_duration') and audio_player.track_duration > 0:
                     duration = audio_player.track_duration
-                    logger.info(f"Got duration from audio_player: {duration}s")
+                    logger.debug(f"Got duration from audio_player: {duration}s")
             
             # Nếu vẫn chưa có, thử lấy từ track_duration trực tiếp
             if duration <= 0 and hasattr(self.multimedia_service, 'track_duration'):
                 duration = self.multimedia_service.track_duration
-                logger.info(f"Got duration from multimedia_service: {duration}s")
+                logger.debug(f"Got duration from multimedia_service: {duration}s")
             
             # Kiểm tra có duration hợp lệ không
             if duration <= 0:
@@ -2064,7 +2017,7 @@ class MultiMediaWidget(QWidget):
                     
                     # Log success or failure
                     if result:
-                        logger.info(f"Seek position set to {position:.2f}s ({percentage}%) of {duration:.2f}s")
+                        logger.debug(f"Seek position set to {position:.2f}s ({percentage}%) of {duration:.2f}s")
                     else:
                         logger.warning(f"Failed to set position to {position:.2f}s")
                 else:
@@ -2162,9 +2115,9 @@ class MultiMediaWidget(QWidget):
         """Handle playback position changed event."""
         self.controls.update_position(position, duration)
         
-        # Update waveform intensity based on current playback position
-        if hasattr(self, 'waveform') and self.waveform.is_active:
-            self.waveform.update_intensity(position, duration)
+        # Keep the waveform on the music at the current playback position
+        if hasattr(self, 'waveform'):
+            self.waveform.update_position(position, duration)
 
     def _on_loop_clicked(self):
         """Handle loop button click."""
@@ -2200,8 +2153,8 @@ class SearchWorker(QThread):
                 # Use the multimedia service's YouTube search functionality
                 results = self.multimedia_service.search_youtube(self.query, max_results=10)
             elif self.source == "local":
-                # Implement local media search if needed
-                pass
+                # Search the indexed music folders and downloaded songs
+                results = self.multimedia_service.search_library(self.query, max_results=20)
             # Add more sources as needed: Spotify, SoundCloud, etc.
             
             # Emit results
@@ -2215,18 +2168,19 @@ class SearchWorker(QThread):
 class MediaItemWidget(QWidget):
     """Custom widget for displaying a media item in search results."""
     
-    def __init__(self, media_item, parent=None):
+    def __init__(self, media_item, art_cache, parent=None):
         super().__init__(parent)
         self.media_item = media_item
         self.thumbnail_url = media_item.get('thumbnail_url', None)
         self.thumbnail = None
-        self.is_loading_thumbnail = False
         
         self._setup_ui()
         
-        # Load thumbnail asynchronously
+        # Thumbnails are downloaded once into the artwork store and decoded off the UI thread
+        self.art_cache = art_cache
         if self.thumbnail_url:
-            self._load_thumbnail_async()
+            self.art_cache.art_ready.connect(self._on_art_ready)
+            self._show_thumbnail()
     
     def _setup_ui(self):
         """Set up the UI components for the media item."""
@@ -2415,64 +2369,33 @@ class MediaItemWidget(QWidget):
         self.thumbnail = pixmap
         self.thumbnail_label.setPixmap(pixmap)
     
-    def _load_thumbnail_async(self):
-        """Load thumbnail image asynchronously to prevent UI blocking."""
-        if self.is_loading_thumbnail:
+    def _show_thumbnail(self):
+        """Show the thumbnail once the art cache has it; until then the default one stays."""
+        image = self.art_cache.get_image(self.thumbnail_url, 120)
+        if image is None:
             return
-            
-        self.is_loading_thumbnail = True
-        
-        def load_image():
-            try:
-                url = self.thumbnail_url
-                data = urllib.request.urlopen(url).read()
-                image = QPixmap()
-                image.loadFromData(data)
-                
-                # Scale to thumbnail size while preserving aspect ratio
-                image = image.scaled(120, 68, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                
-                # Create a new pixmap with rounded corners
-                rounded = QPixmap(120, 68)
-                rounded.fill(Qt.transparent)
-                
-                painter = QPainter(rounded)
-                painter.setRenderHint(QPainter.Antialiasing)
-                
-                # Create path for rounded rectangle
-                path = QPainterPath()
-                path.addRoundedRect(QRectF(0, 0, 120, 68), 6, 6)
-                
-                # Set clip path and draw the image
-                painter.setClipPath(path)
-                
-                # Center the image if aspect ratio is preserved
-                x = (120 - image.width()) // 2 if image.width() < 120 else 0
-                y = (68 - image.height()) // 2 if image.height() < 68 else 0
-                
-                painter.drawPixmap(x, y, image)
-                painter.end()
-                
-                self.thumbnail = rounded
-                
-                # Update UI in the main thread
-                from PyQt5.QtCore import QMetaObject, Qt, Q_ARG
-                QMetaObject.invokeMethod(self, "_set_thumbnail", 
-                                         Qt.QueuedConnection, 
-                                         Q_ARG(QPixmap, rounded))
-            except Exception as e:
-                logger.error(f"Error loading thumbnail: {str(e)}")
-            finally:
-                self.is_loading_thumbnail = False
-        
-        # Start loading in background thread
-        thread = threading.Thread(target=load_image)
-        thread.daemon = True
-        thread.start()
-    
-    def _set_thumbnail(self, pixmap):
-        """Set the thumbnail image (called from the main thread)."""
-        self.thumbnail_label.setPixmap(pixmap)
+        
+        # Cover the 16:9 frame, cropping the letterbox bars of YouTube thumbnails
+        image = QPixmap.fromImage(image).scaled(120, 68, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+        rounded = QPixmap(120, 68)
+        rounded.fill(Qt.transparent)
+        
+        painter = QPainter(rounded)
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        # Create path for rounded rectangle
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(0, 0, 120, 68), 6, 6)
+        painter.setClipPath(path)
+        painter.drawPixmap((120 - image.width()) // 2, (68 - image.height()) // 2, image)
+        painter.end()
+        
+        self.thumbnail = rounded
+        self.thumbnail_label.setPixmap(rounded)
+    
+    def _on_art_ready(self, cover):
+        if cover == self.thumbnail_url:
+            self._show_thumbnail()
     
     def enterEvent(self, event):
         """Handle mouse enter event for hover effect."""
@@ -2499,9 +2422,10 @@ class MediaSearchWidget(QWidget):
     # Define signals
     play_media = pyqtSignal(dict)  # Emitted when media is selected for playback
     
-    def __init__(self, multimedia_service, parent=None):
+    def __init__(self, multimedia_service, art_cache, parent=None):
         super().__init__(parent)
         self.multimedia_service = multimedia_service
+        self.art_cache = art_cache
         self.current_search_worker = None
         self.search_results = []
         
@@ -2532,6 +2456,7 @@ class MediaSearchWidget(QWidget):
         # Source selector for different platforms
         self.source_combo = QComboBox()
         self.source_combo.addItem("YouTube", "youtube")
+        self.source_combo.addItem("Thư viện", "local")
         # Add more sources as they are implemented
         # self.source_combo.addItem("Spotify", "spotify")
         # self.source_combo.addItem("SoundCloud", "soundcloud")
@@ -2744,7 +2669,7 @@ class MediaSearchWidget(QWidget):
         
         # Add results to the container
         for result in results:
-            item_widget = MediaItemWidget(result)
+            item_widget = MediaItemWidget(result, self.art_cache)
             # Connect play button clicked
             item_widget.play_button.clicked.connect(lambda checked=False, r=result: self.onPlayClicked(r))
             
@@ -2837,6 +2762,12 @@ class MediaSearchWidget(QWidget):
                     progress_dialog.close()
                     QMessageBox.warning(self, "Lỗi phát", "Không thể xác định ID video. Vui lòng thử lại.")
             
+            elif source == "local":
+                # Indexed file: play it directly
+                self.multimedia_service.play_file(media_item['file_path'])
+                self.play_media.emit(media_item)
+                return f"Đang phát '{media_item['title']}'"
+            
             # Implement handling for other sources as needed
             
         except Exception as e:
@@ -14,20 +14,6 @@ from ..models.launcher_service import LauncherService
 # Import speech processor for TTS functionality
 from ..models.speech_processor import SpeechProcessor
 
-# Import OpenCV with error handling for exe environment
-try:
-    import cv2
-    CV2_AVAILABLE = True
-    # Test basic OpenCV functionality
-    test_cap = cv2.VideoCapture()
-    test_cap.release()
-except ImportError as e:
-    CV2_AVAILABLE = False
-    logger.error(f"OpenCV not available: {e}")
-except Exception as e:
-    CV2_AVAILABLE = False
-    logger.error(f"OpenCV initialization error: {e}")
-
 import numpy as np
 import time
 import os
@@ -36,31 +22,27 @@ import io
 import base64
 from datetime import datetime
 
-# Import để tạo QR code và xử lý mã QR
-try:
-    import qrcode
-    from PIL import Image as PILImage
-    from PIL import ImageEnhance, ImageFilter
-    from PIL.ImageQt import ImageQt
-    QR_CODE_AVAILABLE = True
-except ImportError:
-    QR_CODE_AVAILABLE = False
-    logger.warning("QR code generation is not available. Install qrcode and pillow packages.")
+from ..utils.lazy_import import LazyModule
+
+
+def _check_cv2(module):
+    """Make sure OpenCV actually works (it can fail to load its DLLs in the exe build)."""
+    test_cap = module.VideoCapture()
+    test_cap.release()
+
+
+def _check_zbar(module):
+    """Make sure ZBar actually works by testing a minimal decode."""
+    try:
+        module.decode(np.zeros((10, 10), dtype=np.uint8))
+    except Exception:
+        logger.warning("This may be due to missing libzbar.dll - run fix_libzbar.py to fix")
+        raise
+
 
-# Thử import ZBar cho việc quét mã QR/barcode
-try:
-    from pyzbar.pyzbar import decode as zbar_decode
-    # Check if ZBar actually works by testing a minimal decode
-    test_img = np.zeros((10, 10), dtype=np.uint8)
-    zbar_decode(test_img)  # Test if it can actually be used
-    ZBAR_AVAILABLE = True
-except ImportError:
-    ZBAR_AVAILABLE = False
-    logger.warning("ZBar not available. Install pyzbar package for QR code scanning.")
-except Exception as e:
-    ZBAR_AVAILABLE = False
-    logger.warning(f"ZBar is installed but not functioning properly: {e}")
-    logger.warning("This may be due to missing libzbar.dll - run fix_libzbar.py to fix")
+# OpenCV and ZBar are imported and probed when the camera is first used
+cv2 = LazyModule('cv2', check=_check_cv2)
+zbar = LazyModule('pyzbar.pyzbar', check=_check_zbar)
 
 class CameraThread(QThread):
     """Thread cho việc đọc camera để không block UI thread."""
@@ -79,7 +61,7 @@ class CameraThread(QThread):
     
     def run(self):
         """Chạy thread camera."""
-        if not CV2_AVAILABLE:
+        if not cv2.available:
             self.error_occurred.emit("OpenCV không khả dụng. Vui lòng cài đặt opencv-python.")
             return
             
@@ -191,7 +173,7 @@ class SmartVisionWidget(QWidget):
         super().__init__()
         
         # Kiểm tra OpenCV availability ngay khi khởi tạo
-        if not CV2_AVAILABLE:
+        if not cv2.available:
             logger.error("OpenCV not available - Smart Vision will be disabled")
         
         # Lưu tham chiếu đến Gemini client và SpeechProcessor
@@ -225,7 +207,7 @@ class SmartVisionWidget(QWidget):
         self._setup_ui()
         
         # Tự động khởi động camera chỉ khi OpenCV khả dụng
-        if CV2_AVAILABLE:
+        if cv2.available:
             self._start_camera()
         else:
             self._show_opencv_error()
@@ -529,7 +511,7 @@ class SmartVisionWidget(QWidget):
         status_bar.addStretch()
         
         # Thêm thông tin QR code (nếu có)
-        if ZBAR_AVAILABLE:
+        if zbar.available:
             status_bar.addWidget(QLabel("Quét mã QR:"))
             self.qr_status = QLabel("Sẵn sàng")
             self.qr_status.setStyleSheet("font-style: italic;")
@@ -591,7 +573,7 @@ class SmartVisionWidget(QWidget):
     
     def _enhance_text_frame(self, frame):
         """Tăng cường frame để hiển thị văn bản tốt hơn."""
-        if not CV2_AVAILABLE:
+        if not cv2.available:
             return frame
             
         try:
@@ -630,7 +612,7 @@ class SmartVisionWidget(QWidget):
     
     def _enhance_document_frame(self, frame):
         """Tăng cường frame để quét tài liệu tốt hơn."""
-        if not CV2_AVAILABLE:
+        if not cv2.available:
             return frame
             
         try:
@@ -675,7 +657,7 @@ class SmartVisionWidget(QWidget):
     
     def _start_camera(self):
         """Khởi động camera."""
-        if not CV2_AVAILABLE:
+        if not cv2.available:
             self._show_opencv_error()
             return
             
@@ -774,13 +756,13 @@ class SmartVisionWidget(QWidget):
             # Thực hiện quét mã QR nếu đang ở chế độ QR
             if self.current_mode == "qr":
                 # Kiểm tra nếu ZBar có sẵn
-                if ZBAR_AVAILABLE:
+                if zbar.available:
                     try:
                         # Chuyển đổi sang grayscale cho việc quét QR tốt hơn
                         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
                         
                         # Quét mã QR
-                        self.qr_codes = zbar_decode(gray)
+                        self.qr_codes = zbar.decode(gray)
                         
                         # Vẽ khung xung quanh mã QR
                         for code in self.qr_codes:
@@ -836,7 +818,7 @@ class SmartVisionWidget(QWidget):
                     # Đặt QR codes rỗng
                     self.qr_codes = []                # Cập nhật trạng thái QR
                 if hasattr(self, 'qr_status'):
-                    if not ZBAR_AVAILABLE:
+                    if not zbar.available:
                         self.qr_status.setText("ZBar không khả dụng - Không thể quét QR")
                         self.qr_status.setStyleSheet("font-weight: bold; color: #FF5252;")
                         self.open_qr_btn.setEnabled(False)
@@ -912,7 +894,7 @@ class SmartVisionWidget(QWidget):
     
     def _capture_image(self):
         """Chụp ảnh từ camera."""
-        if not CV2_AVAILABLE:
+        if not cv2.available:
             QMessageBox.warning(self, "OpenCV không khả dụng", 
                               "OpenCV không khả dụng. Vui lòng cài đặt opencv-python.")
             return
@@ -1026,7 +1008,7 @@ class SmartVisionWidget(QWidget):
     
     def _analyze_image(self):
         """Phân tích hình ảnh bằng Gemini."""
-        if not CV2_AVAILABLE:
+        if not cv2.available:
             QMessageBox.warning(self, "OpenCV không khả dụng", 
                               "OpenCV không khả dụng. Không thể phân tích hình ảnh.")
             return
@@ -1169,7 +1151,7 @@ class SmartVisionWidget(QWidget):
     
     def _save_results(self):
         """Lưu kết quả phân tích và hình ảnh."""
-        if not CV2_AVAILABLE:
+        if not cv2.available:
             QMessageBox.warning(self, "OpenCV không khả dụng", 
                               "OpenCV không khả dụng. Không thể lưu hình ảnh.")
             return
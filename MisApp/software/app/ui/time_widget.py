@@ -1,7 +1,5 @@
 import sys
 import time
-import datetime
-import pytz
 import os
 import math
 import random
@@ -24,6 +22,7 @@ from PyQt5.QtGui import (QFont, QIcon, QColor, QPainter, QPen, QBrush, QLinearGr
 
 from ..utils import logger, config
 from ..models.time_service import TimeService
+from ..models.timezone_engine import timezone_engine
 from .countdown_timer import CountdownTimer
 from .countdown_timer import CountdownTimer
 
@@ -1814,7 +1813,7 @@ class TimeWidget(QWidget):
         """Update all time displays and check alarms."""
         try:
             # Update Vietnam time
-            now = datetime.datetime.now(pytz.timezone(self.default_timezone))
+            now = timezone_engine.now(self.default_timezone)
             
             # Update digital clock with modern format
             self.digital_clock.setText(now.strftime("%H:%M:%S"))
@@ -1839,7 +1838,7 @@ class TimeWidget(QWidget):
                     time_label = self.world_clocks[tz]["time"]
                     date_label = self.world_clocks[tz]["date"]
                     
-                    tz_time = datetime.datetime.now(pytz.timezone(tz))
+                    tz_time = timezone_engine.now(tz)
                     time_label.setText(tz_time.strftime("%H:%M:%S"))
                     date_label.setText(tz_time.strftime("%d/%m/%Y"))
               # Check alarms
@@ -2658,7 +2657,7 @@ class TimeWidget(QWidget):
         """Update LCD with current time information."""
         try:
             # Get current Vietnam time
-            now = datetime.datetime.now(pytz.timezone(self.default_timezone))
+            now = timezone_engine.now(self.default_timezone)
             
             # Format as requested: Date: DD/MM/YYYY \n Time: HH:MM:SS
             date_str = now.strftime("%d/%m/%Y")
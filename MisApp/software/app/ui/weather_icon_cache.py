@@ -0,0 +1,157 @@
+"""
+MIS Smart Assistant - Weather Icon Cache
+Pre-scaled weather icon pixmaps with background downloads for icons that are not bundled.
+"""
+
+import os
+import threading
+import time
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from ..utils import config, logger
+from ..utils.http_client import http_client
+
+
+class WeatherIconCache(QObject):
+    """
+    In-memory cache of weather icons keyed by (icon_code, size, devicePixelRatio).
+
+    Source images are decoded once (bundled icons are preloaded on a worker thread at
+    startup) and every requested size is scaled once. A missing icon is fetched from
+    OpenWeather in the background: callers get a placeholder immediately and
+    icon_ready is emitted when the real image can be requested again.
+    """
+
+    icon_ready = pyqtSignal(str)
+
+    ICON_URL = "https://openweathermap.org/img/wn/{}@2x.png"
+    RETRY_AFTER = 300  # Seconds before a failed download is attempted again
+
+    def __init__(self, placeholder_factory, parent=None):
+        """
+        Initialize the icon cache.
+
+        Args:
+            placeholder_factory (callable): (icon_code, size) -> QPixmap drawn while the real icon loads
+            parent (QObject): Parent object
+        """
+        super().__init__(parent)
+        self.placeholder_factory = placeholder_factory
+        self.icons_dir = os.path.abspath(os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), '../../../resources/weather_icons'
+        ))
+
+        self.images = {}  # icon_code -> decoded QImage at source resolution
+        self.pixmaps = {}  # (icon_code, size, dpr) -> scaled QPixmap
+        self.placeholders = {}  # (icon_code, size) -> QPixmap
+        self.pending = set()
+        self.failed = {}  # icon_code -> time of the last failed download
+        self.lock = threading.Lock()
+
+    def preload(self):
+        """Decode every bundled icon on a worker thread."""
+        threading.Thread(target=self._preload_bundled, daemon=True).start()
+
+    def _preload_bundled(self):
+        try:
+            names = [name for name in os.listdir(self.icons_dir) if name.endswith('.png')]
+        except OSError:
+            return
+
+        for name in names:
+            image = QImage(os.path.join(self.icons_dir, name))
+            if not image.isNull():
+                with self.lock:
+                    self.images.setdefault(name[:-4], image)
+        logger.info(f"Preloaded {len(names)} weather icons")
+
+    def get_pixmap(self, icon_code, size, dpr=1.0):
+        """
+        Get a pixmap for a weather icon, scaled for the target size and pixel ratio.
+
+        Args:
+            icon_code (str): OpenWeather icon code (e.g. '10d')
+            size (int): Logical size in pixels
+            dpr (float): Device pixel ratio of the target widget
+
+        Returns:
+            QPixmap: The icon, or a placeholder while it is being downloaded
+        """
+        key = (icon_code, size, dpr)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            return pixmap
+
+        image = self._get_image(icon_code)
+        if image is None:
+            self._fetch_in_background(icon_code)
+            return self._get_placeholder(icon_code, size)
+
+        device_size = int(round(size * dpr))
+        pixmap = QPixmap.fromImage(
+            image.scaled(device_size, device_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        )
+        pixmap.setDevicePixelRatio(dpr)
+        self.pixmaps[key] = pixmap
+        return pixmap
+
+    def _get_image(self, icon_code):
+        with self.lock:
+            image = self.images.get(icon_code)
+        if image is not None:
+            return image
+
+        # Preload may still be running, or the icon was saved by an earlier download
+        icon_path = os.path.join(self.icons_dir, f"{icon_code}.png")
+        if os.path.exists(icon_path):
+            image = QImage(icon_path)
+            if not image.isNull():
+                with self.lock:
+                    self.images[icon_code] = image
+                return image
+        return None
+
+    def _get_placeholder(self, icon_code, size):
+        key = (icon_code, size)
+        pixmap = self.placeholders.get(key)
+        if pixmap is None:
+            pixmap = self.placeholder_factory(icon_code, size)
+            self.placeholders[key] = pixmap
+        return pixmap
+
+    def _fetch_in_background(self, icon_code):
+        with self.lock:
+            if icon_code in self.pending:
+                return
+            if time.time() - self.failed.get(icon_code, 0) < self.RETRY_AFTER:
+                return
+            self.pending.add(icon_code)
+        threading.Thread(target=self._download, args=(icon_code,), daemon=True).start()
+
+    def _download(self, icon_code):
+        """Download an icon, save it next to the bundled ones and announce it."""
+        try:
+            response = http_client.get(self.ICON_URL.format(icon_code), timeout=config.WEATHER_ICON_TIMEOUT, cache=True)
+            response.raise_for_status()
+
+            image = QImage()
+            if not image.loadFromData(response.content):
+                raise ValueError("invalid image data")
+
+            try:
+                os.makedirs(self.icons_dir, exist_ok=True)
+                image.save(os.path.join(self.icons_dir, f"{icon_code}.png"), "PNG")
+            except Exception as e:
+                logger.warning(f"Could not save weather icon {icon_code}: {str(e)}")
+
+            with self.lock:
+                self.images[icon_code] = image
+                self.pending.discard(icon_code)
+            self.icon_ready.emit(icon_code)
+        except Exception as e:
+            logger.error(f"Error downloading weather icon: {str(e)}")
+            with self.lock:
+                self.failed[icon_code] = time.time()
+                self.pending.discard(icon_code)
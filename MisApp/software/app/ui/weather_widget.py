@@ -1,11 +1,9 @@
 import sys
 import datetime
-import os
 import time
 from datetime import datetime
 import urllib.request
 from pathlib import Path
-import requests
 import io
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QFrame, QGridLayout, QSizePolicy, QComboBox,
@@ -15,6 +13,7 @@ from PyQt5.QtGui import QFont, QPixmap, QColor, QLinearGradient, QPainter, QPain
 
 from ..utils import config, logger
 from ..models.weather_service import WeatherService
+from .weather_icon_cache import WeatherIconCache
 
 class DailyForecastWidget(QFrame):
     """Widget for displaying a single day's forecast."""
@@ -100,19 +99,38 @@ class DailyForecastWidget(QFrame):
         
         pixmap = data['icon_pixmap']
         self.icon_label.setPixmap(pixmap)
+    
+    def clear_forecast(self):
+        """Show a placeholder while the forecast for this day is not known."""
+        self.day_label.setText("--")
+        self.date_label.setText("--/--")
+        self.icon_label.clear()
+        self.high_temp.setText("--")
+        self.low_temp.setText("--")
+        self.description.setText("Đang cập nhật...")
 
 class WeatherWidget(QWidget):
     """Widget for displaying weather information."""
     
     location_changed = pyqtSignal(str)
+    # Weather callbacks arrive on service threads; this hops them onto the UI thread
+    weather_data_ready = pyqtSignal(object)
     
     def __init__(self, weather_service):
         super().__init__()
         
         self.weather_service = weather_service
         
+        self.weather_data_ready.connect(self._on_weather_data_ready)
         self.weather_service.register_update_callback(self._on_weather_updated)
         
+        # Icons are decoded and scaled once; missing ones download in the background
+        self.icon_cache = WeatherIconCache(self._draw_placeholder_icon, self)
+        self.icon_cache.icon_ready.connect(self._on_icon_ready)
+        self.icon_cache.preload()
+        self.current_icon_code = None
+        self.forecast_icon_codes = {}
+        
         # Danh sách các tỉnh thành Việt Nam có mã vùng
         self.vietnam_provinces = [
             "An Giang,VN", "Bà Rịa - Vũng Tàu,VN", "Bắc Giang,VN", "Bắc Kạn,VN", 
@@ -142,7 +160,7 @@ class WeatherWidget(QWidget):
         
         self._setup_ui()
         
-        self.weather_service.update_weather()
+        # Render whatever is cached now; the service refreshes in the background
         self._update_display()
         
         self.update_timer = QTimer(self)
@@ -511,7 +529,6 @@ class WeatherWidget(QWidget):
         # Apply drop shadow effects to frames for better depth
         try:
             from PyQt5.QtWidgets import QGraphicsDropShadowEffect
-            from PyQt5.QtCore import QPoint
             
             # Add shadow to current weather frame
             shadow1 = QGraphicsDropShadowEffect()
@@ -528,13 +545,13 @@ class WeatherWidget(QWidget):
         # Update time
         self.time_label.setText(datetime.now().strftime("%H:%M - %d/%m/%Y"))
         
-        # Get weather data
-        weather_data = self.weather_service.get_current_weather()
-        forecast_data = self.weather_service.get_forecast()
+        # Get weather data (cached, never blocks the UI thread on the network)
+        weather_data = self.weather_service.get_current_weather(block=False)
+        forecast_data = self.weather_service.get_forecast(block=False)
         
         if not weather_data:
-            # Display error message if no data available
-            self.description_label.setText("Không thể lấy dữ liệu thời tiết")
+            # Display a loading message until the background fetch completes
+            self.description_label.setText("Đang cập nhật dữ liệu thời tiết...")
             return
         
         try:
@@ -577,9 +594,11 @@ class WeatherWidget(QWidget):
             icon_code = weather_data.get('weather', [{}])[0].get('icon', '01d')
             self._set_weather_icon(icon_code)
             
-            # Update forecast if available
+            # Update forecast if available; another city's forecast must not stay on screen
             if forecast_data and 'list' in forecast_data:
                 self._update_forecast(forecast_data)
+            else:
+                self._clear_forecast()
             
         except Exception as e:
             logger.error(f"Error updating weather display: {str(e)}")
@@ -637,6 +656,9 @@ class WeatherWidget(QWidget):
             # Sort dates
             dates = sorted(daily_forecasts.keys())
             
+            # Days the new forecast does not cover must not show the previous one
+            self._clear_forecast()
+            
             # Update forecast widgets (up to 10 days)
             for i, date in enumerate(dates[:10]):
                 day_data = daily_forecasts[date]
@@ -644,6 +666,7 @@ class WeatherWidget(QWidget):
                 # Add icon pixmap to data
                 icon_pixmap = self._get_weather_icon_pixmap(day_data['icon_code'], size=60)
                 day_data['icon_pixmap'] = icon_pixmap
+                self.forecast_icon_codes[i] = day_data['icon_code']
                 
                 # Update the widget
                 self.forecast_widgets[i].update_forecast(day_data, date)
@@ -651,6 +674,12 @@ class WeatherWidget(QWidget):
         except Exception as e:
             logger.error(f"Error updating forecast display: {str(e)}")
     
+    def _clear_forecast(self):
+        """Reset every forecast day to its placeholder."""
+        self.forecast_icon_codes.clear()
+        for widget in self.forecast_widgets:
+            widget.clear_forecast()
+    
     def _on_search_clicked(self):
         """Handle search button click."""
         location = self.location_search.text().strip()
@@ -668,21 +697,13 @@ class WeatherWidget(QWidget):
     
     def _search_location(self, location_name):
         """Search for a location and update weather."""
-        # Find the location in our list to get the country code
+        # Find the location in the shared gazetteer to get the country code
         location_query = location_name
         
-        # Search in Vietnamese provinces
-        for province in self.vietnam_provinces:
-            if province.split(',')[0].lower() == location_name.lower():
-                location_query = province
-                break
-                
-        # Search in international cities if not found
-        if location_query == location_name:
-            for city in self.international_cities:
-                if city.split(',')[0].lower() == location_name.lower():
-                    location_query = city
-                    break
+        # Diacritic-insensitive match on provinces, cities and aliases
+        entry = self.weather_service.gazetteer.resolve(location_name)
+        if entry:
+            location_query = f"{entry['name']},{entry['country']}"
         
         # Update location and request weather update
         self.current_location = location_query
@@ -696,52 +717,35 @@ class WeatherWidget(QWidget):
     
     def _set_weather_icon(self, icon_code):
         """Set the weather icon based on the icon code."""
+        self.current_icon_code = icon_code
         pixmap = self._get_weather_icon_pixmap(icon_code, size=120)
         self.weather_icon.setPixmap(pixmap)
     
     def _get_weather_icon_pixmap(self, icon_code, size=100):
-        """Get the weather icon pixmap from icon code."""
-        # Try to load icon from resources
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        resources_dir = os.path.abspath(os.path.join(current_dir, '../../../resources/weather_icons'))
-        icon_path = os.path.join(resources_dir, f"{icon_code}.png")
+        """Get the weather icon pixmap from icon code (a placeholder until it is available)."""
+        return self.icon_cache.get_pixmap(icon_code, size, self.devicePixelRatioF())
+    
+    def _on_icon_ready(self, icon_code):
+        """Swap the real icon in wherever its placeholder is shown."""
+        if icon_code == self.current_icon_code:
+            self._set_weather_icon(icon_code)
         
-        # Create a pixmap with the specified size
+        for i, code in self.forecast_icon_codes.items():
+            if code == icon_code:
+                self.forecast_widgets[i].icon_label.setPixmap(self._get_weather_icon_pixmap(icon_code, size=60))
+    
+    def _draw_placeholder_icon(self, icon_code, size):
+        """Draw a simple icon to show while the real one is loading."""
         pixmap = QPixmap(size, size)
         pixmap.fill(Qt.transparent)
         
-        if os.path.exists(icon_path):
-            # Load icon from file
-            pixmap = QPixmap(icon_path).scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if 'n' in icon_code:  # Night icon
+            self._draw_night_icon(pixmap, size)
+        elif 'd' in icon_code:  # Day icon
+            self._draw_day_icon(pixmap, icon_code, size)
         else:
-            # If icon file doesn't exist, try to download it from OpenWeatherMap
-            icon_url = f"https://openweathermap.org/img/wn/{icon_code}@2x.png"
-            try:
-                response = requests.get(icon_url, stream=True)
-                response.raise_for_status()
-                
-                # Create pixmap from the downloaded image
-                img_data = response.content
-                pixmap.loadFromData(img_data)
-                pixmap = pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                
-                # Create the directory if it doesn't exist
-                os.makedirs(resources_dir, exist_ok=True)
-                
-                # Save for future use
-                pixmap.save(icon_path, "PNG")
-                
-            except Exception as e:
-                logger.error(f"Error downloading weather icon: {str(e)}")
-                
-                # Create a fallback icon
-                if 'n' in icon_code:  # Night icon
-                    self._draw_night_icon(pixmap, size)
-                elif 'd' in icon_code:  # Day icon
-                    self._draw_day_icon(pixmap, icon_code, size)
-                else:
-                    # Generic icon
-                    self._draw_day_icon(pixmap, "01d", size)
+            # Generic icon
+            self._draw_day_icon(pixmap, "01d", size)
         
         return pixmap
     
@@ -884,7 +888,11 @@ class WeatherWidget(QWidget):
             return "cực kỳ cao"
     
     def _on_weather_updated(self, data):
-        """Callback function when weather data is updated."""
+        """Callback function when weather data is updated (may run on a worker thread)."""
+        self.weather_data_ready.emit(data)
+    
+    def _on_weather_data_ready(self, data):
+        """Refresh the display on the UI thread after a weather update."""
         self._update_display()
     
     def paintEvent(self, event):
@@ -8,6 +8,31 @@ NEWSDATA_API_KEY = "pub_bff87ddae8a747b996367058e59ffe37"  # https://newsdata.io
 # Media Processing Settings
 FFMPEG_PATH = None  
 MEDIA_CACHE_DIR = None  
+ENABLE_STREAMING_PLAYBACK = True  # Start YouTube songs from a growing buffer instead of after the full download
+STREAM_PREBUFFER_SECONDS = 3  # Seconds of decoded audio buffered before a streamed song starts
+STREAM_BUFFER_AHEAD_SECONDS = 10  # Decoded audio held ahead of playback; decoding pauses when it is full
+STREAM_START_TIMEOUT = 20  # Seconds to wait for the prebuffer before falling back to a full download
+ENABLE_TRACK_PREFETCH = True  # Prepare the next playlist track while the current one plays
+PLAYLIST_CROSSFADE_SECONDS = 0  # Fade between playlist tracks; 0 switches gaplessly
+ENABLE_TRANSCODE_CACHE = True  # Decode downloaded songs once to an Ogg/WAV copy at the mixer rate
+ENABLE_WAVEFORM_ANALYSIS = True  # Drive the visualizer from a precomputed envelope of each track (needs NumPy)
+SEEK_INTERVAL_MS = 40  # Minimum time between seeks while the position slider is dragged
+DOWNLOAD_HEDGE_DELAY = 8  # Seconds before the next download method starts alongside a slow one
+DOWNLOAD_MAX_CONCURRENT_BACKENDS = 2  # Download methods racing at once for one song
+DOWNLOAD_TIMEOUT = 300  # Seconds before a song's download race is given up
+DOWNLOAD_CHUNK_SIZE = 1048576  # Bytes per HTTP Range request in direct downloads
+DOWNLOAD_CHUNK_WORKERS = 4  # Range requests fetched in parallel
+YOUTUBE_SEARCH_CACHE_TTL = 24  # Hours a YouTube search result is reused for the same query
+YOUTUBE_SEARCH_CACHE_MAX_ENTRIES = 200  # Queries kept in resources/cache/youtube_search.json
+YOUTUBE_TITLE_FETCH_WORKERS = 5  # Video titles looked up in parallel when the results page lacks them
+YOUTUBE_TITLE_FETCH_TIMEOUT = 3  # Seconds a search waits for titles before returning partial results
+MEDIA_LIBRARY_FOLDERS = []  # Music folders indexed alongside resources/media_cache
+MEDIA_LIBRARY_SCAN_WORKERS = 2  # Processes reading tags and loudness during a library rescan
+MEDIA_LIBRARY_MEASURE_LOUDNESS = True  # Measure EBU R128 loudness with FFmpeg when indexing
+ARTWORK_CACHE_MAX_MB = 100  # Size limit of resources/media_cache/artwork (covers and thumbnails)
+ARTWORK_FETCH_TIMEOUT = 5  # Seconds to download a remote cover such as a YouTube thumbnail
+MEDIA_CACHE_MAX_MB = 2048  # Size budget of downloaded songs in resources/media_cache, with sidecars and transcoded copies
+MEDIA_CACHE_PLAY_WEIGHT_DAYS = 7  # Eviction treats each doubling of a song's play count like this many days of recency
 
 # Voice Settings
 ENABLE_TTS_CACHE = True  
@@ -28,14 +53,58 @@ DEFAULT_LANGUAGE = "vi"  # Vietnamese
 ENABLE_VOICE_RESPONSE = True
 ENABLE_TEXT_LOG = True
 LOG_FILE_PATH = "mis_assistant_log.txt"
+PROFILE_STARTUP_IMPORTS = False  # Log per-module import times at startup (also --profile-imports or MIS_PROFILE_IMPORTS=1)
+PROFILE_IMPORTS_TOP = 25  # Slowest modules listed in the startup import profile
+STARTUP_IMPORT_BUDGET_MS = 1500  # Cold-start import budget enforced by benchmarks/startup_imports.py
+GEMINI_INIT_TIMEOUT = 30  # Seconds a query waits for background Gemini model selection
+
+# Conversation History Settings
+ENABLE_CONVERSATION_HISTORY = True  # Keep queries and answers in logs/conversations.db
+CONVERSATION_PAGE_SIZE = 30  # Messages loaded per page when scrolling up through history
+CONVERSATION_FLUSH_INTERVAL = 2  # Seconds queued exchanges wait to be written together
+CONVERSATION_BATCH_SIZE = 50  # Exchanges written per transaction at most
 
 # Server Settings 
 HOST = "0.0.0.0"  
 PORT = 5000
 
+# HTTP Client Settings
+HTTP_TIMEOUT = 10  # Seconds per request unless the caller overrides it
+HTTP_CONNECT_TIMEOUT = 5  
+HTTP_MAX_CONNECTIONS = 50  
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20  
+HTTP_KEEPALIVE_EXPIRY = 30  # Seconds an idle pooled connection is kept open
+HTTP_MAX_RETRIES = 2  # Extra attempts for GET/HEAD on transport errors, 429 and 502-504
+HTTP_BACKOFF_BASE = 0.5  # Seconds; retry delays are drawn from [0, base * 2^attempt]
+HTTP_BACKOFF_MAX = 8  
+HTTP_CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures before a host's circuit opens
+HTTP_CIRCUIT_COOLDOWN = 30  # Seconds before a single probe request is let through
+HTTP_CACHE_MAX_ENTRIES = 128  
+HTTP_METRICS_WINDOW = 200  # Recent requests per host used for latency percentiles
+
 # Weather Settings
 WEATHER_LOCATION = "Da Nang,VN"  # Default location for weather
 WEATHER_UPDATE_INTERVAL = 30 
+WEATHER_REQUEST_TIMEOUT = 10  
+WEATHER_ICON_TIMEOUT = 5  # Background icon downloads from openweathermap.org
+WEATHER_CACHE_MAX_ENTRIES = 16  # Locations kept in the per-location weather cache
+WEATHER_CACHE_MAX_STALE = 180  # Minutes a stale entry may be served while it refreshes
+ENABLE_WEATHER_PREFETCH = True  # Keep every picker location warm with grouped API calls
+WEATHER_PREFETCH_INTERVAL = 60  # Minutes between prefetch cycles
+WEATHER_PREFETCH_CALLS_PER_MINUTE = 30  # Stays well under the free OpenWeather quota
+
+# Time Settings
+TIMEZONE_API_FALLBACK = True  # Query TimezoneDB only for locations missing from the local gazetteer
+TIMEZONE_API_TIMEOUT = 5  
+
+# News Settings
+NEWS_CACHE_DURATION = 30  # Minutes before stored articles of a category expire
+NEWS_REFRESH_LEAD = 5  # Minutes before expiry when the background refresh starts
+NEWS_FETCH_SIZE = 10  # Articles fetched per category (NewsData.io free plan maximum)
+NEWS_FETCH_WORKERS = 4  # Categories fetched concurrently
+NEWS_ACTIVE_MINUTES = 120  # Only categories asked for within this window are refreshed in the background
+NEWS_BACKOFF_BASE = 60  # Seconds before a category is fetched again after a failure; doubles per failure
+NEWS_BACKOFF_MAX = 3600  # Longest wait between retries of a failing category
 
 # Audio Settings
 AUDIO_DEVICE_INDEX = None  
@@ -47,6 +116,7 @@ UI_THEME = "dark"  # 'light' or 'dark'
 UI_FONT_SIZE = 10
 UI_WIDTH = 1024
 UI_HEIGHT = 900
+SERVICE_WARMUP_DELAY = 2000  # Milliseconds after the window shows before idle services start
 
 # Chat UI Colors
 CHAT_USER_BUBBLE_COLOR = "#0D6EFD" 
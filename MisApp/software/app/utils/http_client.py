@@ -0,0 +1,394 @@
+"""
+MIS Smart Assistant - Shared HTTP Client
+One pooled httpx client for every network service, with retries, a per-host
+circuit breaker, Cache-Control/ETag handling and per-host latency metrics.
+"""
+
+import contextlib
+import email.utils
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import urlencode, urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from . import config, logger
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without touching the network while a host's circuit is open."""
+
+
+class HostStats:
+    """Request counters, recent latencies and circuit breaker state for one host."""
+
+    def __init__(self, window):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.latencies = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def percentile(self, fraction):
+        """Latency percentile over the recent window, in milliseconds."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 1)
+
+
+class HttpClient:
+    """
+    Thread-safe wrapper around a single httpx.Client.
+
+    Connections are kept alive per host (HTTP/2 when the h2 package is installed).
+    Idempotent requests are retried on transport errors and 429/5xx gateway
+    responses with full-jitter exponential backoff. After repeated failures a
+    host's circuit opens and calls fail fast until the cooldown has passed.
+    GET responses of callers that opt in are kept in memory when cacheable and
+    revalidated with If-None-Match / If-Modified-Since.
+    """
+
+    RETRY_STATUSES = (429, 502, 503, 504)
+    RETRY_METHODS = ("GET", "HEAD")
+
+    def __init__(self):
+        self.max_retries = config.HTTP_MAX_RETRIES
+        self.backoff_base = config.HTTP_BACKOFF_BASE
+        self.backoff_max = config.HTTP_BACKOFF_MAX
+        self.failure_threshold = config.HTTP_CIRCUIT_FAILURE_THRESHOLD
+        self.circuit_cooldown = config.HTTP_CIRCUIT_COOLDOWN
+        self.cache_max_entries = config.HTTP_CACHE_MAX_ENTRIES
+
+        self.client = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+
+        self.hosts = {}
+        self.hosts_lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, url, params=None, headers=None, timeout=None, cache=False):
+        """
+        Send a GET request.
+
+        Args:
+            url (str): Request URL
+            params (dict): Query parameters
+            headers (dict): Extra request headers
+            timeout (float): Overall timeout in seconds (defaults to HTTP_TIMEOUT)
+            cache (bool): Whether to use the HTTP response cache (for API responses and static
+                resources; off by default so large one-off pages are not kept in memory)
+
+        Returns:
+            httpx.Response: The response (served from cache when still fresh)
+
+        Raises:
+            httpx.HTTPError: If the request ultimately fails
+        """
+        return self.request("GET", url, params=params, headers=headers, timeout=timeout, cache=cache)
+
+    def head(self, url, params=None, headers=None, timeout=None):
+        """Send a HEAD request (see get)."""
+        return self.request("HEAD", url, params=params, headers=headers, timeout=timeout, cache=False)
+
+    def request(self, method, url, params=None, headers=None, timeout=None, cache=False):
+        """
+        Send a request with retries, circuit breaking and caching.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            params (dict): Query parameters
+            headers (dict): Extra request headers
+            timeout (float): Overall timeout in seconds (defaults to HTTP_TIMEOUT)
+            cache (bool): Whether to use the HTTP response cache (GET only)
+
+        Returns:
+            httpx.Response: The response
+
+        Raises:
+            httpx.HTTPError: If the request ultimately fails
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        stats = self._get_stats(host)
+        use_cache = cache and method == "GET"
+        cache_key = self._cache_key(url, params) if use_cache else None
+        headers = dict(headers or {})
+
+        cached = self._cache_lookup(cache_key) if use_cache else None
+        if cached is not None:
+            if cached["expires_at"] > time.monotonic():
+                with self.hosts_lock:
+                    stats.cache_hits += 1
+                return self._build_response(method, url, cached)
+            # Stale: ask the server whether our copy is still valid
+            if cached["etag"]:
+                headers.setdefault("If-None-Match", cached["etag"])
+            if cached["last_modified"]:
+                headers.setdefault("If-Modified-Since", cached["last_modified"])
+
+        kwargs = {"params": params, "headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        attempts = self.max_retries + 1 if method in self.RETRY_METHODS else 1
+        for attempt in range(attempts):
+            self._check_circuit(host, stats)
+            started = time.monotonic()
+            try:
+                response = self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self._record(host, stats, started, failed=True)
+                if attempt + 1 >= attempts or stats.opened_at is not None:
+                    raise
+                self._backoff(host, stats, attempt, None, e)
+                continue
+
+            failed = response.status_code >= 500 or response.status_code == 429
+            self._record(host, stats, started, failed=failed)
+            if response.status_code in self.RETRY_STATUSES and attempt + 1 < attempts:
+                response.close()
+                self._backoff(host, stats, attempt, response, None)
+                continue
+            break
+
+        if use_cache:
+            if response.status_code == 304 and cached is not None:
+                refreshed = self._cache_store(cache_key, response, cached["content"], cached["status_code"], cached)
+                return self._build_response(method, url, refreshed or cached)
+            if response.status_code == 200:
+                self._cache_store(cache_key, response, response.content, 200)
+        return response
+
+    @contextlib.contextmanager
+    def stream(self, method, url, params=None, headers=None, timeout=None):
+        """
+        Open a streamed response for large downloads.
+
+        Streams are not retried or cached; they share the connection pool,
+        circuit breaker and metrics with regular requests.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            params (dict): Query parameters
+            headers (dict): Extra request headers
+            timeout (float): Overall timeout in seconds (defaults to HTTP_TIMEOUT)
+
+        Yields:
+            httpx.Response: Response whose body can be read with iter_bytes()
+        """
+        host = urlsplit(url).netloc
+        stats = self._get_stats(host)
+        self._check_circuit(host, stats)
+
+        kwargs = {"params": params, "headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        started = time.monotonic()
+        try:
+            with self.client.stream(method.upper(), url, **kwargs) as response:
+                self._record(host, stats, started, failed=response.status_code >= 500)
+                yield response
+        except httpx.TransportError:
+            self._record(host, stats, started, failed=True)
+            raise
+
+    def get_host_metrics(self):
+        """
+        Get request metrics for every host contacted so far.
+
+        Returns:
+            dict: host -> {requests, errors, retries, cache_hits, p50_ms, p95_ms, circuit}
+        """
+        with self.hosts_lock:
+            return {
+                host: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "cache_hits": stats.cache_hits,
+                    "p50_ms": stats.percentile(0.5),
+                    "p95_ms": stats.percentile(0.95),
+                    "circuit": self._circuit_state(stats),
+                }
+                for host, stats in self.hosts.items()
+            }
+
+    def log_metrics(self):
+        """Write a one-line summary per host to the log."""
+        for host, metrics in self.get_host_metrics().items():
+            logger.info(
+                f"HTTP {host}: {metrics['requests']} requests, {metrics['errors']} errors, "
+                f"{metrics['retries']} retries, {metrics['cache_hits']} cache hits, "
+                f"p50={metrics['p50_ms']}ms p95={metrics['p95_ms']}ms, circuit {metrics['circuit']}"
+            )
+
+    def close(self):
+        """Close all pooled connections."""
+        self.client.close()
+
+    # ------------------------------------------------------------------
+    # Circuit breaker and metrics
+    # ------------------------------------------------------------------
+
+    def _get_stats(self, host):
+        with self.hosts_lock:
+            stats = self.hosts.get(host)
+            if stats is None:
+                stats = HostStats(config.HTTP_METRICS_WINDOW)
+                self.hosts[host] = stats
+            return stats
+
+    def _circuit_state(self, stats):
+        if stats.opened_at is None:
+            return "closed"
+        if stats.probing or time.monotonic() - stats.opened_at >= self.circuit_cooldown:
+            return "half-open"
+        return "open"
+
+    def _check_circuit(self, host, stats):
+        """Fail fast while the circuit is open; let a single probe through once it cools down."""
+        with self.hosts_lock:
+            if stats.opened_at is None:
+                return
+            if time.monotonic() - stats.opened_at < self.circuit_cooldown or stats.probing:
+                raise CircuitOpenError(f"Circuit open for {host}, skipping request")
+            stats.probing = True
+
+    def _record(self, host, stats, started, failed):
+        elapsed = time.monotonic() - started
+        with self.hosts_lock:
+            stats.requests += 1
+            stats.latencies.append(elapsed)
+            if failed:
+                stats.errors += 1
+                stats.consecutive_failures += 1
+                if stats.probing or stats.consecutive_failures >= self.failure_threshold:
+                    if stats.opened_at is None or stats.probing:
+                        logger.warning(f"HTTP circuit opened for {host} after {stats.consecutive_failures} failures")
+                    stats.opened_at = time.monotonic()
+                stats.probing = False
+            else:
+                if stats.opened_at is not None:
+                    logger.info(f"HTTP circuit closed for {host}")
+                stats.consecutive_failures = 0
+                stats.opened_at = None
+                stats.probing = False
+
+    def _backoff(self, host, stats, attempt, response, error):
+        """Sleep before the next attempt: Retry-After if the server sent one, else full jitter."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = min(self.backoff_max, float(retry_after))
+        reason = f"HTTP {response.status_code}" if response is not None else type(error).__name__
+        logger.info(f"Retrying {host} in {delay:.2f}s after {reason} (attempt {attempt + 2})")
+        with self.hosts_lock:
+            stats.retries += 1
+        time.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # Response cache
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cache_key(url, params):
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()), doseq=True)}"
+
+    def _cache_lookup(self, key):
+        with self.cache_lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+            return entry
+
+    def _cache_store(self, key, response, content, status_code, previous=None):
+        """Store a response if its Cache-Control/validators allow it; return the entry."""
+        directives = {}
+        for part in response.headers.get("Cache-Control", "").split(","):
+            name, _, value = part.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"')
+
+        # A 304 may omit the validators; keep the ones from the stored copy
+        etag = response.headers.get("ETag") or (previous or {}).get("etag")
+        last_modified = response.headers.get("Last-Modified") or (previous or {}).get("last_modified")
+        if "no-store" in directives:
+            with self.cache_lock:
+                self.cache.pop(key, None)
+            return None
+
+        max_age = 0
+        if "no-cache" not in directives:
+            if directives.get("max-age", "").isdigit():
+                max_age = int(directives["max-age"])
+            elif "Expires" in response.headers:
+                try:
+                    expires = email.utils.parsedate_to_datetime(response.headers["Expires"]).timestamp()
+                    max_age = max(0, int(expires - time.time()))
+                except (TypeError, ValueError):
+                    max_age = 0
+
+        if max_age <= 0 and not etag and not last_modified:
+            return None
+
+        entry = {
+            "status_code": status_code,
+            "headers": previous["headers"] if previous else dict(response.headers),
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires_at": time.monotonic() + max_age,
+        }
+        with self.cache_lock:
+            self.cache[key] = entry
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_max_entries:
+                self.cache.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _build_response(method, url, entry):
+        headers = {name: value for name, value in entry["headers"].items()
+                   if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+        return httpx.Response(
+            entry["status_code"],
+            headers=headers,
+            content=entry["content"],
+            request=httpx.Request(method, url),
+        )
+
+
+# Create a global instance
+http_client = HttpClient()
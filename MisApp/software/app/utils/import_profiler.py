@@ -0,0 +1,125 @@
+"""
+MIS Smart Assistant - Import Profiler
+Startup profiling mode that records how long every module takes to import,
+in the spirit of `python -X importtime`, and reports the slowest ones in the log.
+
+Only uses the standard library so it can be installed before anything else is imported.
+"""
+
+import sys
+import threading
+import time
+
+
+class _TimedLoader:
+    """Wraps a module loader and times its create_module and exec_module."""
+
+    def __init__(self, profiler, loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        # Extension modules (cv2, numpy's core) do their work here
+        return self._profiler._timed(spec.name, self._loader.create_module, spec)
+
+    def exec_module(self, module):
+        self._profiler._timed(module.__name__, self._loader.exec_module, module)
+
+
+class ImportProfiler:
+    """
+    Meta path finder that times every module imported while it is installed.
+
+    For each module it records the cumulative time (including imports it triggers)
+    and the self time (excluding them), like the two columns of -X importtime.
+    """
+
+    def __init__(self):
+        self.timings = {}  # module name -> [self seconds, cumulative seconds]
+        self.local = threading.local()
+
+    def install(self):
+        """Start recording imports."""
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        """Stop recording imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path=None, target=None):
+        # Ask the other finders, then time whatever loader they pick
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(self, spec.loader)
+                return spec
+        return None
+
+    def _timed(self, name, func, arg):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        stack.append(0.0)  # time spent in nested imports
+        start_time = time.perf_counter()
+        try:
+            return func(arg)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            timing = self.timings.setdefault(name, [0.0, 0.0])
+            timing[0] += elapsed - nested
+            timing[1] += elapsed
+
+    def total(self):
+        """
+        Total time spent loading modules while the profiler was installed.
+
+        Returns:
+            float: Seconds
+        """
+        return sum(self_time for self_time, _ in self.timings.values())
+
+    def slowest(self, limit=20, cumulative=True):
+        """
+        Get the slowest imports.
+
+        Args:
+            limit (int): Number of modules
+            cumulative (bool): Rank by cumulative time instead of self time
+
+        Returns:
+            list: (module name, self seconds, cumulative seconds), slowest first
+        """
+        column = 1 if cumulative else 0
+        ranked = sorted(self.timings.items(), key=lambda item: item[1][column], reverse=True)
+        return [(name, self_time, cumulative_time) for name, (self_time, cumulative_time) in ranked[:limit]]
+
+    def report(self, limit=20):
+        """
+        Build a text report of the slowest imports.
+
+        Args:
+            limit (int): Number of modules listed
+
+        Returns:
+            str: Report in the -X importtime column layout (microseconds)
+        """
+        lines = [f"Imported {len(self.timings)} modules in {self.total() * 1000:.0f} ms",
+                 "    self [us] |  cumulative | module"]
+        for name, self_time, cumulative_time in self.slowest(limit):
+            lines.append(f"{self_time * 1e6:>13.0f} | {cumulative_time * 1e6:>11.0f} | {name}")
+        return "\n".join(lines)
+
+
+# Create a global instance
+import_profiler = ImportProfiler()
@@ -0,0 +1,76 @@
+"""
+MIS Smart Assistant - Lazy Imports
+Optional heavy dependencies (OpenCV, yt-dlp, mutagen, ...) imported on first use
+instead of when the module that needs them is imported.
+"""
+
+import importlib
+import threading
+
+from . import logger
+
+
+class LazyModule:
+    """
+    Stand-in for an optional module, imported the first time it is used.
+
+    Attribute access imports the module and forwards to it, so call sites read the
+    same as with a plain import. `available` replaces the usual X_AVAILABLE flag.
+    """
+
+    def __init__(self, name, check=None, setup=None):
+        """
+        Initialize the stand-in.
+
+        Args:
+            name (str): Module to import, e.g. 'cv2' or 'mutagen.id3'
+            check (callable): Called with the module after import; raising marks it unavailable
+            setup (callable): Called with the module once after a successful import
+        """
+        self._name = name
+        self._check = check
+        self._setup = setup
+        self._module = None
+        self._error = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Import the module if that has not been tried yet.
+
+        Returns:
+            module: The module, or None if it is not available
+        """
+        if self._module is not None or self._error is not None:
+            return self._module
+        with self._lock:
+            if self._module is None and self._error is None:
+                try:
+                    module = importlib.import_module(self._name)
+                    if self._check:
+                        self._check(module)
+                    if self._setup:
+                        self._setup(module)
+                    self._module = module
+                except ImportError as e:
+                    self._error = e
+                    logger.warning(f"Optional module {self._name} not available: {e}")
+                except Exception as e:
+                    self._error = e
+                    logger.warning(f"Optional module {self._name} is installed but not working: {e}")
+        return self._module
+
+    @property
+    def available(self):
+        """bool: Whether the module imported (and passed its check)."""
+        return self.load() is not None
+
+    def __getattr__(self, attr):
+        module = self.load()
+        if module is None:
+            raise ImportError(f"{self._name} is not available: {self._error}")
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "failed" if self._error is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
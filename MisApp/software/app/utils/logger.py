@@ -64,13 +64,3 @@ def critical(message):
         logger.critical(message)
     except UnicodeEncodeError:
         logger.critical("Tin nhắn ghi nhật ký với các ký tự unicode (không thể hiển thị trong bảng điều khiển)")
-
-def log_conversation(query, response):
-    if config.ENABLE_TEXT_LOG:
-        today = datetime.datetime.now().strftime('%Y-%m-%d')
-        conversation_log_file = os.path.join(log_dir, f'conversation_{today}.txt')
-        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        with open(conversation_log_file, 'a', encoding='utf-8') as f:
-            f.write(f"[{timestamp}] User: {query}\n")
-            f.write(f"[{timestamp}] Assistant: {response}\n\n")
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+MIS Smart Assistant - Response rendering micro-benchmark
+
+Compares the previous multi-pass formatting chain (GeminiClient._format_response,
+then TextFormatter.format_message_text and the poem check in the chat bubble)
+with the single-pass response renderer. Cold runs render a distinct variant of
+the response on every call, so neither the renderer's memo nor the regex cache
+of the old chain is hit for the text; cached runs repeat the same response.
+
+Run from the MisApp directory:
+    python software/benchmarks/response_rendering.py [--repeat N]
+"""
+
+import argparse
+import html
+import itertools
+import os
+import re
+import sys
+import time
+import timeit
+
+project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from software.app.models.response_renderer import render_response
+
+
+# Responses captured from the assistant (Gemini output before formatting)
+CORPUS = {
+    "short_answer": "Hà Nội là thủ đô của **Việt Nam**, nằm ở đồng bằng sông Hồng.",
+    "bullet_list": (
+        "Dưới đây là một số mẹo để ngủ ngon hơn:\n\n"
+        "* **Giữ giờ giấc cố định:** Đi ngủ và thức dậy vào cùng một giờ mỗi ngày.\n"
+        "* **Hạn chế màn hình:** Tránh dùng điện thoại *ít nhất 30 phút* trước khi ngủ.\n"
+        "* **Phòng ngủ thoáng mát:** Nhiệt độ khoảng 24-26°C là lý tưởng.\n"
+        "* **Tránh caffeine:** Không uống cà phê sau 2 giờ chiều.\n\n"
+        "Chúc bạn có một giấc ngủ ngon! 😴"
+    ),
+    "poem": (
+        "Đây là một bài thơ về mùa thu Hà Nội:\n\n"
+        "> Heo may về trên phố cũ\n"
+        "> Lá vàng rơi khẽ bên thềm\n"
+        "> Hồ Gươm soi bóng mây trôi\n"
+        "> Gió thu se lạnh, chiều êm\n>\n"
+        "> Hàng sấu già thay áo mới\n"
+        "> Cốm xanh gói lá sen thơm\n"
+        "> Ai về qua phố Hàng Ngang\n"
+        "> Nhớ mùa thu cũ, nhớ em...\n\n"
+        "Hy vọng bạn thích bài thơ này! 🍂"
+    ),
+    "links": (
+        "Bạn có thể tham khảo các nguồn sau:\n"
+        "1. Tài liệu Python: https://docs.python.org/3/tutorial/\n"
+        "2. Khóa học miễn phí: https://www.freecodecamp.org/learn\n"
+        "3. Hỏi đáp: https://stackoverflow.com/questions/tagged/python\n\n"
+        "__Lưu ý:__ hãy thực hành ~~mỗi tuần~~ mỗi ngày."
+    ),
+    "long_explanation": "\n\n".join(
+        f"### Phần {i}\n"
+        f"**Trí tuệ nhân tạo** (AI) là lĩnh vực nghiên cứu giúp máy tính *học hỏi* và ra quyết định. "
+        f"Các ứng dụng phổ biến gồm nhận dạng giọng nói, dịch máy và xe tự lái. "
+        f"Ví dụ: `model.fit(x, y)` huấn luyện một mô hình với dữ liệu x và y.\n"
+        f"* Học có giám sát\n* Học không giám sát\n* Học tăng cường"
+        for i in range(1, 9)
+    ),
+}
+
+
+def legacy_format_response(text):
+    """GeminiClient._format_response before the single-pass renderer."""
+    text = re.sub(r'(?m)^\*\s+', '• ', text)
+    text = re.sub(r'(?<!\*)\*\*(?!\*)(.+?)(?<!\*)\*\*(?!\*)', r'\1', text)
+    text = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'\1', text)
+    text = text.replace('__', '')
+    text = text.replace('~~', '')
+    return text
+
+
+def legacy_format_message_text(text):
+    """TextFormatter.format_message_text (non-news branch) before the renderer."""
+    url_pattern = r'(https?://[^\s]+)'
+    text_with_links = re.sub(url_pattern, r'<a href="\1" target="_blank" rel="noopener">\1</a>', text)
+    clean_text = html.escape(text)
+    lines = clean_text.split('\n')
+    for i, line in enumerate(lines):
+        if line.strip().startswith('&gt;'):
+            lines[i] = f'<div style="padding: 12px 16px; border-left: 4px solid #667eea;">{line[4:]}</div>'
+    formatted_text = '<br>'.join(lines)
+    if text_with_links != text:
+        pattern = r'&lt;a href=&quot;(.*?)&quot; target=&quot;_blank&quot; rel=&quot;noopener&quot;&gt;(.*?)&lt;/a&gt;'
+        replacer = r'<a href="\1" target="_blank" rel="noopener" style="color: #667eea;">\2</a>'
+        formatted_text = re.sub(pattern, replacer, html.escape(text_with_links).replace('\n', '<br>'))
+    return formatted_text
+
+
+def legacy_format_poem_text(poem_text):
+    """TextFormatter.format_poem_text before the renderer."""
+    lines = poem_text.strip().split('\n')
+    clean_lines = []
+    for line in lines:
+        if line.strip().startswith('>'):
+            clean_lines.append(line.strip()[1:].strip())
+        else:
+            clean_lines.append(line.strip())
+    formatted = '<div style="font-family: Georgia, serif;">'
+    for line in clean_lines:
+        if line:
+            formatted += f'<p style="margin: 8px 0;">{html.escape(line)}</p>'
+        else:
+            formatted += '<div style="height: 16px;"></div>'
+    return formatted + '</div>'
+
+
+def legacy_pipeline(raw):
+    """Gemini response -> stored text -> chat bubble HTML, the old way."""
+    text = legacy_format_response(raw)
+    formatted = legacy_format_message_text(text)
+    if '>' in text and '\n' in text:
+        if re.findall(r'(\n|^)\s*>.*(\n\s*>.*)*', text):
+            formatted = legacy_format_poem_text(text)
+    return formatted
+
+
+def renderer_pipeline(raw):
+    """Gemini response -> stored text -> chat bubble HTML, one scan each."""
+    plain = render_response(raw).plain
+    return render_response(plain).html
+
+
+_variant_ids = itertools.count()
+
+
+def cold_seconds(pipeline, raw, repeat):
+    """Best per-call time of a pipeline over `repeat` never-seen variants of a response."""
+    best = None
+    for _ in range(3):
+        # A numbered last line keeps the layout and markup of the response
+        variants = [f"{raw}\n{next(_variant_ids)}" for _ in range(repeat)]
+        start = time.perf_counter()
+        for variant in variants:
+            pipeline(variant)
+        elapsed = (time.perf_counter() - start) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def warm_seconds(pipeline, raw, repeat):
+    """Best per-call time of a pipeline rendering the same response again."""
+    pipeline(raw)
+    return min(timeit.repeat(lambda: pipeline(raw), number=repeat, repeat=3)) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help='iterations per measurement')
+    args = parser.parse_args()
+
+    print(f"{'response':<18}{'chars':>7}{'legacy µs':>12}{'cold µs':>10}{'cached µs':>11}")
+    totals = [0.0, 0.0, 0.0]
+    for name, raw in CORPUS.items():
+        timings = [
+            cold_seconds(legacy_pipeline, raw, args.repeat) * 1e6,
+            cold_seconds(renderer_pipeline, raw, args.repeat) * 1e6,
+            warm_seconds(renderer_pipeline, raw, args.repeat) * 1e6,
+        ]
+        for i, value in enumerate(timings):
+            totals[i] += value
+        print(f"{name:<18}{len(raw):>7}{timings[0]:>12.1f}{timings[1]:>10.1f}{timings[2]:>11.2f}")
+    print(f"{'total':<18}{'':>7}{totals[0]:>12.1f}{totals[1]:>10.1f}{totals[2]:>11.2f}")
+    print("\n(legacy and cold = a different response on every call; cached = the same response again)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+MIS Smart Assistant - Cold-start import budget check
+
+Imports the main window in a fresh interpreter under `python -X importtime`,
+prints the slowest modules and fails if the import time exceeds the budget
+(config.STARTUP_IMPORT_BUDGET_MS) or if a dependency that should load on first
+use (OpenCV, yt-dlp, the Gemini SDK, ...) is imported at startup.
+
+Run from the MisApp directory:
+    python software/benchmarks/startup_imports.py [--repeat N] [--budget MS]
+
+Exits with status 1 when the budget is exceeded, so it can gate CI.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from software.app.utils import config
+
+
+STARTUP_MODULE = "software.app.ui.main_window"
+
+# Heavy dependencies that must only be imported on first use
+DEFERRED_MODULES = (
+    "cv2",
+    "pyzbar",
+    "yt_dlp",
+    "pytube",
+    "pafy",
+    "googleapiclient",
+    "mutagen",
+    "google.generativeai",
+    "gtts",
+)
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def measure():
+    """
+    Import the startup module in a fresh interpreter.
+
+    Returns:
+        list: (module name, self µs, cumulative µs, depth) in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {STARTUP_MODULE}"],
+        cwd=project_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        tail = result.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        raise RuntimeError(f"Could not import {STARTUP_MODULE}: {tail[0]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='runs to take the fastest of')
+    parser.add_argument('--budget', type=float, default=config.STARTUP_IMPORT_BUDGET_MS, help='budget in ms')
+    parser.add_argument('--top', type=int, default=15, help='slowest modules to list')
+    args = parser.parse_args()
+
+    try:
+        runs = [measure() for _ in range(max(1, args.repeat))]
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    def startup_us(run):
+        # Top-level entries of the app (software, software.app, ..., main_window), not interpreter startup
+        return sum(cumulative_us for name, _, cumulative_us, depth in run
+                   if depth == 0 and name.split('.')[0] == STARTUP_MODULE.split('.')[0])
+
+    modules = min(runs, key=startup_us)
+    total_ms = startup_us(modules) / 1000
+
+    print(f"{'module':<48}{'self ms':>10}{'cumul. ms':>11}")
+    for name, self_us, cumulative_us, _ in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{name:<48}{self_us / 1000:>10.1f}{cumulative_us / 1000:>11.1f}")
+
+    failures = []
+    if total_ms > args.budget:
+        failures.append(f"import of {STARTUP_MODULE} took {total_ms:.0f} ms (budget {args.budget:.0f} ms)")
+    imported = {name for name, _, _, _ in modules}
+    for deferred in DEFERRED_MODULES:
+        if deferred in imported:
+            failures.append(f"{deferred} is imported at startup; it should load on first use")
+
+    print(f"\n{len(modules)} modules, {total_ms:.0f} ms (budget {args.budget:.0f} ms, fastest of {len(runs)})")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())